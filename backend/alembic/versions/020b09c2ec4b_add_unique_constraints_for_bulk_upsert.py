@@ -0,0 +1,64 @@
+"""add_unique_constraints_for_bulk_upsert
+
+Revision ID: 020b09c2ec4b
+Revises: 70379e507ece
+Create Date: 2026-10-18 10:00:00.000000
+
+"""
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision: str = '020b09c2ec4b'
+down_revision: Union[str, None] = '70379e507ece'
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+# (表名, 约束名, 唯一键列)
+UNIQUE_KEYS = [
+    ('stock_fund_flow', 'uq_stock_fund_flow_date_stock', ['date', 'stock_code']),
+    ('industry_fund_flow', 'uq_industry_fund_flow_date_industry', ['date', 'industry']),
+    ('concept_fund_flow', 'uq_concept_fund_flow_date_concept', ['date', 'concept']),
+    ('zt_pool', 'uq_zt_pool_date_stock', ['date', 'stock_code']),
+    ('zt_pool_down', 'uq_zt_pool_down_date_stock', ['date', 'stock_code']),
+    ('index_history', 'uq_index_history_date_code', ['date', 'index_code']),
+    ('lhb_detail', 'uq_lhb_detail_date_stock', ['date', 'stock_code']),
+    ('lhb_institution', 'uq_lhb_institution_detail_name_flag', ['lhb_detail_id', 'institution_name', 'flag']),
+]
+
+
+def _delete_duplicates(table: str, columns: list) -> None:
+    """删除重复记录，每个唯一键只保留 id 最大的一条"""
+    join_cond = " AND ".join(f"a.{c} = b.{c}" for c in columns)
+    op.execute(f"DELETE FROM {table} a USING {table} b WHERE {join_cond} AND a.id < b.id")
+
+
+def upgrade() -> None:
+    # 批量写入（INSERT ... ON CONFLICT DO UPDATE）依赖唯一约束
+    # 添加约束前先清理历史重复数据
+
+    # lhb_detail 去重前，先把重复记录下的机构明细挂到保留的记录上
+    op.execute("""
+        UPDATE lhb_institution i
+        SET lhb_detail_id = keep.keep_id
+        FROM (
+            SELECT d.id AS dup_id, MAX(k.id) AS keep_id
+            FROM lhb_detail d
+            JOIN lhb_detail k ON k.date = d.date AND k.stock_code = d.stock_code
+            GROUP BY d.id
+        ) keep
+        WHERE i.lhb_detail_id = keep.dup_id AND keep.dup_id <> keep.keep_id
+    """)
+
+    for table, name, columns in UNIQUE_KEYS:
+        _delete_duplicates(table, columns)
+        op.create_unique_constraint(name, table, columns)
+
+
+def downgrade() -> None:
+    for table, name, _ in reversed(UNIQUE_KEYS):
+        op.drop_constraint(name, table, type_='unique')
@@ -0,0 +1,32 @@
+"""add_unique_constraint_to_stock_history
+
+Revision ID: 3c5e1f0a9b27
+Revises: 020b09c2ec4b
+Create Date: 2026-10-18 12:00:00.000000
+
+"""
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision: str = '3c5e1f0a9b27'
+down_revision: Union[str, None] = '020b09c2ec4b'
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def upgrade() -> None:
+    # 增量同步按 (date, stock_code) 批量 upsert，先清理重复数据，每组只保留 id 最大的一条
+    op.execute("""
+        DELETE FROM stock_history a
+        USING stock_history b
+        WHERE a.date = b.date AND a.stock_code = b.stock_code AND a.id < b.id
+    """)
+    op.create_unique_constraint('uq_stock_history_date_stock', 'stock_history', ['date', 'stock_code'])
+
+
+def downgrade() -> None:
+    op.drop_constraint('uq_stock_history_date_stock', 'stock_history', type_='unique')
@@ -0,0 +1,36 @@
+"""add_trade_date_table
+
+Revision ID: 7d2a4b6c8e10
+Revises: 3c5e1f0a9b27
+Create Date: 2026-10-18 14:00:00.000000
+
+"""
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision: str = '7d2a4b6c8e10'
+down_revision: Union[str, None] = '3c5e1f0a9b27'
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def upgrade() -> None:
+    op.create_table(
+        'trade_date',
+        sa.Column('id', sa.Integer(), nullable=False),
+        sa.Column('created_at', sa.DateTime(), nullable=False),
+        sa.Column('date', sa.Date(), nullable=False, comment='交易日'),
+        sa.PrimaryKeyConstraint('id'),
+        sa.UniqueConstraint('date', name='uq_trade_date_date'),
+        comment='交易所交易日表',
+    )
+    op.create_index(op.f('ix_trade_date_id'), 'trade_date', ['id'], unique=False)
+
+
+def downgrade() -> None:
+    op.drop_index(op.f('ix_trade_date_id'), table_name='trade_date')
+    op.drop_table('trade_date')
@@ -0,0 +1,57 @@
+"""add_fund_flow_rollup_tables
+
+Revision ID: 9b3e5d7f1a24
+Revises: 7d2a4b6c8e10
+Create Date: 2026-10-18 16:00:00.000000
+
+"""
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision: str = '9b3e5d7f1a24'
+down_revision: Union[str, None] = '7d2a4b6c8e10'
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def _create_rollup_table(table: str, key: str, key_length: int, comment: str) -> None:
+    op.create_table(
+        table,
+        sa.Column('id', sa.Integer(), nullable=False),
+        sa.Column('created_at', sa.DateTime(), nullable=False),
+        sa.Column('date', sa.Date(), nullable=False),
+        sa.Column(key, sa.String(length=key_length), nullable=False),
+        sa.Column('net_amount', sa.Numeric(precision=16, scale=2), nullable=True),
+        sa.Column('cum_net_amount', sa.Numeric(precision=20, scale=2), nullable=False),
+        sa.Column('net_amount_5d', sa.Numeric(precision=18, scale=2), nullable=True),
+        sa.Column('net_amount_10d', sa.Numeric(precision=18, scale=2), nullable=True),
+        sa.Column('net_amount_20d', sa.Numeric(precision=18, scale=2), nullable=True),
+        sa.Column('net_amount_rank', sa.Integer(), nullable=True),
+        sa.PrimaryKeyConstraint('id'),
+        sa.UniqueConstraint('date', key, name=f'uq_{table}_date_{key}'),
+        comment=comment,
+    )
+    op.create_index(op.f(f'ix_{table}_id'), table, ['id'], unique=False)
+    op.create_index(op.f(f'ix_{table}_date'), table, ['date'], unique=False)
+    op.create_index(f'idx_{table}_{key}_date', table, [key, 'date'], unique=False)
+
+
+def _drop_rollup_table(table: str, key: str) -> None:
+    op.drop_index(f'idx_{table}_{key}_date', table_name=table)
+    op.drop_index(op.f(f'ix_{table}_date'), table_name=table)
+    op.drop_index(op.f(f'ix_{table}_id'), table_name=table)
+    op.drop_table(table)
+
+
+def upgrade() -> None:
+    _create_rollup_table('concept_fund_flow_rollup', 'concept', 200, '概念资金流日汇总表')
+    _create_rollup_table('industry_fund_flow_rollup', 'industry', 100, '行业资金流日汇总表')
+
+
+def downgrade() -> None:
+    _drop_rollup_table('industry_fund_flow_rollup', 'industry')
+    _drop_rollup_table('concept_fund_flow_rollup', 'concept')
@@ -0,0 +1,72 @@
+"""add_backfill_tables
+
+Revision ID: a4c6e8f0b2d3
+Revises: 9b3e5d7f1a24
+Create Date: 2026-10-18 18:00:00.000000
+
+"""
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision: str = 'a4c6e8f0b2d3'
+down_revision: Union[str, None] = '9b3e5d7f1a24'
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def upgrade() -> None:
+    op.create_table(
+        'backfill_job',
+        sa.Column('id', sa.Integer(), nullable=False),
+        sa.Column('created_at', sa.DateTime(), nullable=False),
+        sa.Column('task_types', sa.String(length=500), nullable=False),
+        sa.Column('start_date', sa.Date(), nullable=False),
+        sa.Column('end_date', sa.Date(), nullable=False),
+        sa.Column('status', sa.String(length=20), nullable=False),
+        sa.Column('max_workers', sa.Integer(), nullable=True),
+        sa.Column('units_per_minute', sa.Float(), nullable=True),
+        sa.Column('run_started_at', sa.DateTime(), nullable=True),
+        sa.Column('heartbeat_at', sa.DateTime(), nullable=True),
+        sa.Column('finished_at', sa.DateTime(), nullable=True),
+        sa.Column('triggered_by', sa.String(length=20), nullable=False),
+        sa.Column('error_message', sa.Text(), nullable=True),
+        sa.PrimaryKeyConstraint('id'),
+        comment='历史数据回填作业表',
+    )
+    op.create_index(op.f('ix_backfill_job_id'), 'backfill_job', ['id'], unique=False)
+    op.create_index(op.f('ix_backfill_job_status'), 'backfill_job', ['status'], unique=False)
+
+    op.create_table(
+        'backfill_unit',
+        sa.Column('id', sa.Integer(), nullable=False),
+        sa.Column('created_at', sa.DateTime(), nullable=False),
+        sa.Column('job_id', sa.Integer(), nullable=False),
+        sa.Column('task_type', sa.String(length=50), nullable=False),
+        sa.Column('target_date', sa.Date(), nullable=False),
+        sa.Column('status', sa.String(length=20), nullable=False),
+        sa.Column('attempts', sa.Integer(), nullable=False),
+        sa.Column('rows', sa.Integer(), nullable=False),
+        sa.Column('duration', sa.Float(), nullable=True),
+        sa.Column('started_at', sa.DateTime(), nullable=True),
+        sa.Column('finished_at', sa.DateTime(), nullable=True),
+        sa.Column('message', sa.Text(), nullable=True),
+        sa.ForeignKeyConstraint(['job_id'], ['backfill_job.id'], ondelete='CASCADE'),
+        sa.PrimaryKeyConstraint('id'),
+        sa.UniqueConstraint('job_id', 'task_type', 'target_date', name='uq_backfill_unit_job_task_date'),
+        comment='历史数据回填工作单元表',
+    )
+    op.create_index(op.f('ix_backfill_unit_id'), 'backfill_unit', ['id'], unique=False)
+    op.create_index('idx_backfill_unit_job_status', 'backfill_unit', ['job_id', 'status'], unique=False)
+
+
+def downgrade() -> None:
+    op.drop_index('idx_backfill_unit_job_status', table_name='backfill_unit')
+    op.drop_index(op.f('ix_backfill_unit_id'), table_name='backfill_unit')
+    op.drop_table('backfill_unit')
+    op.drop_index(op.f('ix_backfill_job_status'), table_name='backfill_job')
+    op.drop_index(op.f('ix_backfill_job_id'), table_name='backfill_job')
+    op.drop_table('backfill_job')
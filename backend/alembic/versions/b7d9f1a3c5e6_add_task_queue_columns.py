@@ -0,0 +1,55 @@
+"""add_task_queue_columns
+
+Revision ID: b7d9f1a3c5e6
+Revises: a4c6e8f0b2d3
+Create Date: 2026-10-18 20:00:00.000000
+
+"""
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision: str = 'b7d9f1a3c5e6'
+down_revision: Union[str, None] = 'a4c6e8f0b2d3'
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def upgrade() -> None:
+    op.add_column('task_execution', sa.Column('job_payload', sa.JSON(), nullable=True, comment='队列任务内容：{kind, kwargs}'))
+    op.add_column('task_execution', sa.Column('dedupe_key', sa.String(length=200), nullable=True, comment='去重键，同一键同时只能有一个等待/执行中的任务'))
+    op.add_column('task_execution', sa.Column('worker_id', sa.String(length=100), nullable=True, comment='领取任务的工作进程'))
+    op.add_column('task_execution', sa.Column('lease_expires_at', sa.DateTime(), nullable=True, comment='租约到期时间，过期未续约的任务可被重新领取'))
+    op.add_column('task_execution', sa.Column('heartbeat_at', sa.DateTime(), nullable=True, comment='最近一次心跳时间'))
+    op.add_column('task_execution', sa.Column('attempts', sa.Integer(), nullable=False, server_default='0', comment='已领取次数'))
+
+    # 同一去重键同时只允许一个等待/执行中的任务（多个 API 副本同时入队时只有一个成功）
+    op.create_index(
+        'uq_task_execution_active_dedupe',
+        'task_execution',
+        ['dedupe_key'],
+        unique=True,
+        postgresql_where=sa.text("status IN ('pending', 'running') AND dedupe_key IS NOT NULL"),
+    )
+    # 工作进程领取任务：只扫描队列记录
+    op.create_index(
+        'idx_task_execution_queue',
+        'task_execution',
+        ['status', 'id'],
+        unique=False,
+        postgresql_where=sa.text("job_payload IS NOT NULL"),
+    )
+
+
+def downgrade() -> None:
+    op.drop_index('idx_task_execution_queue', table_name='task_execution')
+    op.drop_index('uq_task_execution_active_dedupe', table_name='task_execution')
+    op.drop_column('task_execution', 'attempts')
+    op.drop_column('task_execution', 'heartbeat_at')
+    op.drop_column('task_execution', 'lease_expires_at')
+    op.drop_column('task_execution', 'worker_id')
+    op.drop_column('task_execution', 'dedupe_key')
+    op.drop_column('task_execution', 'job_payload')
@@ -0,0 +1,55 @@
+"""add_keyset_pagination_indexes
+
+Revision ID: c8e0a2b4d6f7
+Revises: b7d9f1a3c5e6
+Create Date: 2026-10-18 22:00:00.000000
+
+列表接口游标分页的复合索引：与默认排序 (排序键 DESC NULLS LAST, id DESC) 完全一致，
+数据库可按索引顺序从游标位置直接读取一页，不需要排序整个结果集。
+NULLS LAST 表达式只有 PostgreSQL 支持，因此只在迁移中创建，不在模型中声明。
+"""
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision: str = 'c8e0a2b4d6f7'
+down_revision: Union[str, None] = 'b7d9f1a3c5e6'
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+# 索引名 -> (表名, 索引列)
+KEYSET_INDEXES = {
+    'idx_lhb_detail_date_net_buy_id': (
+        'lhb_detail', ['date', sa.text('net_buy_amount DESC NULLS LAST'), sa.text('id DESC')]
+    ),
+    'idx_active_branch_date_net_id': (
+        'active_branch', ['date', sa.text('net_amount DESC NULLS LAST'), sa.text('id DESC')]
+    ),
+    'idx_stock_fund_flow_date_main_net_id': (
+        'stock_fund_flow', ['date', sa.text('main_net_inflow DESC NULLS LAST'), sa.text('id DESC')]
+    ),
+    'idx_limit_up_board_date_board_stock_id': (
+        'limit_up_board', [sa.text('date DESC'), 'board_name', 'stock_code', 'id']
+    ),
+    'idx_task_execution_start_time_id': (
+        'task_execution', [sa.text('start_time DESC'), sa.text('id DESC')]
+    ),
+}
+
+
+def upgrade() -> None:
+    if op.get_bind().dialect.name != 'postgresql':
+        return
+    for name, (table, columns) in KEYSET_INDEXES.items():
+        op.create_index(name, table, columns, unique=False)
+
+
+def downgrade() -> None:
+    if op.get_bind().dialect.name != 'postgresql':
+        return
+    for name, (table, _) in KEYSET_INDEXES.items():
+        op.drop_index(name, table_name=table)
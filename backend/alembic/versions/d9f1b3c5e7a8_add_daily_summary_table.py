@@ -0,0 +1,48 @@
+"""add_daily_summary_table
+
+Revision ID: d9f1b3c5e7a8
+Revises: c8e0a2b4d6f7
+Create Date: 2026-10-18 23:00:00.000000
+
+仪表盘每日概览：每个交易日同步完成后汇总一行，仪表盘按日期一次读取。
+"""
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision: str = 'd9f1b3c5e7a8'
+down_revision: Union[str, None] = 'c8e0a2b4d6f7'
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def upgrade() -> None:
+    op.create_table(
+        'daily_summary',
+        sa.Column('id', sa.Integer(), nullable=False),
+        sa.Column('created_at', sa.DateTime(), nullable=False),
+        sa.Column('date', sa.Date(), nullable=False),
+        sa.Column('indices', sa.JSON(), nullable=True, comment='指数收盘：[{index_code, index_name, close_price, change_percent, ...}]'),
+        sa.Column('zt_count', sa.Integer(), nullable=False, comment='涨停家数'),
+        sa.Column('zt_down_count', sa.Integer(), nullable=False, comment='跌停家数'),
+        sa.Column('sector_rise_count', sa.Integer(), nullable=False, comment='上涨板块数'),
+        sa.Column('sector_fall_count', sa.Integer(), nullable=False, comment='下跌板块数'),
+        sa.Column('sector_total_count', sa.Integer(), nullable=False, comment='板块总数'),
+        sa.Column('top_concepts', sa.JSON(), nullable=True, comment='概念净流入前列：[{concept, net_amount, index_change_percent}]'),
+        sa.Column('lhb_count', sa.Integer(), nullable=False, comment='龙虎榜上榜股票数'),
+        sa.Column('lhb_net_buy_amount', sa.Numeric(precision=20, scale=2), nullable=True, comment='龙虎榜合计净买额'),
+        sa.Column('lhb_top', sa.JSON(), nullable=True, comment='龙虎榜净买额前列：[{stock_code, stock_name, net_buy_amount, change_percent}]'),
+        sa.PrimaryKeyConstraint('id'),
+        comment='每日市场概览表',
+    )
+    op.create_index(op.f('ix_daily_summary_id'), 'daily_summary', ['id'], unique=False)
+    op.create_index(op.f('ix_daily_summary_date'), 'daily_summary', ['date'], unique=True)
+
+
+def downgrade() -> None:
+    op.drop_index(op.f('ix_daily_summary_date'), table_name='daily_summary')
+    op.drop_index(op.f('ix_daily_summary_id'), table_name='daily_summary')
+    op.drop_table('daily_summary')
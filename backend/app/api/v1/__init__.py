@@ -30,4 +30,5 @@ safe_include_router("trading_calendar", "router", "/trading-calendar", ["交易
 safe_include_router("task", "router", "/tasks", ["任务管理"])
 safe_include_router("stock_concept", "router", "/stock-concepts", ["股票概念板块"])
 safe_include_router("limit_up_board", "router", "/limit-up-board", ["涨停板分析"])
+safe_include_router("dashboard", "router", "/dashboard", ["仪表盘"])
 
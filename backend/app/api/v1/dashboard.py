@@ -0,0 +1,40 @@
+"""
+仪表盘API路由
+"""
+from fastapi import APIRouter, Depends, HTTPException
+from sqlalchemy.orm import Session
+
+from app.database.session import get_db
+from app.services.dashboard_service import DashboardService
+from app.schemas.dashboard import DashboardSnapshotResponse
+from app.utils.date_utils import parse_date
+from app.utils.query_cache import cached_query, is_closed_date
+
+router = APIRouter()
+
+
+@router.get("/{date}", response_model=DashboardSnapshotResponse)
+def get_dashboard_snapshot(
+    date: str,
+    db: Session = Depends(get_db)
+):
+    """
+    获取某日仪表盘概览：指数收盘、涨跌停家数、板块涨跌家数、概念净流入前列、龙虎榜概况
+
+    每日同步完成后预先计算并保存，已收盘日期的结果常驻查询缓存；
+    尚无概览行的日期现场汇总返回（只读，不写入）。
+    """
+    target_date = parse_date(date)
+    if not target_date:
+        raise HTTPException(status_code=400, detail="日期格式错误")
+
+    snapshot = cached_query(
+        "dashboard_snapshot",
+        {"date": target_date},
+        lambda: DashboardService.get_snapshot(db, target_date),
+        tags=[("daily_summary", target_date)],
+        closed=is_closed_date(target_date),
+    )
+    if snapshot is None:
+        raise HTTPException(status_code=404, detail=f"{target_date} 暂无数据")
+    return snapshot
@@ -7,11 +7,18 @@ from typing import Optional
 from datetime import date
 import math
 
-from app.database.session import get_db
+from app.database.session import get_db, get_read_db
 from app.services.fund_flow_service import FundFlowService
+from app.services.fund_flow_rollup_service import FundFlowRollupService
 from app.utils.date_utils import parse_date, get_trading_date, get_trading_dates_before
+from app.utils.query_cache import cached_query, is_closed_date
+from app.utils.count_strategy import COUNT_QUERY_DESCRIPTION, COUNT_QUERY_PATTERN
+from app.utils.keyset import CURSOR_QUERY_DESCRIPTION, InvalidCursorError
+from app.utils.export import EXPORT_FORMAT_DESCRIPTION, EXPORT_FORMAT_PATTERN, export_response
 from app.config import settings
-from app.schemas.fund_flow import FundFlowFilterRequest, ConceptFundFlowFilterRequest
+from app.schemas.fund_flow import (
+    FundFlowFilterRequest, FundFlowFilterResponse, ConceptFundFlowFilterRequest, StockFundFlowItem,
+)
 
 router = APIRouter()
 
@@ -32,6 +39,8 @@ def get_fund_flow_list(
     page_size: int = Query(50, ge=1, le=settings.MAX_PAGE_SIZE, description="每页数量，默认50"),
     sort_by: Optional[str] = Query("main_net_inflow", description="排序字段，如 main_net_inflow/main_inflow/main_outflow/turnover_rate/change_percent"),
     order: str = Query("desc", pattern="^(asc|desc)$", description="排序方向"),
+    cursor: Optional[str] = Query(None, description=CURSOR_QUERY_DESCRIPTION),
+    count: Optional[str] = Query(None, pattern=COUNT_QUERY_PATTERN, description=COUNT_QUERY_DESCRIPTION),
     db: Session = Depends(get_db)
 ):
     """
@@ -88,42 +97,43 @@ def get_fund_flow_list(
         concept_names_list = [x.strip() for x in concept_names.split(',') if x.strip()]
     
     # 根据查询模式调用不同的服务方法
+    filters = dict(
+        stock_code=stock_code,
+        stock_name=stock_name,
+        concept_ids=concept_ids_list,
+        concept_names=concept_names_list,
+        consecutive_days=consecutive_days,
+        min_net_inflow=min_net_inflow,
+        is_limit_up=is_limit_up,
+        page_size=page_size,
+        sort_by=sort_by,
+        order=order,
+    )
+    next_cursor = None
     try:
-        if target_date is not None:
+        if cursor is not None:
+            # 游标分页：不查询总数
+            if target_date is not None:
+                keyset = FundFlowService.get_fund_flow_list_by_cursor(
+                    db=db, target_date=target_date, cursor=cursor, **filters
+                )
+            else:
+                keyset = FundFlowService.get_fund_flow_list_by_date_range_cursor(
+                    db=db, start_date=start, end_date=end, cursor=cursor, **filters
+                )
+            items, total, next_cursor = keyset.items, None, keyset.next_cursor
+        elif target_date is not None:
             # 单日期查询
             items, total = FundFlowService.get_fund_flow_list(
-                db=db,
-                target_date=target_date,
-                stock_code=stock_code,
-                stock_name=stock_name,
-                concept_ids=concept_ids_list,
-                concept_names=concept_names_list,
-                consecutive_days=consecutive_days,
-                min_net_inflow=min_net_inflow,
-                is_limit_up=is_limit_up,
-                page=page,
-                page_size=page_size,
-                sort_by=sort_by,
-                order=order,
+                db=db, target_date=target_date, page=page, count_mode=count, **filters
             )
         else:
             # 日期范围查询
             items, total = FundFlowService.get_fund_flow_list_by_date_range(
-                db=db,
-                start_date=start,
-                end_date=end,
-                stock_code=stock_code,
-                stock_name=stock_name,
-                concept_ids=concept_ids_list,
-                concept_names=concept_names_list,
-                consecutive_days=consecutive_days,
-                min_net_inflow=min_net_inflow,
-                is_limit_up=is_limit_up,
-                page=page,
-                page_size=page_size,
-                sort_by=sort_by,
-                order=order,
+                db=db, start_date=start, end_date=end, page=page, **filters
             )
+    except InvalidCursorError:
+        raise
     except Exception as e:
         import traceback
         error_details = traceback.format_exc()
@@ -153,10 +163,34 @@ def get_fund_flow_list(
         "total": total,
         "page": page,
         "page_size": page_size,
-        "total_pages": math.ceil(total / page_size)
+        "total_pages": math.ceil(total / page_size) if total is not None else None,
+        "next_cursor": next_cursor,
     }
 
 
+@router.get("/history/export")
+def export_fund_flow_history(
+    start_date: str = Query(..., description="开始日期"),
+    end_date: str = Query(..., description="结束日期"),
+    stock_code: Optional[str] = Query(None, description="股票代码，不传则导出全市场"),
+    format: str = Query("csv", pattern=EXPORT_FORMAT_PATTERN, description=EXPORT_FORMAT_DESCRIPTION),
+    db: Session = Depends(get_db)
+):
+    """流式导出资金流历史（按日期、股票代码排序），全市场多月数据也不会一次性载入内存"""
+    start = parse_date(start_date)
+    end = parse_date(end_date)
+    if not start or not end:
+        raise HTTPException(status_code=400, detail="日期格式错误")
+    
+    rows = FundFlowService.iter_fund_flow_history(
+        db, stock_code, start, end, batch_size=settings.EXPORT_BATCH_SIZE
+    )
+    return export_response(
+        StockFundFlowItem, rows, format,
+        f"fund_flow_{stock_code or 'all'}_{start:%Y%m%d}_{end:%Y%m%d}",
+    )
+
+
 @router.get("/{stock_code}/history")
 def get_fund_flow_history(
     stock_code: str,
@@ -184,7 +218,7 @@ def get_concept_fund_flow(
     limit: int = Query(50, ge=1, le=200, description="返回条数，默认50，最大200（仅单日期查询时有效）"),
     page: int = Query(1, ge=1, description="页码（日期范围查询时有效）"),
     page_size: int = Query(50, ge=1, le=settings.MAX_PAGE_SIZE, description="每页数量（日期范围查询时有效）"),
-    sort_by: Optional[str] = Query("net_amount", description="排序字段（日期范围查询时有效）"),
+    sort_by: Optional[str] = Query("net_amount", description="排序字段（日期范围查询时有效），可选 net_amount/inflow/outflow/index_change_percent/date/stock_count/net_amount_5d/net_amount_10d/net_amount_20d/cum_net_amount/net_amount_rank"),
     order: str = Query("desc", pattern="^(asc|desc)$", description="排序方向（日期范围查询时有效）"),
     db: Session = Depends(get_db),
 ):
@@ -206,35 +240,39 @@ def get_concept_fund_flow(
         if start > end:
             raise HTTPException(status_code=400, detail="开始日期不能大于结束日期")
         
-        # 使用日期范围查询
-        concepts_list = [concept] if concept else None
-        items, total = FundFlowService.get_concept_fund_flow_by_date_range(
-            db=db,
-            start_date=start,
-            end_date=end,
-            concepts=concepts_list,
-            sort_by=sort_by,
-            order=order,
-            page=page,
-            page_size=page_size
-        )
-        
-        # 转换为字典列表
-        items_dict = []
-        for item in items:
-            item_dict = {
-                column.name: getattr(item, column.name)
-                for column in item.__table__.columns
+        def load_range():
+            # 使用日期范围查询
+            concepts_list = [concept] if concept else None
+            items, total = FundFlowService.get_concept_fund_flow_by_date_range(
+                db=db,
+                start_date=start,
+                end_date=end,
+                concepts=concepts_list,
+                sort_by=sort_by,
+                order=order,
+                page=page,
+                page_size=page_size
+            )
+            
+            # 每行已附带日汇总字段和该概念在范围内的净额合计
+            return {
+                "items": items,
+                "total": total,
+                "page": page,
+                "page_size": page_size,
+                "total_pages": math.ceil(total / page_size) if page_size > 0 else 0
             }
-            items_dict.append(item_dict)
         
-        return {
-            "items": items_dict,
-            "total": total,
-            "page": page,
-            "page_size": page_size,
-            "total_pages": math.ceil(total / page_size) if page_size > 0 else 0
-        }
+        return cached_query(
+            "fund_flow.concept_range",
+            {
+                "start_date": start, "end_date": end, "concept": concept,
+                "page": page, "page_size": page_size, "sort_by": sort_by, "order": order,
+            },
+            load_range,
+            tags=[("concept_fund_flow", None)],
+            closed=is_closed_date(end),
+        )
     else:
         # 单日期查询
         if date:
@@ -247,30 +285,42 @@ def get_concept_fund_flow(
             if not target_date:
                 raise HTTPException(status_code=404, detail="未找到可用的交易日期")
         
-        items = FundFlowService.get_concept_fund_flow_db(db, target_date, limit=limit)
-        
-        # 如果指定日期没有数据，尝试查询最近有数据的日期（仅当未指定date时）
-        if not items and not date:
-            from sqlalchemy import func
-            from app.models.fund_flow import ConceptFundFlow
-            latest_date_with_data = db.query(func.max(ConceptFundFlow.date)).scalar()
-            if latest_date_with_data and latest_date_with_data != target_date:
-                items = FundFlowService.get_concept_fund_flow_db(db, latest_date_with_data, limit=limit)
-        
-        # 如果提供了概念名称，进行过滤
-        if concept:
-            items = [item for item in items if concept.lower() in (item.concept or '').lower()]
-        
-        # 转换为字典列表
-        items_dict = []
-        for item in items:
-            item_dict = {
-                column.name: getattr(item, column.name)
-                for column in item.__table__.columns
-            }
-            items_dict.append(item_dict)
+        def load_single():
+            items = FundFlowService.get_concept_fund_flow_db(db, target_date, limit=limit)
+            
+            # 如果指定日期没有数据，尝试查询最近有数据的日期（仅当未指定date时）
+            if not items and not date:
+                from sqlalchemy import func
+                from app.models.fund_flow import ConceptFundFlow
+                latest_date_with_data = db.query(func.max(ConceptFundFlow.date)).scalar()
+                if latest_date_with_data and latest_date_with_data != target_date:
+                    items = FundFlowService.get_concept_fund_flow_db(db, latest_date_with_data, limit=limit)
+            
+            # 如果提供了概念名称，进行过滤
+            if concept:
+                items = [item for item in items if concept.lower() in (item.concept or '').lower()]
+            FundFlowRollupService.attach_rollups(db, "concept", items)
+            
+            # 转换为字典列表
+            items_dict = []
+            for item in items:
+                item_dict = {
+                    column.name: getattr(item, column.name)
+                    for column in item.__table__.columns
+                }
+                item_dict.update(FundFlowRollupService.rollup_fields(item._rollup))
+                items_dict.append(item_dict)
+            
+            return items_dict
         
-        return items_dict
+        # 未指定日期时可能回退到最近有数据的日期，按"最新"数据缓存
+        return cached_query(
+            "fund_flow.concept",
+            {"date": target_date if date else None, "concept": concept, "limit": limit},
+            load_single,
+            tags=[("concept_fund_flow", target_date if date else None)],
+            closed=bool(date) and is_closed_date(target_date),
+        )
 
 
 @router.get("/industry")
@@ -283,8 +333,25 @@ def get_industry_fund_flow(
     target_date = parse_date(date)
     if not target_date:
         raise HTTPException(status_code=400, detail="日期格式错误")
-    items = FundFlowService.get_industry_fund_flow(db, target_date, limit=limit)
-    return items
+    
+    def load():
+        items = FundFlowService.get_industry_fund_flow(db, target_date, limit=limit)
+        FundFlowRollupService.attach_rollups(db, "industry", items)
+        return [
+            {
+                **{column.name: getattr(item, column.name) for column in item.__table__.columns},
+                **FundFlowRollupService.rollup_fields(item._rollup),
+            }
+            for item in items
+        ]
+    
+    return cached_query(
+        "fund_flow.industry",
+        {"date": target_date, "limit": limit},
+        load,
+        tags=[("industry_fund_flow", target_date)],
+        closed=is_closed_date(target_date),
+    )
 
 
 @router.post("/filter")
@@ -328,6 +395,7 @@ def filter_fund_flow(
     - conditions: 筛选条件列表，多个条件之间是AND关系
     - 每个条件包含日期范围和主力净流入区间
     - 主力净流入单位：元（如 100000000 表示1亿，10000000 表示1000万）
+    - consecutive_days/min_net_inflow: 可选，连续N日净流入>M（截止到条件中最晚的结束日期）
     """
     try:
         items, total = FundFlowService.filter_fund_flow_by_conditions(
@@ -335,6 +403,8 @@ def filter_fund_flow(
             conditions=request.conditions,
             concept_ids=request.concept_ids,
             concept_names=request.concept_names,
+            consecutive_days=request.consecutive_days,
+            min_net_inflow=request.min_net_inflow,
             page=request.page,
             page_size=request.page_size,
             sort_by=request.sort_by,
@@ -352,6 +422,32 @@ def filter_fund_flow(
         raise HTTPException(status_code=500, detail=f"筛选失败: {str(e)}")
 
 
+@router.post("/filter/export")
+def export_filter_fund_flow(
+    request: FundFlowFilterRequest,
+    format: str = Query("csv", pattern=EXPORT_FORMAT_PATTERN, description=EXPORT_FORMAT_DESCRIPTION),
+    db: Session = Depends(get_read_db)
+):
+    """
+    流式导出多日期范围条件筛选结果（全部结果，忽略 page/page_size）
+    
+    请求体与 POST /fund-flow/filter 相同，每行字段与其 items 相同；
+    CSV / Parquet 中 match_conditions、concepts 写为 JSON 字符串。
+    """
+    rows = FundFlowService.iter_filter_results(
+        db=db,
+        conditions=request.conditions,
+        concept_ids=request.concept_ids,
+        concept_names=request.concept_names,
+        consecutive_days=request.consecutive_days,
+        min_net_inflow=request.min_net_inflow,
+        sort_by=request.sort_by,
+        order=request.order,
+        batch_size=settings.EXPORT_BATCH_SIZE,
+    )
+    return export_response(FundFlowFilterResponse, rows, format, "fund_flow_filter")
+
+
 @router.post("/concept/filter")
 def filter_concept_fund_flow(
     request: ConceptFundFlowFilterRequest,
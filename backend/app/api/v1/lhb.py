@@ -38,6 +38,10 @@ from app.schemas.lhb import (
     LhbStockStatisticsItem,
 )
 from app.utils.date_utils import parse_date
+from app.utils.query_cache import cached_query, is_closed_date
+from app.utils.count_strategy import COUNT_QUERY_DESCRIPTION, COUNT_QUERY_PATTERN
+from app.utils.keyset import CURSOR_QUERY_DESCRIPTION, InvalidCursorError
+from app.utils.export import EXPORT_FORMAT_DESCRIPTION, EXPORT_FORMAT_PATTERN, export_response
 from app.config import settings
 import logging
 
@@ -55,6 +59,8 @@ def get_lhb_list(
     page_size: int = Query(settings.DEFAULT_PAGE_SIZE, ge=1, le=settings.MAX_PAGE_SIZE, description="每页数量"),
     sort_by: Optional[str] = Query(None, description="排序字段"),
     order: str = Query("desc", description="排序方向"),
+    cursor: Optional[str] = Query(None, description=CURSOR_QUERY_DESCRIPTION),
+    count: Optional[str] = Query(None, pattern=COUNT_QUERY_PATTERN, description=COUNT_QUERY_DESCRIPTION),
     db: Session = Depends(get_db)
 ):
     """获取龙虎榜列表"""
@@ -73,16 +79,31 @@ def get_lhb_list(
     if not valid_order or valid_order == "undefined" or valid_order not in ("asc", "desc"):
         valid_order = "desc"
     
-    items, total = LhbService.get_lhb_list(
-        db=db,
-        target_date=target_date,
-        stock_code=stock_code,
-        stock_name=stock_name,
-        page=page,
-        page_size=page_size,
-        sort_by=sort_by,
-        order=valid_order
-    )
+    next_cursor = None
+    if cursor is not None:
+        keyset = LhbService.get_lhb_list_by_cursor(
+            db=db,
+            target_date=target_date,
+            stock_code=stock_code,
+            stock_name=stock_name,
+            page_size=page_size,
+            sort_by=sort_by,
+            order=valid_order,
+            cursor=cursor,
+        )
+        items, total, next_cursor = keyset.items, None, keyset.next_cursor
+    else:
+        items, total = LhbService.get_lhb_list(
+            db=db,
+            target_date=target_date,
+            stock_code=stock_code,
+            stock_name=stock_name,
+            page=page,
+            page_size=page_size,
+            sort_by=sort_by,
+            order=valid_order,
+            count_mode=count
+        )
     
     logger.debug(f"查询结果: {len(items)} 条, total: {total}")
     if len(items) == 0:
@@ -213,14 +234,15 @@ def get_lhb_list(
             for item in items
         ]
     
-    total_pages = math.ceil(total / page_size) if total > 0 else 0
+    total_pages = None if total is None else (math.ceil(total / page_size) if total > 0 else 0)
     
     response = LhbListResponse(
         items=items_with_institutions,
         total=total,
         page=page,
         page_size=page_size,
-        total_pages=total_pages
+        total_pages=total_pages,
+        next_cursor=next_cursor,
     )
     
     logger.debug(f"返回响应: items={len(response.items)}, total={response.total}")
@@ -259,17 +281,26 @@ def get_lhb_stocks_statistics(
         if not valid_order or valid_order == "undefined" or valid_order not in ("asc", "desc"):
             valid_order = "desc"
         
-        # 调用服务方法
-        statistics_list, total = LhbService.get_lhb_stocks_statistics(
-            db=db,
-            start_date=start,
-            end_date=end,
-            stock_code=stock_code,
-            stock_name=stock_name,
-            page=page,
-            page_size=page_size,
-            sort_by=sort_by,
-            order=valid_order
+        # 调用服务方法（按日期范围缓存，该范围内任一日期写入龙虎榜数据后失效）
+        statistics_list, total = cached_query(
+            "lhb.stocks_statistics",
+            {
+                "start_date": start, "end_date": end, "stock_code": stock_code, "stock_name": stock_name,
+                "page": page, "page_size": page_size, "sort_by": sort_by, "order": valid_order,
+            },
+            lambda: LhbService.get_lhb_stocks_statistics(
+                db=db,
+                start_date=start,
+                end_date=end,
+                stock_code=stock_code,
+                stock_name=stock_name,
+                page=page,
+                page_size=page_size,
+                sort_by=sort_by,
+                order=valid_order
+            ),
+            tags=[("lhb_detail", None)],
+            closed=is_closed_date(end),
         )
         
         # 转换为响应对象
@@ -640,6 +671,60 @@ def get_institution_trading_statistics_aggregated(
         raise HTTPException(status_code=500, detail=f"获取机构交易统计汇总失败: {str(e)}")
 
 
+@router.get("/institution-trading-statistics/aggregated/export")
+def export_institution_trading_statistics_aggregated(
+    start_date: str = Query(..., description="开始日期，格式：YYYY-MM-DD"),
+    end_date: str = Query(..., description="结束日期，格式：YYYY-MM-DD"),
+    format: str = Query("csv", pattern=EXPORT_FORMAT_PATTERN, description=EXPORT_FORMAT_DESCRIPTION),
+    stock_code: Optional[str] = Query(None, description="股票代码"),
+    stock_name: Optional[str] = Query(None, description="股票名称（模糊查询）"),
+    min_appear_count: Optional[int] = Query(None, ge=0, description="最小上榜次数"),
+    max_appear_count: Optional[int] = Query(None, ge=0, description="最大上榜次数"),
+    min_total_net_buy_amount: Optional[float] = Query(None, description="最小累计净买入金额"),
+    max_total_net_buy_amount: Optional[float] = Query(None, description="最大累计净买入金额"),
+    min_total_buy_amount: Optional[float] = Query(None, description="最小累计买入金额"),
+    max_total_buy_amount: Optional[float] = Query(None, description="最大累计买入金额"),
+    min_total_sell_amount: Optional[float] = Query(None, description="最小累计卖出金额"),
+    max_total_sell_amount: Optional[float] = Query(None, description="最大累计卖出金额"),
+    sort_by: Optional[str] = Query(None, description="排序字段，同汇总接口"),
+    order: str = Query("desc", description="排序方向 asc/desc"),
+    db: Session = Depends(get_db)
+):
+    """流式导出时间段内的机构交易统计汇总（全部结果，不分页），字段与汇总接口的 items 相同"""
+    from fastapi import HTTPException
+    from app.schemas.lhb import InstitutionTradingStatisticsAggregatedItem
+    
+    start_date_parsed = parse_date(start_date)
+    end_date_parsed = parse_date(end_date)
+    if not start_date_parsed or not end_date_parsed:
+        raise HTTPException(status_code=400, detail="日期格式错误，请使用 YYYY-MM-DD 格式")
+    if start_date_parsed > end_date_parsed:
+        raise HTTPException(status_code=400, detail="start_date 不能大于 end_date")
+    
+    rows = InstitutionTradingService.iter_aggregated_statistics(
+        db=db,
+        start_date=start_date_parsed,
+        end_date=end_date_parsed,
+        batch_size=settings.EXPORT_BATCH_SIZE,
+        stock_code=stock_code,
+        stock_name=stock_name,
+        min_appear_count=min_appear_count,
+        max_appear_count=max_appear_count,
+        min_total_net_buy_amount=min_total_net_buy_amount,
+        max_total_net_buy_amount=max_total_net_buy_amount,
+        min_total_buy_amount=min_total_buy_amount,
+        max_total_buy_amount=max_total_buy_amount,
+        min_total_sell_amount=min_total_sell_amount,
+        max_total_sell_amount=max_total_sell_amount,
+        sort_by=sort_by,
+        order=order if order in ("asc", "desc") else "desc",
+    )
+    return export_response(
+        InstitutionTradingStatisticsAggregatedItem, rows, format,
+        f"institution_trading_statistics_{start_date_parsed:%Y%m%d}_{end_date_parsed:%Y%m%d}",
+    )
+
+
 @router.get("/active-branch", response_model=ActiveBranchListResponse)
 def get_active_branch_list(
     date: Optional[str] = Query(None, description="日期，格式：YYYY-MM-DD；为空时返回最近一次同步的数据"),
@@ -650,6 +735,8 @@ def get_active_branch_list(
     institution_name: Optional[str] = Query(None, description="营业部名称（模糊查询）"),
     institution_code: Optional[str] = Query(None, description="营业部代码"),
     buy_stock_name: Optional[str] = Query(None, description="买入股票名称（查询买入该股票的营业部）"),
+    cursor: Optional[str] = Query(None, description=CURSOR_QUERY_DESCRIPTION),
+    count: Optional[str] = Query(None, pattern=COUNT_QUERY_PATTERN, description=COUNT_QUERY_DESCRIPTION),
     db: Session = Depends(get_db)
 ):
     """获取活跃营业部列表"""
@@ -659,17 +746,33 @@ def get_active_branch_list(
     try:
         target_date = parse_date(date) if date else None
         logger.debug(f"收到请求: date={date}, target_date={target_date}, page={page}, page_size={page_size}, sort_by={sort_by}, order={order}, institution_name={institution_name}, institution_code={institution_code}, buy_stock_name={buy_stock_name}")
-        items, total = ActiveBranchService.get_list(
-            db=db,
-            target_date=target_date,
-            page=page,
-            page_size=page_size,
-            sort_by=sort_by,
-            order=order if order in ("asc", "desc") else "desc",
-            institution_name=institution_name,
-            institution_code=institution_code,
-            buy_stock_name=buy_stock_name,
-        )
+        next_cursor = None
+        if cursor is not None:
+            keyset = ActiveBranchService.get_list_by_cursor(
+                db=db,
+                target_date=target_date,
+                page_size=page_size,
+                sort_by=sort_by,
+                order=order if order in ("asc", "desc") else "desc",
+                institution_name=institution_name,
+                institution_code=institution_code,
+                buy_stock_name=buy_stock_name,
+                cursor=cursor,
+            )
+            items, total, next_cursor = keyset.items, None, keyset.next_cursor
+        else:
+            items, total = ActiveBranchService.get_list(
+                db=db,
+                target_date=target_date,
+                page=page,
+                page_size=page_size,
+                sort_by=sort_by,
+                order=order if order in ("asc", "desc") else "desc",
+                institution_name=institution_name,
+                institution_code=institution_code,
+                buy_stock_name=buy_stock_name,
+                count_mode=count,
+            )
         
         logger.debug(f"查询返回: {len(items)} 条items, total: {total}")
         # 转换为响应对象
@@ -709,15 +812,18 @@ def get_active_branch_list(
                 continue
         
         logger.debug(f"返回结果: {len(response_items)} 条, total: {total}")
-        total_pages = math.ceil(total / page_size) if total > 0 else 0
+        total_pages = None if total is None else (math.ceil(total / page_size) if total > 0 else 0)
         
         return ActiveBranchListResponse(
             items=response_items,
             total=total,
             page=page,
             page_size=page_size,
-            total_pages=total_pages
+            total_pages=total_pages,
+            next_cursor=next_cursor,
         )
+    except InvalidCursorError:
+        raise
     except Exception as e:
         logger.debug(f"错误: {str(e)}")
 
@@ -17,6 +17,9 @@ from app.schemas.limit_up_board import (
     LimitUpBoardBatchCreate,
 )
 from app.utils.date_utils import parse_date
+from app.utils.query_cache import cached_query, is_closed_date
+from app.utils.count_strategy import COUNT_QUERY_DESCRIPTION, COUNT_QUERY_PATTERN
+from app.utils.keyset import CURSOR_QUERY_DESCRIPTION
 from app.config import settings
 
 router = APIRouter()
@@ -36,6 +39,8 @@ def get_limit_up_board_list(
     concept_name: Optional[str] = Query(None, description="概念板块名称筛选"),
     sort_by: Optional[str] = Query(None, description="排序字段，支持: date, board_name, stock_code, stock_name, board_count (板数), circulation_market_value, turnover_amount"),
     order: str = Query("desc", pattern="^(asc|desc)$", description="排序方向，asc 或 desc"),
+    cursor: Optional[str] = Query(None, description=CURSOR_QUERY_DESCRIPTION),
+    count: Optional[str] = Query(None, pattern=COUNT_QUERY_PATTERN, description=COUNT_QUERY_DESCRIPTION),
     db: Session = Depends(get_db)
 ):
     """获取涨停板分析列表"""
@@ -45,10 +50,7 @@ def get_limit_up_board_list(
         if not target_date:
             raise HTTPException(status_code=400, detail="日期格式错误，应为 YYYY-MM-DD")
     
-    items, total = LimitUpBoardService.get_list(
-        db=db,
-        page=page,
-        page_size=page_size,
+    filters = dict(
         target_date=target_date,
         board_name=board_name,
         stock_code=stock_code,
@@ -61,6 +63,17 @@ def get_limit_up_board_list(
         order=order,
     )
     
+    if cursor is not None:
+        keyset = LimitUpBoardService.get_list_by_cursor(db=db, page_size=page_size, cursor=cursor, **filters)
+        return LimitUpBoardListResponse(
+            items=keyset.items,
+            page=page,
+            page_size=page_size,
+            next_cursor=keyset.next_cursor,
+        )
+    
+    items, total = LimitUpBoardService.get_list(db=db, page=page, page_size=page_size, count_mode=count, **filters)
+    
     total_pages = math.ceil(total / page_size) if total > 0 else 0
     
     return LimitUpBoardListResponse(
@@ -169,7 +182,13 @@ def get_board_statistics(
         if not target_date:
             raise HTTPException(status_code=400, detail="日期格式错误，应为 YYYY-MM-DD")
     
-    return LimitUpBoardService.get_board_statistics(db, target_date)
+    return cached_query(
+        "limit_up_board.statistics_board",
+        {"date": target_date},
+        lambda: LimitUpBoardService.get_board_statistics(db, target_date),
+        tags=[("limit_up_board", target_date)],
+        closed=is_closed_date(target_date),
+    )
 
 
 @router.get("/statistics/board-count", response_model=dict)
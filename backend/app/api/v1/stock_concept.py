@@ -63,28 +63,16 @@ def get_concept_tree(
     max_level: int = Query(3, ge=1, le=3, description="最大层级深度"),
     db: Session = Depends(get_db)
 ):
-    """获取概念树形结构"""
-    def build_tree_node(concept: StockConcept, current_level: int) -> StockConceptTree:
-        """递归构建树节点"""
-        node = StockConceptTree.model_validate(concept)
-        
-        if current_level < max_level:
-            # 查询子概念
-            children = db.query(StockConcept).filter(
-                StockConcept.parent_id == concept.id
-            ).order_by(
-                StockConcept.sort_order.asc(),
-                StockConcept.name.asc()
-            ).all()
-            
-            node.children = [build_tree_node(child, current_level + 1) for child in children]
-        
-        return node
-    
-    # 查询所有一级概念
-    level1_concepts = StockConceptService.get_tree(db, max_level)
+    """获取概念树形结构（一次查询取出全部概念后组装）"""
+    def build_tree_node(node: dict) -> StockConceptTree:
+        """由服务层组装好的节点构建响应，避免访问 children 关系触发逐个查询"""
+        data = StockConceptResponse.model_validate(node["concept"]).model_dump()
+        return StockConceptTree(
+            **data,
+            children=[build_tree_node(child) for child in node["children"]],
+        )
     
-    return [build_tree_node(concept, 1) for concept in level1_concepts]
+    return [build_tree_node(node) for node in StockConceptService.get_tree(db, max_level)]
 
 
 @router.get("/{concept_id}/ancestors", response_model=List[StockConceptResponse])
@@ -97,7 +85,7 @@ def get_concept_ancestors(
     if not concept:
         raise HTTPException(status_code=404, detail="概念板块不存在")
     
-    ancestors = concept.get_all_ancestors()
+    ancestors = StockConceptService.get_ancestors(db, concept_id)
     return ancestors
 
 
@@ -112,7 +100,7 @@ def get_concept_descendants(
     if not concept:
         raise HTTPException(status_code=404, detail="概念板块不存在")
     
-    descendants = concept.get_all_descendants()
+    descendants = StockConceptService.get_descendants(db, concept_id)
     if include_self:
         descendants.insert(0, concept)
     
@@ -13,8 +13,12 @@ from app.schemas.task import (
     TaskRunRequest,
     TaskRunResponse,
     SchedulerStatusResponse,
+    BackfillRequest,
+    BackfillRunResponse,
 )
 from app.models.task_execution import TaskStatus
+from app.utils.count_strategy import COUNT_QUERY_DESCRIPTION, COUNT_QUERY_PATTERN
+from app.utils.keyset import CURSOR_QUERY_DESCRIPTION
 
 router = APIRouter()
 
@@ -26,6 +30,8 @@ def get_task_executions(
     task_type: Optional[str] = Query(None, description="任务类型"),
     status: Optional[str] = Query(None, description="执行状态"),
     task_name: Optional[str] = Query(None, description="任务名称"),
+    cursor: Optional[str] = Query(None, description=CURSOR_QUERY_DESCRIPTION),
+    count: Optional[str] = Query(None, pattern=COUNT_QUERY_PATTERN, description=COUNT_QUERY_DESCRIPTION),
     db: Session = Depends(get_db),
 ):
     """获取任务执行历史列表"""
@@ -43,6 +49,8 @@ def get_task_executions(
         task_type=task_type,
         status=task_status,
         task_name=task_name,
+        cursor=cursor,
+        count_mode=count,
     )
     
     return result
@@ -72,7 +80,23 @@ def run_tasks(
     background_tasks: BackgroundTasks,
     db: Session = Depends(get_db),
 ):
-    """手动执行任务（异步）"""
+    """手动执行任务（异步）；开启任务队列时只入队，由工作进程执行"""
+    from app.config import settings
+
+    if settings.SYNC_QUEUE_ENABLED:
+        from app.services.task_queue_service import TaskQueueService
+        from app.utils.date_utils import get_trading_date, parse_date
+
+        target_date = parse_date(request.target_date) if request.target_date else get_trading_date()
+        if target_date is None:
+            raise HTTPException(status_code=400, detail="日期格式错误或无法获取交易日，请使用 YYYY-MM-DD 格式指定")
+        execution, created = TaskQueueService.enqueue_sync_daily_data(db, request.task_types, target_date)
+        return TaskRunResponse(
+            execution_id=execution.id,
+            message="任务已入队，等待工作进程执行" if created else "相同任务已在队列中",
+            task_types=request.task_types or [],
+        )
+
     try:
         # 创建任务执行记录
         execution = TaskService.create_task_execution(
@@ -98,6 +122,109 @@ def run_tasks(
         raise HTTPException(status_code=500, detail=f"任务提交失败: {str(e)}")
 
 
+def _start_backfill(db: Session, background_tasks: BackgroundTasks, job_id: int) -> None:
+    """开启任务队列时入队，否则在后台执行"""
+    from app.config import settings
+    from app.services.backfill_service import BackfillService
+
+    if settings.SYNC_QUEUE_ENABLED:
+        from app.services.task_queue_service import TaskQueueService
+        TaskQueueService.enqueue_backfill(db, job_id)
+    else:
+        background_tasks.add_task(BackfillService.start_job_async, job_id)
+
+
+@router.post("/backfill", response_model=BackfillRunResponse)
+def create_backfill(
+    request: BackfillRequest,
+    background_tasks: BackgroundTasks,
+    db: Session = Depends(get_db),
+):
+    """创建历史数据回填作业（按任务类型和交易日拆分为工作单元，后台执行）"""
+    from datetime import datetime as dt
+    from app.services.backfill_service import BackfillService
+
+    try:
+        start_date = dt.strptime(request.start_date, "%Y-%m-%d").date()
+        end_date = dt.strptime(request.end_date, "%Y-%m-%d").date()
+    except ValueError:
+        raise HTTPException(status_code=400, detail="日期格式错误，请使用 YYYY-MM-DD 格式")
+    try:
+        job = BackfillService.create_job(
+            db=db,
+            task_types=request.task_types,
+            start_date=start_date,
+            end_date=end_date,
+            max_workers=request.max_workers,
+            units_per_minute=request.units_per_minute,
+        )
+    except ValueError as e:
+        raise HTTPException(status_code=400, detail=str(e))
+
+    _start_backfill(db, background_tasks, job.id)
+    progress = BackfillService.get_progress(db, job.id)
+    return BackfillRunResponse(
+        job_id=job.id,
+        message="回填作业已提交，正在后台执行",
+        total_units=progress["total_units"],
+    )
+
+
+@router.get("/backfill", response_model=dict)
+def get_backfill_jobs(
+    page: int = Query(1, ge=1, description="页码"),
+    page_size: int = Query(20, ge=1, le=100, description="每页数量"),
+    db: Session = Depends(get_db),
+):
+    """获取回填作业列表（含进度与吞吐）"""
+    from app.services.backfill_service import BackfillService
+    return BackfillService.list_jobs(db=db, page=page, page_size=page_size)
+
+
+@router.get("/backfill/{job_id}", response_model=dict)
+def get_backfill_progress(
+    job_id: int,
+    db: Session = Depends(get_db),
+):
+    """获取回填作业进度：各状态单元数、单元/分钟、行/秒、预计剩余时间"""
+    from app.services.backfill_service import BackfillService
+    progress = BackfillService.get_progress(db=db, job_id=job_id)
+    if progress is None:
+        raise HTTPException(status_code=404, detail="回填作业不存在")
+    return progress
+
+
+@router.post("/backfill/{job_id}/resume", response_model=dict)
+def resume_backfill(
+    job_id: int,
+    background_tasks: BackgroundTasks,
+    db: Session = Depends(get_db),
+):
+    """继续执行中断或有失败单元的回填作业（已成功的单元不再执行）"""
+    from app.models.backfill import BackfillJob
+    from app.services.backfill_service import BackfillService
+
+    job = db.query(BackfillJob).filter(BackfillJob.id == job_id).first()
+    if job is None:
+        raise HTTPException(status_code=404, detail="回填作业不存在")
+    # 快速拒绝；并发请求都通过该检查时，由 run_job 中的条件 UPDATE 保证只有一个真正执行
+    if BackfillService.is_active(job):
+        raise HTTPException(status_code=409, detail="回填作业正在执行中")
+    if job.status == TaskStatus.SUCCESS:
+        return {"job_id": job_id, "message": "回填作业已全部完成"}
+
+    _start_backfill(db, background_tasks, job_id)
+    return {"job_id": job_id, "message": "回填作业已继续，正在后台执行"}
+
+
+@router.get("/queue", response_model=dict)
+def get_task_queue(db: Session = Depends(get_db)):
+    """获取任务队列概况：等待/执行中的任务数、各任务的工作进程与心跳"""
+    from app.config import settings
+    from app.services.task_queue_service import TaskQueueService
+    return {"enabled": settings.SYNC_QUEUE_ENABLED, **TaskQueueService.get_queue_stats(db)}
+
+
 @router.get("/task-types", response_model=dict)
 def get_task_types():
     """获取所有任务类型"""
@@ -114,3 +241,43 @@ def get_scheduler_status():
     status = get_scheduler_status()
     return SchedulerStatusResponse(**status)
 
+
+
+@router.get("/akshare-cache/stats", response_model=dict)
+def get_akshare_cache_stats():
+    """获取 AKShare 本地缓存统计（命中/未命中次数、条目数、占用空间）"""
+    from app.utils.akshare_cache import get_akshare_cache
+    cache = get_akshare_cache()
+    if cache is None:
+        return {"enabled": False}
+    return cache.stats()
+
+
+@router.delete("/akshare-cache", response_model=dict)
+def clear_akshare_cache():
+    """清空 AKShare 本地缓存"""
+    from app.utils.akshare_cache import get_akshare_cache
+    cache = get_akshare_cache()
+    if cache is None:
+        raise HTTPException(status_code=400, detail="AKShare 本地缓存未开启")
+    return {"deleted": cache.clear()}
+
+
+@router.get("/query-cache/stats", response_model=dict)
+def get_query_cache_stats():
+    """获取热点接口查询缓存统计（命中/未命中次数、条目数、占用空间）"""
+    from app.utils.query_cache import get_query_cache
+    cache = get_query_cache()
+    if cache is None:
+        return {"enabled": False}
+    return cache.stats()
+
+
+@router.delete("/query-cache", response_model=dict)
+def clear_query_cache():
+    """清空热点接口查询缓存"""
+    from app.utils.query_cache import get_query_cache
+    cache = get_query_cache()
+    if cache is None:
+        raise HTTPException(status_code=400, detail="查询缓存未开启")
+    return {"deleted": cache.clear()}
@@ -11,6 +11,9 @@ from app.database.session import get_db
 from app.services.zt_pool_service import ZtPoolService
 from app.schemas.zt_pool import ZtPoolListResponse, ZtPoolAnalysisResponse, ZtPoolUpdateRequest
 from app.utils.date_utils import parse_date, get_trading_date
+from app.utils.query_cache import cached_query, is_closed_date
+from app.utils.count_strategy import COUNT_QUERY_DESCRIPTION, COUNT_QUERY_PATTERN
+from app.utils.keyset import CURSOR_QUERY_DESCRIPTION
 from app.config import settings
 
 router = APIRouter()
@@ -33,6 +36,8 @@ def get_zt_pool_list(
     page_size: int = Query(settings.DEFAULT_PAGE_SIZE, ge=1, le=settings.MAX_PAGE_SIZE, description="每页数量"),
     sort_by: Optional[str] = Query(None, description="排序字段"),
     order: str = Query("desc", pattern="^(asc|desc)$", description="排序方向"),
+    cursor: Optional[str] = Query(None, description=CURSOR_QUERY_DESCRIPTION),
+    count: Optional[str] = Query(None, pattern=COUNT_QUERY_PATTERN, description=COUNT_QUERY_DESCRIPTION),
     db: Session = Depends(get_db)
 ):
     """获取涨停池列表"""
@@ -57,8 +62,7 @@ def get_zt_pool_list(
     if concept_names:
         concept_names_list = [x.strip() for x in concept_names.split(',') if x.strip()]
     
-    items, total = ZtPoolService.get_zt_pool_list(
-        db=db,
+    filters = dict(
         start_date=parsed_start_date,
         end_date=parsed_end_date,
         stock_code=stock_code,
@@ -70,10 +74,32 @@ def get_zt_pool_list(
         concept_ids=concept_ids_list,
         concept_names=concept_names_list,
         is_lhb=is_lhb,
+    )
+    
+    if cursor is not None:
+        keyset = ZtPoolService.get_zt_pool_list_by_cursor(
+            db=db,
+            **filters,
+            page_size=page_size,
+            sort_by=sort_by,
+            order=order,
+            cursor=cursor,
+        )
+        return ZtPoolListResponse(
+            items=keyset.items,
+            page=page,
+            page_size=page_size,
+            next_cursor=keyset.next_cursor,
+        )
+    
+    items, total = ZtPoolService.get_zt_pool_list(
+        db=db,
+        **filters,
         page=page,
         page_size=page_size,
         sort_by=sort_by,
-        order=order
+        order=order,
+        count_mode=count
     )
     
     total_pages = math.ceil(total / page_size)
@@ -116,7 +142,13 @@ def get_zt_analysis(
         from fastapi import HTTPException
         raise HTTPException(status_code=400, detail="日期格式错误")
     
-    analysis = ZtPoolService.get_zt_analysis(db, target_date)
+    analysis = cached_query(
+        "zt_pool.analysis",
+        {"date": target_date},
+        lambda: ZtPoolService.get_zt_analysis(db, target_date),
+        tags=[("zt_pool", target_date)],
+        closed=is_closed_date(target_date),
+    )
     return analysis
 
 
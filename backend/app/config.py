@@ -31,6 +31,20 @@ class Settings(BaseSettings):
             raise ValueError("DATABASE_URL environment variable is required")
         # GCP 环境中，如果未设置，返回空字符串，在真正使用时再验证
         return v or ""
+
+    # 读库连接URL（只读副本或 pgbouncer 事务池，可选）；未设置时读引擎连接主库，但仍使用独立连接池
+    DATABASE_READ_URL: Optional[str] = None
+
+    # 每个进程的数据库连接总预算：写库、读库连接池的 pool_size + max_overflow 合计不超过该值，超出时按写库优先压缩
+    DB_MAX_CONNECTIONS: int = 40
+    # 写库连接池：同步任务、脚本和写操作（同步任务工作进程使用 SYNC_PROCESS_DB_* 覆盖）
+    DB_POOL_SIZE: int = 8
+    DB_MAX_OVERFLOW: int = 7
+    # 读库连接池：GET 接口和只读筛选接口
+    DB_READ_POOL_SIZE: int = 10
+    DB_READ_MAX_OVERFLOW: int = 15
+    # 同步 def 路由的线程池大小（每个线程同时最多占用一个读库连接，与读库连接池上限 10 + 15 一致）
+    API_THREADPOOL_SIZE: int = 25
     
     # Supabase配置
     SUPABASE_URL: Optional[str] = os.getenv("SUPABASE_URL")
@@ -70,7 +84,69 @@ class Settings(BaseSettings):
     # 分页配置
     DEFAULT_PAGE_SIZE: int = 20
     MAX_PAGE_SIZE: int = 100
+    # 列表总数的默认计算方式（接口可用 count 参数覆盖）
+    # exact：精确 COUNT，按 (接口, 筛选条件, 日期) 缓存；estimate：PostgreSQL 估算；none：不计数，只返回是否有下一页
+    LIST_COUNT_MODE: str = "exact"
+    LIST_COUNT_EXACT_BELOW: int = 1000  # 估算行数低于该值时改为精确计数（小结果集估算误差大，COUNT 也便宜）
+    EXPORT_BATCH_SIZE: int = 2000  # 流式导出每批从服务端游标读取的行数（也是 Parquet 行组大小）
     
+    # AKShare 并发抓取配置
+    AKSHARE_MAX_WORKERS: int = 4  # 最大并发请求数
+    AKSHARE_RATE_LIMIT: float = 5.0  # 每个接口每秒最多请求数
+    AKSHARE_MAX_RETRIES: int = 3  # 请求异常时的最大重试次数
+
+    # AKShare 本地响应缓存（可选）
+    AKSHARE_CACHE_ENABLED: bool = False
+    AKSHARE_CACHE_DIR: str = ".cache/akshare"
+    AKSHARE_CACHE_MAX_MB: int = 1024  # 缓存总大小上限，超出按 LRU 淘汰
+    AKSHARE_CACHE_TTL: int = 300  # 非历史数据（如"即时"快照）的缓存秒数
+
+    # 热点接口查询缓存
+    QUERY_CACHE_ENABLED: bool = True
+    # memory / redis；同步工作进程池中的失效会回传给 API 进程，启用 SYNC_QUEUE_ENABLED（独立工作进程）时需用 redis，
+    # 否则启动时记录错误，已收盘日期的缓存也改为按 QUERY_CACHE_TTL 过期
+    QUERY_CACHE_BACKEND: str = "memory"
+    QUERY_CACHE_MAX_MB: int = 256  # 进程内缓存总大小上限，超出按 LRU 淘汰
+    QUERY_CACHE_TTL: int = 60  # 当日/最新数据的缓存秒数，已收盘日期不过期
+
+    # 个股资金流内存立方体（日期范围汇总查询）
+    FUND_FLOW_CUBE_ENABLED: bool = True
+    FUND_FLOW_CUBE_MAX_DAYS: int = 400  # 常驻窗口的最大自然日跨度，超出时只为该次查询临时加载
+    FUND_FLOW_CUBE_TTL: int = 60  # 比对各日期行数、刷新当日数据的间隔秒数
+
+    # 每日同步任务依赖图调度
+    SYNC_MAX_WORKERS: int = 6  # 同时运行的同步任务数
+    SYNC_AKSHARE_CONCURRENCY: int = 4  # 同时访问 AKShare 的同步任务数
+    # 同时占用数据库连接的同步任务数；实际取值不超过所在进程的写库连接池：
+    # 工作进程中为 SYNC_PROCESS_DB_POOL_SIZE - 1，线程模式下为 DB_POOL_SIZE 的一半（给 API 写请求留余量）
+    SYNC_DB_CONCURRENCY: int = 5
+
+    # 同步任务执行方式
+    # thread：在当前进程的线程中执行；process：提交到独立的工作进程池，pandas 解析不占用 API 进程的 GIL
+    # （任务在工作进程中触发的查询缓存、资金流立方体失效随结果回传，由 API 进程执行）
+    SYNC_EXECUTION_MODE: str = "process"
+    SYNC_PROCESS_WORKERS: int = 2  # 工作进程数
+    SYNC_PROCESS_DB_POOL_SIZE: int = 6  # 每个工作进程的数据库连接池大小
+    SYNC_PROCESS_DB_MAX_OVERFLOW: int = 4
+
+    # 数据库任务队列（开启后 API 和调度器只入队，由 scripts/run_worker.py 启动的工作进程领取执行）
+    SYNC_QUEUE_ENABLED: bool = False
+    SYNC_QUEUE_LEASE_SECONDS: int = 300  # 租约时长，执行中每 1/3 租约续约一次，过期未续约视为工作进程已退出
+    SYNC_QUEUE_POLL_SECONDS: float = 5.0  # 队列为空时的轮询间隔
+    SYNC_QUEUE_MAX_ATTEMPTS: int = 3  # 工作进程退出导致租约过期时的最大领取次数
+
+    # 历史数据回填
+    BACKFILL_MAX_WORKERS: int = 4  # 同时执行的回填单元数
+    BACKFILL_UNITS_PER_MINUTE: float = 30.0  # 每分钟最多启动的回填单元数，0 表示不限
+    BACKFILL_STALE_MINUTES: int = 30  # 执行中的作业超过该时间没有心跳，视为进程已中断，可继续执行
+    BACKFILL_HEARTBEAT_SECONDS: float = 60.0  # 执行中的作业刷新心跳的间隔（需远小于 BACKFILL_STALE_MINUTES）
+
+    # 性能埋点（/metrics、/debug/perf）
+    PERF_METRICS_ENABLED: bool = True
+    PERF_N_PLUS_ONE_THRESHOLD: int = 10  # 同一语句形状在一次请求/同步任务内执行超过该次数时记为疑似 N+1
+    PERF_PROFILING_ENABLED: bool = False  # 允许请求带 X-Perf-Profile 头触发采样分析（采样有开销，默认关闭）
+    PERF_PROFILE_INTERVAL: float = 0.005  # 采样间隔（秒）
+
     # 日志配置
     LOG_LEVEL: str = os.getenv("LOG_LEVEL", "INFO")
     
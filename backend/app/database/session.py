@@ -1,28 +1,34 @@
 """
 数据库会话管理
 仅支持 PostgreSQL/Supabase 数据库
+
+读写分离：写引擎（DATABASE_URL）供同步任务、脚本和写操作使用；读引擎（DATABASE_READ_URL，可指向只读副本
+或 pgbouncer 事务池，未设置时连接主库）供 GET 接口使用。两者连接池相互独立，各自有大小上限和占用指标（/metrics）。
 """
 import os
+from fastapi import Request
 from sqlalchemy import create_engine, event
 from sqlalchemy.orm import sessionmaker, Session
-from typing import Generator, Optional
+from typing import Dict, Generator, Optional, Tuple
 
 from app.config import settings
 
+import logging
+
+logger = logging.getLogger(__name__)
+
 # 查询超时设置（秒）
 QUERY_TIMEOUT = 30
 
 # 延迟初始化引擎和会话工厂
 _engine: Optional[object] = None
 _SessionLocal: Optional[sessionmaker] = None
+_read_engine: Optional[object] = None
+_ReadSessionLocal: Optional[sessionmaker] = None
 
-def _get_engine():
-    """获取数据库引擎（延迟初始化）"""
-    global _engine, _SessionLocal
-    
-    if _engine is not None:
-        return _engine
-    
+
+def _database_url() -> Optional[str]:
+    """读取并校验 DATABASE_URL；GCP 环境未设置时返回 None"""
     # 获取数据库URL
     db_url = settings.DATABASE_URL or os.getenv("DATABASE_URL", "")
     
@@ -39,28 +45,67 @@ def _get_engine():
             f"请设置 DATABASE_URL 环境变量为 Supabase PostgreSQL 连接字符串。\n"
             f"当前值: {db_url[:50] if db_url else '未设置'}..."
         )
-    
+    return db_url
+
+
+def _read_database_url() -> Optional[str]:
+    """读库 URL：DATABASE_READ_URL（只读副本或 pgbouncer 事务池），未设置时与写库相同（仍使用独立连接池）"""
+    read_url = settings.DATABASE_READ_URL
+    if not read_url:
+        return _database_url()
+    if not read_url.lower().startswith('postgresql://'):
+        raise ValueError(f"DATABASE_READ_URL 必须是 PostgreSQL 连接字符串，当前值: {read_url[:50]}...")
+    return read_url
+
+
+def pool_budget() -> Dict[str, Tuple[int, int]]:
+    """
+    当前进程各连接池的 (pool_size, max_overflow)，合计不超过 DB_MAX_CONNECTIONS
+
+    写库连接池优先（同步任务和写操作），读库连接池使用剩余额度；超出预算时先压缩溢出连接，
+    读库连接池至少保留 1 个连接。
+    """
+    budget = settings.DB_MAX_CONNECTIONS
+    write_size = max(1, min(settings.DB_POOL_SIZE, budget - 1))
+    write_overflow = max(0, min(settings.DB_MAX_OVERFLOW, budget - 1 - write_size))
+    remaining = budget - write_size - write_overflow
+    read_size = max(1, min(settings.DB_READ_POOL_SIZE, remaining))
+    read_overflow = max(0, min(settings.DB_READ_MAX_OVERFLOW, remaining - read_size))
+    sizes = {"write": (write_size, write_overflow), "read": (read_size, read_overflow)}
+    configured = {
+        "write": (settings.DB_POOL_SIZE, settings.DB_MAX_OVERFLOW),
+        "read": (settings.DB_READ_POOL_SIZE, settings.DB_READ_MAX_OVERFLOW),
+    }
+    if sizes != configured:
+        logger.warning(f"连接池配置 {configured} 超出每进程连接预算 DB_MAX_CONNECTIONS={budget}，已调整为 {sizes}")
+    return sizes
+
+
+def _create_engine(db_url: str, pool_name: str, pool_size: int, max_overflow: int):
+    """创建同步引擎（读、写引擎共用的连接参数和事件）"""
+    from sqlalchemy.pool import QueuePool
+    from app.utils.perf import install_query_hooks, metered_pool_class
+
     # PostgreSQL/Supabase 连接参数
     connect_args = {}
     
-    # 优化连接池配置：
-    # - pool_size: 基础连接池大小，增加以支持更多并发请求和定时任务
-    # - max_overflow: 超出pool_size后可以创建的额外连接数
+    # 连接池配置：
+    # - pool_size / max_overflow: 读、写连接池分别设置，同步任务占满写连接池时不影响接口读取
     # - pool_timeout: 获取连接的超时时间
-    # 注意：定时任务使用独立线程执行，需要足够的连接数避免阻塞
-    _engine = create_engine(
+    db_engine = create_engine(
         db_url,
         connect_args=connect_args,
+        poolclass=metered_pool_class(QueuePool, pool_name),  # 记录获取连接耗时和占用情况
         pool_pre_ping=True,  # 连接前ping，确保连接有效
-        pool_size=15,  # 增加基础连接池大小（从10增加到15）
-        max_overflow=25,  # 增加最大溢出连接数（从20增加到25），支持更多并发
+        pool_size=pool_size,
+        max_overflow=max_overflow,
         pool_timeout=10,  # 连接池获取连接超时
         pool_recycle=3600,  # 连接回收时间（1小时），避免长时间连接导致的数据库连接超时
         echo=False,
     )
     
     # 为 PostgreSQL 添加查询超时事件监听
-    @event.listens_for(_engine, "connect")
+    @event.listens_for(db_engine, "connect")
     def set_postgres_timeout(dbapi_conn, connection_record):
         """设置 PostgreSQL 查询超时"""
         try:
@@ -71,24 +116,102 @@ def _get_engine():
         except Exception:
             pass  # 忽略错误
     
+    # SQL 计时（请求/同步任务的查询数、N+1 检测）
+    install_query_hooks(db_engine)
+    return db_engine
+
+
+def _get_engine():
+    """获取写库引擎（延迟初始化）：同步任务、脚本和写操作使用"""
+    global _engine, _SessionLocal
+    
+    if _engine is not None:
+        return _engine
+    
+    db_url = _database_url()
+    if db_url is None:
+        return None
+    
+    _engine = _create_engine(db_url, "write", *pool_budget()["write"])
+
     # 创建会话工厂
     _SessionLocal = sessionmaker(autocommit=False, autoflush=False, bind=_engine)
     
     return _engine
 
+
+def _get_read_engine():
+    """获取读库引擎（延迟初始化）：GET 接口使用"""
+    global _read_engine, _ReadSessionLocal
+
+    if _read_engine is not None:
+        return _read_engine
+
+    write_engine = _get_engine()
+    if write_engine is None:
+        return None
+    _read_engine = _create_engine(_read_database_url(), "read", *pool_budget()["read"])
+    _ReadSessionLocal = sessionmaker(
+        class_=RoutingSession, autocommit=False, autoflush=False,
+        read_bind=_read_engine, write_bind=write_engine,
+    )
+    return _read_engine
+
+
+_WRITE_PREFIXES = ("insert", "update", "delete", "merge", "create", "alter", "drop", "truncate", "copy", "set", "lock")
+
+
+def _is_write(clause) -> bool:
+    """语句是否需要写库：DML、SELECT ... FOR UPDATE、以写操作开头的文本 SQL"""
+    from sqlalchemy.sql.dml import UpdateBase
+    from sqlalchemy.sql.elements import TextClause
+
+    if clause is None:
+        return False
+    if isinstance(clause, UpdateBase):
+        return True
+    if isinstance(clause, TextClause):
+        return clause.text.lstrip().lower().startswith(_WRITE_PREFIXES)
+    return getattr(clause, "_for_update_arg", None) is not None
+
+
+class RoutingSession(Session):
+    """
+    读会话：查询走读库，写入（flush、INSERT/UPDATE/DELETE）走写库
+
+    少数 GET 接口会顺带写入（如龙虎榜回填概念）。
+    一旦写入，本会话之后的查询也改走写库，避免只读副本复制延迟导致读不到刚写入的数据。
+    """
+
+    def __init__(self, *args, read_bind=None, write_bind=None, **kwargs):
+        super().__init__(*args, **kwargs)
+        self._read_bind = read_bind
+        self._write_bind = write_bind
+        self._use_writer = False
+
+    def get_bind(self, mapper=None, clause=None, **kwargs):
+        if not self._use_writer and (self._flushing or _is_write(clause)):
+            self._use_writer = True
+        return self._write_bind if self._use_writer else self._read_bind
+
+
 # 为了向后兼容，创建 SessionLocal 的代理类
 class SessionLocalProxy:
-    """会话工厂代理，支持延迟初始化"""
+    """会话工厂代理，支持延迟初始化（read=True 时为读会话工厂）"""
+    def __init__(self, read: bool = False):
+        self.read = read
+
     def __call__(self, *args, **kwargs):
-        global _SessionLocal
-        if _SessionLocal is None:
-            engine = _get_engine()
-            if engine is None:
-                raise ValueError("DATABASE_URL 未设置，无法创建数据库会话")
-        return _SessionLocal(*args, **kwargs)
-
-# 为了向后兼容，创建 SessionLocal 实例
+        engine = _get_read_engine() if self.read else _get_engine()
+        if engine is None:
+            raise ValueError("DATABASE_URL 未设置，无法创建数据库会话")
+        factory = _ReadSessionLocal if self.read else _SessionLocal
+        return factory(*args, **kwargs)
+
+# 为了向后兼容，创建 SessionLocal 实例（写会话）
 SessionLocal = SessionLocalProxy()
+# 读会话：只读接口使用
+ReadSessionLocal = SessionLocalProxy(read=True)
 
 # 为了向后兼容，提供 engine 属性访问
 def get_engine():
@@ -106,17 +229,27 @@ class EngineProxy:
 
 engine = EngineProxy()
 
-def get_db() -> Generator[Session, None, None]:
+# 使用读会话的请求方法
+READ_METHODS = ("GET", "HEAD", "OPTIONS")
+
+
+def get_db(request: Request = None) -> Generator[Session, None, None]:
     """
     获取数据库会话
-    用于依赖注入
+    用于依赖注入：GET/HEAD 请求使用读会话（读库连接池），其它请求使用写会话；
+    不经请求调用时（脚本）使用写会话
     """
-    # 确保引擎已初始化
-    engine = _get_engine()
-    if engine is None:
-        raise ValueError("DATABASE_URL 未设置，无法创建数据库会话")
-    
-    db = SessionLocal()
+    read = request is not None and request.method in READ_METHODS
+    db = ReadSessionLocal() if read else SessionLocal()
+    try:
+        yield db
+    finally:
+        db.close()
+
+
+def get_read_db() -> Generator[Session, None, None]:
+    """读会话（用 POST 传递查询条件的只读接口，如筛选导出）"""
+    db = ReadSessionLocal()
     try:
         yield db
     finally:
@@ -2,6 +2,7 @@
 FastAPI应用入口
 """
 import os
+from contextlib import asynccontextmanager
 from fastapi import FastAPI, Request, status
 from fastapi.middleware.cors import CORSMiddleware
 from fastapi.responses import JSONResponse
@@ -24,6 +25,8 @@ except Exception as e:
     print(f"[警告] 配置加载失败，使用最小配置: {e}")
 
 from app.api.v1 import api_router
+from app.utils.keyset import InvalidCursorError
+from app.utils.perf import PerfMiddleware, get_perf_registry
 
 # 在云环境中自动运行数据库迁移（异步执行，不阻塞应用启动）
 is_gcp = os.getenv("FUNCTION_TARGET") or os.getenv("K_SERVICE") or os.getenv("GOOGLE_CLOUD_PROJECT")
@@ -45,11 +48,20 @@ if is_gcp:
     migration_thread = threading.Thread(target=run_migrations_async, daemon=True)
     migration_thread.start()
 
+@asynccontextmanager
+async def lifespan(app: FastAPI):
+    # 同步 def 路由在线程池中执行：线程数与读库连接池一致，排队发生在线程池而不是连接池超时
+    from anyio import to_thread
+    to_thread.current_default_thread_limiter().total_tokens = getattr(settings, "API_THREADPOOL_SIZE", 40)
+    yield
+
+
 app = FastAPI(
     title=settings.PROJECT_NAME,
     version=settings.VERSION,
     docs_url="/docs",
     redoc_url="/redoc",
+    lifespan=lifespan,
 )
 
 # CORS中间件 - 必须在其他中间件之前
@@ -70,6 +82,9 @@ app.add_middleware(
     expose_headers=["*"],
 )
 
+# 性能埋点：接口耗时、每次请求的 SQL 条数和耗时（/metrics、/debug/perf）
+app.add_middleware(PerfMiddleware)
+
 
 def get_allowed_origin(request: Request) -> str:
     """获取允许的Origin，支持精确匹配和正则匹配"""
@@ -127,6 +142,15 @@ async def http_exception_handler(request: Request, exc: StarletteHTTPException):
         headers=get_cors_headers(request)
     )
 
+@app.exception_handler(InvalidCursorError)
+async def invalid_cursor_handler(request: Request, exc: InvalidCursorError):
+    """分页游标无效（格式错误或排序方式已变化）"""
+    return JSONResponse(
+        status_code=400,
+        content={"detail": str(exc)},
+        headers=get_cors_headers(request)
+    )
+
 @app.exception_handler(RequestValidationError)
 async def validation_exception_handler(request: Request, exc: RequestValidationError):
     """请求验证异常处理，确保CORS头总是被添加"""
@@ -194,3 +218,28 @@ def health_check(request: Request):
             headers=get_cors_headers(request)
         )
 
+
+@app.get("/metrics", include_in_schema=False)
+def metrics():
+    """Prometheus 指标（当前进程）"""
+    from fastapi.responses import PlainTextResponse
+    return PlainTextResponse(
+        get_perf_registry().render_prometheus(),
+        media_type="text/plain; version=0.0.4; charset=utf-8"
+    )
+
+
+@app.get("/debug/perf")
+def debug_perf(top: int = 20):
+    """性能汇总：累计耗时最多的接口、疑似 N+1 语句、AKShare 调用耗时、同步任务阶段耗时"""
+    return get_perf_registry().summary(top=top)
+
+
+@app.get("/debug/perf/profiles/{profile_id}")
+def debug_perf_profile(profile_id: str):
+    """请求采样分析结果（折叠栈格式），profile_id 见响应头 X-Perf-Profile-Id"""
+    from fastapi import HTTPException
+    profile = get_perf_registry().get_profile(profile_id)
+    if profile is None:
+        raise HTTPException(status_code=404, detail="采样结果不存在或已被淘汰")
+    return profile
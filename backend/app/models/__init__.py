@@ -12,13 +12,22 @@ from app.models.lhb import (
 from app.models.capital import CapitalDetail
 from app.models.index import IndexHistory
 from app.models.sector import SectorHistory
-from app.models.fund_flow import StockFundFlow, IndustryFundFlow, ConceptFundFlow
+from app.models.fund_flow import (
+    StockFundFlow,
+    IndustryFundFlow,
+    ConceptFundFlow,
+    ConceptFundFlowRollup,
+    IndustryFundFlowRollup,
+)
 from app.models.zt_pool import ZtPool, ZtPoolDown
 from app.models.trading_calendar import TradingCalendar
 from app.models.task_execution import TaskExecution, TaskStatus
+from app.models.backfill import BackfillJob, BackfillUnit
 from app.models.stock_concept import StockConcept, StockConceptMapping, TradingCalendarConcept
 from app.models.limit_up_board import LimitUpBoard, LimitUpBoardConcept
 from app.models.stock_history import StockHistory
+from app.models.trade_date import TradeDate
+from app.models.daily_summary import DailySummary
 
 __all__ = [
     "LhbDetail",
@@ -29,6 +38,8 @@ __all__ = [
     "StockFundFlow",
     "IndustryFundFlow",
     "ConceptFundFlow",
+    "ConceptFundFlowRollup",
+    "IndustryFundFlowRollup",
     "ZtPool",
     "ZtPoolDown",
     "LhbHotInstitution",
@@ -38,11 +49,15 @@ __all__ = [
     "TradingCalendar",
     "TaskExecution",
     "TaskStatus",
+    "BackfillJob",
+    "BackfillUnit",
     "StockConcept",
     "StockConceptMapping",
     "TradingCalendarConcept",
     "LimitUpBoard",
     "LimitUpBoardConcept",
     "StockHistory",
+    "TradeDate",
+    "DailySummary",
 ]
 
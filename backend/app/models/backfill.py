@@ -0,0 +1,51 @@
+"""
+历史数据回填数据模型
+一个回填作业按 (任务类型, 交易日) 拆分为若干工作单元，单元完成即落库，中断后从未完成的单元继续
+"""
+from sqlalchemy import Column, String, Date, DateTime, Integer, Float, Text, ForeignKey, Index, UniqueConstraint
+
+from app.database.base import BaseModel
+from app.models.task_execution import TaskStatusEnum, _default_task_status
+
+
+class BackfillJob(BaseModel):
+    """回填作业表"""
+    __tablename__ = "backfill_job"
+
+    task_types = Column(String(500), nullable=False, comment="任务类型（逗号分隔）")
+    start_date = Column(Date, nullable=False, comment="开始日期")
+    end_date = Column(Date, nullable=False, comment="结束日期")
+    status = Column(TaskStatusEnum(), nullable=False, default=_default_task_status, index=True, comment="作业状态")
+    max_workers = Column(Integer, nullable=True, comment="并发单元数")
+    units_per_minute = Column(Float, nullable=True, comment="每分钟最多启动的单元数")
+    run_started_at = Column(DateTime, nullable=True, comment="本轮执行开始时间")
+    heartbeat_at = Column(DateTime, nullable=True, comment="最近一次检查点时间")
+    finished_at = Column(DateTime, nullable=True, comment="结束时间")
+    triggered_by = Column(String(20), nullable=False, default="manual", comment="触发方式：api/script")
+    error_message = Column(Text, nullable=True, comment="错误信息")
+
+    __table_args__ = (
+        {"comment": "历史数据回填作业表"},
+    )
+
+
+class BackfillUnit(BaseModel):
+    """回填工作单元表（一个任务类型 + 一个交易日）"""
+    __tablename__ = "backfill_unit"
+
+    job_id = Column(Integer, ForeignKey("backfill_job.id", ondelete="CASCADE"), nullable=False, comment="作业ID")
+    task_type = Column(String(50), nullable=False, comment="任务类型")
+    target_date = Column(Date, nullable=False, comment="目标日期")
+    status = Column(TaskStatusEnum(), nullable=False, default=_default_task_status, comment="单元状态")
+    attempts = Column(Integer, nullable=False, default=0, comment="已执行次数")
+    rows = Column(Integer, nullable=False, default=0, comment="写入行数")
+    duration = Column(Float, nullable=True, comment="执行耗时（秒）")
+    started_at = Column(DateTime, nullable=True, comment="开始时间")
+    finished_at = Column(DateTime, nullable=True, comment="结束时间")
+    message = Column(Text, nullable=True, comment="执行结果或错误信息")
+
+    __table_args__ = (
+        UniqueConstraint("job_id", "task_type", "target_date", name="uq_backfill_unit_job_task_date"),
+        Index("idx_backfill_unit_job_status", "job_id", "status"),
+        {"comment": "历史数据回填工作单元表"},
+    )
@@ -0,0 +1,27 @@
+"""
+每日市场概览数据模型
+"""
+from sqlalchemy import Column, Date, Integer, JSON, Numeric
+
+from app.database.base import BaseModel
+
+
+class DailySummary(BaseModel):
+    """每日市场概览（同步完成后由各原始表汇总，仪表盘一次读取）"""
+    __tablename__ = "daily_summary"
+
+    date = Column(Date, nullable=False, unique=True, index=True)
+    indices = Column(JSON, nullable=True, comment="指数收盘：[{index_code, index_name, close_price, change_percent, ...}]")
+    zt_count = Column(Integer, nullable=False, default=0, comment="涨停家数")
+    zt_down_count = Column(Integer, nullable=False, default=0, comment="跌停家数")
+    sector_rise_count = Column(Integer, nullable=False, default=0, comment="上涨板块数")
+    sector_fall_count = Column(Integer, nullable=False, default=0, comment="下跌板块数")
+    sector_total_count = Column(Integer, nullable=False, default=0, comment="板块总数")
+    top_concepts = Column(JSON, nullable=True, comment="概念净流入前列：[{concept, net_amount, index_change_percent}]")
+    lhb_count = Column(Integer, nullable=False, default=0, comment="龙虎榜上榜股票数")
+    lhb_net_buy_amount = Column(Numeric(20, 2), comment="龙虎榜合计净买额")
+    lhb_top = Column(JSON, nullable=True, comment="龙虎榜净买额前列：[{stock_code, stock_name, net_buy_amount, change_percent}]")
+
+    __table_args__ = (
+        {"comment": "每日市场概览表"},
+    )
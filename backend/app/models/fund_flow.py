@@ -1,7 +1,7 @@
 """
 个股资金流数据模型
 """
-from sqlalchemy import Column, String, Date, Numeric, Boolean, Index
+from sqlalchemy import Column, String, Date, Numeric, Boolean, Integer, Index, UniqueConstraint
 from datetime import date
 
 from app.database.base import BaseModel
@@ -28,6 +28,7 @@ class StockFundFlow(BaseModel):
         Index('idx_stock_fund_flow_date_stock', 'date', 'stock_code'),
         Index('idx_stock_fund_flow_stock_date', 'stock_code', 'date'),
         Index('idx_stock_fund_flow_date_main_net', 'date', 'main_net_inflow'),
+        UniqueConstraint('date', 'stock_code', name='uq_stock_fund_flow_date_stock'),
         {"comment": "个股资金流表"},
     )
 
@@ -51,6 +52,7 @@ class IndustryFundFlow(BaseModel):
     __table_args__ = (
         Index('idx_industry_fund_flow_date_industry', 'date', 'industry'),
         Index('idx_industry_fund_flow_date_net', 'date', 'net_amount'),
+        UniqueConstraint('date', 'industry', name='uq_industry_fund_flow_date_industry'),
         {"comment": "行业/概念资金流表（stock_fund_flow_industry 即时）"},
     )
 
@@ -74,6 +76,47 @@ class ConceptFundFlow(BaseModel):
     __table_args__ = (
         Index('idx_concept_fund_flow_date_concept', 'date', 'concept'),
         Index('idx_concept_fund_flow_date_net', 'date', 'net_amount'),
+        UniqueConstraint('date', 'concept', name='uq_concept_fund_flow_date_concept'),
         {"comment": "概念资金流表（stock_fund_flow_concept 即时）"},
     )
 
+
+
+class ConceptFundFlowRollup(BaseModel):
+    """概念资金流日汇总（由 concept_fund_flow 增量计算）"""
+    __tablename__ = "concept_fund_flow_rollup"
+
+    date = Column(Date, nullable=False, index=True)
+    concept = Column(String(200), nullable=False)
+    net_amount = Column(Numeric(16, 2))  # 当日净额
+    cum_net_amount = Column(Numeric(20, 2), nullable=False)  # 截至当日的累计净额（前缀和）
+    net_amount_5d = Column(Numeric(18, 2))  # 近5个交易日净额
+    net_amount_10d = Column(Numeric(18, 2))  # 近10个交易日净额
+    net_amount_20d = Column(Numeric(18, 2))  # 近20个交易日净额
+    net_amount_rank = Column(Integer)  # 当日净额排名（1 为最高）
+
+    __table_args__ = (
+        Index('idx_concept_fund_flow_rollup_concept_date', 'concept', 'date'),
+        UniqueConstraint('date', 'concept', name='uq_concept_fund_flow_rollup_date_concept'),
+        {"comment": "概念资金流日汇总表"},
+    )
+
+
+class IndustryFundFlowRollup(BaseModel):
+    """行业资金流日汇总（由 industry_fund_flow 增量计算）"""
+    __tablename__ = "industry_fund_flow_rollup"
+
+    date = Column(Date, nullable=False, index=True)
+    industry = Column(String(100), nullable=False)
+    net_amount = Column(Numeric(16, 2))  # 当日净额
+    cum_net_amount = Column(Numeric(20, 2), nullable=False)  # 截至当日的累计净额（前缀和）
+    net_amount_5d = Column(Numeric(18, 2))  # 近5个交易日净额
+    net_amount_10d = Column(Numeric(18, 2))  # 近10个交易日净额
+    net_amount_20d = Column(Numeric(18, 2))  # 近20个交易日净额
+    net_amount_rank = Column(Integer)  # 当日净额排名（1 为最高）
+
+    __table_args__ = (
+        Index('idx_industry_fund_flow_rollup_industry_date', 'industry', 'date'),
+        UniqueConstraint('date', 'industry', name='uq_industry_fund_flow_rollup_date_industry'),
+        {"comment": "行业资金流日汇总表"},
+    )
@@ -1,7 +1,7 @@
 """
 大盘指数数据模型
 """
-from sqlalchemy import Column, String, Date, Numeric, BigInteger
+from sqlalchemy import Column, String, Date, Numeric, BigInteger, UniqueConstraint
 from datetime import date
 
 from app.database.base import BaseModel
@@ -20,6 +20,7 @@ class IndexHistory(BaseModel):
     amount = Column(Numeric(15, 2))
     
     __table_args__ = (
+        UniqueConstraint("date", "index_code", name="uq_index_history_date_code"),
         {"comment": "大盘指数历史表"},
     )
 
@@ -25,6 +25,7 @@ class LhbDetail(BaseModel):
     concept = Column(String(200), comment="概念板块")
     
     __table_args__ = (
+        UniqueConstraint("date", "stock_code", name="uq_lhb_detail_date_stock"),
         {"comment": "龙虎榜详情表"},
     )
     
@@ -46,6 +47,7 @@ class LhbInstitution(BaseModel):
     flag = Column(String(10), comment="交易方向：买入/卖出", index=True)
     
     __table_args__ = (
+        UniqueConstraint("lhb_detail_id", "institution_name", "flag", name="uq_lhb_institution_detail_name_flag"),
         {"comment": "龙虎榜机构明细表"},
     )
     
@@ -1,7 +1,7 @@
 """
 股票历史行情数据模型
 """
-from sqlalchemy import Column, String, Date, Numeric, Index, BigInteger
+from sqlalchemy import Column, String, Date, Numeric, Index, BigInteger, UniqueConstraint
 from datetime import date
 
 from app.database.base import BaseModel
@@ -28,5 +28,6 @@ class StockHistory(BaseModel):
     __table_args__ = (
         Index('idx_stock_history_date_stock', 'date', 'stock_code'),
         Index('idx_stock_history_stock_date', 'stock_code', 'date'),
+        UniqueConstraint('date', 'stock_code', name='uq_stock_history_date_stock'),
         {"comment": "股票历史行情表"},
     )
@@ -1,7 +1,7 @@
 """
 任务执行历史数据模型
 """
-from sqlalchemy import Column, String, DateTime, Text, JSON, Enum as SQLEnum, TypeDecorator
+from sqlalchemy import Column, String, DateTime, Integer, Text, JSON, Index, Enum as SQLEnum, TypeDecorator, text
 from datetime import datetime
 import enum
 
@@ -70,8 +70,29 @@ class TaskExecution(BaseModel):
     error_message = Column(Text, nullable=True, comment="错误信息")
     triggered_by = Column(String(20), nullable=False, default="scheduler", comment="触发方式：scheduler/manual")
     target_date = Column(String(20), nullable=True, comment="目标日期")
+
+    # 任务队列字段（仅由队列入队的记录使用，job_payload 为空的是直接执行的历史记录）
+    job_payload = Column(JSON(none_as_null=True), nullable=True, comment="队列任务内容：{kind, kwargs}")
+    dedupe_key = Column(String(200), nullable=True, comment="去重键，同一键同时只能有一个等待/执行中的任务")
+    worker_id = Column(String(100), nullable=True, comment="领取任务的工作进程")
+    lease_expires_at = Column(DateTime, nullable=True, comment="租约到期时间，过期未续约的任务可被重新领取")
+    heartbeat_at = Column(DateTime, nullable=True, comment="最近一次心跳时间")
+    attempts = Column(Integer, nullable=False, default=0, server_default="0", comment="已领取次数")
     
     __table_args__ = (
+        Index(
+            "uq_task_execution_active_dedupe",
+            "dedupe_key",
+            unique=True,
+            postgresql_where=text("status IN ('pending', 'running') AND dedupe_key IS NOT NULL"),
+            sqlite_where=text("status IN ('pending', 'running') AND dedupe_key IS NOT NULL"),
+        ),
+        Index(
+            "idx_task_execution_queue",
+            "status",
+            "id",
+            postgresql_where=text("job_payload IS NOT NULL"),
+        ),
         {"comment": "任务执行历史表"},
     )
 
@@ -1,7 +1,7 @@
 """
 涨停池数据模型
 """
-from sqlalchemy import Column, String, Date, Numeric, Integer, BigInteger, Time, Text, Index
+from sqlalchemy import Column, String, Date, Numeric, Integer, BigInteger, Time, Text, Index, UniqueConstraint
 from datetime import date, time
 
 from app.database.base import BaseModel
@@ -33,6 +33,7 @@ class ZtPool(BaseModel):
     __table_args__ = (
         Index('idx_zt_pool_date_stock', 'date', 'stock_code'),
         Index('idx_zt_pool_stock_date', 'stock_code', 'date'),
+        UniqueConstraint('date', 'stock_code', name='uq_zt_pool_date_stock'),
         {"comment": "涨停池表"},
     )
 
@@ -61,6 +62,7 @@ class ZtPoolDown(BaseModel):
     limit_up_reason = Column(Text)  # 跌停原因
 
     __table_args__ = (
+        UniqueConstraint('date', 'stock_code', name='uq_zt_pool_down_date_stock'),
         {"comment": "跌停池表"},
     )
 
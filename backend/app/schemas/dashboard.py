@@ -0,0 +1,47 @@
+"""
+仪表盘概览Schema
+"""
+from pydantic import BaseModel, Field
+from typing import List, Optional
+from datetime import date
+
+
+class DashboardIndexItem(BaseModel):
+    """指数收盘"""
+    index_code: str
+    index_name: str
+    close_price: Optional[float] = None
+    change_percent: Optional[float] = None
+    volume: Optional[int] = None
+    amount: Optional[float] = None
+    volume_change_percent: Optional[float] = Field(None, description="成交量变化比例（相比前一交易日）")
+
+
+class DashboardConceptItem(BaseModel):
+    """概念净流入"""
+    concept: str
+    net_amount: Optional[float] = None  # 净额（元）
+    index_change_percent: Optional[float] = None  # 概念指数涨跌幅（%）
+
+
+class DashboardLhbItem(BaseModel):
+    """龙虎榜净买额前列"""
+    stock_code: str
+    stock_name: str
+    net_buy_amount: Optional[float] = None
+    change_percent: Optional[float] = None
+
+
+class DashboardSnapshotResponse(BaseModel):
+    """仪表盘每日概览"""
+    date: date
+    indices: List[DashboardIndexItem] = Field(default_factory=list)
+    zt_count: int = Field(0, description="涨停家数")
+    zt_down_count: int = Field(0, description="跌停家数")
+    sector_rise_count: int = Field(0, description="上涨板块数")
+    sector_fall_count: int = Field(0, description="下跌板块数")
+    sector_total_count: int = Field(0, description="板块总数")
+    top_concepts: List[DashboardConceptItem] = Field(default_factory=list, description="概念净流入前列")
+    lhb_count: int = Field(0, description="龙虎榜上榜股票数")
+    lhb_net_buy_amount: Optional[float] = Field(None, description="龙虎榜合计净买额")
+    lhb_top: List[DashboardLhbItem] = Field(default_factory=list, description="龙虎榜净买额前列")
@@ -36,6 +36,8 @@ class FundFlowFilterRequest(BaseModel):
     conditions: List[DateRangeCondition] = Field(..., description="筛选条件列表，多个条件之间是AND关系")
     concept_ids: Optional[List[int]] = Field(None, description="概念板块ID列表（可选）")
     concept_names: Optional[List[str]] = Field(None, description="概念板块名称列表（可选）")
+    consecutive_days: Optional[int] = Field(None, ge=1, description="连续N日，净流入>M的查询条件（N，截止到条件中最晚的结束日期）")
+    min_net_inflow: Optional[float] = Field(None, ge=0, description="连续N日，净流入>M的查询条件（M，单位：元）")
     page: int = Field(1, ge=1, description="页码")
     page_size: int = Field(20, ge=1, le=100, description="每页数量")
     sort_by: Optional[str] = Field("main_net_inflow", description="排序字段")
@@ -52,6 +54,25 @@ class FundFlowFilterResponse(BaseModel):
     concepts: Optional[List[dict]] = Field(None, description="概念板块列表")
 
 
+class StockFundFlowItem(BaseModel):
+    """个股资金流（单日）"""
+    date: date
+    stock_code: str
+    stock_name: str
+    current_price: Optional[float] = None  # 最新价
+    change_percent: Optional[float] = None  # 涨跌幅（%）
+    turnover_rate: Optional[float] = None  # 换手率（%）
+    main_inflow: Optional[float] = None  # 主力流入
+    main_outflow: Optional[float] = None  # 主力流出
+    main_net_inflow: Optional[float] = None  # 主力净流入
+    turnover_amount: Optional[float] = None  # 成交额
+    is_limit_up: Optional[bool] = None  # 是否涨停
+    is_lhb: Optional[bool] = None  # 是否龙虎榜
+    
+    class Config:
+        from_attributes = True
+
+
 class ConceptNetAmountRange(BaseModel):
     """概念净额区间"""
     min: Optional[float] = Field(None, description="最小净额（单位：元），如 100000000 表示1亿")
@@ -80,6 +101,7 @@ class ConceptDateRangeCondition(BaseModel):
     """概念日期范围筛选条件"""
     date_range: Optional[DateRange] = Field(None, description="日期范围（可选）")
     net_amount: Optional[ConceptNetAmountRange] = Field(None, description="净额区间条件")
+    range_net_amount: Optional[ConceptNetAmountRange] = Field(None, description="日期范围内净额合计区间条件（无日期范围时为全部历史合计）")
     inflow: Optional[ConceptInflowRange] = Field(None, description="流入资金区间条件")
     outflow: Optional[ConceptOutflowRange] = Field(None, description="流出资金区间条件")
     index_change_percent: Optional[ConceptIndexChangeRange] = Field(None, description="指数涨跌幅区间条件")
@@ -51,10 +51,11 @@ class LhbDetailResponse(LhbDetailBase):
 class LhbListResponse(BaseModel):
     """龙虎榜列表响应"""
     items: List[LhbDetailResponse]
-    total: int
+    total: Optional[int] = Field(None, description="总数（游标分页时不返回）")
     page: int
     page_size: int
-    total_pages: int
+    total_pages: Optional[int] = None
+    next_cursor: Optional[str] = Field(None, description="下一页游标，为空表示没有下一页")
 
 
 class LhbStockStatisticsItem(BaseModel):
@@ -228,10 +229,11 @@ class ActiveBranchResponse(BaseModel):
 class ActiveBranchListResponse(BaseModel):
     """活跃营业部列表响应"""
     items: List[ActiveBranchResponse]
-    total: int
+    total: Optional[int] = Field(None, description="总数（游标分页时不返回）")
     page: int
     page_size: int
-    total_pages: int
+    total_pages: Optional[int] = None
+    next_cursor: Optional[str] = Field(None, description="下一页游标，为空表示没有下一页")
 
 
 class ActiveBranchDetailResponse(BaseModel):
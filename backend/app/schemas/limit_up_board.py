@@ -217,10 +217,11 @@ class LimitUpBoardResponse(LimitUpBoardBase):
 class LimitUpBoardListResponse(BaseModel):
     """涨停板分析列表响应"""
     items: List[LimitUpBoardResponse]
-    total: int
+    total: Optional[int] = Field(None, description="总数（游标分页时不返回）")
     page: int
     page_size: int
-    total_pages: int
+    total_pages: Optional[int] = None
+    next_cursor: Optional[str] = Field(None, description="下一页游标，为空表示没有下一页")
 
 
 class LimitUpBoardListParams(BaseModel):
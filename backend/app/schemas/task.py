@@ -25,6 +25,9 @@ class TaskExecutionResponse(TaskExecutionBase):
     """任务执行响应"""
     id: int
     created_at: datetime
+    worker_id: Optional[str] = Field(None, description="执行该任务的工作进程（队列任务）")
+    attempts: Optional[int] = Field(None, description="领取次数（队列任务）")
+    heartbeat_at: Optional[datetime] = Field(None, description="最近一次心跳时间（队列任务）")
     
     class Config:
         from_attributes = True
@@ -33,10 +36,11 @@ class TaskExecutionResponse(TaskExecutionBase):
 class TaskExecutionListResponse(BaseModel):
     """任务执行列表响应"""
     items: List[TaskExecutionResponse]
-    total: int
+    total: Optional[int] = Field(None, description="总数（游标分页时不返回）")
     page: int
     page_size: int
-    total_pages: int
+    total_pages: Optional[int] = None
+    next_cursor: Optional[str] = Field(None, description="下一页游标，为空表示没有下一页")
 
 
 class TaskExecutionCreate(BaseModel):
@@ -60,6 +64,22 @@ class TaskRunResponse(BaseModel):
     task_types: List[str]
 
 
+class BackfillRequest(BaseModel):
+    """历史数据回填请求"""
+    task_types: List[str] = Field(..., description="任务类型列表")
+    start_date: str = Field(..., description="开始日期，格式：YYYY-MM-DD")
+    end_date: str = Field(..., description="结束日期，格式：YYYY-MM-DD")
+    max_workers: Optional[int] = Field(None, ge=1, le=16, description="并发单元数，不指定则使用默认配置")
+    units_per_minute: Optional[float] = Field(None, ge=0, description="每分钟最多启动的单元数，不指定则使用默认配置")
+
+
+class BackfillRunResponse(BaseModel):
+    """历史数据回填提交响应"""
+    job_id: int
+    message: str
+    total_units: int
+
+
 class ScheduledJobInfo(BaseModel):
     """定时任务信息"""
     id: str = Field(..., description="任务ID")
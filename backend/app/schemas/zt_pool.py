@@ -1,7 +1,7 @@
 """
 涨停池Pydantic模式
 """
-from pydantic import BaseModel
+from pydantic import BaseModel, Field
 from typing import Optional, List, Dict
 from datetime import date, datetime, time
 from decimal import Decimal
@@ -66,10 +66,11 @@ class ZtPoolResponse(ZtPoolBase):
 class ZtPoolListResponse(BaseModel):
     """涨停池列表响应"""
     items: List[ZtPoolResponse]
-    total: int
+    total: Optional[int] = Field(None, description="总数（游标分页时不返回）")
     page: int
     page_size: int
-    total_pages: int
+    total_pages: Optional[int] = None
+    next_cursor: Optional[str] = Field(None, description="下一页游标，为空表示没有下一页")
 
 
 class ZtPoolUpdateRequest(BaseModel):
@@ -13,12 +13,57 @@ import math
 
 from app.models.lhb import ActiveBranch
 from app.utils.akshare_utils import safe_akshare_call
+from app.utils.count_strategy import CountCacheKey, paginate_query
+from app.utils.query_cache import invalidate_query_cache, is_closed_date
+from app.utils.keyset import KeysetPage, SortKey, keyset_paginate, model_column, sort_signature
 import akshare as ak
 
 
 class ActiveBranchService:
     """活跃营业部服务类"""
     
+    @staticmethod
+    def _build_list_query(
+        db: Session,
+        target_date: date,
+        institution_name: Optional[str] = None,
+        institution_code: Optional[str] = None,
+        buy_stock_name: Optional[str] = None,
+    ):
+        """活跃营业部列表的筛选条件（不含排序）"""
+        # 构建基础查询 - 先应用日期过滤（有索引）
+        query = db.query(ActiveBranch).filter(ActiveBranch.date == target_date)
+        
+        # 营业部代码查询（精确匹配，有索引，优先应用）
+        if institution_code and institution_code.strip():
+            query = query.filter(ActiveBranch.institution_code == institution_code.strip())
+        
+        # 营业部名称模糊查询 - 优化：使用ILIKE（PostgreSQL，不区分大小写，更高效）
+        if institution_name and institution_name.strip():
+            institution_name_clean = institution_name.strip()
+            # PostgreSQL支持ilike，比使用func.lower() + like更高效
+            query = query.filter(ActiveBranch.institution_name.ilike(f"%{institution_name_clean}%"))
+        
+        # 买入股票名称查询 - 查询buy_stocks字段包含该股票名称的记录
+        # 由于buy_stocks字段可能包含多个股票名称（用逗号、空格等分隔），
+        # LIKE 只做初步过滤，精确匹配由 _buys_stock 在内存中完成
+        if buy_stock_name and buy_stock_name.strip():
+            buy_stock_name_clean = buy_stock_name.strip()
+            query = query.filter(
+                ActiveBranch.buy_stocks.isnot(None),
+                ActiveBranch.buy_stocks != '',
+                ActiveBranch.buy_stocks.ilike(f"%{buy_stock_name_clean}%")
+            )
+        return query
+    
+    @staticmethod
+    def _buys_stock(item: ActiveBranch, buy_stock_name: str) -> bool:
+        """buy_stocks 字段（逗号、空格分隔）是否精确包含该股票名称"""
+        if not item.buy_stocks:
+            return False
+        stocks = re.split(r'[,，\s]+', item.buy_stocks.strip())
+        return buy_stock_name.strip() in [s.strip() for s in stocks]
+    
     @staticmethod
     def get_list(
         db: Session,
@@ -30,6 +75,7 @@ class ActiveBranchService:
         institution_name: Optional[str] = None,
         institution_code: Optional[str] = None,
         buy_stock_name: Optional[str] = None,
+        count_mode: Optional[str] = None,
     ) -> tuple[List[ActiveBranch], int]:
         """
         获取活跃营业部列表
@@ -44,6 +90,7 @@ class ActiveBranchService:
             institution_name: 营业部名称（模糊查询）
             institution_code: 营业部代码
             buy_stock_name: 买入股票名称（查询buy_stocks字段包含该股票名称的记录）
+            count_mode: 总数计算方式（exact/estimate/none），None 使用 LIST_COUNT_MODE
         """
         try:
             # 优化：先获取最新日期（如果未指定），使用更高效的查询
@@ -54,30 +101,9 @@ class ActiveBranchService:
                     return [], 0
                 target_date = latest_date_subquery
             
-            # 构建基础查询 - 先应用日期过滤（有索引）
-            query = db.query(ActiveBranch).filter(ActiveBranch.date == target_date)
-            
-            # 营业部代码查询（精确匹配，有索引，优先应用）
-            if institution_code and institution_code.strip():
-                query = query.filter(ActiveBranch.institution_code == institution_code.strip())
-            
-            # 营业部名称模糊查询 - 优化：使用ILIKE（PostgreSQL，不区分大小写，更高效）
-            if institution_name and institution_name.strip():
-                institution_name_clean = institution_name.strip()
-                # PostgreSQL支持ilike，比使用func.lower() + like更高效
-                query = query.filter(ActiveBranch.institution_name.ilike(f"%{institution_name_clean}%"))
-            
-            # 买入股票名称查询 - 查询buy_stocks字段包含该股票名称的记录
-            # 由于buy_stocks字段可能包含多个股票名称（用逗号、空格等分隔），
-            # 需要先查询所有记录，然后在内存中过滤以确保精确匹配
-            if buy_stock_name and buy_stock_name.strip():
-                buy_stock_name_clean = buy_stock_name.strip()
-                # 先使用LIKE进行初步过滤（数据库层面）
-                query = query.filter(
-                    ActiveBranch.buy_stocks.isnot(None),
-                    ActiveBranch.buy_stocks != '',
-                    ActiveBranch.buy_stocks.ilike(f"%{buy_stock_name_clean}%")
-                )
+            query = ActiveBranchService._build_list_query(
+                db, target_date, institution_name, institution_code, buy_stock_name
+            )
             
             # 排序 - 先构建排序，再分页
             if sort_by:
@@ -102,15 +128,10 @@ class ActiveBranchService:
                 all_items = query.all()
                 
                 # 在内存中过滤：确保buy_stocks字段精确包含该股票名称
-                buy_stock_name_clean = buy_stock_name.strip()
-                filtered_items = []
-                for item in all_items:
-                    if not item.buy_stocks:
-                        continue
-                    # 解析buy_stocks字段，检查是否包含该股票名称
-                    stocks = re.split(r'[,，\s]+', item.buy_stocks.strip())
-                    if buy_stock_name_clean in [s.strip() for s in stocks]:
-                        filtered_items.append(item)
+                filtered_items = [
+                    item for item in all_items
+                    if ActiveBranchService._buys_stock(item, buy_stock_name)
+                ]
                 
                 # 重新应用排序（如果之前有排序）
                 if sort_by:
@@ -141,45 +162,21 @@ class ActiveBranchService:
                 
                 return items, total
             
-            # 优化：先获取总数（在分页前），但使用更高效的方法
-            # 对于第一页且没有过滤条件时，可以跳过count
-            need_count = True
-            if page == 1 and not institution_name and not institution_code:
-                # 第一页且无过滤条件，可以先获取数据，再判断是否需要count
-                need_count = False
-            
-            # 分页
-            offset = (page - 1) * page_size
-            items = query.offset(offset).limit(page_size + 1).all()
-            
-            # 判断是否有下一页
-            has_next = len(items) > page_size
-            if has_next:
-                items = items[:page_size]
-            
-            # 计算总数 - 优化：只在必要时执行count
-            if page == 1 and not has_next and not need_count:
-                # 第一页，没有下一页，且无过滤条件，总数就是当前结果数
-                total = len(items)
-            elif page == 1 and not has_next:
-                # 第一页，没有下一页，总数就是当前结果数
-                total = len(items)
-            else:
-                # 需要count：使用子查询优化count性能
-                # 对于有LIKE查询的情况，count可能较慢，但这是必要的
-                try:
-                    # 使用独立的count查询，避免重复执行排序等操作
-                    count_query = db.query(func.count(ActiveBranch.id)).filter(ActiveBranch.date == target_date)
-                    if institution_code and institution_code.strip():
-                        count_query = count_query.filter(ActiveBranch.institution_code == institution_code.strip())
-                    if institution_name and institution_name.strip():
-                        institution_name_clean = institution_name.strip()
-                        count_query = count_query.filter(ActiveBranch.institution_name.ilike(f"%{institution_name_clean}%"))
-                    total = count_query.scalar() or 0
-                except Exception as count_error:
-                    # 如果count失败，回退到使用原query的count（可能较慢）
-                    print(f"[ActiveBranchService] Count查询优化失败，使用回退方案: {str(count_error)}")
-                    total = query.count()
+            # 先获取分页数据，再按计数策略决定是否计算总数（精确总数按日期缓存）
+            result = paginate_query(
+                db, query, page, page_size, count_mode,
+                cache_key=CountCacheKey(
+                    "active_branch_list",
+                    {
+                        "date": target_date,
+                        "institution_name": institution_name,
+                        "institution_code": institution_code,
+                    },
+                    tags=[("active_branch", target_date)],
+                    closed=is_closed_date(target_date),
+                ),
+            )
+            items, total = result.items, result.total
             
             return items, total
             
@@ -189,6 +186,47 @@ class ActiveBranchService:
             traceback.print_exc()
             raise
     
+    @staticmethod
+    def get_list_by_cursor(
+        db: Session,
+        target_date: Optional[date] = None,
+        page_size: int = 20,
+        sort_by: Optional[str] = None,
+        order: str = "desc",
+        institution_name: Optional[str] = None,
+        institution_code: Optional[str] = None,
+        buy_stock_name: Optional[str] = None,
+        cursor: Optional[str] = None,
+    ) -> KeysetPage:
+        """
+        获取活跃营业部列表（游标分页）
+        排序与 get_list 一致，id 作为同值时的次序；买入股票名称按批读取并在内存中精确匹配，
+        不再把全部候选记录取回内存。
+        """
+        if not target_date:
+            target_date = db.query(func.max(ActiveBranch.date)).scalar()
+            if not target_date:
+                return KeysetPage(items=[], next_cursor=None, has_more=False)
+        
+        sort_column = model_column(ActiveBranch, sort_by)
+        if sort_column is None:
+            sort_column, order = ActiveBranch.net_amount, "desc"
+        descending = order == "desc"
+        keys = [SortKey(sort_column, descending=descending), SortKey(ActiveBranch.id, descending=descending)]
+        
+        query = ActiveBranchService._build_list_query(
+            db, target_date, institution_name, institution_code, buy_stock_name
+        )
+        predicate = None
+        if buy_stock_name and buy_stock_name.strip():
+            def predicate(item: ActiveBranch) -> bool:
+                return ActiveBranchService._buys_stock(item, buy_stock_name)
+        return keyset_paginate(
+            query, keys, page_size, cursor=cursor,
+            signature=sort_signature(f"active_branch:{target_date}", keys),
+            predicate=predicate,
+        )
+    
     @staticmethod
     def save_active_branch_data(
         db: Session,
@@ -373,6 +411,7 @@ class ActiveBranchService:
         try:
             db.commit()
             print(f"成功保存 {count} 条活跃营业部数据到数据库")
+            invalidate_query_cache("active_branch", target_date)
         except Exception as e:
             print(f"[ActiveBranchService] 提交失败: {str(e)}")
             db.rollback()
@@ -404,8 +443,12 @@ class ActiveBranchService:
             if df is None or df.empty:
                 print(f"目标日期 {target_date} 无数据，尝试查找最近有数据的日期...")
                 actual_date = None
-                for i in range(1, 8):
-                    check_date = target_date - timedelta(days=i)
+                from app.utils.trade_calendar import get_trade_calendar
+                # 只尝试最近7天内的交易日，跳过周末和节假日
+                recent_days = get_trade_calendar(db).trading_days_between(
+                    target_date - timedelta(days=7), target_date - timedelta(days=1)
+                )
+                for check_date in reversed(recent_days):
                     check_date_str = check_date.strftime("%Y%m%d")
                     print(f"  尝试日期: {check_date} ({check_date_str})")
                     df = safe_akshare_call(ak.stock_lhb_hyyyb_em, start_date=check_date_str, end_date=check_date_str)
@@ -0,0 +1,423 @@
+"""
+历史数据回填服务
+按 (任务类型, 交易日) 拆分工作单元并落库，按依赖图并发执行：
+- 每个单元完成即提交（检查点），进程中断后再次执行只处理未成功的单元
+- 单元启动速率受令牌桶限制，并发受 AKShare/数据库资源上限限制
+- 进度与吞吐（单元/分钟、行/秒）根据单元表实时统计
+"""
+import threading
+import logging
+from datetime import date, datetime, timedelta
+from typing import Any, Dict, List, Optional
+
+from sqlalchemy import desc, func, insert, or_
+from sqlalchemy.orm import Session
+
+from app.models.backfill import BackfillJob, BackfillUnit
+from app.models.task_execution import TaskStatus
+
+logger = logging.getLogger(__name__)
+
+
+def _unit_key(task_type: str, target_date: date) -> str:
+    return f"{task_type}@{target_date.isoformat()}"
+
+
+class BackfillService:
+    """历史数据回填服务类"""
+
+    @staticmethod
+    def create_job(
+        db: Session,
+        task_types: List[str],
+        start_date: date,
+        end_date: date,
+        max_workers: Optional[int] = None,
+        units_per_minute: Optional[float] = None,
+        triggered_by: str = "api",
+    ) -> BackfillJob:
+        """
+        创建回填作业，并按 (任务类型, 交易日) 写入工作单元
+
+        Raises:
+            ValueError: 任务类型未知、日期范围无效或范围内没有交易日
+        """
+        from app.tasks.scheduler import get_sync_task_map
+        from app.utils.trade_calendar import get_trade_calendar
+
+        task_types = list(dict.fromkeys(task_types or []))
+        if not task_types:
+            raise ValueError("请指定要回填的任务类型")
+        unknown = [t for t in task_types if t not in get_sync_task_map()]
+        if unknown:
+            raise ValueError(f"未知任务类型: {', '.join(unknown)}")
+        if start_date > end_date:
+            raise ValueError("开始日期不能晚于结束日期")
+
+        trading_days = get_trade_calendar(db).trading_days_between(start_date, end_date)
+        if not trading_days:
+            raise ValueError(f"{start_date} 至 {end_date} 之间没有交易日")
+
+        job = BackfillJob(
+            task_types=",".join(task_types),
+            start_date=start_date,
+            end_date=end_date,
+            status=TaskStatus.PENDING,
+            max_workers=max_workers,
+            units_per_minute=units_per_minute,
+            triggered_by=triggered_by,
+        )
+        db.add(job)
+        db.flush()
+        db.execute(insert(BackfillUnit), [
+            {
+                "job_id": job.id,
+                "task_type": task_type,
+                "target_date": d,
+                "status": TaskStatus.PENDING,
+                "attempts": 0,
+                "rows": 0,
+            }
+            for d in trading_days
+            for task_type in task_types
+        ])
+        db.commit()
+        db.refresh(job)
+        print(f"创建回填作业 {job.id}: {job.task_types}，{start_date} 至 {end_date}，共 {len(trading_days) * len(task_types)} 个单元")
+        return job
+
+    @staticmethod
+    def is_active(job: BackfillJob) -> bool:
+        """作业是否正在某个进程中执行（心跳未过期）"""
+        from app.config import settings
+
+        if job.status != TaskStatus.RUNNING or job.heartbeat_at is None:
+            return False
+        return datetime.now() - job.heartbeat_at < timedelta(minutes=settings.BACKFILL_STALE_MINUTES)
+
+    @staticmethod
+    def claim_job(db: Session, job_id: int) -> Optional[datetime]:
+        """
+        认领作业：一条条件 UPDATE 把未在执行（或心跳已过期）的作业置为执行中
+
+        并发的继续执行请求只有一个能认领成功，不会重复执行同一批单元。
+
+        Returns:
+            本次认领时间（作为本轮执行的标识），作业不存在或正在其它进程执行时返回 None
+        """
+        from app.config import settings
+
+        now = datetime.now()
+        stale_before = now - timedelta(minutes=settings.BACKFILL_STALE_MINUTES)
+        claimed = db.query(BackfillJob).filter(
+            BackfillJob.id == job_id,
+            or_(
+                BackfillJob.status != TaskStatus.RUNNING,
+                BackfillJob.heartbeat_at.is_(None),
+                BackfillJob.heartbeat_at < stale_before,
+            )
+        ).update({
+            BackfillJob.status: TaskStatus.RUNNING,
+            BackfillJob.run_started_at: now,
+            BackfillJob.heartbeat_at: now,
+            BackfillJob.finished_at: None,
+            BackfillJob.error_message: None,
+        }, synchronize_session=False)
+        db.commit()
+        return now if claimed else None
+
+    @staticmethod
+    def _heartbeat_loop(session_factory, job_id: int, run_started_at: datetime, stop: threading.Event) -> None:
+        """执行期间定期刷新心跳（单个单元耗时很长时也不会被视为中断）；只刷新本轮认领的执行"""
+        from app.config import settings
+
+        while not stop.wait(settings.BACKFILL_HEARTBEAT_SECONDS):
+            db = session_factory()
+            try:
+                db.query(BackfillJob).filter(
+                    BackfillJob.id == job_id,
+                    BackfillJob.run_started_at == run_started_at,
+                    BackfillJob.status == TaskStatus.RUNNING,
+                ).update({BackfillJob.heartbeat_at: datetime.now()}, synchronize_session=False)
+                db.commit()
+            except Exception as e:
+                db.rollback()
+                logger.warning(f"[回填 {job_id}] 刷新心跳失败: {str(e)}")
+            finally:
+                db.close()
+
+    @staticmethod
+    def run_job(
+        job_id: int,
+        session_factory=None,
+        task_map: Optional[Dict[str, Any]] = None,
+        cancel: Optional[threading.Event] = None,
+    ) -> Optional[Dict[str, Any]]:
+        """
+        执行（或继续执行）回填作业，只处理未成功的单元
+
+        上次中断时处于执行中的单元重新执行；失败的单元重试。
+        作业正在其它进程执行（心跳未过期）时不做任何处理，返回当前进度。
+
+        Args:
+            job_id: 作业ID
+            session_factory: 数据库会话工厂，默认 SessionLocal
+            task_map: 任务映射，默认与每日同步相同
+            cancel: 置位后不再启动新的单元，未开始的单元保持未成功，可继续执行
+
+        Returns:
+            执行结束后的进度，作业不存在时返回 None
+        """
+        from app.config import settings
+        from app.database.session import SessionLocal
+        from app.tasks.dag_runner import DagRunner, TaskNode
+        from app.tasks.process_pool import sync_db_concurrency
+        from app.tasks.scheduler import SYNC_TASK_DEPENDENCIES, get_sync_task_map, run_sync_task
+        from app.utils.akshare_fetcher import TokenBucket
+        from app.utils.sync_result import SyncResult
+
+        session_factory = session_factory or SessionLocal
+        task_map = task_map or get_sync_task_map()
+        db = session_factory()
+        stop_heartbeat = threading.Event()
+        try:
+            job = db.query(BackfillJob).filter(BackfillJob.id == job_id).first()
+            if job is None:
+                return None
+
+            # 先认领再回收单元，避免把另一个进程正在执行的单元改回待执行
+            run_started_at = BackfillService.claim_job(db, job_id)
+            if run_started_at is None:
+                print(f"[回填 {job_id}] 作业正在其它进程执行，跳过")
+                return BackfillService.get_progress(db, job_id)
+            db.refresh(job)
+            threading.Thread(
+                target=BackfillService._heartbeat_loop,
+                args=(session_factory, job_id, run_started_at, stop_heartbeat),
+                name=f"backfill-heartbeat-{job_id}",
+                daemon=True,
+            ).start()
+
+            # 回收上次中断遗留的执行中单元
+            db.query(BackfillUnit).filter(
+                BackfillUnit.job_id == job_id,
+                BackfillUnit.status == TaskStatus.RUNNING
+            ).update({BackfillUnit.status: TaskStatus.PENDING}, synchronize_session=False)
+            db.commit()
+
+            units = db.query(BackfillUnit).filter(
+                BackfillUnit.job_id == job_id,
+                BackfillUnit.status != TaskStatus.SUCCESS
+            ).order_by(BackfillUnit.target_date, BackfillUnit.id).all()
+            units_by_key = {_unit_key(u.task_type, u.target_date): u for u in units}
+            print(f"[回填 {job_id}] 待执行 {len(units)} 个单元")
+
+            units_per_minute = job.units_per_minute if job.units_per_minute is not None else settings.BACKFILL_UNITS_PER_MINUTE
+            bucket = TokenBucket(units_per_minute / 60.0, capacity=1) if units_per_minute else None
+
+            def run_unit(task_type: str, target_date: date) -> dict:
+                if bucket is not None:
+                    bucket.acquire()
+                return run_sync_task(task_type, task_map[task_type][0], target_date, session_factory=session_factory)
+
+            nodes = []
+            for key, unit in units_by_key.items():
+                if unit.task_type not in task_map:
+                    unit.status = TaskStatus.FAILED
+                    unit.message = "未知任务类型"
+                    continue
+                deps = tuple(
+                    dep_key for dep_key in (
+                        _unit_key(dep, unit.target_date) for dep in SYNC_TASK_DEPENDENCIES.get(unit.task_type, [])
+                    )
+                    if dep_key in units_by_key and dep_key.split("@")[0] in task_map
+                )
+                nodes.append(TaskNode(
+                    key=key,
+                    func=lambda task_type=unit.task_type, target_date=unit.target_date: run_unit(task_type, target_date),
+                    deps=deps,
+                    resources=task_map[unit.task_type][1],
+                ))
+            db.commit()
+
+            def on_start(run):
+                unit = units_by_key[run.key]
+                unit.status = TaskStatus.RUNNING
+                unit.attempts = (unit.attempts or 0) + 1
+                unit.started_at = run.started_at
+                db.commit()
+
+            def on_finish(run):
+                # 检查点：单元结果立即提交，中断后不会重复执行
+                unit = units_by_key[run.key]
+                task_result = run.result or {}
+                result = task_result.get("result")
+                if run.status == "skipped":
+                    unit.status = TaskStatus.FAILED
+                    unit.message = run.error
+                else:
+                    unit.status = TaskStatus.SUCCESS if run.status == "success" else TaskStatus.FAILED
+                    unit.rows = result.count if isinstance(result, SyncResult) else 0
+                    unit.duration = round(run.duration, 3)
+                    unit.finished_at = run.finished_at
+                    unit.message = str(result) if result is not None else run.error
+                job.heartbeat_at = datetime.now()
+                db.commit()
+                status = "✅" if unit.status == TaskStatus.SUCCESS else "❌"
+                print(f"[回填 {job_id}] {status} {unit.task_type} {unit.target_date}: {unit.message}")
+
+            if nodes:
+                DagRunner(
+                    nodes,
+                    resource_limits={
+                        "akshare": settings.SYNC_AKSHARE_CONCURRENCY,
+                        "db": sync_db_concurrency(),
+                    },
+                    max_workers=job.max_workers or settings.BACKFILL_MAX_WORKERS,
+                    is_success=lambda task_result: bool(task_result and task_result["success"]),
+                    on_finish=on_finish,
+                    on_start=on_start,
+                    cancel=cancel,
+                ).run()
+
+            # 本次有单元成功的日期重算仪表盘概览
+            from app.services.dashboard_service import DashboardService
+            for target_date in sorted({
+                unit.target_date for unit in units_by_key.values() if unit.status == TaskStatus.SUCCESS
+            }):
+                DashboardService.build_snapshot(db, target_date)
+
+            failed = db.query(func.count(BackfillUnit.id)).filter(
+                BackfillUnit.job_id == job_id,
+                BackfillUnit.status != TaskStatus.SUCCESS
+            ).scalar()
+            job.status = TaskStatus.SUCCESS if failed == 0 else TaskStatus.FAILED
+            job.error_message = f"{failed} 个单元未成功，可继续执行重试" if failed else None
+            job.finished_at = datetime.now()
+            job.heartbeat_at = job.finished_at
+            db.commit()
+
+            progress = BackfillService.get_progress(db, job_id)
+            print(
+                f"[回填 {job_id}] 结束: 成功 {progress['completed_units']}/{progress['total_units']}，"
+                f"{progress['units_per_minute']} 单元/分钟，{progress['rows_per_second']} 行/秒"
+            )
+            return progress
+        except Exception as e:
+            db.rollback()
+            logger.error(f"[回填 {job_id}] 执行失败: {str(e)}", exc_info=True)
+            print(f"[回填 {job_id}] 执行失败: {str(e)}")
+            job = db.query(BackfillJob).filter(BackfillJob.id == job_id).first()
+            if job is not None:
+                job.status = TaskStatus.FAILED
+                job.error_message = str(e)
+                job.finished_at = datetime.now()
+                db.commit()
+            raise
+        finally:
+            stop_heartbeat.set()
+            db.close()
+
+    @staticmethod
+    def start_job_async(job_id: int) -> threading.Thread:
+        """在后台线程中执行回填作业（SYNC_EXECUTION_MODE=process 时由工作进程执行）"""
+        def target():
+            from app.tasks.process_pool import run_sync_job
+            try:
+                run_sync_job(BackfillService.run_job, job_id=job_id)
+            except Exception as e:
+                # run_job 内部的异常已记录并更新作业状态；工作进程退出时作业保持执行中，心跳过期后可继续
+                logger.error(f"[回填 {job_id}] 后台执行失败: {str(e)}")
+
+        thread = threading.Thread(target=target, name=f"backfill-{job_id}", daemon=True)
+        thread.start()
+        return thread
+
+    @staticmethod
+    def get_progress(db: Session, job_id: int) -> Optional[Dict[str, Any]]:
+        """
+        作业进度与吞吐
+
+        吞吐按本轮执行统计：本轮完成的单元数 / 本轮已用时间。
+        """
+        job = db.query(BackfillJob).filter(BackfillJob.id == job_id).first()
+        if job is None:
+            return None
+
+        rows = db.query(
+            BackfillUnit.task_type,
+            BackfillUnit.status,
+            func.count(BackfillUnit.id),
+            func.coalesce(func.sum(BackfillUnit.rows), 0),
+        ).filter(BackfillUnit.job_id == job_id).group_by(BackfillUnit.task_type, BackfillUnit.status).all()
+
+        by_status: Dict[str, int] = {status.value: 0 for status in TaskStatus}
+        by_task: Dict[str, Dict[str, int]] = {}
+        total_rows = 0
+        for task_type, status, count, row_sum in rows:
+            status = status.value if isinstance(status, TaskStatus) else status
+            by_status[status] = by_status.get(status, 0) + count
+            by_task.setdefault(task_type, {})[status] = count
+            if status == TaskStatus.SUCCESS.value:
+                total_rows += int(row_sum)
+        total_units = sum(by_status.values())
+        completed = by_status.get(TaskStatus.SUCCESS.value, 0)
+
+        units_per_minute = rows_per_second = 0.0
+        eta_seconds = None
+        elapsed = 0.0
+        if job.run_started_at:
+            run_end = job.finished_at if job.status != TaskStatus.RUNNING and job.finished_at else datetime.now()
+            elapsed = max((run_end - job.run_started_at).total_seconds(), 0.0)
+            run_units, run_rows = db.query(
+                func.count(BackfillUnit.id),
+                func.coalesce(func.sum(BackfillUnit.rows), 0),
+            ).filter(
+                BackfillUnit.job_id == job_id,
+                BackfillUnit.status == TaskStatus.SUCCESS,
+                BackfillUnit.finished_at >= job.run_started_at,
+            ).one()
+            if elapsed > 0:
+                units_per_minute = run_units / elapsed * 60
+                rows_per_second = int(run_rows) / elapsed
+            remaining = total_units - completed
+            if job.status == TaskStatus.RUNNING and units_per_minute > 0:
+                eta_seconds = round(remaining / units_per_minute * 60)
+
+        return {
+            "job_id": job.id,
+            "task_types": job.task_types.split(","),
+            "start_date": job.start_date.isoformat(),
+            "end_date": job.end_date.isoformat(),
+            "status": job.status.value if isinstance(job.status, TaskStatus) else job.status,
+            "active": BackfillService.is_active(job),
+            "total_units": total_units,
+            "completed_units": completed,
+            "failed_units": by_status.get(TaskStatus.FAILED.value, 0),
+            "running_units": by_status.get(TaskStatus.RUNNING.value, 0),
+            "pending_units": by_status.get(TaskStatus.PENDING.value, 0),
+            "progress": round(completed / total_units * 100, 2) if total_units else 0.0,
+            "rows": total_rows,
+            "elapsed_seconds": round(elapsed, 2),
+            "units_per_minute": round(units_per_minute, 2),
+            "rows_per_second": round(rows_per_second, 2),
+            "eta_seconds": eta_seconds,
+            "by_task": by_task,
+            "created_at": job.created_at.isoformat() if job.created_at else None,
+            "run_started_at": job.run_started_at.isoformat() if job.run_started_at else None,
+            "finished_at": job.finished_at.isoformat() if job.finished_at else None,
+            "error_message": job.error_message,
+        }
+
+    @staticmethod
+    def list_jobs(db: Session, page: int = 1, page_size: int = 20) -> Dict[str, Any]:
+        """回填作业列表（含进度）"""
+        total = db.query(func.count(BackfillJob.id)).scalar() or 0
+        jobs = db.query(BackfillJob.id).order_by(desc(BackfillJob.id)).offset((page - 1) * page_size).limit(page_size).all()
+        return {
+            "items": [BackfillService.get_progress(db, job_id) for (job_id,) in jobs],
+            "total": total,
+            "page": page,
+            "page_size": page_size,
+            "total_pages": (total + page_size - 1) // page_size if total > 0 else 0,
+        }
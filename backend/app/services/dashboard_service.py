@@ -0,0 +1,169 @@
+"""
+仪表盘每日概览服务
+每日同步完成后从各原始表汇总一行 daily_summary（指数收盘、涨跌停家数、板块涨跌家数、概念净流入前列、龙虎榜概况），
+仪表盘每个日期只需一次按日期的索引读取，不再分别请求指数、涨停池、跌停池和全部板块。
+"""
+from datetime import date
+from typing import Dict, Optional
+
+from sqlalchemy import func
+from sqlalchemy.orm import Session
+
+from app.models.daily_summary import DailySummary
+from app.models.fund_flow import ConceptFundFlow
+from app.models.lhb import LhbDetail
+from app.models.sector import SectorHistory
+from app.models.zt_pool import ZtPool, ZtPoolDown
+from app.utils.query_cache import invalidate_query_cache
+
+# 概览中保留的概念净流入、龙虎榜净买额条数
+TOP_CONCEPT_COUNT = 10
+LHB_TOP_COUNT = 5
+
+SUMMARY_FIELDS = (
+    "indices", "zt_count", "zt_down_count",
+    "sector_rise_count", "sector_fall_count", "sector_total_count",
+    "top_concepts", "lhb_count", "lhb_net_buy_amount", "lhb_top",
+)
+
+
+def _float(value) -> Optional[float]:
+    return float(value) if value is not None else None
+
+
+class DashboardService:
+    """仪表盘每日概览服务类"""
+
+    @staticmethod
+    def compute_summary(db: Session, target_date: date) -> Dict:
+        """从原始表计算某日概览（不写库）"""
+        from app.services.index_service import IndexService
+
+        indices = [
+            {
+                "index_code": idx.index_code,
+                "index_name": idx.index_name,
+                "close_price": _float(idx.close_price),
+                "change_percent": _float(idx.change_percent),
+                "volume": idx.volume,
+                "amount": _float(idx.amount),
+                "volume_change_percent": getattr(idx, "volume_change_percent", None),
+            }
+            for idx in IndexService.get_index_list(db, target_date)
+        ]
+
+        zt_count = db.query(func.count(func.distinct(ZtPool.stock_code))).filter(
+            ZtPool.date == target_date
+        ).scalar() or 0
+        zt_down_count = db.query(func.count(func.distinct(ZtPoolDown.stock_code))).filter(
+            ZtPoolDown.date == target_date
+        ).scalar() or 0
+
+        # 板块涨跌家数：与仪表盘原先在前端统计的口径一致（涨跌幅为空的板块只计入总数）
+        sector_total, sector_rise, sector_fall = db.query(
+            func.count(SectorHistory.id),
+            func.count(SectorHistory.id).filter(SectorHistory.change_percent > 0),
+            func.count(SectorHistory.id).filter(SectorHistory.change_percent < 0),
+        ).filter(SectorHistory.date == target_date).one()
+
+        top_concepts = [
+            {
+                "concept": row.concept,
+                "net_amount": _float(row.net_amount),
+                "index_change_percent": _float(row.index_change_percent),
+            }
+            for row in db.query(ConceptFundFlow).filter(
+                ConceptFundFlow.date == target_date,
+                ConceptFundFlow.net_amount.isnot(None)
+            ).order_by(ConceptFundFlow.net_amount.desc()).limit(TOP_CONCEPT_COUNT).all()
+        ]
+
+        lhb_count, lhb_net_buy_amount = db.query(
+            func.count(LhbDetail.id),
+            func.sum(LhbDetail.net_buy_amount),
+        ).filter(LhbDetail.date == target_date).one()
+        lhb_rows = db.query(LhbDetail).filter(
+            LhbDetail.date == target_date,
+            LhbDetail.net_buy_amount.isnot(None)
+        ).order_by(LhbDetail.net_buy_amount.desc()).limit(LHB_TOP_COUNT).all()
+
+        return {
+            "indices": indices,
+            "zt_count": zt_count,
+            "zt_down_count": zt_down_count,
+            "sector_rise_count": sector_rise or 0,
+            "sector_fall_count": sector_fall or 0,
+            "sector_total_count": sector_total or 0,
+            "top_concepts": top_concepts,
+            "lhb_count": lhb_count or 0,
+            "lhb_net_buy_amount": _float(lhb_net_buy_amount),
+            "lhb_top": [
+                {
+                    "stock_code": row.stock_code,
+                    "stock_name": row.stock_name,
+                    "net_buy_amount": _float(row.net_buy_amount),
+                    "change_percent": _float(row.change_percent),
+                }
+                for row in lhb_rows
+            ],
+        }
+
+    @staticmethod
+    def _has_data(summary: Dict) -> bool:
+        return bool(
+            summary["indices"] or summary["zt_count"] or summary["zt_down_count"]
+            or summary["sector_total_count"] or summary["top_concepts"] or summary["lhb_count"]
+        )
+
+    @staticmethod
+    def build_snapshot(db: Session, target_date: date) -> Optional[DailySummary]:
+        """
+        同步某日数据后调用：重算并写入该日概览
+
+        该日没有任何数据（非交易日或尚未同步）时不写入。汇总失败不影响数据同步，返回 None。
+        """
+        try:
+            summary = DashboardService.compute_summary(db, target_date)
+            if not DashboardService._has_data(summary):
+                return None
+            row = db.query(DailySummary).filter(DailySummary.date == target_date).first()
+            if row is None:
+                row = DailySummary(date=target_date)
+                db.add(row)
+            for field in SUMMARY_FIELDS:
+                setattr(row, field, summary[field])
+            db.commit()
+            invalidate_query_cache("daily_summary", target_date)
+            print(f"成功更新 {target_date} 的仪表盘概览")
+            return row
+        except Exception as e:
+            db.rollback()
+            print(f"更新 {target_date} 的仪表盘概览失败: {str(e)}")
+            import traceback
+            traceback.print_exc()
+            return None
+
+    @staticmethod
+    def to_dict(row: DailySummary) -> Dict:
+        data = {field: getattr(row, field) for field in SUMMARY_FIELDS}
+        data["date"] = row.date
+        data["lhb_net_buy_amount"] = _float(row.lhb_net_buy_amount)
+        return data
+
+    @staticmethod
+    def get_snapshot(db: Session, target_date: date) -> Optional[Dict]:
+        """
+        获取某日概览（只读）
+
+        没有概览行时（由未接入概览的入口同步、或上线前的历史日期）现场汇总返回但不写入，
+        概览行只由每日同步和历史回填写入，读请求不与之并发写同一行。
+        """
+        row = db.query(DailySummary).filter(DailySummary.date == target_date).first()
+        if row is not None:
+            return DashboardService.to_dict(row)
+        summary = DashboardService.compute_summary(db, target_date)
+        if not DashboardService._has_data(summary):
+            return None
+        data = {field: summary[field] for field in SUMMARY_FIELDS}
+        data["date"] = target_date
+        return data
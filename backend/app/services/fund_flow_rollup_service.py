@@ -0,0 +1,293 @@
+"""
+概念/行业资金流日汇总服务
+同步某日的概念或行业资金流后，增量写入该日的汇总行：
+- cum_net_amount：截至当日的累计净额（前缀和），任意日期范围的净额 = 两次查找之差
+- net_amount_5d/10d/20d：近 N 个交易日净额（同样由前缀和相减得到）
+- net_amount_rank：当日净额排名
+"""
+from datetime import date
+from typing import Dict, Iterable, Optional, Tuple
+
+import numpy as np
+import pandas as pd
+from sqlalchemy import and_, func, select
+from sqlalchemy.orm import Session
+
+from app.models.fund_flow import (
+    ConceptFundFlow,
+    ConceptFundFlowRollup,
+    IndustryFundFlow,
+    IndustryFundFlowRollup,
+)
+from app.utils.bulk_upsert import bulk_upsert
+
+# 类型 -> (原始表模型, 汇总表模型, 名称字段)
+ROLLUPS = {
+    "concept": (ConceptFundFlow, ConceptFundFlowRollup, "concept"),
+    "industry": (IndustryFundFlow, IndustryFundFlowRollup, "industry"),
+}
+
+# 滚动窗口（交易日数）
+WINDOWS = (5, 10, 20)
+
+ROLLUP_FIELDS = ("cum_net_amount", "net_amount_5d", "net_amount_10d", "net_amount_20d", "net_amount_rank")
+
+
+def _float(value) -> float:
+    return float(value) if value is not None else 0.0
+
+
+class FundFlowRollupService:
+    """概念/行业资金流日汇总服务类"""
+
+    @staticmethod
+    def _latest_cum_query(
+        kind: str,
+        as_of: Optional[date],
+        inclusive: bool = True,
+        names: Optional[Iterable[str]] = None
+    ):
+        """
+        每个名称在 as_of（含/不含）之前最后一行汇总的 (name, latest_date, cum) 查询，as_of 为空时不限
+
+        按名称取 max(date)，再与汇总表连接取累计值。
+        """
+        _, Rollup, key = ROLLUPS[kind]
+        key_column = getattr(Rollup, key)
+        latest = select(
+            key_column.label("name"),
+            func.max(Rollup.date).label("latest_date")
+        )
+        if as_of is not None:
+            latest = latest.where(Rollup.date <= as_of if inclusive else Rollup.date < as_of)
+        if names is not None:
+            latest = latest.where(key_column.in_(list(names)))
+        latest = latest.group_by(key_column).subquery()
+
+        return select(
+            key_column.label("name"), Rollup.date.label("latest_date"), Rollup.cum_net_amount.label("cum")
+        ).join(
+            latest,
+            and_(key_column == latest.c.name, Rollup.date == latest.c.latest_date)
+        )
+
+    @staticmethod
+    def _latest_cum(
+        db: Session,
+        kind: str,
+        as_of: date,
+        inclusive: bool = True,
+        names: Optional[Iterable[str]] = None
+    ) -> Dict[str, Tuple[date, float]]:
+        """每个名称在 as_of（含/不含）之前最后一行汇总的 (日期, 累计净额)"""
+        rows = db.execute(FundFlowRollupService._latest_cum_query(kind, as_of, inclusive, names)).all()
+        return {name: (d, _float(cum)) for name, d, cum in rows}
+
+    @staticmethod
+    def _write_day(db: Session, kind: str, target_date: date) -> int:
+        """计算并写入某日的汇总行（不提交），返回写入行数"""
+        from app.utils.trade_calendar import get_trade_calendar
+
+        Raw, Rollup, key = ROLLUPS[kind]
+        db.query(Rollup).filter(Rollup.date == target_date).delete(synchronize_session=False)
+
+        rows = db.query(getattr(Raw, key), Raw.net_amount).filter(Raw.date == target_date).all()
+        if not rows:
+            return 0
+        frame = pd.DataFrame(rows, columns=[key, "net_amount"]).drop_duplicates(subset=[key], keep="last")
+        names = frame[key].tolist()
+        net = pd.to_numeric(frame["net_amount"], errors="coerce")
+
+        previous = FundFlowRollupService._latest_cum(db, kind, target_date, inclusive=False, names=names)
+        cum = np.array([previous.get(n, (None, 0.0))[1] for n in names]) + net.fillna(0.0).to_numpy(dtype=float)
+        frame["cum_net_amount"] = cum.round(2)
+
+        # 近 N 日净额 = 当日累计 - 窗口前一个交易日的累计
+        trading_days = get_trade_calendar(db).previous_trading_days(target_date, max(WINDOWS) + 1)
+        for window in WINDOWS:
+            boundary = FundFlowRollupService._latest_cum(db, kind, trading_days[window], names=names)
+            frame[f"net_amount_{window}d"] = (cum - np.array([boundary.get(n, (None, 0.0))[1] for n in names])).round(2)
+
+        frame["net_amount_rank"] = [
+            int(rank) if pd.notna(rank) else None
+            for rank in net.rank(ascending=False, method="min")
+        ]
+        frame.insert(0, "date", target_date)
+        saved = bulk_upsert(db, Rollup, frame, conflict_columns=["date", key])
+        return saved.count
+
+    @staticmethod
+    def rebuild(db: Session, kind: str, start_date: Optional[date] = None) -> int:
+        """
+        从 start_date 起（为空时全部）按日期顺序重算汇总
+
+        补录历史日期后，之后各日的累计值都依赖它，需要整体重算。
+        """
+        Raw, Rollup, _ = ROLLUPS[kind]
+        q = db.query(Raw.date).distinct()
+        if start_date is not None:
+            q = q.filter(Raw.date >= start_date)
+        dates = sorted(row[0] for row in q.all())
+
+        stale = db.query(Rollup)
+        if start_date is not None:
+            stale = stale.filter(Rollup.date >= start_date)
+        stale.delete(synchronize_session=False)
+
+        total = 0
+        for d in dates:
+            total += FundFlowRollupService._write_day(db, kind, d)
+        db.commit()
+        return total
+
+    @staticmethod
+    def rollup_day(db: Session, kind: str, target_date: date) -> Optional[int]:
+        """
+        同步某日原始数据后调用：写入该日汇总
+
+        以下情况从最早受影响的日期起重算：
+        - 之后已有汇总（补录历史日期）
+        - 之前有原始数据还没有汇总（首次上线，或由未接入汇总的同步入口写入）
+
+        汇总失败不影响原始数据同步，返回 None。
+        """
+        Raw, Rollup, _ = ROLLUPS[kind]
+        try:
+            has_later = db.query(Rollup.id).filter(Rollup.date > target_date).first() is not None
+            last_rolled = db.query(func.max(Rollup.date)).filter(Rollup.date < target_date).scalar()
+            gap_query = db.query(func.min(Raw.date)).filter(Raw.date < target_date)
+            if last_rolled is not None:
+                gap_query = gap_query.filter(Raw.date > last_rolled)
+            first_gap = gap_query.scalar()
+            if first_gap is not None:
+                count = FundFlowRollupService.rebuild(db, kind, first_gap)
+            elif has_later:
+                count = FundFlowRollupService.rebuild(db, kind, target_date)
+            else:
+                count = FundFlowRollupService._write_day(db, kind, target_date)
+                db.commit()
+            print(f"成功更新 {target_date} 的{kind}资金流汇总，共 {count} 条")
+            return count
+        except Exception as e:
+            db.rollback()
+            print(f"更新 {target_date} 的{kind}资金流汇总失败: {str(e)}")
+            import traceback
+            traceback.print_exc()
+            return None
+
+    @staticmethod
+    def range_net_query(
+        kind: str,
+        start_date: Optional[date] = None,
+        end_date: Optional[date] = None,
+        names: Optional[Iterable[str]] = None
+    ):
+        """
+        [start_date, end_date] 内各名称净额合计的查询 (name, range_net_amount)，日期为空表示不限
+
+        只含范围内有数据的名称。合计 = 截至 end_date 的累计 - start_date 之前的累计，
+        每个名称两次前缀和查找，不扫描原始表。
+        """
+        names = list(names) if names is not None else None
+        end_cum = FundFlowRollupService._latest_cum_query(kind, end_date, names=names).subquery()
+        if start_date is None:
+            return select(end_cum.c.name, end_cum.c.cum.label("range_net_amount"))
+        start_cum = FundFlowRollupService._latest_cum_query(
+            kind, start_date, inclusive=False, names=names
+        ).subquery()
+        return select(
+            end_cum.c.name,
+            (end_cum.c.cum - func.coalesce(start_cum.c.cum, 0)).label("range_net_amount")
+        ).select_from(
+            end_cum.outerjoin(start_cum, start_cum.c.name == end_cum.c.name)
+        ).where(end_cum.c.latest_date >= start_date)
+
+    @staticmethod
+    def range_net_amounts(
+        db: Session,
+        kind: str,
+        start_date: date,
+        end_date: date,
+        names: Optional[Iterable[str]] = None
+    ) -> Dict[str, float]:
+        """[start_date, end_date] 内各名称的净额合计（只含范围内有数据的名称）"""
+        rows = db.execute(FundFlowRollupService.range_net_query(kind, start_date, end_date, names)).all()
+        return {name: round(_float(net), 2) for name, net in rows}
+
+    @staticmethod
+    def select_with_rollups(kind: str, *filters, start_date: Optional[date] = None, end_date: Optional[date] = None):
+        """
+        原始资金流行连同当日汇总字段的查询（一条语句，按列名取值）
+
+        给定日期范围时再附加该名称在范围内的净额合计（range_net_amount）。
+        """
+        Raw, Rollup, key = ROLLUPS[kind]
+        columns = list(Raw.__table__.columns) + [getattr(Rollup, field) for field in ROLLUP_FIELDS]
+        q = select(*columns).outerjoin(
+            Rollup,
+            and_(Rollup.date == Raw.date, getattr(Rollup, key) == getattr(Raw, key))
+        ).where(*filters)
+        if start_date and end_date:
+            range_net = FundFlowRollupService.range_net_query(kind, start_date, end_date).subquery()
+            q = q.add_columns(range_net.c.range_net_amount).outerjoin(
+                range_net, range_net.c.name == getattr(Raw, key)
+            )
+        return q
+
+    @staticmethod
+    def get_rollups(
+        db: Session,
+        kind: str,
+        keys: Iterable[Tuple[date, str]]
+    ) -> Dict[Tuple[date, str], object]:
+        """按 (日期, 名称) 批量获取汇总行"""
+        _, Rollup, key = ROLLUPS[kind]
+        keys = set(keys)
+        if not keys:
+            return {}
+        key_column = getattr(Rollup, key)
+        rows = db.query(Rollup).filter(
+            Rollup.date.in_(list({d for d, _ in keys})),
+            key_column.in_(list({n for _, n in keys}))
+        ).all()
+        return {
+            (row.date, getattr(row, key)): row
+            for row in rows
+            if (row.date, getattr(row, key)) in keys
+        }
+
+    @staticmethod
+    def attach_rollups(
+        db: Session,
+        kind: str,
+        items: list,
+        start_date: Optional[date] = None,
+        end_date: Optional[date] = None
+    ) -> None:
+        """
+        为当前页的资金流记录附加日汇总行（_rollup），
+        给定日期范围时附加该名称在范围内的净额合计（_range_net_amount）
+        """
+        if not items:
+            return
+        key = ROLLUPS[kind][2]
+        rollups = FundFlowRollupService.get_rollups(db, kind, [(item.date, getattr(item, key)) for item in items])
+        range_net = {}
+        if start_date and end_date:
+            range_net = FundFlowRollupService.range_net_amounts(
+                db, kind, start_date, end_date, names={getattr(item, key) for item in items}
+            )
+        for item in items:
+            setattr(item, '_rollup', rollups.get((item.date, getattr(item, key))))
+            setattr(item, '_range_net_amount', range_net.get(getattr(item, key)))
+
+    @staticmethod
+    def rollup_fields(rollup) -> Dict[str, object]:
+        """汇总行转为接口字段（无汇总时为 None）"""
+        return {field: getattr(rollup, field, None) if rollup is not None else None for field in ROLLUP_FIELDS}
+
+    @staticmethod
+    def sort_columns(kind: str) -> Dict[str, object]:
+        """可用于排序的汇总字段"""
+        _, Rollup, _ = ROLLUPS[kind]
+        return {field: getattr(Rollup, field) for field in ROLLUP_FIELDS}
@@ -0,0 +1,208 @@
+"""
+资金流筛选原语
+将常用的选股条件编译为集合化 SQL（GROUP BY + HAVING / CTE），避免逐股票查询
+"""
+from sqlalchemy.orm import Session
+from sqlalchemy import and_, func, select
+from sqlalchemy.sql import Select
+from sqlalchemy.sql.selectable import CTE
+from typing import List, Optional, Set
+from datetime import date
+
+from app.models.fund_flow import StockFundFlow
+from app.models.stock_concept import StockConcept, StockConceptMapping
+from app.models.zt_pool import ZtPool
+
+
+class FundFlowScreener:
+    """资金流筛选原语"""
+
+    @staticmethod
+    def consecutive_inflow_query(
+        trading_dates: List[date],
+        min_net_inflow: float
+    ) -> Select:
+        """
+        构建“连续N日主力净流入>M”的股票代码查询
+
+        在给定的交易日集合上按股票代码分组，一条语句完成筛选：
+        - count(distinct date) = N：N个交易日每天都有数据
+        - count(main_net_inflow) = count(*)：没有空值
+        - min(main_net_inflow) > M：每天净流入都大于M
+
+        Args:
+            trading_dates: 交易日列表（N = len(trading_dates)）
+            min_net_inflow: 净流入阈值M（单位：元）
+
+        Returns:
+            Select: 只包含 stock_code 一列的查询，可直接用于 in_() 子查询
+        """
+        required_days = len(set(trading_dates))
+        return select(StockFundFlow.stock_code).where(
+            StockFundFlow.date.in_(trading_dates)
+        ).group_by(
+            StockFundFlow.stock_code
+        ).having(
+            and_(
+                func.count(func.distinct(StockFundFlow.date)) == required_days,
+                func.count(StockFundFlow.main_net_inflow) == func.count(),
+                func.min(StockFundFlow.main_net_inflow) > min_net_inflow,
+            )
+        )
+
+    @staticmethod
+    def get_consecutive_inflow_codes(
+        db: Session,
+        trading_dates: List[date],
+        min_net_inflow: float
+    ) -> Set[str]:
+        """
+        获取连续N日主力净流入>M的股票代码集合
+
+        Args:
+            db: 数据库会话
+            trading_dates: 交易日列表
+            min_net_inflow: 净流入阈值（单位：元）
+        """
+        if not trading_dates:
+            return set()
+        query = FundFlowScreener.consecutive_inflow_query(trading_dates, min_net_inflow)
+        return {row[0] for row in db.execute(query).all()}
+
+    @staticmethod
+    def _date_filters(column, date_range) -> list:
+        """日期范围条件，未指定的一端不限"""
+        filters = []
+        if date_range.start is not None:
+            filters.append(column >= date_range.start)
+        if date_range.end is not None:
+            filters.append(column <= date_range.end)
+        return filters
+
+    @staticmethod
+    def condition_cte(condition, index: int) -> CTE:
+        """
+        把单个日期范围条件编译为 CTE，只包含满足条件的 stock_code
+
+        - 日期范围内任意一天主力净流入落在区间内
+        - 涨停次数区间：与按股票分组的 zt_pool 计数左连接，未涨停按 0 次计
+        """
+        date_range = condition.date_range
+        net_inflow_range = condition.main_net_inflow
+        limit_up_count_range = condition.limit_up_count
+
+        filters = FundFlowScreener._date_filters(StockFundFlow.date, date_range)
+        if net_inflow_range:
+            if net_inflow_range.min is not None:
+                filters.append(StockFundFlow.main_net_inflow >= net_inflow_range.min)
+            if net_inflow_range.max is not None:
+                filters.append(StockFundFlow.main_net_inflow <= net_inflow_range.max)
+        query = select(StockFundFlow.stock_code).where(*filters).distinct()
+
+        if limit_up_count_range and (
+            limit_up_count_range.min is not None or limit_up_count_range.max is not None
+        ):
+            codes = query.subquery(f"cond_{index}_codes")
+            limit_ups = select(
+                ZtPool.stock_code,
+                func.count(ZtPool.id).label("limit_up_count")
+            ).where(
+                *FundFlowScreener._date_filters(ZtPool.date, date_range)
+            ).group_by(
+                ZtPool.stock_code
+            ).subquery(f"cond_{index}_zt")
+            count = func.coalesce(limit_ups.c.limit_up_count, 0)
+            query = select(codes.c.stock_code).outerjoin(
+                limit_ups, limit_ups.c.stock_code == codes.c.stock_code
+            )
+            if limit_up_count_range.min is not None:
+                query = query.where(count >= limit_up_count_range.min)
+            if limit_up_count_range.max is not None:
+                query = query.where(count <= limit_up_count_range.max)
+
+        return query.cte(f"cond_{index}")
+
+    @staticmethod
+    def concept_codes_query(
+        concept_ids: Optional[List[int]] = None,
+        concept_names: Optional[List[str]] = None
+    ) -> Select:
+        """概念板块成分股的股票代码（概念映射只有股票名称，经资金流表换算为代码）"""
+        stock_names = select(StockConceptMapping.stock_name)
+        if concept_ids:
+            stock_names = stock_names.where(StockConceptMapping.concept_id.in_(concept_ids))
+        if concept_names:
+            stock_names = stock_names.join(
+                StockConcept, StockConceptMapping.concept_id == StockConcept.id
+            ).where(StockConcept.name.in_(concept_names))
+        return select(StockFundFlow.stock_code).where(
+            StockFundFlow.stock_name.in_(stock_names)
+        ).distinct()
+
+    @staticmethod
+    def multi_condition_query(
+        conditions: list,
+        consecutive_dates: Optional[List[date]] = None,
+        min_net_inflow: Optional[float] = None,
+        concept_ids: Optional[List[int]] = None,
+        concept_names: Optional[List[str]] = None,
+        sort_by: Optional[str] = None,
+        order: str = "desc"
+    ) -> Select:
+        """
+        把多条件选股编译为一条语句：每个条件一个 CTE，按 stock_code 内连接取交集
+
+        返回列：stock_code、stock_name、latest_date、total_net_inflow（按代码+名称汇总），
+        total（窗口函数给出的结果总数）以及 cond_{i}_count（第 i 个条件单独命中的股票数）。
+        调用方只需追加 offset/limit 即可分页。
+
+        Args:
+            conditions: DateRangeCondition 列表，条件之间为 AND 关系
+            consecutive_dates: 连续N日净流入>M 使用的交易日（可选）
+            min_net_inflow: 连续N日净流入>M 中的 M
+            concept_ids: 概念板块ID列表（可选）
+            concept_names: 概念板块名称列表（可选）
+            sort_by: main_net_inflow / stock_code / stock_name
+            order: asc / desc
+        """
+        ctes = [FundFlowScreener.condition_cte(cond, idx) for idx, cond in enumerate(conditions)]
+        base = ctes[0]
+        matched = select(base.c.stock_code)
+        for cte in ctes[1:]:
+            matched = matched.join(cte, cte.c.stock_code == base.c.stock_code)
+        if consecutive_dates is not None:
+            matched = matched.where(base.c.stock_code.in_(
+                FundFlowScreener.consecutive_inflow_query(consecutive_dates, min_net_inflow)
+            ))
+        if concept_ids or concept_names:
+            matched = matched.where(base.c.stock_code.in_(
+                FundFlowScreener.concept_codes_query(concept_ids, concept_names)
+            ))
+        matched = matched.cte("matched")
+
+        total_net_inflow = func.sum(StockFundFlow.main_net_inflow)
+        query = select(
+            StockFundFlow.stock_code,
+            StockFundFlow.stock_name,
+            func.max(StockFundFlow.date).label("latest_date"),
+            total_net_inflow.label("total_net_inflow"),
+            func.count().over().label("total"),
+            *[
+                select(func.count()).select_from(cte).scalar_subquery().label(f"cond_{idx}_count")
+                for idx, cte in enumerate(ctes)
+            ]
+        ).where(
+            StockFundFlow.stock_code.in_(select(matched.c.stock_code))
+        ).group_by(
+            StockFundFlow.stock_code,
+            StockFundFlow.stock_name
+        )
+
+        sort_column = {
+            "stock_code": StockFundFlow.stock_code,
+            "stock_name": StockFundFlow.stock_name,
+        }.get(sort_by, total_net_inflow)
+        order_by = sort_column.asc() if order == "asc" else sort_column.desc()
+        # 追加股票代码保证分页顺序稳定
+        return query.order_by(order_by, StockFundFlow.stock_code.asc())
+
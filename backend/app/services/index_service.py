@@ -9,6 +9,8 @@ import pandas as pd
 
 from app.models.index import IndexHistory
 from app.utils.akshare_utils import safe_akshare_call
+from app.utils.bulk_upsert import bulk_upsert, UpsertResult
+from app.utils.akshare_schema import normalize_frame, to_records
 import akshare as ak
 
 
@@ -35,19 +37,17 @@ class IndexService:
         # 批量查询前一交易日数据以提高效率
         if indices:
             index_codes = [idx.index_code for idx in indices]
-            # 查找前一个交易日的数据（最多往前找5个交易日）
+            # 查找前一个交易日的数据（最多往前找5个交易日，一次查询）
+            from app.utils.trade_calendar import get_trade_calendar
+            prev_dates = get_trade_calendar(db).previous_trading_days(target_date - timedelta(days=1), 5)
+            prev_indices = db.query(IndexHistory).filter(
+                IndexHistory.index_code.in_(index_codes),
+                IndexHistory.date.in_(prev_dates)
+            ).order_by(IndexHistory.date.desc()).all()
             prev_indices_map = {}
-            for i in range(1, 6):
-                check_date = target_date - timedelta(days=i)
-                prev_indices = db.query(IndexHistory).filter(
-                    IndexHistory.index_code.in_(index_codes),
-                    IndexHistory.date == check_date
-                ).all()
-                for prev_idx in prev_indices:
-                    if prev_idx.index_code not in prev_indices_map and prev_idx.volume:
-                        prev_indices_map[prev_idx.index_code] = prev_idx
-                if len(prev_indices_map) == len(index_codes):
-                    break  # 所有指数都找到了前一交易日数据
+            for prev_idx in prev_indices:
+                if prev_idx.index_code not in prev_indices_map and prev_idx.volume:
+                    prev_indices_map[prev_idx.index_code] = prev_idx
         
         # 计算成交量变化比例
         for index in indices:
@@ -142,54 +142,12 @@ class IndexService:
                 logger.warning(f"未获取到指数K线数据: index_code={index_code}")
                 return []
             
-            # 转换为字典列表
-            result = []
-            for _, row in df.iterrows():
-                # 解析日期 - 尝试多种可能的字段名
-                date_str = None
-                for date_field in ["日期", "date", "交易日期", "time"]:
-                    if date_field in row:
-                        date_str = str(row[date_field])
-                        break
-                
-                if not date_str:
-                    continue
-                
-                try:
-                    # 尝试多种日期格式
-                    if len(date_str) == 8 and date_str.isdigit():  # YYYYMMDD格式
-                        from datetime import datetime
-                        trade_date = datetime.strptime(date_str, "%Y%m%d").date()
-                    else:  # 其他格式尝试pandas解析
-                        trade_date = pd.to_datetime(date_str).date()
-                except Exception as e:
-                    logger.debug(f"日期解析失败: {date_str}, error: {str(e)}")
-                    continue
-                
-                # 提取K线数据 - 尝试多种可能的字段名
-                open_price = row.get("开盘", row.get("open", row.get("开", None)))
-                high_price = row.get("最高", row.get("high", row.get("高", None)))
-                low_price = row.get("最低", row.get("low", row.get("低", None)))
-                close_price = row.get("收盘", row.get("close", row.get("收", None)))
-                volume = row.get("成交量", row.get("volume", row.get("vol", None)))
-                amount = row.get("成交额", row.get("amount", row.get("amount", None)))
-                
-                # 确保数据有效
-                if close_price is None:
-                    continue
-                
-                result.append({
-                    "date": trade_date.isoformat(),
-                    "open": float(open_price) if open_price is not None and pd.notna(open_price) else None,
-                    "high": float(high_price) if high_price is not None and pd.notna(high_price) else None,
-                    "low": float(low_price) if low_price is not None and pd.notna(low_price) else None,
-                    "close": float(close_price) if close_price is not None and pd.notna(close_price) else None,
-                    "volume": int(volume) if volume is not None and pd.notna(volume) else None,
-                    "amount": float(amount) if amount is not None and pd.notna(amount) else None,
-                })
+            # 三个接口的字段名不同，按列探测后整列解析
+            frame = normalize_frame("index_kline", df, required=["date", "close"])
+            frame = frame.sort_values("date")
+            frame["date"] = frame["date"].map(lambda d: d.isoformat())
+            result = to_records(frame)
             
-            # 按日期排序
-            result.sort(key=lambda x: x["date"])
             logger.info(f"成功获取指数K线数据: index_code={index_code}, count={len(result)}")
             return result
             
@@ -202,56 +160,19 @@ class IndexService:
         db: Session,
         target_date: date,
         df: pd.DataFrame
-    ) -> int:
-        """保存指数数据"""
-        count = 0
-        for _, row in df.iterrows():
-            # stock_zh_index_spot_em 返回的字段名可能不同，需要根据实际返回调整
-            index_code = str(row.get("代码", row.get("index_code", "")))
-            index_name = row.get("名称", row.get("name", ""))
-            
-            if not index_code or not index_name:
-                continue
-            
-            existing = db.query(IndexHistory).filter(
-                and_(
-                    IndexHistory.date == target_date,
-                    IndexHistory.index_code == index_code
-                )
-            ).first()
-            
-            # 尝试多种可能的字段名
-            close_price = row.get("最新价", row.get("最新", row.get("close", None)))
-            change_percent = row.get("涨跌幅", row.get("涨跌", row.get("change_pct", None)))
-            volume = row.get("成交量", row.get("volume", None))
-            amount = row.get("成交额", row.get("amount", None))
-            
-            if existing:
-                existing.index_name = index_name
-                if close_price is not None:
-                    existing.close_price = close_price
-                if change_percent is not None:
-                    existing.change_percent = change_percent
-                if volume is not None:
-                    existing.volume = volume
-                if amount is not None:
-                    existing.amount = amount
-            else:
-                index = IndexHistory(
-                    date=target_date,
-                    index_code=index_code,
-                    index_name=index_name,
-                    close_price=close_price,
-                    change_percent=change_percent,
-                    volume=volume,
-                    amount=amount,
-                )
-                db.add(index)
-            
-            count += 1
+    ) -> UpsertResult:
+        """保存指数数据，按 (date, index_code) 批量 upsert，空值不覆盖已有数据"""
+        frame = normalize_frame("stock_zh_index_spot_em", df, required=["index_code", "index_name"])
+        frame.insert(0, "date", target_date)
+        records = to_records(frame)
         
+        result = bulk_upsert(
+            db, IndexHistory, records,
+            conflict_columns=["date", "index_code"],
+            keep_existing_on_null=True,
+        )
         db.commit()
-        return count
+        return result
     
     @staticmethod
     def sync_data(db: Session, target_date: date):
@@ -272,12 +193,12 @@ class IndexService:
                 return SyncResult.failure_result(error_msg, "数据源返回空")
             
             # 保存数据
-            count = IndexService.save_index_data(db, target_date, df)
-            if count == 0:
+            saved = IndexService.save_index_data(db, target_date, df)
+            if saved.count == 0:
                 return SyncResult.failure_result("保存数据失败，保存数量为0", "数据库保存异常")
             
-            print(f"成功同步 {target_date} 的指数数据，共 {count} 条")
-            return SyncResult.success_result(f"指数数据同步成功", count)
+            print(f"成功同步 {target_date} 的指数数据，共 {saved.count} 条")
+            return SyncResult.from_upsert(f"指数数据同步成功", saved)
         except Exception as e:
             error_msg = f"同步指数数据失败: {str(e)}"
             print(error_msg)
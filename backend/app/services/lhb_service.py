@@ -8,15 +8,55 @@ from datetime import date
 import pandas as pd
 import math
 import decimal
+import sys
 
 from app.models.lhb import LhbDetail, LhbInstitution
 from app.utils.akshare_utils import safe_akshare_call
+from app.utils.akshare_fetcher import AkshareFetcher
+from app.utils.bulk_upsert import bulk_upsert, UpsertResult
+from app.utils.akshare_schema import normalize_frame, to_records
+from app.utils.count_strategy import CountCacheKey, paginate_query
+from app.utils.query_cache import invalidate_query_cache, is_closed_date
+from app.utils.keyset import KeysetPage, SortKey, keyset_paginate, model_column, sort_signature
 import akshare as ak
 
 
 class LhbService:
     """龙虎榜服务类"""
     
+    @staticmethod
+    def _build_list_query(
+        db: Session,
+        target_date: date,
+        stock_code: Optional[str] = None,
+        stock_name: Optional[str] = None,
+    ):
+        """龙虎榜列表的筛选条件（不含排序）"""
+        query = db.query(LhbDetail).filter(LhbDetail.date == target_date)
+        
+        # 添加股票代码过滤
+        if stock_code and stock_code.strip():
+            query = query.filter(LhbDetail.stock_code == stock_code.strip())
+        
+        # 添加股票名称模糊查询（大小写不敏感）
+        if stock_name and stock_name.strip():
+            stock_name_clean = stock_name.strip()
+            # 使用 func.lower 确保大小写不敏感查询
+            query = query.filter(func.lower(LhbDetail.stock_name).like(f"%{stock_name_clean.lower()}%"))
+        return query
+    
+    @staticmethod
+    def _attach_concepts(db: Session, items: List[LhbDetail]) -> None:
+        """为每个龙虎榜记录加载概念板块"""
+        from app.services.stock_concept_service import StockConceptService
+        for item in items:
+            concepts = StockConceptService.get_by_stock_name(db, item.stock_name)
+            setattr(item, '_concepts', concepts)
+            # 同时更新concept文本字段（兼容旧接口）
+            if concepts:
+                concept_names = [c.name for c in concepts]
+                setattr(item, 'concept', ','.join(concept_names))
+    
     @staticmethod
     def get_lhb_list(
         db: Session,
@@ -26,28 +66,21 @@ class LhbService:
         page: int = 1,
         page_size: int = 20,
         sort_by: Optional[str] = None,
-        order: str = "desc"
+        order: str = "desc",
+        count_mode: Optional[str] = None
     ) -> tuple[List[LhbDetail], int]:
         """
         获取龙虎榜列表（优化版本）
+
+        Args:
+            count_mode: 总数计算方式（exact/estimate/none），None 使用 LIST_COUNT_MODE
         """
         import logging
         logger = logging.getLogger(__name__)
         logger.debug(f"查询参数: date={target_date}, stock_code={stock_code}, stock_name={stock_name}, page={page}, page_size={page_size}")
         
         try:
-            # 构建基础查询
-            query = db.query(LhbDetail).filter(LhbDetail.date == target_date)
-            
-            # 添加股票代码过滤
-            if stock_code and stock_code.strip():
-                query = query.filter(LhbDetail.stock_code == stock_code.strip())
-            
-            # 添加股票名称模糊查询（大小写不敏感）
-            if stock_name and stock_name.strip():
-                stock_name_clean = stock_name.strip()
-                # 使用 func.lower 确保大小写不敏感查询
-                query = query.filter(func.lower(LhbDetail.stock_name).like(f"%{stock_name_clean.lower()}%"))
+            query = LhbService._build_list_query(db, target_date, stock_code, stock_name)
             
             # 排序
             if sort_by:
@@ -65,37 +98,24 @@ class LhbService:
                 from sqlalchemy import nullslast
                 query = query.order_by(nullslast(desc(LhbDetail.net_buy_amount)))
             
-            # 优化：先获取分页数据，再根据情况决定是否计算总数
-            offset = (page - 1) * page_size
-            items = query.offset(offset).limit(page_size + 1).all()  # 多取一条用于判断
-            
-            # 判断是否有下一页
-            has_next = len(items) > page_size
-            if has_next:
-                items = items[:page_size]  # 只保留当前页的数据
-            
-            # 计算总数：如果第一页且没有下一页，总数就是当前数据量
-            if page == 1 and not has_next:
-                total = len(items)
-            else:
-                # 需要计算总数（但可以优化：如果数据量很大，可以估算）
-                total = query.count()
+            # 先获取分页数据，再按计数策略决定是否计算总数（精确总数按日期缓存）
+            result = paginate_query(
+                db, query, page, page_size, count_mode,
+                cache_key=CountCacheKey(
+                    "lhb_list",
+                    {"date": target_date, "stock_code": stock_code, "stock_name": stock_name},
+                    tags=[("lhb_detail", target_date)],
+                    closed=is_closed_date(target_date),
+                ),
+            )
+            items, total = result.items, result.total
             
             print(f"[LhbService] 查询结果: {len(items)} 条, total: {total} 条")
             if len(items) > 0:
                 print(f"[LhbService] 第一条数据: {items[0].stock_name} ({items[0].stock_code})")
             sys.stdout.flush()
             
-            # 为每个龙虎榜记录加载概念板块
-            from app.services.stock_concept_service import StockConceptService
-            for item in items:
-                concepts = StockConceptService.get_by_stock_name(db, item.stock_name)
-                setattr(item, '_concepts', concepts)
-                # 同时更新concept文本字段（兼容旧接口）
-                if concepts:
-                    concept_names = [c.name for c in concepts]
-                    setattr(item, 'concept', ','.join(concept_names))
-            
+            LhbService._attach_concepts(db, items)
             return items, total
             
         except Exception as e:
@@ -106,6 +126,35 @@ class LhbService:
             # 返回空结果，避免服务崩溃
             return [], 0
     
+    @staticmethod
+    def get_lhb_list_by_cursor(
+        db: Session,
+        target_date: date,
+        stock_code: Optional[str] = None,
+        stock_name: Optional[str] = None,
+        page_size: int = 20,
+        sort_by: Optional[str] = None,
+        order: str = "desc",
+        cursor: Optional[str] = None,
+    ) -> KeysetPage:
+        """
+        获取龙虎榜列表（游标分页）
+        排序与 get_lhb_list 一致，id 作为同值时的次序；不查询总数。
+        """
+        sort_column = model_column(LhbDetail, sort_by)
+        if sort_column is None:
+            sort_column, order = LhbDetail.net_buy_amount, "desc"
+        descending = order == "desc"
+        keys = [SortKey(sort_column, descending=descending), SortKey(LhbDetail.id, descending=descending)]
+        
+        query = LhbService._build_list_query(db, target_date, stock_code, stock_name)
+        keyset = keyset_paginate(
+            query, keys, page_size, cursor=cursor,
+            signature=sort_signature(f"lhb:{target_date}", keys),
+        )
+        LhbService._attach_concepts(db, keyset.items)
+        return keyset
+    
     @staticmethod
     def get_lhb_detail(
         db: Session,
@@ -159,102 +208,55 @@ class LhbService:
         db: Session,
         target_date: date,
         df: pd.DataFrame
-    ) -> int:
+    ) -> UpsertResult:
         """
         保存龙虎榜数据
-        返回保存的记录数
+        按 (date, stock_code) 批量 upsert，空值不覆盖已有数据
         """
-        count = 0
+        # 从"上榜日"字段获取日期，如果没有则使用target_date
+        frame = normalize_frame("stock_lhb_detail_em", df, required=["stock_code", "stock_name"])
+        frame["date"] = frame["date"].fillna(target_date)
+        # 概念信息暂时留空，后续可以从其他接口获取
+        frame["concept"] = None
         
         # 去重：同一日期同一代码只保留一条
-        df_to_process = df.copy()
-        if "代码" in df_to_process.columns:
-            before_len = len(df_to_process)
-            df_to_process = df_to_process.drop_duplicates(subset=["代码"])
-            after_len = len(df_to_process)
-            if before_len != after_len:
-                print(f"[LhbService] 去重龙虎榜基础数据: {before_len} -> {after_len}")
-        
-        for _, row in df_to_process.iterrows():
-            stock_code = str(row.get("代码", "")).zfill(6)
-            stock_name = row.get("名称", "")
-            
-            # 从"上榜日"字段获取日期，如果没有则使用target_date
-            row_date = target_date
-            if "上榜日" in row and pd.notna(row.get("上榜日")):
-                try:
-                    from datetime import datetime
-                    if isinstance(row.get("上榜日"), str):
-                        row_date = datetime.strptime(row.get("上榜日"), "%Y-%m-%d").date()
-                    else:
-                        row_date = row.get("上榜日").date() if hasattr(row.get("上榜日"), "date") else target_date
-                except:
-                    row_date = target_date
-            
-            # 检查是否已存在
-            existing = db.query(LhbDetail).filter(
-                and_(
-                    LhbDetail.date == row_date,
-                    LhbDetail.stock_code == stock_code
-                )
-            ).first()
-            
-            # 尝试多种可能的字段名
-            close_price = row.get("收盘价", row.get("最新价", None))
-            change_percent = row.get("涨跌幅", row.get("涨跌", None))
-            net_buy_amount = row.get("龙虎榜净买额", row.get("净买额", None))
-            buy_amount = row.get("龙虎榜买入额", row.get("买入额", None))
-            sell_amount = row.get("龙虎榜卖出额", row.get("卖出额", None))
-            total_amount = row.get("总成交额", row.get("成交额", None))
-            turnover_rate = row.get("换手率", None)
-            
-            # 获取概念信息（暂时留空，后续可以从其他接口获取）
-            concept = None
-            
-            if existing:
-                lhb_detail = existing
-                # 更新
-                existing.stock_name = stock_name
-                if close_price is not None:
-                    existing.close_price = close_price
-                if change_percent is not None:
-                    existing.change_percent = change_percent
-                if net_buy_amount is not None:
-                    existing.net_buy_amount = net_buy_amount
-                if buy_amount is not None:
-                    existing.buy_amount = buy_amount
-                if sell_amount is not None:
-                    existing.sell_amount = sell_amount
-                if total_amount is not None:
-                    existing.total_amount = total_amount
-                if turnover_rate is not None:
-                    existing.turnover_rate = turnover_rate
-                if concept is not None:
-                    existing.concept = concept
-                lhb_detail = existing
-            else:
-                # 新建
-                lhb = LhbDetail(
-                    date=row_date,
-                    stock_code=stock_code,
-                    stock_name=stock_name,
-                    close_price=close_price,
-                    change_percent=change_percent,
-                    net_buy_amount=net_buy_amount,
-                    buy_amount=buy_amount,
-                    sell_amount=sell_amount,
-                    total_amount=total_amount,
-                    turnover_rate=turnover_rate,
-                    concept=concept,
-                )
-                db.add(lhb)
-                db.flush()  # 获取ID
-                lhb_detail = lhb
-            
-            count += 1
+        before_len = len(frame)
+        frame = frame.drop_duplicates(subset=["date", "stock_code"])
+        if before_len != len(frame):
+            print(f"[LhbService] 去重龙虎榜基础数据: {before_len} -> {len(frame)}")
+        records = to_records(frame)
         
+        result = bulk_upsert(
+            db, LhbDetail, records,
+            conflict_columns=["date", "stock_code"],
+            keep_existing_on_null=True,
+        )
         db.commit()
-        return count
+        # 上榜日可能与 target_date 不同，按实际写入的日期失效
+        for written_date in {r["date"] for r in records}:
+            invalidate_query_cache("lhb_detail", written_date)
+        return result
+    
+    @staticmethod
+    def _institution_records(
+        df: pd.DataFrame,
+        flag: str,
+        lhb_detail_id: int,
+        stock_code: str,
+        target_date: date
+    ) -> List[dict]:
+        """将买入/卖出机构 DataFrame 转换为待写入的记录"""
+        frame = normalize_frame("stock_lhb_stock_detail_em", df, required=["institution_name"])
+        before_len = len(frame)
+        frame = frame.drop_duplicates(subset=["institution_name"])
+        if len(frame) != before_len:
+            print(f"[LhbService] {flag}机构去重: {before_len} -> {len(frame)}")
+        
+        frame.insert(0, "lhb_detail_id", lhb_detail_id)
+        frame.insert(1, "date", target_date)
+        frame.insert(2, "stock_code", stock_code)
+        frame["flag"] = flag
+        return to_records(frame)
     
     @staticmethod
     def save_institution_data(
@@ -264,115 +266,32 @@ class LhbService:
         target_date: date,
         df_buy: pd.DataFrame,
         df_sell: pd.DataFrame
-    ) -> int:
+    ) -> UpsertResult:
         """
         保存机构明细数据
-        返回保存的记录数
         注意：买入和卖出数据分别保存，通过flag字段区分
+        按 (lhb_detail_id, institution_name, flag) 批量 upsert，空值不覆盖已有数据
         """
-        count = 0
-        
-        # 保存买入机构数据（flag='买入'）
-        if df_buy is not None and not df_buy.empty:
-            df_buy_proc = df_buy.drop_duplicates(subset=["交易营业部名称"]) if "交易营业部名称" in df_buy.columns else df_buy
-            if len(df_buy_proc) != len(df_buy):
-                print(f"[LhbService] 买入机构去重: {len(df_buy)} -> {len(df_buy_proc)}")
-            for _, row in df_buy_proc.iterrows():
-                institution_name = row.get("交易营业部名称", "")
-                if not institution_name:
-                    continue
-                
-                buy_amount = row.get("买入金额", None)
-                sell_amount = row.get("卖出金额", None)
-                net_buy_amount = row.get("净额", None)
-                
-                # 检查是否已存在（同一机构、同一flag）
-                existing = db.query(LhbInstitution).filter(
-                    and_(
-                        LhbInstitution.lhb_detail_id == lhb_detail_id,
-                        LhbInstitution.institution_name == institution_name,
-                        LhbInstitution.flag == '买入'
-                    )
-                ).first()
-                
-                if existing:
-                    # 更新
-                    if buy_amount is not None:
-                        existing.buy_amount = buy_amount
-                    if sell_amount is not None:
-                        existing.sell_amount = sell_amount
-                    if net_buy_amount is not None:
-                        existing.net_buy_amount = net_buy_amount
-                else:
-                    # 新建
-                    institution = LhbInstitution(
-                        lhb_detail_id=lhb_detail_id,
-                        date=target_date,
-                        stock_code=stock_code,
-                        institution_name=institution_name,
-                        buy_amount=buy_amount,
-                        sell_amount=sell_amount,
-                        net_buy_amount=net_buy_amount,
-                        flag='买入',
-                    )
-                    db.add(institution)
-                
-                count += 1
-        
-        # 保存卖出机构数据（flag='卖出'）
-        if df_sell is not None and not df_sell.empty:
-            df_sell_proc = df_sell.drop_duplicates(subset=["交易营业部名称"]) if "交易营业部名称" in df_sell.columns else df_sell
-            if len(df_sell_proc) != len(df_sell):
-                print(f"[LhbService] 卖出机构去重: {len(df_sell)} -> {len(df_sell_proc)}")
-            for _, row in df_sell_proc.iterrows():
-                institution_name = row.get("交易营业部名称", "")
-                if not institution_name:
-                    continue
-                
-                buy_amount = row.get("买入金额", None)
-                sell_amount = row.get("卖出金额", None)
-                net_buy_amount = row.get("净额", None)
-                
-                # 检查是否已存在（同一机构、同一flag）
-                existing = db.query(LhbInstitution).filter(
-                    and_(
-                        LhbInstitution.lhb_detail_id == lhb_detail_id,
-                        LhbInstitution.institution_name == institution_name,
-                        LhbInstitution.flag == '卖出'
-                    )
-                ).first()
-                
-                if existing:
-                    # 更新
-                    if buy_amount is not None:
-                        existing.buy_amount = buy_amount
-                    if sell_amount is not None:
-                        existing.sell_amount = sell_amount
-                    if net_buy_amount is not None:
-                        existing.net_buy_amount = net_buy_amount
-                else:
-                    # 新建
-                    institution = LhbInstitution(
-                        lhb_detail_id=lhb_detail_id,
-                        date=target_date,
-                        stock_code=stock_code,
-                        institution_name=institution_name,
-                        buy_amount=buy_amount,
-                        sell_amount=sell_amount,
-                        net_buy_amount=net_buy_amount,
-                        flag='卖出',
-                    )
-                    db.add(institution)
-                    count += 1
+        records = (
+            LhbService._institution_records(df_buy, '买入', lhb_detail_id, stock_code, target_date)
+            + LhbService._institution_records(df_sell, '卖出', lhb_detail_id, stock_code, target_date)
+        )
         
+        result = bulk_upsert(
+            db, LhbInstitution, records,
+            conflict_columns=["lhb_detail_id", "institution_name", "flag"],
+            update_columns=["buy_amount", "sell_amount", "net_buy_amount"],
+            keep_existing_on_null=True,
+        )
         db.commit()
-        return count
+        return result
     
     @staticmethod
     def sync_institution_data(db: Session, target_date: date):
         """
         同步指定日期的所有股票的机构明细数据
         应该在 sync_data 之后调用
+        买入/卖出机构通过 AkshareFetcher 并发限流获取，结果由当前会话串行写入
         """
         from app.utils.sync_result import SyncResult
         
@@ -390,53 +309,52 @@ class LhbService:
             fail_count = 0
             total_institutions = 0
             
-            print(f"开始同步 {target_date} 的机构数据，共 {len(lhb_details)} 只股票...")
-            
-            for i, lhb_detail in enumerate(lhb_details, 1):
-                stock_code = lhb_detail.stock_code
-                stock_name = lhb_detail.stock_name
+            fetcher = AkshareFetcher()
+            print(f"开始同步 {target_date} 的机构数据，共 {len(lhb_details)} 只股票"
+                  f"（并发 {fetcher.max_workers}，限流 {fetcher.rate}/s）...")
+            
+            # 买入、卖出机构并发获取，按 (龙虎榜记录ID, 方向) 区分
+            # 先取出代码和名称，避免每次提交后对象过期触发重新查询
+            details_by_id = {d.id: (d.stock_code, d.stock_name) for d in lhb_details}
+            requests = {
+                (d.id, flag): (ak.stock_lhb_stock_detail_em, {"symbol": d.stock_code, "date": date_str, "flag": flag})
+                for d in lhb_details
+                for flag in ('买入', '卖出')
+            }
+            
+            # 抓取在线程池中进行，保存在当前线程中用同一个会话串行执行
+            pending: dict = {}
+            for (detail_id, flag), df in fetcher.fetch_all(requests):
+                pending.setdefault(detail_id, {})[flag] = df
+                if len(pending[detail_id]) < 2:
+                    continue
+                
+                frames = pending.pop(detail_id)
+                stock_code, stock_name = details_by_id[detail_id]
+                done = success_count + fail_count + 1
+                if done % 10 == 0:
+                    print(f"  进度: {done}/{len(lhb_details)} ({stock_code} {stock_name})")
                 
-                if i % 10 == 0:
-                    print(f"  进度: {i}/{len(lhb_details)} ({stock_code} {stock_name})")
+                df_buy, df_sell = frames['买入'], frames['卖出']
+                if df_buy is None and df_sell is None:
+                    fail_count += 1
+                    continue
                 
                 try:
-                    # 获取买入机构
-                    df_buy = safe_akshare_call(
-                        ak.stock_lhb_stock_detail_em,
-                        symbol=stock_code,
-                        date=date_str,
-                        flag='买入'
-                    )
-                    
-                    # 获取卖出机构
-                    df_sell = safe_akshare_call(
-                        ak.stock_lhb_stock_detail_em,
-                        symbol=stock_code,
-                        date=date_str,
-                        flag='卖出'
-                    )
-                    
-                    if df_buy is None and df_sell is None:
-                        fail_count += 1
-                        continue
-                    
                     # 保存机构数据
                     inst_count = LhbService.save_institution_data(
-                        db, lhb_detail.id, stock_code, target_date, df_buy, df_sell
-                    )
+                        db, detail_id, stock_code, target_date, df_buy, df_sell
+                    ).count
                     
                     if inst_count > 0:
                         success_count += 1
                         total_institutions += inst_count
                     else:
                         fail_count += 1
-                    
-                    # 避免请求过快
-                    import time
-                    time.sleep(0.3)
                         
                 except Exception as e:
-                    print(f"  获取 {stock_code} {stock_name} 机构数据失败: {str(e)[:50]}")
+                    db.rollback()
+                    print(f"  保存 {stock_code} {stock_name} 机构数据失败: {str(e)[:50]}")
                     fail_count += 1
                     continue
             
@@ -488,16 +406,16 @@ class LhbService:
                 return SyncResult.failure_result(error_msg, "数据过滤后为空")
             
             # 保存基础数据
-            count = LhbService.save_lhb_data(db, target_date, df)
-            if count == 0:
+            saved = LhbService.save_lhb_data(db, target_date, df)
+            if saved.count == 0:
                 return SyncResult.failure_result("保存数据失败，保存数量为0", "数据库保存异常")
             
-            print(f"成功同步 {target_date} 的龙虎榜基础数据，共 {count} 条")
+            print(f"成功同步 {target_date} 的龙虎榜基础数据，共 {saved.count} 条")
             
             # 注意：机构数据同步已分离到 sync_institution_data 方法
             # 在定时任务中会单独调用，避免在 sync_data 中同步机构数据导致超时
             
-            return SyncResult.success_result(f"龙虎榜数据同步成功", count)
+            return SyncResult.from_upsert(f"龙虎榜数据同步成功", saved)
         except Exception as e:
             error_msg = f"同步龙虎榜数据失败: {str(e)}"
             print(error_msg)
@@ -1,7 +1,7 @@
 """
 涨停板分析服务
 """
-from sqlalchemy.orm import Session
+from sqlalchemy.orm import Session, joinedload
 from sqlalchemy import and_, desc, asc, func, or_, cast, String, case, Integer, text
 from typing import Optional, List, Tuple
 from datetime import date, time
@@ -12,7 +12,10 @@ import re
 from app.models.limit_up_board import LimitUpBoard, LimitUpBoardConcept
 from app.models.stock_concept import StockConcept
 from app.schemas.limit_up_board import LimitUpBoardCreate, LimitUpBoardUpdate
-from app.services.stock_concept_service import StockConceptService
+from app.services.stock_concept_service import StockConceptService, ConceptNameMatcher
+from app.utils.count_strategy import CountCacheKey, paginate_query
+from app.utils.query_cache import invalidate_query_cache, is_closed_date
+from app.utils.keyset import KeysetPage, SortKey, keyset_paginate, model_column, sort_signature
 
 
 def extract_board_count(limit_up_days: Optional[str]) -> Optional[int]:
@@ -39,46 +42,70 @@ class LimitUpBoardService:
     """涨停板分析服务类"""
     
     @staticmethod
-    def extract_concepts_from_keywords(
-        db: Session,
+    def _match_concepts(
+        matcher: ConceptNameMatcher,
         keywords: Optional[str],
         provided_concept_names: Optional[List[str]] = None
     ) -> List[int]:
-        """
-        从关键字中提取概念板块ID列表
-        返回: 概念板块ID列表
-        """
+        """用已构建的匹配器提取概念ID：先取显式提供的概念名称，再取关键字中出现的概念"""
         concept_ids = []
         
-        if not keywords and not provided_concept_names:
-            return concept_ids
-        
-        # 获取所有概念板块名称（用于匹配）
-        all_concepts, _ = StockConceptService.get_list(db, page=1, page_size=10000)
-        concept_name_map = {concept.name: concept.id for concept in all_concepts}
-        
         # 如果提供了概念名称，直接使用
         if provided_concept_names:
             for name in provided_concept_names:
-                if name in concept_name_map:
-                    concept_ids.append(concept_name_map[name])
+                if name in matcher.name_map:
+                    concept_ids.append(matcher.name_map[name])
         
-        # 从关键字中提取概念板块
+        # 从关键字中提取概念板块（一次扫描匹配全部概念名称）
         if keywords:
-            keywords_lower = keywords.lower()
-            for concept_name, concept_id in concept_name_map.items():
-                # 检查概念名称是否在关键字中出现
-                if concept_name.lower() in keywords_lower:
-                    if concept_id not in concept_ids:
-                        concept_ids.append(concept_id)
+            for concept_id in matcher.match(keywords):
+                if concept_id not in concept_ids:
+                    concept_ids.append(concept_id)
         
         return concept_ids
     
     @staticmethod
-    def get_list(
+    def extract_concepts_from_keywords(
+        db: Session,
+        keywords: Optional[str],
+        provided_concept_names: Optional[List[str]] = None
+    ) -> List[int]:
+        """
+        从关键字中提取概念板块ID列表
+        返回: 概念板块ID列表
+        """
+        if not keywords and not provided_concept_names:
+            return []
+        
+        matcher = StockConceptService.get_name_matcher(db)
+        return LimitUpBoardService._match_concepts(matcher, keywords, provided_concept_names)
+    
+    @staticmethod
+    def extract_concepts_batch(
+        db: Session,
+        items: List[Tuple[Optional[str], Optional[List[str]]]]
+    ) -> List[List[int]]:
+        """
+        批量提取概念板块ID，整批只获取一次匹配器
+        
+        Args:
+            items: [(关键字, 显式提供的概念名称列表), ...]
+            
+        Returns:
+            与 items 一一对应的概念ID列表
+        """
+        if not any(keywords or names for keywords, names in items):
+            return [[] for _ in items]
+        
+        matcher = StockConceptService.get_name_matcher(db)
+        return [
+            LimitUpBoardService._match_concepts(matcher, keywords, names)
+            for keywords, names in items
+        ]
+    
+    @staticmethod
+    def _build_list_query(
         db: Session,
-        page: int = 1,
-        page_size: int = 20,
         target_date: Optional[date] = None,
         board_name: Optional[str] = None,
         stock_code: Optional[str] = None,
@@ -87,17 +114,8 @@ class LimitUpBoardService:
         limit_up_reason: Optional[str] = None,
         concept_id: Optional[int] = None,
         concept_name: Optional[str] = None,
-        sort_by: Optional[str] = None,
-        order: str = "desc",
-    ) -> Tuple[List[LimitUpBoard], int]:
-        """
-        获取涨停板分析列表
-        
-        Args:
-            sort_by: 排序字段，支持: date, board_name, stock_code, stock_name, 
-                    board_count (板数), circulation_market_value, turnover_amount
-            order: 排序方向，asc 或 desc
-        """
+    ):
+        """涨停板分析列表的筛选条件（不含排序）"""
         query = db.query(LimitUpBoard)
         
         if target_date:
@@ -128,9 +146,71 @@ class LimitUpBoardService:
                 query = query.filter(StockConcept.id == concept_id)
             if concept_name:
                 query = query.filter(StockConcept.name.like(f"%{concept_name}%"))
+        return query
+    
+    @staticmethod
+    def _board_count_expr():
+        """
+        从 limit_up_days 提取板数：使用 PostgreSQL 的正则表达式提取 "X 板" 中的数字
+        匹配格式: "X 板" 或 "X板" 等，提取不到时为 0
+        """
+        return func.cast(
+            func.coalesce(
+                func.nullif(
+                    func.regexp_replace(
+                        LimitUpBoard.limit_up_days,
+                        '.*?(\\d+)\\s*板.*',
+                        '\\1',
+                        'g'
+                    ),
+                    ''
+                ),
+                '0'
+            ),
+            Integer
+        )
+    
+    @staticmethod
+    def _attach_concepts(db: Session, items: List[LimitUpBoard]) -> None:
+        """加载概念板块关联"""
+        for item in items:
+            concept_mappings = db.query(LimitUpBoardConcept).filter(
+                LimitUpBoardConcept.limit_up_board_id == item.id
+            ).all()
+            concepts = [mapping.concept for mapping in concept_mappings]
+            item._concepts = concepts
+    
+    @staticmethod
+    def get_list(
+        db: Session,
+        page: int = 1,
+        page_size: int = 20,
+        target_date: Optional[date] = None,
+        board_name: Optional[str] = None,
+        stock_code: Optional[str] = None,
+        stock_name: Optional[str] = None,
+        tag: Optional[str] = None,
+        limit_up_reason: Optional[str] = None,
+        concept_id: Optional[int] = None,
+        concept_name: Optional[str] = None,
+        sort_by: Optional[str] = None,
+        order: str = "desc",
+        count_mode: Optional[str] = None,
+    ) -> Tuple[List[LimitUpBoard], int]:
+        """
+        获取涨停板分析列表
         
-        # 获取总数
-        total = query.count()
+        Args:
+            sort_by: 排序字段，支持: date, board_name, stock_code, stock_name, 
+                    board_count (板数), circulation_market_value, turnover_amount
+            order: 排序方向，asc 或 desc
+            count_mode: 总数计算方式（exact/estimate/none），None 使用 LIST_COUNT_MODE
+        """
+        filters = dict(
+            target_date=target_date, board_name=board_name, stock_code=stock_code, stock_name=stock_name,
+            tag=tag, limit_up_reason=limit_up_reason, concept_id=concept_id, concept_name=concept_name,
+        )
+        query = LimitUpBoardService._build_list_query(db, **filters)
         
         # 排序逻辑
         if sort_by == "board_count":
@@ -139,21 +219,7 @@ class LimitUpBoardService:
             # 匹配格式: "X 板" 或 "X板" 等，提取数字部分
             # PostgreSQL 正则表达式语法: regexp_replace(source, pattern, replacement, flags)
             # 注意：PostgreSQL 使用 E'...' 来表示转义字符串，或者使用双反斜杠
-            board_count_expr = func.cast(
-                func.coalesce(
-                    func.nullif(
-                        func.regexp_replace(
-                            LimitUpBoard.limit_up_days,
-                            '.*?(\\d+)\\s*板.*',
-                            '\\1',
-                            'g'
-                        ),
-                        ''
-                    ),
-                    '0'
-                ),
-                Integer
-            )
+            board_count_expr = LimitUpBoardService._board_count_expr()
             
             if order == "desc":
                 query = query.order_by(desc(board_count_expr))
@@ -162,10 +228,6 @@ class LimitUpBoardService:
             
             # 添加次要排序字段
             query = query.order_by(desc(LimitUpBoard.date), LimitUpBoard.board_name, LimitUpBoard.stock_code)
-            
-            # 分页
-            query = query.offset((page - 1) * page_size).limit(page_size)
-            items = query.all()
         else:
             # 其他字段的排序
             if sort_by:
@@ -181,20 +243,74 @@ class LimitUpBoardService:
             else:
                 # 默认排序
                 query = query.order_by(desc(LimitUpBoard.date), LimitUpBoard.board_name, LimitUpBoard.stock_code)
-            
-            # 分页
-            query = query.offset((page - 1) * page_size).limit(page_size)
-            items = query.all()
         
-        # 加载概念板块关联
-        for item in items:
-            concept_mappings = db.query(LimitUpBoardConcept).filter(
-                LimitUpBoardConcept.limit_up_board_id == item.id
-            ).all()
-            concepts = [mapping.concept for mapping in concept_mappings]
-            item._concepts = concepts
+        # 分页；精确总数按筛选条件缓存，无任何筛选时估算直接读表统计信息
+        result = paginate_query(
+            db, query, page, page_size, count_mode,
+            cache_key=CountCacheKey(
+                "limit_up_board_list",
+                filters,
+                tags=[("limit_up_board", target_date)],
+                closed=is_closed_date(target_date),
+            ),
+            table_name=None if any(filters.values()) else LimitUpBoard.__tablename__,
+        )
+        items = result.items
         
-        return items, total
+        LimitUpBoardService._attach_concepts(db, items)
+        return items, result.total
+    
+    @staticmethod
+    def get_list_by_cursor(
+        db: Session,
+        page_size: int = 20,
+        target_date: Optional[date] = None,
+        board_name: Optional[str] = None,
+        stock_code: Optional[str] = None,
+        stock_name: Optional[str] = None,
+        tag: Optional[str] = None,
+        limit_up_reason: Optional[str] = None,
+        concept_id: Optional[int] = None,
+        concept_name: Optional[str] = None,
+        sort_by: Optional[str] = None,
+        order: str = "desc",
+        cursor: Optional[str] = None,
+    ) -> KeysetPage:
+        """获取涨停板分析列表（游标分页），排序与 get_list 一致，id 作为同值时的次序；不查询总数"""
+        query = LimitUpBoardService._build_list_query(
+            db, target_date, board_name, stock_code, stock_name, tag, limit_up_reason, concept_id, concept_name
+        )
+        descending = order == "desc"
+        default_keys = [
+            SortKey(LimitUpBoard.date, descending=True),
+            SortKey(LimitUpBoard.board_name),
+            SortKey(LimitUpBoard.stock_code),
+        ]
+        row_values = None
+        if sort_by == "board_count":
+            board_count = LimitUpBoardService._board_count_expr().label("board_count")
+            query = query.add_columns(board_count)
+            keys = [SortKey(board_count, descending=descending, nullable=False), *default_keys, SortKey(LimitUpBoard.id)]
+            
+            def row_values(row):
+                item, count = row
+                return (count, item.date, item.board_name, item.stock_code, item.id)
+        else:
+            sort_column = model_column(LimitUpBoard, sort_by)
+            if sort_column is not None:
+                keys = [SortKey(sort_column, descending=descending), SortKey(LimitUpBoard.id, descending=descending)]
+            else:
+                keys = [*default_keys, SortKey(LimitUpBoard.id)]
+        
+        keyset = keyset_paginate(
+            query, keys, page_size, cursor=cursor,
+            signature=sort_signature("limit_up_board", keys),
+            row_values=row_values,
+        )
+        if sort_by == "board_count":
+            keyset.items = [item for item, _ in keyset.items]
+        LimitUpBoardService._attach_concepts(db, keyset.items)
+        return keyset
     
     @staticmethod
     def get_by_id(db: Session, item_id: int) -> Optional[LimitUpBoard]:
@@ -220,7 +336,35 @@ class LimitUpBoardService:
             )
         
         # 创建主记录
-        db_item = LimitUpBoard(
+        db_item = LimitUpBoardService._new_record(item)
+        db.add(db_item)
+        db.flush()  # 获取ID
+        
+        # 创建概念板块关联
+        for concept_id in concept_ids:
+            mapping = LimitUpBoardConcept(
+                limit_up_board_id=db_item.id,
+                concept_id=concept_id
+            )
+            db.add(mapping)
+        
+        db.commit()
+        db.refresh(db_item)
+        invalidate_query_cache("limit_up_board", db_item.date)
+        
+        # 加载概念板块
+        concept_mappings = db.query(LimitUpBoardConcept).filter(
+            LimitUpBoardConcept.limit_up_board_id == db_item.id
+        ).all()
+        concepts = [mapping.concept for mapping in concept_mappings]
+        db_item._concepts = concepts
+        
+        return db_item
+    
+    @staticmethod
+    def _new_record(item: LimitUpBoardCreate) -> LimitUpBoard:
+        """由创建请求构造主记录（未加入会话）"""
+        return LimitUpBoard(
             date=item.date,
             board_name=item.board_name,
             board_stock_count=item.board_stock_count,
@@ -247,37 +391,50 @@ class LimitUpBoardService:
             consecutive_board_count=item.consecutive_board_count,
             industry=item.industry,
         )
-        db.add(db_item)
+    
+    @staticmethod
+    def batch_create(db: Session, items: List[LimitUpBoardCreate], auto_extract_concepts: bool = True) -> List[LimitUpBoard]:
+        """
+        批量创建涨停板分析
+        整批一次提取概念、一次提交，任一条失败则整批回滚
+        """
+        if not items:
+            return []
+        
+        if auto_extract_concepts:
+            concept_id_lists = LimitUpBoardService.extract_concepts_batch(
+                db, [(item.keywords, item.concept_names) for item in items]
+            )
+        else:
+            concept_id_lists = [[] for _ in items]
+        
+        created_items = [LimitUpBoardService._new_record(item) for item in items]
+        db.add_all(created_items)
         db.flush()  # 获取ID
         
         # 创建概念板块关联
-        for concept_id in concept_ids:
-            mapping = LimitUpBoardConcept(
-                limit_up_board_id=db_item.id,
-                concept_id=concept_id
-            )
-            db.add(mapping)
+        for db_item, concept_ids in zip(created_items, concept_id_lists):
+            for concept_id in concept_ids:
+                db.add(LimitUpBoardConcept(
+                    limit_up_board_id=db_item.id,
+                    concept_id=concept_id
+                ))
         
         db.commit()
-        db.refresh(db_item)
-        
-        # 加载概念板块
-        concept_mappings = db.query(LimitUpBoardConcept).filter(
-            LimitUpBoardConcept.limit_up_board_id == db_item.id
+        for target_date in {db_item.date for db_item in created_items}:
+            invalidate_query_cache("limit_up_board", target_date)
+        
+        # 一次查询加载所有新记录的概念板块
+        concepts_by_item = {}
+        concept_mappings = db.query(LimitUpBoardConcept).options(
+            joinedload(LimitUpBoardConcept.concept)
+        ).filter(
+            LimitUpBoardConcept.limit_up_board_id.in_([db_item.id for db_item in created_items])
         ).all()
-        concepts = [mapping.concept for mapping in concept_mappings]
-        db_item._concepts = concepts
-        
-        return db_item
-    
-    @staticmethod
-    def batch_create(db: Session, items: List[LimitUpBoardCreate], auto_extract_concepts: bool = True) -> List[LimitUpBoard]:
-        """批量创建涨停板分析"""
-        created_items = []
-        
-        for item in items:
-            created_item = LimitUpBoardService.create(db, item, auto_extract_concepts)
-            created_items.append(created_item)
+        for mapping in concept_mappings:
+            concepts_by_item.setdefault(mapping.limit_up_board_id, []).append(mapping.concept)
+        for db_item in created_items:
+            db_item._concepts = concepts_by_item.get(db_item.id, [])
         
         return created_items
     
@@ -287,6 +444,7 @@ class LimitUpBoardService:
         db_item = db.query(LimitUpBoard).filter(LimitUpBoard.id == item_id).first()
         if not db_item:
             return None
+        original_date = db_item.date
         
         update_data = item_update.model_dump(exclude_unset=True, exclude={'concept_names'})
         for key, value in update_data.items():
@@ -312,6 +470,9 @@ class LimitUpBoardService:
         
         db.commit()
         db.refresh(db_item)
+        invalidate_query_cache("limit_up_board", original_date)
+        if db_item.date != original_date:
+            invalidate_query_cache("limit_up_board", db_item.date)
         
         # 加载概念板块
         concept_mappings = db.query(LimitUpBoardConcept).filter(
@@ -329,8 +490,10 @@ class LimitUpBoardService:
         if not db_item:
             return False
         
+        target_date = db_item.date
         db.delete(db_item)
         db.commit()
+        invalidate_query_cache("limit_up_board", target_date)
         return True
     
     @staticmethod
@@ -338,6 +501,7 @@ class LimitUpBoardService:
         """根据日期删除涨停板分析"""
         deleted_count = db.query(LimitUpBoard).filter(LimitUpBoard.date == target_date).delete()
         db.commit()
+        invalidate_query_cache("limit_up_board", target_date)
         return deleted_count
     
     @staticmethod
@@ -2,12 +2,38 @@
 股票概念板块服务
 """
 from sqlalchemy.orm import Session
-from sqlalchemy import func, or_
-from typing import Optional, List
+from sqlalchemy import func, or_, select, union, literal
+from typing import Optional, List, Tuple
 import math
+import threading
 
 from app.models.stock_concept import StockConcept, StockConceptMapping
 from app.config import settings
+from app.utils.aho_corasick import AhoCorasick
+
+
+class ConceptNameMatcher:
+    """
+    概念名称多模式匹配器
+    由全部概念名称构建 Aho–Corasick 自动机，一次扫描文本即可找出出现的所有概念
+    """
+    
+    def __init__(self, concepts: List[Tuple[int, str]], signature: Tuple = ()):
+        # 同名概念以排序靠后的为准（与按名称建字典的旧逻辑一致）
+        self.name_map = {}
+        for concept_id, name in concepts:
+            self.name_map[name] = concept_id
+        self.signature = signature
+        self._order = {concept_id: i for i, concept_id in enumerate(self.name_map.values())}
+        self._automaton = AhoCorasick(self.name_map.items())
+    
+    def match(self, text: Optional[str]) -> List[int]:
+        """返回 text 中出现的概念ID（不区分大小写），按概念排序顺序排列"""
+        return sorted(self._automaton.find(text or ""), key=self._order.__getitem__)
+
+
+_name_matcher: Optional[ConceptNameMatcher] = None
+_name_matcher_lock = threading.Lock()
 
 
 class StockConceptService:
@@ -62,17 +88,92 @@ class StockConceptService:
         return items, total
     
     @staticmethod
-    def get_tree(db: Session, max_level: int = 3) -> List[StockConcept]:
-        """获取概念树形结构"""
-        # 查询所有一级概念
-        level1_concepts = db.query(StockConcept).filter(
-            StockConcept.level == 1
+    def get_name_matcher(db: Session) -> ConceptNameMatcher:
+        """
+        获取缓存的概念名称匹配器
+        
+        本进程内的增删改会主动失效；其它进程（如导入脚本）新增概念时，
+        通过 (概念数量, 最大ID) 签名发现变化后重建
+        """
+        global _name_matcher
+        signature = tuple(db.query(func.count(StockConcept.id), func.max(StockConcept.id)).one())
+        matcher = _name_matcher
+        if matcher is not None and matcher.signature == signature:
+            return matcher
+        
+        with _name_matcher_lock:
+            if _name_matcher is None or _name_matcher.signature != signature:
+                concepts = db.query(StockConcept.id, StockConcept.name).order_by(
+                    StockConcept.level.asc(),
+                    StockConcept.sort_order.asc(),
+                    StockConcept.name.asc()
+                ).all()
+                _name_matcher = ConceptNameMatcher(concepts, signature)
+            return _name_matcher
+    
+    @staticmethod
+    def invalidate_name_matcher():
+        """概念名称变化后失效匹配器，下次使用时重建"""
+        global _name_matcher
+        _name_matcher = None
+    
+    @staticmethod
+    def get_tree(db: Session, max_level: int = 3) -> List[dict]:
+        """
+        获取概念树形结构
+        一次查询取出 max_level 以内的全部概念，在内存中按 parent_id 组装
+        
+        Returns:
+            一级概念节点列表，每个节点为 {"concept": StockConcept, "children": [...]}
+        """
+        concepts = db.query(StockConcept).filter(
+            StockConcept.level <= max_level
         ).order_by(
             StockConcept.sort_order.asc(),
             StockConcept.name.asc()
         ).all()
         
-        return level1_concepts
+        nodes = {c.id: {"concept": c, "children": []} for c in concepts}
+        roots = []
+        for concept in concepts:
+            node = nodes[concept.id]
+            if concept.level == 1:
+                roots.append(node)
+            elif concept.parent_id in nodes:
+                nodes[concept.parent_id]["children"].append(node)
+        
+        return roots
+    
+    @staticmethod
+    def _hierarchy_cte(concept_ids: List[int], direction: str, max_depth: int = 10):
+        """
+        WITH RECURSIVE 查询 concept_ids 的所有后代（descendants）或祖先（ancestors），不含自身
+        
+        结果列为 (id, depth)，depth 为与起点的距离；max_depth 仅作环路保护，层级本身不超过3级
+        """
+        if direction == "descendants":
+            cte = select(
+                StockConcept.id.label("id"), literal(1).label("depth")
+            ).where(
+                StockConcept.parent_id.in_(concept_ids)
+            ).cte(name="concept_descendants", recursive=True)
+            step = select(StockConcept.id, cte.c.depth + 1).where(
+                StockConcept.parent_id == cte.c.id,
+                cte.c.depth < max_depth,
+            )
+        else:
+            cte = select(
+                StockConcept.parent_id.label("id"), literal(1).label("depth")
+            ).where(
+                StockConcept.id.in_(concept_ids),
+                StockConcept.parent_id.isnot(None),
+            ).cte(name="concept_ancestors", recursive=True)
+            step = select(StockConcept.parent_id, cte.c.depth + 1).where(
+                StockConcept.id == cte.c.id,
+                StockConcept.parent_id.isnot(None),
+                cte.c.depth < max_depth,
+            )
+        return cte.union_all(step)
     
     @staticmethod
     def expand_concept_ids(
@@ -84,6 +185,8 @@ class StockConceptService:
         """
         扩展概念ID列表（包含子概念或父概念）
         
+        不论传入多少个ID，都只执行一条递归查询
+        
         Args:
             db: 数据库会话
             concept_ids: 原始概念ID列表
@@ -98,60 +201,47 @@ class StockConceptService:
         
         expanded_ids = set(concept_ids)
         
-        # 查询所有相关概念
-        concepts = db.query(StockConcept).filter(
-            StockConcept.id.in_(concept_ids)
-        ).all()
+        selects = []
+        if include_descendants:
+            cte = StockConceptService._hierarchy_cte(concept_ids, "descendants")
+            selects.append(select(cte.c.id))
+        if include_ancestors:
+            cte = StockConceptService._hierarchy_cte(concept_ids, "ancestors")
+            selects.append(select(cte.c.id))
         
-        for concept in concepts:
-            # 包含子概念
-            if include_descendants:
-                descendants = StockConceptService.get_all_descendant_ids(db, concept.id)
-                expanded_ids.update(descendants)
-            
-            # 包含父概念
-            if include_ancestors:
-                ancestors = StockConceptService.get_all_ancestor_ids(db, concept.id)
-                expanded_ids.update(ancestors)
+        if selects:
+            stmt = selects[0] if len(selects) == 1 else union(*selects)
+            expanded_ids.update(db.execute(stmt).scalars().all())
         
         return list(expanded_ids)
     
     @staticmethod
     def get_all_descendant_ids(db: Session, concept_id: int) -> List[int]:
-        """获取所有子概念ID（递归）"""
-        descendant_ids = []
-        
-        # 查询直接子概念
-        children = db.query(StockConcept).filter(
-            StockConcept.parent_id == concept_id
-        ).all()
-        
-        for child in children:
-            descendant_ids.append(child.id)
-            # 递归查询子概念的子概念
-            descendant_ids.extend(
-                StockConceptService.get_all_descendant_ids(db, child.id)
-            )
-        
-        return descendant_ids
+        """获取所有子概念ID（一条递归查询）"""
+        cte = StockConceptService._hierarchy_cte([concept_id], "descendants")
+        return list(db.execute(select(cte.c.id).distinct()).scalars().all())
     
     @staticmethod
     def get_all_ancestor_ids(db: Session, concept_id: int) -> List[int]:
-        """获取所有父概念ID（向上递归）"""
-        ancestor_ids = []
-        
-        concept = db.query(StockConcept).filter(
-            StockConcept.id == concept_id
-        ).first()
-        
-        if concept and concept.parent_id:
-            ancestor_ids.append(concept.parent_id)
-            # 递归查询父概念的父概念
-            ancestor_ids.extend(
-                StockConceptService.get_all_ancestor_ids(db, concept.parent_id)
-            )
-        
-        return ancestor_ids
+        """获取所有父概念ID（一条递归查询，由近到远）"""
+        cte = StockConceptService._hierarchy_cte([concept_id], "ancestors")
+        return list(db.execute(select(cte.c.id).order_by(cte.c.depth.asc())).scalars().all())
+    
+    @staticmethod
+    def get_descendants(db: Session, concept_id: int) -> List[StockConcept]:
+        """获取所有后代概念（按层级路径排序）"""
+        cte = StockConceptService._hierarchy_cte([concept_id], "descendants")
+        return db.query(StockConcept).filter(
+            StockConcept.id.in_(select(cte.c.id))
+        ).order_by(StockConcept.path.asc()).all()
+    
+    @staticmethod
+    def get_ancestors(db: Session, concept_id: int) -> List[StockConcept]:
+        """获取所有祖先概念（由近到远）"""
+        cte = StockConceptService._hierarchy_cte([concept_id], "ancestors")
+        return db.query(StockConcept).filter(
+            StockConcept.id.in_(select(cte.c.id))
+        ).order_by(StockConcept.level.desc()).all()
     
     @staticmethod
     def get_stock_concepts_with_hierarchy(
@@ -232,6 +322,7 @@ class StockConceptService:
         
         db.commit()
         db.refresh(concept)
+        StockConceptService.invalidate_name_matcher()
         return concept
     
     @staticmethod
@@ -289,6 +380,7 @@ class StockConceptService:
         
         db.commit()
         db.refresh(concept)
+        StockConceptService.invalidate_name_matcher()
         return concept
     
     @staticmethod
@@ -316,6 +408,7 @@ class StockConceptService:
         
         db.delete(concept)
         db.commit()
+        StockConceptService.invalidate_name_matcher()
         return True
     
     @staticmethod
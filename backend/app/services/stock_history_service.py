@@ -2,16 +2,18 @@
 股票历史行情服务
 """
 from sqlalchemy.orm import Session
-from sqlalchemy import and_, desc
-from typing import Optional, List
+from sqlalchemy import desc, func, tuple_
+from typing import Optional, List, Dict, Tuple
 from datetime import date, timedelta
+from bisect import bisect_left, bisect_right
 import pandas as pd
 
 from app.models.stock_history import StockHistory
 from app.models.limit_up_board import LimitUpBoard
-from app.utils.akshare_utils import safe_akshare_call
+from app.utils.akshare_fetcher import AkshareFetcher
+from app.utils.bulk_upsert import bulk_upsert, UpsertResult, DEFAULT_BATCH_SIZE
 from app.utils.sync_result import SyncResult
-from app.utils.format_utils import safe_float, safe_int
+from app.utils.akshare_schema import normalize_frame, to_records
 import akshare as ak
 
 
@@ -33,19 +35,108 @@ class StockHistoryService:
         # 确保是6位数字
         return code.zfill(6)
     
+    @staticmethod
+    def get_watermarks(
+        db: Session,
+        stock_codes: List[str],
+        start_date: date
+    ) -> Dict[str, Tuple[date, date, int]]:
+        """
+        一条 GROUP BY 语句查询每只股票在窗口内已有的数据范围
+        
+        Returns:
+            Dict[str, Tuple[date, date, int]]: {股票代码: (最早日期, 最新日期, 天数)}
+        """
+        if not stock_codes:
+            return {}
+        rows = db.query(
+            StockHistory.stock_code,
+            func.min(StockHistory.date),
+            func.max(StockHistory.date),
+            func.count(func.distinct(StockHistory.date)),
+        ).filter(
+            StockHistory.stock_code.in_(stock_codes),
+            StockHistory.date >= start_date,
+        ).group_by(StockHistory.stock_code).all()
+        return {code: (first, last, days) for code, first, last, days in rows}
+    
+    @staticmethod
+    def get_reference_dates(db: Session, start_date: date, end_date: date) -> List[date]:
+        """窗口内 stock_history 中出现过的所有日期，作为已知交易日用于发现缺口"""
+        rows = db.query(StockHistory.date).filter(
+            StockHistory.date >= start_date,
+            StockHistory.date <= end_date,
+        ).distinct().all()
+        return sorted(r[0] for r in rows)
+    
+    @staticmethod
+    def plan_history_fetch(
+        stock_codes: List[str],
+        watermarks: Dict[str, Tuple[date, date, int]],
+        reference_dates: List[date],
+        start_date: date,
+        end_date: date
+    ) -> Dict[str, Tuple[date, str]]:
+        """
+        决定每只股票需要获取的日期范围
+        
+        - 没有数据：全量获取 [start_date, end_date]
+        - 已有数据有缺口（窗口内第一个已知交易日到最新日期之间缺了某天，含开头缺失）：全量获取
+        - 最新日期 >= end_date：已是最新，不获取
+        - 其余：从最新日期（含，用于校验复权口径）增量获取到 end_date
+        
+        Returns:
+            Dict[str, Tuple[date, str]]: {股票代码: (获取开始日期, "full"/"incremental")}
+        """
+        plan = {}
+        for code in stock_codes:
+            watermark = watermarks.get(code)
+            if watermark is None:
+                plan[code] = (start_date, "full")
+                continue
+            first, last, days = watermark
+            # 已知交易日从窗口内第一个算起：已有数据晚于它开始，说明前面也有缺口
+            window_first = bisect_left(reference_dates, start_date)
+            expected = bisect_right(reference_dates, last) - min(window_first, bisect_left(reference_dates, first))
+            if days < expected:
+                plan[code] = (start_date, "full")
+            elif last < end_date:
+                plan[code] = (last, "incremental")
+        return plan
+    
+    @staticmethod
+    def _stored_close_prices(
+        db: Session,
+        keys: List[Tuple[str, date]]
+    ) -> Dict[Tuple[str, date], float]:
+        """批量查询 (股票代码, 日期) 对应的已存收盘价"""
+        if not keys:
+            return {}
+        rows = db.query(StockHistory.stock_code, StockHistory.date, StockHistory.close_price).filter(
+            tuple_(StockHistory.stock_code, StockHistory.date).in_(keys)
+        ).all()
+        return {(code, d): float(close) for code, d, close in rows if close is not None}
+    
     @staticmethod
     def sync_limit_up_stocks_history(
         db: Session,
         target_date: Optional[date] = None,
-        months: int = 3
+        months: int = 3,
+        incremental: bool = True,
+        adjust: str = ""
     ) -> SyncResult:
         """
         同步涨停股的历史行情数据（3个月）
         
+        增量模式下先按股票查询已有数据的最新日期（水位），只请求缺少的日期范围；
+        数据有缺口、或重叠日收盘价与已存数据不一致（复权口径变化）时回退为全量获取。
+        
         Args:
             db: 数据库会话
             target_date: 目标日期，None表示使用当前日期
             months: 获取历史数据的月数，默认3个月
+            incremental: 是否使用增量模式，False 时每只股票都全量获取
+            adjust: 复权方式，""为不复权；复权数据会随除权除息整体变化，只支持全量获取
         
         Returns:
             SyncResult: 同步结果
@@ -56,84 +147,113 @@ class StockHistoryService:
             
             print(f"开始同步涨停股历史行情数据，目标日期: {target_date}, 历史月数: {months}")
             
-            # 获取目标日期的所有涨停股
-            limit_up_stocks = db.query(LimitUpBoard).filter(
-                LimitUpBoard.date == target_date
-            ).all()
+            # 获取目标日期的所有涨停股（去重股票代码）
+            stock_codes = sorted({
+                row[0] for row in db.query(LimitUpBoard.stock_code).filter(
+                    LimitUpBoard.date == target_date
+                ).distinct().all()
+            })
             
-            if not limit_up_stocks:
+            if not stock_codes:
                 print(f"目标日期 {target_date} 没有涨停股数据")
                 return SyncResult.failure_result(
                     f"目标日期 {target_date} 没有涨停股数据",
                     "无数据源"
                 )
             
-            # 去重股票代码
-            stock_codes = list(set([stock.stock_code for stock in limit_up_stocks]))
-            print(f"找到 {len(stock_codes)} 只涨停股，开始同步历史数据...")
-            
             # 计算日期范围
             end_date = target_date
             start_date = end_date - timedelta(days=months * 30)  # 大约3个月
             
-            start_date_str = start_date.strftime("%Y%m%d")
+            if incremental and not adjust:
+                watermarks = StockHistoryService.get_watermarks(db, stock_codes, start_date)
+                reference_dates = StockHistoryService.get_reference_dates(db, start_date, end_date)
+                plan = StockHistoryService.plan_history_fetch(
+                    stock_codes, watermarks, reference_dates, start_date, end_date
+                )
+            else:
+                plan = {code: (start_date, "full") for code in stock_codes}
+            
+            full_count = sum(1 for _, mode in plan.values() if mode == "full")
+            print(f"找到 {len(stock_codes)} 只涨停股: 全量 {full_count} 只, "
+                  f"增量 {len(plan) - full_count} 只, 已是最新 {len(stock_codes) - len(plan)} 只")
+            
             end_date_str = end_date.strftime("%Y%m%d")
             
+            def request_for(code: str, fetch_start: date):
+                return (ak.stock_zh_a_hist, {
+                    # 标准化股票代码格式（移除 .SZ/.SH/.BJ 后缀）
+                    "symbol": StockHistoryService.normalize_stock_code(code),
+                    "period": "daily",
+                    "start_date": fetch_start.strftime("%Y%m%d"),
+                    "end_date": end_date_str,
+                    "adjust": adjust,
+                })
+            
+            fetcher = AkshareFetcher()
+            requests = {code: request_for(code, fetch_start) for code, (fetch_start, _) in plan.items()}
+            overlap_close = StockHistoryService._stored_close_prices(
+                db, [(code, fetch_start) for code, (fetch_start, mode) in plan.items() if mode == "incremental"]
+            )
+            
             success_count = 0
             fail_count = 0
-            total_records = 0
+            refetch_count = 0
+            fetched_rows = 0
+            saved = UpsertResult()
+            buffer: List[dict] = []
             
-            for idx, stock_code in enumerate(stock_codes, 1):
-                try:
-                    # 标准化股票代码格式（移除 .SZ/.SH/.BJ 后缀）
-                    normalized_code = StockHistoryService.normalize_stock_code(stock_code)
-                    print(f"[{idx}/{len(stock_codes)}] 同步 {stock_code} ({normalized_code}) 的历史数据...")
-                    
-                    # 调用 akshare 接口获取历史数据
-                    df = safe_akshare_call(
-                        ak.stock_zh_a_hist,
-                        symbol=normalized_code,
-                        period="daily",
-                        start_date=start_date_str,
-                        end_date=end_date_str,
-                        adjust=""  # 不复权
+            def flush():
+                nonlocal saved
+                if buffer:
+                    saved = saved + bulk_upsert(
+                        db, StockHistory, buffer,
+                        conflict_columns=["date", "stock_code"],
+                        keep_existing_on_null=True,
                     )
-                    
-                    if df is None or df.empty:
-                        print(f"  ⚠️ {stock_code} 无历史数据")
-                        fail_count += 1
-                        continue
-                    
-                    # 保存数据
-                    saved_count = StockHistoryService.save_stock_history(
-                        db, stock_code, df
-                    )
-                    
-                    if saved_count > 0:
-                        success_count += 1
-                        total_records += saved_count
-                        print(f"  ✅ {stock_code} 成功保存 {saved_count} 条记录")
-                    else:
-                        fail_count += 1
-                        print(f"  ❌ {stock_code} 保存失败")
-                    
-                except Exception as e:
-                    print(f"  ❌ {stock_code} 同步异常: {str(e)}")
+                    db.commit()
+                    buffer.clear()
+            
+            for stock_code, df in fetcher.fetch_all(requests):
+                fetch_start, mode = plan[stock_code]
+                records = StockHistoryService._history_records(stock_code, df)
+                
+                # 增量获取的第一天与已存数据重叠，收盘价不一致说明复权口径变化，回退全量
+                if mode == "incremental" and records:
+                    stored = overlap_close.get((stock_code, fetch_start))
+                    first = records[0]
+                    if (stored is not None and first["date"] == fetch_start and first["close_price"] is not None
+                            and abs(first["close_price"] - stored) > 0.005):
+                        print(f"  ⚠️ {stock_code} {fetch_start} 收盘价 {first['close_price']} 与已存 {stored} 不一致，全量重新获取")
+                        func, kwargs = request_for(stock_code, start_date)
+                        records = StockHistoryService._history_records(stock_code, fetcher.call(func, **kwargs))
+                        refetch_count += 1
+                
+                if not records:
+                    print(f"  ⚠️ {stock_code} 无历史数据")
                     fail_count += 1
-                    import traceback
-                    traceback.print_exc()
+                    continue
+                
+                success_count += 1
+                fetched_rows += len(records)
+                buffer.extend(records)
+                if len(buffer) >= DEFAULT_BATCH_SIZE:
+                    flush()
+            flush()
             
-            print(f"\n同步完成: 成功 {success_count}/{len(stock_codes)}, 失败 {fail_count}, 总记录数 {total_records}")
+            print(f"\n同步完成: 成功 {success_count}/{len(plan)}, 失败 {fail_count}, "
+                  f"复权变化回退全量 {refetch_count} 只, 获取 {fetched_rows} 行, 写入 {saved.count} 条")
             
-            if success_count == 0:
+            if plan and success_count == 0:
                 return SyncResult.failure_result(
                     "所有股票同步失败",
                     f"成功: {success_count}, 失败: {fail_count}"
                 )
             
-            return SyncResult.success_result(
-                f"同步完成: 成功 {success_count}/{len(stock_codes)} 只股票，共 {total_records} 条记录",
-                total_records
+            return SyncResult.from_upsert(
+                f"同步完成: {len(stock_codes)} 只股票（全量 {full_count}，增量 {len(plan) - full_count}，"
+                f"已是最新 {len(stock_codes) - len(plan)}），共 {saved.count} 条记录",
+                saved
             )
             
         except Exception as e:
@@ -141,8 +261,19 @@ class StockHistoryService:
             print(error_msg)
             import traceback
             traceback.print_exc()
+            db.rollback()
             return SyncResult.failure_result(str(e), error_msg)
     
+    @staticmethod
+    def _history_records(stock_code: str, df: Optional[pd.DataFrame]) -> List[dict]:
+        """将 stock_zh_a_hist 返回的数据转换为待写入的记录（按日期升序）"""
+        if df is None or df.empty:
+            return []
+        # 整列解析日期和数值（根据 akshare 返回的列名）
+        frame = normalize_frame("stock_zh_a_hist", df, required=["date"]).sort_values("date")
+        frame.insert(1, "stock_code", stock_code)
+        return to_records(frame)
+    
     @staticmethod
     def save_stock_history(
         db: Session,
@@ -150,7 +281,7 @@ class StockHistoryService:
         df: pd.DataFrame
     ) -> int:
         """
-        保存股票历史行情数据
+        保存股票历史行情数据，按 (date, stock_code) 批量 upsert
         
         Args:
             db: 数据库会话
@@ -160,89 +291,23 @@ class StockHistoryService:
         Returns:
             int: 保存的记录数
         """
-        if df is None or df.empty:
+        records = StockHistoryService._history_records(stock_code, df)
+        if not records:
             return 0
         
-        # 标准化列名映射（根据 akshare 返回的列名）
-        column_mapping = {
-            "日期": "date",
-            "股票代码": "stock_code",
-            "开盘": "open_price",
-            "收盘": "close_price",
-            "最高": "high_price",
-            "最低": "low_price",
-            "成交量": "volume",
-            "成交额": "amount",
-            "振幅": "amplitude",
-            "涨跌幅": "change_percent",
-            "涨跌额": "change_amount",
-            "换手率": "turnover_rate",
-        }
-        
-        # 重命名列
-        df = df.rename(columns=column_mapping)
-        
-        saved_count = 0
-        
-        for _, row in df.iterrows():
-            try:
-                # 解析日期
-                trade_date = pd.to_datetime(row.get("date")).date()
-                
-                # 检查是否已存在
-                existing = db.query(StockHistory).filter(
-                    and_(
-                        StockHistory.date == trade_date,
-                        StockHistory.stock_code == stock_code
-                    )
-                ).first()
-                
-                if existing:
-                    # 更新现有记录
-                    existing.stock_name = row.get("stock_name") or existing.stock_name
-                    existing.open_price = safe_float(row.get("open_price"))
-                    existing.close_price = safe_float(row.get("close_price"))
-                    existing.high_price = safe_float(row.get("high_price"))
-                    existing.low_price = safe_float(row.get("low_price"))
-                    existing.volume = safe_int(row.get("volume"))
-                    existing.amount = safe_float(row.get("amount"))
-                    existing.amplitude = safe_float(row.get("amplitude"))
-                    existing.change_percent = safe_float(row.get("change_percent"))
-                    existing.change_amount = safe_float(row.get("change_amount"))
-                    existing.turnover_rate = safe_float(row.get("turnover_rate"))
-                else:
-                    # 创建新记录
-                    history = StockHistory(
-                        date=trade_date,
-                        stock_code=stock_code,
-                        stock_name=row.get("stock_name"),
-                        open_price=safe_float(row.get("open_price")),
-                        close_price=safe_float(row.get("close_price")),
-                        high_price=safe_float(row.get("high_price")),
-                        low_price=safe_float(row.get("low_price")),
-                        volume=safe_int(row.get("volume")),
-                        amount=safe_float(row.get("amount")),
-                        amplitude=safe_float(row.get("amplitude")),
-                        change_percent=safe_float(row.get("change_percent")),
-                        change_amount=safe_float(row.get("change_amount")),
-                        turnover_rate=safe_float(row.get("turnover_rate")),
-                    )
-                    db.add(history)
-                
-                saved_count += 1
-                
-            except Exception as e:
-                print(f"  保存单条记录失败: {str(e)}")
-                continue
-        
         try:
+            result = bulk_upsert(
+                db, StockHistory, records,
+                conflict_columns=["date", "stock_code"],
+                keep_existing_on_null=True,
+            )
             db.commit()
         except Exception as e:
             db.rollback()
             print(f"  提交失败: {str(e)}")
             return 0
         
-        return saved_count
+        return result.count
     
     @staticmethod
     def get_stock_history(
@@ -0,0 +1,261 @@
+"""
+任务队列服务
+以 task_execution 表作为队列：API 和调度器只入队，工作进程用 SELECT ... FOR UPDATE SKIP LOCKED 领取。
+领取后持有租约并定期续约；租约过期（工作进程退出）的任务可被其它工作进程重新领取。
+同一去重键同时只能有一个等待/执行中的任务，多个 API 副本同时入队也只执行一次。
+"""
+from datetime import date, datetime, timedelta
+from typing import Any, Dict, List, Optional, Tuple
+
+from sqlalchemy import and_, func, or_
+from sqlalchemy.exc import IntegrityError
+from sqlalchemy.orm import Session
+
+from app.models.task_execution import TaskExecution, TaskStatus
+
+# 工作进程支持的任务种类
+QUEUE_KINDS = ("sync_daily_data", "backfill")
+
+
+class TaskQueueService:
+    """任务队列服务类"""
+
+    @staticmethod
+    def _find_by_dedupe(db: Session, dedupe_key: str, include_success: bool) -> Optional[TaskExecution]:
+        statuses = [TaskStatus.PENDING, TaskStatus.RUNNING]
+        if include_success:
+            statuses.append(TaskStatus.SUCCESS)
+        return db.query(TaskExecution).filter(
+            TaskExecution.dedupe_key == dedupe_key,
+            TaskExecution.status.in_(statuses)
+        ).order_by(TaskExecution.id.desc()).first()
+
+    @staticmethod
+    def enqueue(
+        db: Session,
+        kind: str,
+        kwargs: Dict[str, Any],
+        task_name: str,
+        task_type: str,
+        target_date: Optional[str] = None,
+        dedupe_key: Optional[str] = None,
+        triggered_by: str = "manual",
+        skip_if_succeeded: bool = False,
+    ) -> Tuple[TaskExecution, bool]:
+        """
+        入队
+
+        Args:
+            dedupe_key: 去重键，已有同键的等待/执行中任务时直接返回该任务
+            skip_if_succeeded: 同键任务已成功执行过时也不再入队（定时任务每个日期只执行一次）
+
+        Returns:
+            (执行记录, 是否新入队)
+        """
+        from app.services.task_service import make_json_serializable
+
+        if kind not in QUEUE_KINDS:
+            raise ValueError(f"不支持的队列任务: {kind}")
+        if dedupe_key:
+            existing = TaskQueueService._find_by_dedupe(db, dedupe_key, skip_if_succeeded)
+            if existing is not None:
+                return existing, False
+
+        execution = TaskExecution(
+            task_name=task_name,
+            task_type=task_type,
+            status=TaskStatus.PENDING,
+            start_time=datetime.now(),
+            triggered_by=triggered_by,
+            target_date=target_date,
+            job_payload={"kind": kind, "kwargs": make_json_serializable(kwargs)},
+            dedupe_key=dedupe_key,
+            attempts=0,
+        )
+        db.add(execution)
+        try:
+            db.commit()
+        except IntegrityError:
+            # 其它副本刚刚入队了同键任务
+            db.rollback()
+            existing = TaskQueueService._find_by_dedupe(db, dedupe_key, skip_if_succeeded) if dedupe_key else None
+            if existing is None:
+                raise
+            return existing, False
+        db.refresh(execution)
+        return execution, True
+
+    @staticmethod
+    def enqueue_sync_daily_data(
+        db: Session,
+        task_types: Optional[List[str]],
+        target_date: date,
+        triggered_by: str = "manual",
+        skip_if_succeeded: bool = False,
+    ) -> Tuple[TaskExecution, bool]:
+        """按日期入队每日数据同步，去重键为 (日期, 任务类型集合)"""
+        target_date_str = target_date.strftime("%Y-%m-%d")
+        type_key = ",".join(sorted(set(task_types))) if task_types else "all"
+        task_name = "数据同步任务" if not task_types else f"数据同步任务 ({', '.join(task_types)})"
+        return TaskQueueService.enqueue(
+            db,
+            kind="sync_daily_data",
+            kwargs={"task_types": task_types, "target_date": target_date_str},
+            task_name=task_name,
+            task_type=",".join(task_types) if task_types else "all",
+            target_date=target_date_str,
+            dedupe_key=f"sync_daily_data:{target_date_str}:{type_key}",
+            triggered_by=triggered_by,
+            skip_if_succeeded=skip_if_succeeded,
+        )
+
+    @staticmethod
+    def enqueue_backfill(db: Session, job_id: int, triggered_by: str = "manual") -> Tuple[TaskExecution, bool]:
+        """入队执行（或继续执行）回填作业"""
+        return TaskQueueService.enqueue(
+            db,
+            kind="backfill",
+            kwargs={"job_id": job_id},
+            task_name=f"历史数据回填 #{job_id}",
+            task_type="backfill",
+            dedupe_key=f"backfill:{job_id}",
+            triggered_by=triggered_by,
+        )
+
+    @staticmethod
+    def reap_expired(db: Session, max_attempts: Optional[int] = None, now: Optional[datetime] = None) -> int:
+        """租约过期且已达最大领取次数的任务标记为失败，返回标记数量（不提交）"""
+        from app.config import settings
+
+        now = now or datetime.now()
+        max_attempts = max_attempts or settings.SYNC_QUEUE_MAX_ATTEMPTS
+        return db.query(TaskExecution).filter(
+            TaskExecution.job_payload.isnot(None),
+            TaskExecution.status == TaskStatus.RUNNING,
+            TaskExecution.lease_expires_at < now,
+            TaskExecution.attempts >= max_attempts,
+        ).update({
+            TaskExecution.status: TaskStatus.FAILED,
+            TaskExecution.end_time: now,
+            TaskExecution.lease_expires_at: None,
+            TaskExecution.error_message: f"工作进程租约过期，已达最大执行次数 {max_attempts}",
+        }, synchronize_session=False)
+
+    @staticmethod
+    def claim(db: Session, worker_id: str, lease_seconds: Optional[int] = None) -> Optional[TaskExecution]:
+        """
+        领取一个任务：等待中的任务，或租约已过期的执行中任务（按入队顺序）
+
+        SKIP LOCKED 让多个工作进程并发领取时互不阻塞、不会领到同一任务。
+        """
+        from app.config import settings
+
+        now = datetime.now()
+        lease_seconds = lease_seconds or settings.SYNC_QUEUE_LEASE_SECONDS
+        TaskQueueService.reap_expired(db, now=now)
+
+        execution = db.query(TaskExecution).filter(
+            TaskExecution.job_payload.isnot(None),
+            or_(
+                TaskExecution.status == TaskStatus.PENDING,
+                and_(TaskExecution.status == TaskStatus.RUNNING, TaskExecution.lease_expires_at < now),
+            )
+        ).order_by(TaskExecution.id).limit(1).with_for_update(skip_locked=True).first()
+        if execution is None:
+            db.commit()
+            return None
+
+        execution.status = TaskStatus.RUNNING
+        execution.worker_id = worker_id
+        execution.attempts = (execution.attempts or 0) + 1
+        execution.lease_expires_at = now + timedelta(seconds=lease_seconds)
+        execution.heartbeat_at = now
+        execution.start_time = now
+        execution.end_time = None
+        execution.error_message = None
+        db.commit()
+        db.refresh(execution)
+        return execution
+
+    @staticmethod
+    def heartbeat(db: Session, execution_id: int, worker_id: str, lease_seconds: Optional[int] = None) -> bool:
+        """续约，返回 False 表示租约已被其它工作进程接管或任务已结束"""
+        from app.config import settings
+
+        now = datetime.now()
+        lease_seconds = lease_seconds or settings.SYNC_QUEUE_LEASE_SECONDS
+        updated = db.query(TaskExecution).filter(
+            TaskExecution.id == execution_id,
+            TaskExecution.worker_id == worker_id,
+            TaskExecution.status == TaskStatus.RUNNING,
+        ).update({
+            TaskExecution.lease_expires_at: now + timedelta(seconds=lease_seconds),
+            TaskExecution.heartbeat_at: now,
+        }, synchronize_session=False)
+        db.commit()
+        return updated == 1
+
+    @staticmethod
+    def finish(
+        db: Session,
+        execution_id: int,
+        worker_id: str,
+        success: Optional[bool] = None,
+        result: Optional[Dict[str, Any]] = None,
+        error_message: Optional[str] = None,
+    ) -> None:
+        """
+        结束任务并释放租约
+
+        success 为 None 表示任务已自行写入最终状态（如 sync_daily_data），只释放租约。
+        """
+        from app.services.task_service import TaskService
+
+        execution = db.query(TaskExecution).filter(TaskExecution.id == execution_id).first()
+        if execution is None or execution.worker_id != worker_id:
+            return
+        if execution.status == TaskStatus.RUNNING:
+            if success is None and not error_message:
+                success, error_message = False, "任务结束但未记录执行结果"
+            TaskService.update_execution_status(
+                db=db,
+                execution_id=execution_id,
+                status=TaskStatus.SUCCESS if success else TaskStatus.FAILED,
+                result=result,
+                error_message=error_message,
+            )
+        execution.lease_expires_at = None
+        db.commit()
+
+    @staticmethod
+    def get_queue_stats(db: Session) -> Dict[str, Any]:
+        """队列概况：等待/执行中的任务数与活跃工作进程"""
+        now = datetime.now()
+        counts = dict(db.query(TaskExecution.status, func.count(TaskExecution.id)).filter(
+            TaskExecution.job_payload.isnot(None),
+            TaskExecution.status.in_([TaskStatus.PENDING, TaskStatus.RUNNING])
+        ).group_by(TaskExecution.status).all())
+        running = db.query(TaskExecution).filter(
+            TaskExecution.job_payload.isnot(None),
+            TaskExecution.status == TaskStatus.RUNNING
+        ).order_by(TaskExecution.id).all()
+        oldest_pending = db.query(func.min(TaskExecution.start_time)).filter(
+            TaskExecution.job_payload.isnot(None),
+            TaskExecution.status == TaskStatus.PENDING
+        ).scalar()
+        return {
+            "pending": counts.get(TaskStatus.PENDING, 0),
+            "running": counts.get(TaskStatus.RUNNING, 0),
+            "oldest_pending_seconds": round((now - oldest_pending).total_seconds(), 1) if oldest_pending else None,
+            "jobs": [
+                {
+                    "execution_id": e.id,
+                    "task_name": e.task_name,
+                    "worker_id": e.worker_id,
+                    "attempts": e.attempts,
+                    "heartbeat_at": e.heartbeat_at.isoformat() if e.heartbeat_at else None,
+                    "lease_expired": bool(e.lease_expires_at and e.lease_expires_at < now),
+                }
+                for e in running
+            ],
+        }
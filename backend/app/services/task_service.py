@@ -51,8 +51,17 @@ class TaskService:
         task_type: Optional[str] = None,
         status: Optional[TaskStatus] = None,
         task_name: Optional[str] = None,
+        cursor: Optional[str] = None,
+        count_mode: Optional[str] = None,
     ) -> Dict[str, Any]:
-        """获取任务执行历史列表（高性能优化版本）"""
+        """
+        获取任务执行历史列表（高性能优化版本）
+
+        cursor 不为 None 时按 (start_time, id) 游标分页，不查询总数（total 为 None）。
+        count_mode 为页码分页的总数计算方式（exact/estimate/none）；执行记录持续写入，精确总数不缓存。
+        """
+        from app.utils.keyset import InvalidCursorError
+
         try:
             # 构建基础查询
             query = db.query(TaskExecution)
@@ -65,26 +74,35 @@ class TaskService:
             if task_name:
                 query = query.filter(TaskExecution.task_name == task_name)
             
+            if cursor is not None:
+                from app.utils.keyset import SortKey, keyset_paginate, sort_signature
+
+                keys = [SortKey(TaskExecution.start_time, descending=True), SortKey(TaskExecution.id, descending=True)]
+                keyset = keyset_paginate(
+                    query, keys, page_size, cursor=cursor,
+                    signature=sort_signature("task_execution", keys),
+                )
+                return {
+                    "items": keyset.items,
+                    "total": None,
+                    "page": page,
+                    "page_size": page_size,
+                    "total_pages": None,
+                    "next_cursor": keyset.next_cursor,
+                }
+
             # 优化：使用索引优化的排序（start_time 有索引）
             # 对于大数据集，先获取分页数据，再决定是否需要总数
             items_query = query.order_by(desc(TaskExecution.start_time))
             
-            # 先查询分页数据
-            items = items_query.offset((page - 1) * page_size).limit(page_size).all()
-            
-            # 优化总数查询策略：
-            # 1. 如果第一页数据不足一页，总数就是当前数据量
-            # 2. 如果第一页数据满页，需要计算总数（但可以延迟计算）
-            # 3. 对于大数据集，可以考虑使用近似计数或跳过总数计算
-            
-            if page == 1 and len(items) < page_size:
-                # 第一页数据不足一页，总数就是当前数据量
-                total = len(items)
-            else:
-                # 需要计算总数
-                # 优化：如果查询条件简单，使用更高效的count查询
-                # 对于复杂查询，可以考虑使用近似计数或延迟加载
-                total = query.count()
+            # 先查询分页数据，再按计数策略决定是否计算总数；无筛选条件时估算直接读表统计信息
+            from app.utils.count_strategy import paginate_query
+
+            result = paginate_query(
+                db, items_query, page, page_size, count_mode,
+                table_name=None if (task_type or status or task_name) else TaskExecution.__tablename__,
+            )
+            items, total = result.items, result.total
             
             total_pages = (total + page_size - 1) // page_size if total > 0 else 0
             
@@ -95,6 +113,8 @@ class TaskService:
                 "page_size": page_size,
                 "total_pages": total_pages,
             }
+        except InvalidCursorError:
+            raise
         except Exception as e:
             print(f"[TaskService] 获取任务执行历史失败: {str(e)}")
             import traceback
@@ -331,7 +351,9 @@ class TaskService:
             
             # 执行任务（传入execution_id使用现有记录）
             print(f"开始异步执行任务 {execution_id}...")
-            sync_daily_data(task_types=task_types, target_date=target_date_obj, execution_id=execution_id)
+            # SYNC_EXECUTION_MODE=process 时在工作进程中执行，当前线程只等待结果
+            from app.tasks.process_pool import run_sync_job
+            run_sync_job(sync_daily_data, task_types=task_types, target_date=target_date_obj, execution_id=execution_id)
             print(f"任务 {execution_id} 执行完成")
             
         except Exception as e:
@@ -0,0 +1,45 @@
+"""
+交易所交易日历服务
+"""
+from sqlalchemy.orm import Session
+
+from app.models.trade_date import TradeDate
+from app.utils.akshare_utils import safe_akshare_call
+from app.utils.akshare_schema import normalize_frame, to_records
+from app.utils.bulk_upsert import bulk_upsert
+from app.utils.trade_calendar import reload_trade_calendar
+import akshare as ak
+
+
+class TradeCalendarService:
+    """交易所交易日历服务类"""
+
+    @staticmethod
+    def sync_trade_calendar(db: Session):
+        """
+        刷新交易日表并重新加载内存交易日历
+        使用接口: tool_trade_date_hist_sina（包含历史及当年剩余交易日）
+        """
+        from app.utils.sync_result import SyncResult
+
+        try:
+            df = safe_akshare_call(ak.tool_trade_date_hist_sina)
+            if df is None or df.empty:
+                error_msg = "未获取到交易日历，接口返回空或网络异常"
+                print(error_msg)
+                return SyncResult.failure_result(error_msg, "数据源返回空")
+
+            frame = normalize_frame("tool_trade_date_hist_sina", df, required=["date"])
+            saved = bulk_upsert(db, TradeDate, to_records(frame), conflict_columns=["date"])
+            db.commit()
+
+            total = reload_trade_calendar(db)
+            print(f"成功同步交易日历，新增 {saved.inserted} 个交易日，共 {total} 个交易日")
+            return SyncResult.from_upsert("交易日历同步成功", saved)
+        except Exception as e:
+            db.rollback()
+            error_msg = f"同步交易日历失败: {str(e)}"
+            print(error_msg)
+            import traceback
+            traceback.print_exc()
+            return SyncResult.failure_result(str(e), error_msg)
@@ -12,7 +12,11 @@ from app.models.lhb import LhbDetail
 from app.models.stock_concept import StockConceptMapping, StockConcept
 from app.services.stock_concept_service import StockConceptService
 from app.utils.akshare_utils import safe_akshare_call
-from app.utils.format_utils import safe_float, safe_int
+from app.utils.akshare_schema import normalize_frame, to_records
+from app.utils.bulk_upsert import bulk_upsert, UpsertResult
+from app.utils.count_strategy import CountCacheKey, paginate_query
+from app.utils.query_cache import invalidate_query_cache, is_closed_date
+from app.utils.keyset import KeysetPage, SortKey, keyset_paginate, model_column, sort_signature
 import akshare as ak
 
 
@@ -20,7 +24,7 @@ class ZtPoolService:
     """涨停池服务类"""
     
     @staticmethod
-    def get_zt_pool_list(
+    def _build_list_query(
         db: Session,
         start_date: date,
         end_date: date,
@@ -33,19 +37,12 @@ class ZtPoolService:
         concept_ids: Optional[List[int]] = None,
         concept_names: Optional[List[str]] = None,
         is_lhb: Optional[bool] = None,
-        page: int = 1,
-        page_size: int = 20,
-        sort_by: Optional[str] = None,
-        order: str = "desc"
-    ) -> tuple[List[ZtPool], int]:
+    ):
         """
-        获取涨停池列表
+        涨停池列表查询（不含排序）：每个股票只取日期范围内最新一条记录，并带上涨停次数
         
-        Args:
-            start_date: 开始日期（日期范围查询）
-            end_date: 结束日期（日期范围查询）
-            stock_name: 股票名称（模糊匹配）
-            is_lhb: 是否龙虎榜筛选，True表示只返回龙虎榜股票，False表示只返回非龙虎榜股票，None表示不筛选
+        Returns:
+            (ZtPool, limit_up_count) 行的查询，limit_up_count 为对应的列表达式
         """
         # 使用日期范围查询
         query = db.query(ZtPool).filter(
@@ -138,17 +135,6 @@ class ZtPoolService:
                     )
                 )
         
-        # 排序
-        if sort_by:
-            sort_column = getattr(ZtPool, sort_by, None)
-            if sort_column:
-                if order == "desc":
-                    query = query.order_by(desc(sort_column))
-                else:
-                    query = query.order_by(asc(sort_column))
-        else:
-            query = query.order_by(desc(ZtPool.change_percent))
-        
         # 日期范围查询，需要统计涨停次数并去重
         # 先应用所有筛选条件构建基础查询
         base_query = query
@@ -170,15 +156,10 @@ class ZtPoolService:
         
         # 统计每个股票的涨停次数：每条记录算一次，只要存在记录就算一次
         # 使用 count(id) 统计每个股票在日期范围内的记录数（即涨停次数）
-        limit_up_counts_query = count_query.order_by(None).with_entities(
+        limit_up_counts = count_query.order_by(None).with_entities(
             ZtPool.stock_code,
             func.count(ZtPool.id).label('limit_up_count')
-        ).group_by(ZtPool.stock_code)
-        
-        limit_up_counts_dict = {
-            row.stock_code: row.limit_up_count
-            for row in limit_up_counts_query.all()
-        }
+        ).group_by(ZtPool.stock_code).subquery()
         
         # 获取每个股票的最新记录（按日期倒序）
         # 使用窗口函数获取每个股票的最新记录
@@ -208,40 +189,35 @@ class ZtPoolService:
             latest_ids_subquery.c.rn == 1
         ).subquery()
         
-        # 获取最新记录，并应用所有筛选条件
-        items_query = base_query.filter(ZtPool.id.in_(select(latest_ids.c.id)))
-        
-        # 获取所有记录
-        all_items = items_query.all()
-        # 为每个记录添加涨停次数
-        for item in all_items:
-            setattr(item, 'limit_up_count', limit_up_counts_dict.get(item.stock_code, 0))
-        
-        # 排序
-        if sort_by:
-            sort_column = getattr(ZtPool, sort_by, None)
-            if sort_column:
-                # 有排序字段时，先按涨停次数排序，然后按指定字段排序
-                all_items.sort(
-                    key=lambda x: (
-                        -getattr(x, 'limit_up_count', 0),
-                        -(getattr(x, sort_by) or 0) if order == "desc" else (getattr(x, sort_by) or 0)
-                    )
-                )
-        else:
-            # 默认按涨停次数倒序，然后按涨跌幅倒序
-            all_items.sort(
-                key=lambda x: (
-                    -getattr(x, 'limit_up_count', 0),
-                    -(x.change_percent or 0)
-                )
-            )
-        
-        # 总数
-        total = len(all_items)
-        # 分页
-        offset = (page - 1) * page_size
-        items = all_items[offset:offset + page_size]
+        # 获取最新记录，并应用所有筛选条件；涨停次数关联子查询，由数据库排序分页
+        limit_up_count = limit_up_counts.c.limit_up_count
+        items_query = base_query.filter(
+            ZtPool.id.in_(select(latest_ids.c.id))
+        ).join(
+            limit_up_counts, limit_up_counts.c.stock_code == ZtPool.stock_code
+        ).add_columns(limit_up_count)
+        return items_query, limit_up_count
+    
+    @staticmethod
+    def _list_sort_keys(limit_up_count, sort_by: Optional[str], order: str) -> List[SortKey]:
+        """先按涨停次数倒序，再按指定字段（默认涨跌幅倒序），id 作为同值时的次序"""
+        sort_column = model_column(ZtPool, sort_by)
+        if sort_column is None:
+            sort_column, order = ZtPool.change_percent, "desc"
+        descending = order == "desc"
+        return [
+            SortKey(limit_up_count, descending=True, nullable=False),
+            SortKey(sort_column, descending=descending),
+            SortKey(ZtPool.id, descending=descending),
+        ]
+    
+    @staticmethod
+    def _decorate_list_items(db: Session, rows, start_date: date, end_date: date) -> List[ZtPool]:
+        """(ZtPool, 涨停次数) 行 -> 带涨停次数、龙虎榜标记和概念信息的记录"""
+        items = []
+        for item, count in rows:
+            setattr(item, 'limit_up_count', count)
+            items.append(item)
         
         # 批量查询龙虎榜股票代码集合和概念信息
         lhb_stock_codes = set()
@@ -278,7 +254,122 @@ class ZtPoolService:
             concepts = concepts_by_stock.get(item.stock_name, [])
             setattr(item, '_concepts', concepts)
         
-        return items, total
+        return items
+    
+    @staticmethod
+    def get_zt_pool_list(
+        db: Session,
+        start_date: date,
+        end_date: date,
+        stock_code: Optional[str] = None,
+        stock_name: Optional[str] = None,
+        concept: Optional[str] = None,
+        industry: Optional[str] = None,
+        consecutive_limit_count: Optional[int] = None,
+        limit_up_statistics: Optional[str] = None,
+        concept_ids: Optional[List[int]] = None,
+        concept_names: Optional[List[str]] = None,
+        is_lhb: Optional[bool] = None,
+        page: int = 1,
+        page_size: int = 20,
+        sort_by: Optional[str] = None,
+        order: str = "desc",
+        count_mode: Optional[str] = None
+    ) -> tuple[List[ZtPool], int]:
+        """
+        获取涨停池列表
+        
+        Args:
+            start_date: 开始日期（日期范围查询）
+            end_date: 结束日期（日期范围查询）
+            stock_name: 股票名称（模糊匹配）
+            is_lhb: 是否龙虎榜筛选，True表示只返回龙虎榜股票，False表示只返回非龙虎榜股票，None表示不筛选
+            count_mode: 总数计算方式（exact/estimate/none），None 使用 LIST_COUNT_MODE
+        """
+        items_query, limit_up_count = ZtPoolService._build_list_query(
+            db,
+            start_date=start_date,
+            end_date=end_date,
+            stock_code=stock_code,
+            stock_name=stock_name,
+            concept=concept,
+            industry=industry,
+            consecutive_limit_count=consecutive_limit_count,
+            limit_up_statistics=limit_up_statistics,
+            concept_ids=concept_ids,
+            concept_names=concept_names,
+            is_lhb=is_lhb,
+        )
+        keys = ZtPoolService._list_sort_keys(limit_up_count, sort_by, order)
+        
+        # 总数和当前页都由数据库计算，不把全部记录取回内存再排序切片；
+        # 精确总数按筛选条件缓存，已收盘的日期范围翻页时不再重复 COUNT
+        tags = [("zt_pool", start_date if start_date == end_date else None)]
+        if is_lhb is not None:
+            tags.append(("lhb_detail", None))
+        result = paginate_query(
+            db, items_query.order_by(*[key.order_by() for key in keys]), page, page_size, count_mode,
+            cache_key=CountCacheKey(
+                "zt_pool_list",
+                {
+                    "start_date": start_date, "end_date": end_date,
+                    "stock_code": stock_code, "stock_name": stock_name,
+                    "concept": concept, "industry": industry,
+                    "consecutive_limit_count": consecutive_limit_count,
+                    "limit_up_statistics": limit_up_statistics,
+                    "concept_ids": concept_ids, "concept_names": concept_names,
+                    "is_lhb": is_lhb,
+                },
+                tags=tags,
+                closed=is_closed_date(end_date),
+            ),
+        )
+        items = ZtPoolService._decorate_list_items(db, result.items, start_date, end_date)
+        return items, result.total
+    
+    @staticmethod
+    def get_zt_pool_list_by_cursor(
+        db: Session,
+        start_date: date,
+        end_date: date,
+        stock_code: Optional[str] = None,
+        stock_name: Optional[str] = None,
+        concept: Optional[str] = None,
+        industry: Optional[str] = None,
+        consecutive_limit_count: Optional[int] = None,
+        limit_up_statistics: Optional[str] = None,
+        concept_ids: Optional[List[int]] = None,
+        concept_names: Optional[List[str]] = None,
+        is_lhb: Optional[bool] = None,
+        page_size: int = 20,
+        sort_by: Optional[str] = None,
+        order: str = "desc",
+        cursor: Optional[str] = None,
+    ) -> KeysetPage:
+        """获取涨停池列表（游标分页），排序与 get_zt_pool_list 一致，不查询总数"""
+        items_query, limit_up_count = ZtPoolService._build_list_query(
+            db,
+            start_date=start_date,
+            end_date=end_date,
+            stock_code=stock_code,
+            stock_name=stock_name,
+            concept=concept,
+            industry=industry,
+            consecutive_limit_count=consecutive_limit_count,
+            limit_up_statistics=limit_up_statistics,
+            concept_ids=concept_ids,
+            concept_names=concept_names,
+            is_lhb=is_lhb,
+        )
+        keys = ZtPoolService._list_sort_keys(limit_up_count, sort_by, order)
+        sort_attr = keys[1].column.key
+        keyset = keyset_paginate(
+            items_query, keys, page_size, cursor=cursor,
+            signature=sort_signature(f"zt_pool:{start_date}:{end_date}", keys),
+            row_values=lambda row: (row[1], getattr(row[0], sort_attr), row[0].id),
+        )
+        keyset.items = ZtPoolService._decorate_list_items(db, keyset.items, start_date, end_date)
+        return keyset
     
     @staticmethod
     def get_concepts_for_zt_pool(db: Session, zt_pool: ZtPool) -> List:
@@ -389,106 +480,31 @@ class ZtPoolService:
         db: Session,
         target_date: date,
         df: pd.DataFrame
-    ) -> int:
+    ) -> UpsertResult:
         """
         保存涨停池数据
         保存 stock_zt_pool_em 接口返回的所有字段
+        按 (date, stock_code) 批量 upsert
         """
         # 打印所有列名用于调试
         if not df.empty:
             print(f"接口返回的列: {df.columns.tolist()}")
         
-        count = 0
-        for _, row in df.iterrows():
-            stock_code = str(row.get("代码", "")).zfill(6)
-            stock_name = row.get("名称", "")
-            
-            if not stock_code or not stock_name:
-                print(f"警告: 跳过无效数据，代码={stock_code}, 名称={stock_name}")
-                continue
-            
-            # 检查是否已存在
-            existing = db.query(ZtPool).filter(
-                and_(
-                    ZtPool.date == target_date,
-                    ZtPool.stock_code == stock_code
-                )
-            ).first()
-            
-            # 解析时间字段，支持多种格式
-            first_limit_time = None
-            last_limit_time = None
-            
-            # 首次封板时间
-            first_time_str = row.get("首次封板时间")
-            if first_time_str:
-                try:
-                    from datetime import datetime
-                    first_time_str = str(first_time_str).strip()
-                    # 尝试多种时间格式
-                    for fmt in ["%H:%M:%S", "%H:%M", "%H:%M:%S.%f"]:
-                        try:
-                            first_limit_time = datetime.strptime(first_time_str, fmt).time()
-                            break
-                        except ValueError:
-                            continue
-                except Exception as e:
-                    print(f"解析首次封板时间失败: {first_time_str}, 错误: {e}")
-            
-            # 最后封板时间
-            last_time_str = row.get("最后封板时间")
-            if last_time_str:
-                try:
-                    from datetime import datetime
-                    last_time_str = str(last_time_str).strip()
-                    # 尝试多种时间格式
-                    for fmt in ["%H:%M:%S", "%H:%M", "%H:%M:%S.%f"]:
-                        try:
-                            last_limit_time = datetime.strptime(last_time_str, fmt).time()
-                            break
-                        except ValueError:
-                            continue
-                except Exception as e:
-                    print(f"解析最后封板时间失败: {last_time_str}, 错误: {e}")
-            
-            # 构建数据字典，保存所有可用字段
-            data = {
-                "date": target_date,
-                "stock_code": stock_code,
-                "stock_name": stock_name,
-                "change_percent": safe_float(row.get("涨跌幅")),
-                "latest_price": safe_float(row.get("最新价")),
-                "turnover_amount": safe_int(row.get("成交额")),
-                "circulation_market_value": safe_float(row.get("流通市值")),
-                "total_market_value": safe_float(row.get("总市值")),
-                "turnover_rate": safe_float(row.get("换手率")),
-                "limit_up_capital": safe_int(row.get("封板资金")),
-                "first_limit_time": first_limit_time,
-                "last_limit_time": last_limit_time,
-                "explosion_count": safe_int(row.get("炸板次数")) or 0,
-                "limit_up_statistics": str(row.get("涨停统计", "")),
-                "consecutive_limit_count": safe_int(row.get("连板数")) or 1,
-                "industry": str(row.get("所属行业", "")),
-                "concept": str(row.get("概念", "")),
-                "limit_up_reason": str(row.get("涨停原因", "")),
-            }
-            
-            # 保存所有数据，包括更新已存在的记录
-            if existing:
-                # 更新所有字段
-                for key, value in data.items():
-                    setattr(existing, key, value)
-            else:
-                # 创建新记录
-                zt = ZtPool(**data)
-                db.add(zt)
-            
-            count += 1
-        
-        # 提交所有更改
+        # 整列解析数值和封板时间（支持 HH:MM:SS / HHMMSS 等格式）
+        frame = normalize_frame("stock_zt_pool_em", df)
+        invalid = frame["stock_code"].isna() | frame["stock_name"].isna()
+        if invalid.any():
+            print(f"警告: 跳过 {int(invalid.sum())} 条无效数据（缺少代码或名称）")
+            frame = frame[~invalid]
+        frame.insert(0, "date", target_date)
+        records = to_records(frame)
+        
+        # 保存所有数据，已存在的记录覆盖所有字段
+        result = bulk_upsert(db, ZtPool, records, conflict_columns=["date", "stock_code"])
         db.commit()
-        print(f"成功保存 {count} 条涨停池数据到数据库")
-        return count
+        invalidate_query_cache("zt_pool", target_date)
+        print(f"成功保存 {result.count} 条涨停池数据到数据库（新增 {result.inserted}，更新 {result.updated}）")
+        return result
     
     @staticmethod
     def sync_data(db: Session, target_date: date):
@@ -517,13 +533,13 @@ class ZtPoolService:
             print(f"数据列名: {df.columns.tolist()}")
             
             # 保存所有数据
-            count = ZtPoolService.save_zt_pool_data(db, target_date, df)
+            saved = ZtPoolService.save_zt_pool_data(db, target_date, df)
             
-            if count == 0:
+            if saved.count == 0:
                 return SyncResult.failure_result("保存数据失败，保存数量为0", "数据库保存异常")
             
-            print(f"成功同步 {target_date} 的涨停池数据，共 {count} 条")
-            return SyncResult.success_result(f"涨停池数据同步成功，共保存 {count} 条记录", count)
+            print(f"成功同步 {target_date} 的涨停池数据，共 {saved.count} 条")
+            return SyncResult.from_upsert(f"涨停池数据同步成功，共保存 {saved.count} 条记录", saved)
         except Exception as e:
             error_msg = f"同步涨停池数据失败: {str(e)}"
             print(error_msg)
@@ -543,6 +559,7 @@ class ZtPoolService:
             rec.limit_up_reason = limit_up_reason
         db.commit()
         db.refresh(rec)
+        invalidate_query_cache("zt_pool", rec.date)
         return rec
 
 
@@ -745,64 +762,15 @@ class ZtPoolDownService:
         return items, total
 
     @staticmethod
-    def save_data(db: Session, target_date: date, df: pd.DataFrame) -> int:
-        count = 0
-        for _, row in df.iterrows():
-            stock_code = str(row.get("代码", "")).zfill(6)
-            stock_name = row.get("名称", "")
-            if not stock_code or not stock_name:
-                continue
-
-            existing = db.query(ZtPoolDown).filter(
-                and_(ZtPoolDown.date == target_date, ZtPoolDown.stock_code == stock_code)
-            ).first()
-
-            first_limit_time = None
-            last_limit_time = None
-            if row.get("首次封板时间"):
-                try:
-                    from datetime import datetime
-                    first_limit_time = datetime.strptime(str(row.get("首次封板时间")), "%H:%M:%S").time()
-                except:
-                    pass
-            if row.get("最后封板时间"):
-                try:
-                    from datetime import datetime
-                    last_limit_time = datetime.strptime(str(row.get("最后封板时间")), "%H:%M:%S").time()
-                except:
-                    pass
-
-            data = {
-                "date": target_date,
-                "stock_code": stock_code,
-                "stock_name": stock_name,
-                "change_percent": safe_float(row.get("涨跌幅")),
-                "latest_price": safe_float(row.get("最新价")),
-                "turnover_amount": safe_int(row.get("成交额")),
-                "circulation_market_value": safe_float(row.get("流通市值")),
-                "total_market_value": safe_float(row.get("总市值")),
-                "turnover_rate": safe_float(row.get("换手率")),
-                "limit_up_capital": safe_int(row.get("封板资金")),
-                "first_limit_time": first_limit_time,
-                "last_limit_time": last_limit_time,
-                "explosion_count": safe_int(row.get("炸板次数")) or 0,
-                "limit_up_statistics": str(row.get("涨停统计", "")),
-                "consecutive_limit_count": safe_int(row.get("连板数")) or 1,
-                "industry": str(row.get("所属行业", "")),
-                "concept": str(row.get("概念", "")),
-                "limit_up_reason": str(row.get("涨停原因", row.get("跌停原因", ""))),
-            }
-
-            if existing:
-                for k, v in data.items():
-                    setattr(existing, k, v)
-            else:
-                rec = ZtPoolDown(**data)
-                db.add(rec)
-            count += 1
+    def save_data(db: Session, target_date: date, df: pd.DataFrame) -> UpsertResult:
+        """保存跌停池数据，按 (date, stock_code) 批量 upsert"""
+        frame = normalize_frame("stock_zt_pool_dtgc_em", df, required=["stock_code", "stock_name"])
+        frame.insert(0, "date", target_date)
+        records = to_records(frame)
 
+        result = bulk_upsert(db, ZtPoolDown, records, conflict_columns=["date", "stock_code"])
         db.commit()
-        return count
+        return result
 
     @staticmethod
     def sync_data(db: Session, target_date: date):
@@ -816,12 +784,12 @@ class ZtPoolDownService:
                 print(error_msg)
                 return SyncResult.failure_result(error_msg, "数据源返回空")
             
-            count = ZtPoolDownService.save_data(db, target_date, df)
-            if count == 0:
+            saved = ZtPoolDownService.save_data(db, target_date, df)
+            if saved.count == 0:
                 return SyncResult.failure_result("保存数据失败，保存数量为0", "数据库保存异常")
             
-            print(f"成功同步 {target_date} 的跌停池数据，共 {count} 条")
-            return SyncResult.success_result(f"跌停池数据同步成功", count)
+            print(f"成功同步 {target_date} 的跌停池数据，共 {saved.count} 条")
+            return SyncResult.from_upsert(f"跌停池数据同步成功", saved)
         except Exception as e:
             error_msg = f"同步跌停池数据失败: {str(e)}"
             print(error_msg)
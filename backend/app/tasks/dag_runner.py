@@ -0,0 +1,267 @@
+"""
+任务依赖图（DAG）执行器
+每个任务在自身依赖全部成功后立即开始，不再等待同一批次的其它任务；
+同时按资源（AKShare 请求、数据库连接等）限制并发，就绪任务按关键路径长度优先调度。
+"""
+import heapq
+import logging
+import threading
+from collections import deque
+from concurrent.futures import FIRST_COMPLETED, ThreadPoolExecutor, wait
+from dataclasses import dataclass, field
+from datetime import datetime
+from typing import Any, Callable, Dict, Iterable, List, Optional, Tuple
+
+logger = logging.getLogger(__name__)
+
+# 没有历史耗时的任务按该值（秒）估算
+DEFAULT_ESTIMATE = 60.0
+
+
+@dataclass
+class TaskNode:
+    """依赖图中的一个任务"""
+    key: str
+    func: Callable[[], Any]
+    deps: Tuple[str, ...] = ()
+    resources: Tuple[str, ...] = ()
+    estimate: float = DEFAULT_ESTIMATE
+
+
+@dataclass
+class NodeRun:
+    """单个任务的执行记录"""
+    key: str
+    status: str = "pending"  # pending / success / failed / skipped
+    result: Any = None
+    error: Optional[str] = None
+    ready_at: Optional[datetime] = None
+    started_at: Optional[datetime] = None
+    finished_at: Optional[datetime] = None
+    blocked_by: Optional[str] = None  # 最后完成、决定其就绪时间的依赖
+
+    @property
+    def duration(self) -> float:
+        if self.started_at and self.finished_at:
+            return (self.finished_at - self.started_at).total_seconds()
+        return 0.0
+
+    @property
+    def wait(self) -> float:
+        """就绪后等待资源/线程的秒数"""
+        if self.ready_at and self.started_at:
+            return (self.started_at - self.ready_at).total_seconds()
+        return 0.0
+
+
+@dataclass
+class DagRunReport:
+    """一次执行的全部结果"""
+    runs: Dict[str, NodeRun] = field(default_factory=dict)
+    started_at: Optional[datetime] = None
+    finished_at: Optional[datetime] = None
+
+    def critical_path(self) -> Tuple[List[str], float]:
+        """
+        实际关键路径：从最后完成的任务出发，沿"决定其就绪时间的依赖"回溯
+
+        Returns:
+            (任务列表（按执行顺序）, 整体耗时秒数)
+        """
+        finished = [run for run in self.runs.values() if run.finished_at and run.started_at]
+        if not finished:
+            return [], 0.0
+        current = max(finished, key=lambda run: run.finished_at)
+        path = [current.key]
+        while current.blocked_by and current.blocked_by in self.runs:
+            current = self.runs[current.blocked_by]
+            path.append(current.key)
+        path.reverse()
+        total = (self.finished_at - self.started_at).total_seconds() if self.started_at and self.finished_at else 0.0
+        return path, total
+
+
+class DagRunner:
+    """
+    依赖图执行器
+
+    Args:
+        nodes: 任务列表，依赖必须都在列表中且不能成环
+        resource_limits: 资源名 -> 最大并发数，未列出的资源不限
+        max_workers: 线程数上限
+        is_success: 根据任务返回值判断是否成功（失败或异常时，依赖它的任务被跳过）
+        on_finish: 每个任务结束（含跳过）时的回调，在调度线程中调用
+        on_start: 每个任务提交执行时的回调，在调度线程中调用
+        cancel: 置位后不再启动新任务，未开始的任务标记为跳过，已在执行的任务照常结束
+    """
+
+    def __init__(
+        self,
+        nodes: Iterable[TaskNode],
+        resource_limits: Optional[Dict[str, int]] = None,
+        max_workers: int = 5,
+        is_success: Callable[[Any], bool] = bool,
+        on_finish: Optional[Callable[[NodeRun], None]] = None,
+        on_start: Optional[Callable[[NodeRun], None]] = None,
+        cancel: Optional[threading.Event] = None,
+    ):
+        self.nodes: Dict[str, TaskNode] = {}
+        for node in nodes:
+            if node.key in self.nodes:
+                raise ValueError(f"重复的任务: {node.key}")
+            self.nodes[node.key] = node
+        self.resource_limits = dict(resource_limits or {})
+        for resource, limit in self.resource_limits.items():
+            if limit < 1:
+                raise ValueError(f"资源 {resource} 的并发上限必须至少为 1: {limit}")
+        self.max_workers = max(1, max_workers)
+        self.is_success = is_success
+        self.on_finish = on_finish
+        self.on_start = on_start
+        self.cancel = cancel
+
+        self.children: Dict[str, List[str]] = {key: [] for key in self.nodes}
+        for node in self.nodes.values():
+            for dep in node.deps:
+                if dep not in self.nodes:
+                    raise ValueError(f"任务 {node.key} 的依赖 {dep} 不存在")
+                self.children[dep].append(node.key)
+        self.order = self._topological_order()
+        self.priority = self._critical_path_lengths()
+
+    def _topological_order(self) -> List[str]:
+        indegree = {key: len(node.deps) for key, node in self.nodes.items()}
+        # 先进先出，同优先级的任务保持传入顺序
+        queue = deque(key for key, degree in indegree.items() if degree == 0)
+        order = []
+        while queue:
+            key = queue.popleft()
+            order.append(key)
+            for child in self.children[key]:
+                indegree[child] -= 1
+                if indegree[child] == 0:
+                    queue.append(child)
+        if len(order) != len(self.nodes):
+            cycle = sorted(key for key, degree in indegree.items() if degree > 0)
+            raise ValueError(f"任务依赖存在环: {cycle}")
+        return order
+
+    def _critical_path_lengths(self) -> Dict[str, float]:
+        """每个任务到图末端的最长预估耗时（含自身），越长越先调度"""
+        lengths: Dict[str, float] = {}
+        for key in reversed(self.order):
+            tail = max((lengths[child] for child in self.children[key]), default=0.0)
+            lengths[key] = self.nodes[key].estimate + tail
+        return lengths
+
+    def run(self) -> DagRunReport:
+        report = DagRunReport(runs={key: NodeRun(key) for key in self.nodes}, started_at=datetime.now())
+        runs = report.runs
+        remaining = {key: len(node.deps) for key, node in self.nodes.items()}
+        in_use: Dict[str, int] = {}
+        ready: List[Tuple[float, int, str]] = []
+        position = {key: i for i, key in enumerate(self.order)}
+
+        def make_ready(key: str) -> None:
+            runs[key].ready_at = datetime.now()
+            heapq.heappush(ready, (-self.priority[key], position[key], key))
+
+        def notify(callback: Optional[Callable[[NodeRun], None]], run: NodeRun) -> None:
+            if callback:
+                try:
+                    callback(run)
+                except Exception as e:
+                    logger.warning(f"任务回调失败: {run.key}, 错误: {str(e)}")
+
+        def finish(run: NodeRun) -> None:
+            notify(self.on_finish, run)
+
+        def skip_descendants(key: str) -> None:
+            for child in self.children[key]:
+                child_run = runs[child]
+                if child_run.status != "pending":
+                    continue
+                child_run.status = "skipped"
+                child_run.error = f"依赖任务 {key} 未成功完成"
+                child_run.blocked_by = key
+                finish(child_run)
+                skip_descendants(child)
+
+        def cancel_pending() -> None:
+            ready.clear()
+            for key in self.order:
+                if runs[key].status == "pending":
+                    runs[key].status = "skipped"
+                    runs[key].error = "执行已取消"
+                    finish(runs[key])
+
+        def resources_free(node: TaskNode) -> bool:
+            return all(
+                in_use.get(r, 0) < self.resource_limits[r]
+                for r in node.resources if r in self.resource_limits
+            )
+
+        for key in self.order:
+            if remaining[key] == 0:
+                make_ready(key)
+
+        running = {}
+        with ThreadPoolExecutor(max_workers=self.max_workers, thread_name_prefix="dag") as executor:
+            while ready or running:
+                if self.cancel is not None and self.cancel.is_set() and ready:
+                    logger.warning("依赖图执行已取消，未开始的任务不再执行")
+                    cancel_pending()
+                # 按优先级启动资源空闲的就绪任务；资源不足的任务留在队列中，不阻塞其它资源的任务
+                blocked = []
+                while ready and len(running) < self.max_workers:
+                    item = heapq.heappop(ready)
+                    node = self.nodes[item[2]]
+                    if not resources_free(node):
+                        blocked.append(item)
+                        continue
+                    for r in node.resources:
+                        in_use[r] = in_use.get(r, 0) + 1
+                    runs[node.key].started_at = datetime.now()
+                    runs[node.key].status = "running"
+                    notify(self.on_start, runs[node.key])
+                    running[executor.submit(node.func)] = node
+                for item in blocked:
+                    heapq.heappush(ready, item)
+
+                if not running:
+                    # 防御性处理：无法调度时避免死循环，后代任务同样标记为跳过，不停留在 pending
+                    for _, _, key in ready:
+                        runs[key].status = "failed"
+                        runs[key].error = "资源上限不足，无法调度"
+                        finish(runs[key])
+                    for _, _, key in ready:
+                        skip_descendants(key)
+                    break
+
+                done, _ = wait(list(running), return_when=FIRST_COMPLETED)
+                for future in done:
+                    node = running.pop(future)
+                    run = runs[node.key]
+                    run.finished_at = datetime.now()
+                    for r in node.resources:
+                        in_use[r] -= 1
+                    try:
+                        run.result = future.result()
+                        run.status = "success" if self.is_success(run.result) else "failed"
+                    except Exception as e:
+                        logger.error(f"任务 {node.key} 执行异常: {str(e)}", exc_info=True)
+                        run.status = "failed"
+                        run.error = str(e)
+                    finish(run)
+
+                    if run.status != "success":
+                        skip_descendants(node.key)
+                        continue
+                    for child in self.children[node.key]:
+                        remaining[child] -= 1
+                        if remaining[child] == 0 and runs[child].status == "pending":
+                            runs[child].blocked_by = node.key
+                            make_ready(child)
+
+        report.finished_at = datetime.now()
+        return report
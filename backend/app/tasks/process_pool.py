@@ -0,0 +1,194 @@
+"""
+同步任务工作进程池
+pandas 解析、groupby 等 CPU 密集的同步任务提交到独立进程执行，避免与 API 请求争用 GIL。
+工作进程以 spawn 方式启动，各自创建数据库引擎和连接池；执行状态和结果由任务自身写入 task_execution。
+任务在工作进程中触发的缓存失效（查询缓存、资金流立方体）随结果回传，由调用方所在的 API 进程执行。
+"""
+import importlib
+import logging
+import multiprocessing
+import os
+import threading
+from concurrent.futures import ProcessPoolExecutor
+from concurrent.futures.process import BrokenProcessPool
+from typing import Any, Callable, Dict, List, Optional, Set, Tuple
+
+logger = logging.getLogger(__name__)
+
+_pool: Optional[ProcessPoolExecutor] = None
+_pool_lock = threading.Lock()
+_in_worker = False
+# 工作进程中当前任务记录的失效操作：(类型, 参数)
+_invalidations: Set[Tuple[str, tuple]] = set()
+_invalidations_lock = threading.Lock()
+
+
+def _init_worker(pool_size: int, max_overflow: int, log_level: str) -> None:
+    """工作进程初始化：在创建数据库引擎前改用工作进程的连接池大小"""
+    global _in_worker
+    _in_worker = True
+    from app.config import settings
+
+    settings.DB_POOL_SIZE = pool_size
+    settings.DB_MAX_OVERFLOW = max_overflow
+    logging.basicConfig(level=log_level)
+
+
+def _target_name(func: Callable) -> str:
+    return f"{func.__module__}:{func.__qualname__}"
+
+
+def _invoke(target: str, kwargs: Dict[str, Any]) -> Tuple[Any, Optional[BaseException], List[Tuple[str, tuple]]]:
+    """
+    在工作进程中按 "模块:限定名" 找到函数并执行（支持类的静态方法）
+
+    Returns:
+        (结果, 异常, 执行期间记录的失效操作)；任务失败前可能已提交部分数据，失效操作照常回传
+    """
+    module_name, qualname = target.split(":", 1)
+    func = importlib.import_module(module_name)
+    for attr in qualname.split("."):
+        func = getattr(func, attr)
+    with _invalidations_lock:
+        _invalidations.clear()
+    result, error = None, None
+    try:
+        result = func(**kwargs)
+    except Exception as e:
+        error = e
+    with _invalidations_lock:
+        invalidations = sorted(_invalidations, key=repr)
+        _invalidations.clear()
+    return result, error, invalidations
+
+
+def forward_invalidation(kind: str, *args) -> None:
+    """
+    在工作进程中记录一次缓存失效，任务结束后回传给 API 进程执行（不在工作进程中时不做任何事）
+
+    kind: query_cache（invalidate_query_cache 的参数）/ fund_flow_cube（invalidate_fund_flow_cube 的参数）
+    """
+    if _in_worker:
+        with _invalidations_lock:
+            _invalidations.add((kind, args))
+
+
+def _apply_invalidations(invalidations: List[Tuple[str, tuple]]) -> None:
+    """在 API 进程中执行工作进程回传的失效操作"""
+    from app.utils.fund_flow_cube import invalidate_fund_flow_cube
+    from app.utils.query_cache import invalidate_query_cache
+
+    handlers = {"query_cache": invalidate_query_cache, "fund_flow_cube": invalidate_fund_flow_cube}
+    for kind, args in invalidations:
+        try:
+            handlers[kind](*args)
+        except Exception as e:
+            logger.warning(f"执行工作进程回传的缓存失效失败: {kind} {args}, 错误: {str(e)}")
+
+
+def in_worker_process() -> bool:
+    """当前是否在同步任务工作进程中"""
+    return _in_worker
+
+
+def worker_info() -> Dict[str, Any]:
+    """当前进程的执行方式信息，写入执行记录便于排查"""
+    from app.config import settings
+
+    return {
+        "mode": "process" if _in_worker else "thread",
+        "pid": os.getpid(),
+        "db_pool_size": settings.DB_POOL_SIZE,
+    }
+
+
+def sync_db_concurrency() -> int:
+    """
+    同时占用数据库连接的同步任务数：SYNC_DB_CONCURRENCY，且不超过当前进程写库连接池能提供的连接数
+
+    工作进程的连接池（SYNC_PROCESS_DB_POOL_SIZE）只供同步使用，给外层会话留 1 个；
+    线程模式下与 API 的写请求共用写库连接池（按 DB_MAX_CONNECTIONS 预算调整后），同步任务最多占一半。
+    """
+    from app.config import settings
+    from app.database.session import pool_budget
+
+    pool_size = pool_budget()["write"][0]
+    available = pool_size - 1 if _in_worker else pool_size // 2
+    return max(1, min(settings.SYNC_DB_CONCURRENCY, available))
+
+
+def execution_mode() -> str:
+    """同步任务执行方式：process / thread（工作进程内部一律在线程中执行，不再嵌套进程）"""
+    from app.config import settings
+
+    if _in_worker:
+        return "thread"
+    return "process" if settings.SYNC_EXECUTION_MODE == "process" else "thread"
+
+
+def get_sync_process_pool() -> ProcessPoolExecutor:
+    """获取工作进程池（首次调用时创建）"""
+    global _pool
+    from app.config import settings
+
+    with _pool_lock:
+        if _pool is None:
+            _pool = ProcessPoolExecutor(
+                max_workers=max(1, settings.SYNC_PROCESS_WORKERS),
+                mp_context=multiprocessing.get_context("spawn"),
+                initializer=_init_worker,
+                initargs=(settings.SYNC_PROCESS_DB_POOL_SIZE, settings.SYNC_PROCESS_DB_MAX_OVERFLOW, settings.LOG_LEVEL),
+            )
+            logger.info(f"同步任务工作进程池已创建，进程数: {settings.SYNC_PROCESS_WORKERS}")
+        return _pool
+
+
+def shutdown_sync_process_pool(wait: bool = True) -> None:
+    """关闭工作进程池"""
+    global _pool
+    with _pool_lock:
+        pool, _pool = _pool, None
+    if pool is not None:
+        pool.shutdown(wait=wait)
+
+
+def _reset_broken_pool(pool: ProcessPoolExecutor) -> None:
+    global _pool
+    with _pool_lock:
+        if _pool is pool:
+            _pool = None
+    pool.shutdown(wait=False)
+
+
+def run_sync_job(func: Callable, **kwargs) -> Any:
+    """
+    按 SYNC_EXECUTION_MODE 执行同步任务并等待结果
+
+    process 模式下提交到工作进程池，调用线程只等待结果（不占用 GIL）；
+    func 必须是模块级函数或类的静态方法，参数需可序列化。
+    任务在工作进程中触发的缓存失效在本进程重放（进程内查询缓存只有这里能失效）。
+    工作进程异常退出时重建进程池，该次任务抛出 BrokenProcessPool。
+    """
+    if execution_mode() != "process":
+        return func(**kwargs)
+
+    target = _target_name(func)
+    pool = get_sync_process_pool()
+    try:
+        future = pool.submit(_invoke, target, kwargs)
+    except BrokenProcessPool:
+        # 进程池在之前的任务中损坏，重建后重新提交
+        _reset_broken_pool(pool)
+        pool = get_sync_process_pool()
+        future = pool.submit(_invoke, target, kwargs)
+
+    try:
+        result, error, invalidations = future.result()
+    except BrokenProcessPool:
+        logger.error(f"同步任务工作进程异常退出: {target}")
+        _reset_broken_pool(pool)
+        raise
+    _apply_invalidations(invalidations)
+    if error is not None:
+        raise error
+    return result
@@ -1,6 +1,7 @@
 """
 定时任务调度器（性能优化版本）
-使用线程池执行器隔离任务执行，避免影响API响应时间
+使用线程池执行器隔离任务执行，避免影响API响应时间；
+SYNC_EXECUTION_MODE=process 时同步任务在独立的工作进程中执行，不与 API 争用 GIL
 """
 from apscheduler.schedulers.background import BackgroundScheduler
 from apscheduler.executors.pool import ThreadPoolExecutor
@@ -8,9 +9,10 @@ from apscheduler.triggers.cron import CronTrigger
 from pytz import timezone
 from datetime import date, datetime
 from typing import Union, Optional
+import functools
 import time
 import threading
-from concurrent.futures import ThreadPoolExecutor as ConcurrentThreadPoolExecutor, TimeoutError as FutureTimeoutError, as_completed
+from concurrent.futures import ThreadPoolExecutor as ConcurrentThreadPoolExecutor, TimeoutError as FutureTimeoutError
 import logging
 
 # 配置日志
@@ -508,10 +510,67 @@ def sync_limit_up_stocks_history(target_date: date | None = None):
         db.close()
 
 
+def sync_trade_calendar():
+    """
+    刷新交易所交易日历并重新加载内存索引
+    交易日历每年只在年底公布次年安排时变化，每周刷新一次即可
+    """
+    db = SessionLocal()
+    try:
+        from app.services.trade_calendar_service import TradeCalendarService
+        
+        result = TradeCalendarService.sync_trade_calendar(db)
+        if result.success:
+            logger.info(f"[{threading.current_thread().name}] ✅ 交易日历同步成功: {result}")
+        else:
+            logger.error(f"[{threading.current_thread().name}] ❌ 交易日历同步失败: {result}")
+    except Exception as e:
+        logger.error(f"[{threading.current_thread().name}] 交易日历同步失败: {str(e)}", exc_info=True)
+    finally:
+        db.close()
+
+
 # 全局调度器实例
 _scheduler_instance: Optional[BackgroundScheduler] = None
 
 
+def _enqueue_scheduled_sync(task_types: Optional[list]) -> None:
+    """定时任务入队：同一日期、同一组任务只入队并执行一次（多个调度器实例同时触发也只有一个生效）"""
+    from app.services.task_queue_service import TaskQueueService
+
+    target_date = get_trading_date()
+    if target_date is None:
+        logger.warning(f"无法获取交易日，跳过入队: {task_types or 'all'}")
+        return
+    db = SessionLocal()
+    try:
+        execution, created = TaskQueueService.enqueue_sync_daily_data(
+            db, task_types, target_date, triggered_by="scheduler", skip_if_succeeded=True
+        )
+        if created:
+            print(f"定时任务已入队: {execution.task_name} {target_date} (ID: {execution.id})")
+        else:
+            print(f"定时任务已在队列中或已完成，跳过: {execution.task_name} {target_date} (ID: {execution.id})")
+    finally:
+        db.close()
+
+
+def _sync_job(func, task_types: Optional[list] = None):
+    """
+    调度器任务包装
+    - SYNC_QUEUE_ENABLED：只入队，由工作进程执行（task_types 为对应的 sync_daily_data 任务类型）
+    - 否则按 SYNC_EXECUTION_MODE 在工作进程池或当前线程中执行
+    """
+    @functools.wraps(func)
+    def wrapper():
+        from app.config import settings
+        if settings.SYNC_QUEUE_ENABLED:
+            return _enqueue_scheduled_sync(task_types)
+        from app.tasks.process_pool import run_sync_job
+        return run_sync_job(func)
+    return wrapper
+
+
 def init_scheduler():
     """
     初始化调度器（性能优化版本）
@@ -542,7 +601,7 @@ def init_scheduler():
     
     # 每日收盘后执行数据同步（北京时间 16:00）
     scheduler.add_job(
-        sync_daily_data,
+        _sync_job(sync_daily_data),
         trigger=CronTrigger(hour=16, minute=0, timezone=beijing_tz),
         id='sync_daily_data',
         name='每日数据同步',
@@ -552,7 +611,7 @@ def init_scheduler():
     
     # 龙虎榜机构数据同步（北京时间 16:30，在基础数据同步之后）
     scheduler.add_job(
-        sync_lhb_institution_data,
+        _sync_job(sync_lhb_institution_data, ["lhb_institution"]),
         trigger=CronTrigger(hour=16, minute=30, timezone=beijing_tz),
         id='sync_lhb_institution_data',
         name='龙虎榜机构数据同步',
@@ -562,7 +621,7 @@ def init_scheduler():
     
     # 机构交易统计数据同步（北京时间 15:30，交易日收盘后）
     scheduler.add_job(
-        sync_institution_trading_statistics,
+        _sync_job(sync_institution_trading_statistics, ["institution_trading_statistics"]),
         trigger=CronTrigger(hour=15, minute=30, timezone=beijing_tz),
         id='sync_institution_trading_statistics',
         name='机构交易统计数据同步',
@@ -572,7 +631,7 @@ def init_scheduler():
     
     # 涨停股历史行情数据同步（北京时间 17:00，在涨停板数据同步之后）
     scheduler.add_job(
-        sync_limit_up_stocks_history,
+        _sync_job(sync_limit_up_stocks_history, ["stock_history"]),
         trigger=CronTrigger(hour=17, minute=0, timezone=beijing_tz),
         id='sync_limit_up_stocks_history',
         name='涨停股历史行情数据同步',
@@ -582,7 +641,7 @@ def init_scheduler():
     
     # 活跃营业部数据同步（北京时间 4:00）
     scheduler.add_job(
-        sync_active_branch_data,
+        _sync_job(sync_active_branch_data, ["active_branch"]),
         trigger=CronTrigger(hour=4, minute=0, timezone=beijing_tz),
         id='sync_active_branch_data',
         name='活跃营业部数据同步',
@@ -592,7 +651,7 @@ def init_scheduler():
     
     # 活跃营业部交易详情数据同步（北京时间 4:30，在活跃营业部数据同步之后）
     scheduler.add_job(
-        sync_active_branch_detail_data,
+        _sync_job(sync_active_branch_detail_data, ["active_branch_detail"]),
         trigger=CronTrigger(hour=4, minute=30, timezone=beijing_tz),
         id='sync_active_branch_detail_data',
         name='活跃营业部交易详情数据同步',
@@ -600,6 +659,17 @@ def init_scheduler():
         executor='default',  # 使用配置的线程池执行器
     )
     
+    # 交易日历刷新（每周一北京时间 3:00，调度器启动时先执行一次）
+    scheduler.add_job(
+        sync_trade_calendar,
+        trigger=CronTrigger(day_of_week='mon', hour=3, minute=0, timezone=beijing_tz),
+        id='sync_trade_calendar',
+        name='交易日历同步',
+        replace_existing=True,
+        executor='default',
+        next_run_time=datetime.now(beijing_tz),
+    )
+    
     _scheduler_instance = scheduler
     return scheduler
 
@@ -657,7 +727,139 @@ def get_scheduler_status() -> dict:
     }
 
 
-def sync_daily_data(task_types: list[str] | None = None, target_date: date | None = None, execution_id: int | None = None):
+# 每日同步任务占用的资源，对应 SYNC_AKSHARE_CONCURRENCY / SYNC_DB_CONCURRENCY（按连接池大小封顶）
+SYNC_TASK_RESOURCES = ("akshare", "db")
+
+# 任务依赖关系：某些任务必须在其他任务完成后执行（同一目标日期内）
+SYNC_TASK_DEPENDENCIES = {
+    "lhb_institution": ["lhb"],  # 龙虎榜机构数据依赖龙虎榜基础数据
+    "active_branch_detail": ["active_branch"],  # 活跃营业部详情依赖活跃营业部数据
+    "stock_history": ["zt_pool"],  # 涨停股历史行情依赖涨停池数据
+}
+
+
+def get_sync_task_map() -> dict:
+    """
+    按日期同步的任务映射：key -> (service_method(db, target_date), 占用的资源)
+
+    所有任务都从 AKShare 抓取并写库，并行执行时各自使用独立连接。
+    """
+    # 延迟导入避免循环导入
+    from app.services.lhb_service import LhbService
+    from app.services.institution_trading_service import InstitutionTradingService
+    from app.services.active_branch_service import ActiveBranchService
+    from app.services.active_branch_detail_service import ActiveBranchDetailService
+    from app.services.zt_pool_service import ZtPoolService
+    from app.services.zt_pool_service import ZtPoolDownService
+    from app.services.index_service import IndexService
+    from app.services.fund_flow_service import FundFlowService
+    from app.services.capital_service import CapitalService
+    from app.services.stock_history_service import StockHistoryService
+
+    return {
+        "lhb": (LhbService.sync_data, SYNC_TASK_RESOURCES),
+        "lhb_institution": (LhbService.sync_institution_data, SYNC_TASK_RESOURCES),
+        "institution_trading_statistics": (InstitutionTradingService.sync_data, SYNC_TASK_RESOURCES),
+        "active_branch": (ActiveBranchService.sync_data, SYNC_TASK_RESOURCES),
+        "active_branch_detail": (ActiveBranchDetailService.sync_date_data, SYNC_TASK_RESOURCES),
+        "zt_pool": (ZtPoolService.sync_data, SYNC_TASK_RESOURCES),
+        "zt_pool_down": (ZtPoolDownService.sync_data, SYNC_TASK_RESOURCES),
+        "index": (IndexService.sync_data, SYNC_TASK_RESOURCES),
+        "stock_fund_flow": (FundFlowService.sync_data, SYNC_TASK_RESOURCES),
+        "fund_flow_concept": (lambda db, date: FundFlowService.sync_concept_fund_flow(db, date, limit=200), SYNC_TASK_RESOURCES),
+        "capital": (CapitalService.sync_data, SYNC_TASK_RESOURCES),
+        "stock_history": (lambda db, date: StockHistoryService.sync_limit_up_stocks_history(db, date, months=3), SYNC_TASK_RESOURCES),
+    }
+
+
+def run_sync_task(key: str, service_method, target_date_param, session_factory=None) -> dict:
+    """
+    执行单个同步任务，使用独立的数据库连接
+
+    Returns:
+        {key, result(SyncResult), duration, success, phases[, error]}，异常不向外抛出
+        phases 为各阶段耗时（总耗时、SQL、AKShare、其它）和 SQL/AKShare 调用次数
+    """
+    from app.utils.perf import perf_scope
+
+    with perf_scope("sync", key) as perf:
+        task_result = _run_sync_task(key, service_method, target_date_param, session_factory)
+    task_result["phases"] = perf.phases()
+    return task_result
+
+
+def _run_sync_task(key: str, service_method, target_date_param, session_factory=None) -> dict:
+    task_db = (session_factory or SessionLocal)()
+    task_start_time = time.time()
+    try:
+        # 调用服务方法，传入独立的数据库连接和目标日期
+        result = service_method(task_db, target_date_param)
+
+        # 兼容旧代码：如果返回 bool，转换为 SyncResult
+        if isinstance(result, bool):
+            if result:
+                result = SyncResult.success_result(f"{key} 同步成功")
+            else:
+                result = SyncResult.failure_result(f"{key} 同步失败", "返回 False")
+
+        task_duration = time.time() - task_start_time
+        return {
+            "key": key,
+            "result": result,
+            "duration": task_duration,
+            "success": result.success if isinstance(result, SyncResult) else result,
+        }
+    except Exception as e:
+        task_duration = time.time() - task_start_time
+        error_msg = f"{key} 执行异常: {str(e)}"
+        logger.error(f"[{threading.current_thread().name}] ❌ {error_msg}", exc_info=True)
+        import traceback
+        traceback.print_exc()
+        return {
+            "key": key,
+            "result": SyncResult.failure_result(str(e), error_msg),
+            "duration": task_duration,
+            "success": False,
+            "error": str(e),
+        }
+    finally:
+        task_db.close()
+
+
+def _load_task_estimates(db, limit: int = 20) -> dict:
+    """
+    从最近的执行记录中读取各任务最近一次成功的耗时（秒），作为依赖图调度的预估耗时
+    """
+    from app.models.task_execution import TaskExecution
+
+    estimates = {}
+    try:
+        rows = db.query(TaskExecution.result).filter(
+            TaskExecution.result.isnot(None)
+        ).order_by(TaskExecution.start_time.desc()).limit(limit).all()
+    except Exception as e:
+        db.rollback()
+        logger.warning(f"读取任务历史耗时失败: {str(e)}")
+        return estimates
+
+    for (result,) in rows:
+        task_results = result.get("task_results") if isinstance(result, dict) else None
+        for key, item in (task_results or {}).items():
+            if key in estimates or not isinstance(item, dict) or not item.get("success"):
+                continue
+            try:
+                estimates[key] = float(item.get("duration"))
+            except (TypeError, ValueError):
+                continue
+    return estimates
+
+
+def sync_daily_data(
+    task_types: list[str] | None = None,
+    target_date: date | None = None,
+    execution_id: int | None = None,
+    cancel: threading.Event | None = None,
+):
     """
     同步每日数据
     调用各个服务的数据同步方法
@@ -668,6 +870,7 @@ def sync_daily_data(task_types: list[str] | None = None, target_date: date | Non
         task_types: 要执行的任务类型列表，None表示执行所有任务
         target_date: 目标日期，None表示使用交易日
         execution_id: 已存在的执行记录ID，如果提供则使用现有记录，否则创建新记录
+        cancel: 置位后不再启动新的同步任务（如队列工作进程的租约已失效）
     """
     # 使用独立的数据库连接，避免与API请求共享连接池
     # 这样可以确保任务执行不会占用API请求的连接资源
@@ -708,193 +911,100 @@ def sync_daily_data(task_types: list[str] | None = None, target_date: date | Non
         
         execution_id = execution.id
         
-        from app.services.lhb_service import LhbService
-        from app.services.institution_trading_service import InstitutionTradingService
-        from app.services.active_branch_service import ActiveBranchService
-        from app.services.active_branch_detail_service import ActiveBranchDetailService
-        from app.services.zt_pool_service import ZtPoolService
-        from app.services.zt_pool_service import ZtPoolDownService
-        from app.services.index_service import IndexService
-        from app.services.fund_flow_service import FundFlowService
-        from app.services.capital_service import CapitalService
-        from app.services.stock_history_service import StockHistoryService
-        
-        # 任务映射：key -> (service_method, 是否需要独立db连接)
-        # 注意：所有任务方法都需要db参数，并行执行时会使用独立连接
-        task_map = {
-            "lhb": (LhbService.sync_data, True),
-            "lhb_institution": (LhbService.sync_institution_data, True),
-            "institution_trading_statistics": (InstitutionTradingService.sync_data, True),
-            "active_branch": (ActiveBranchService.sync_data, True),
-            "active_branch_detail": (ActiveBranchDetailService.sync_date_data, True),
-            "zt_pool": (ZtPoolService.sync_data, True),
-            "zt_pool_down": (ZtPoolDownService.sync_data, True),
-            "index": (IndexService.sync_data, True),
-            "stock_fund_flow": (FundFlowService.sync_data, True),
-            "fund_flow_concept": (lambda db, date: FundFlowService.sync_concept_fund_flow(db, date, limit=200), True),
-            "capital": (CapitalService.sync_data, True),
-            "stock_history": (lambda db, date: StockHistoryService.sync_limit_up_stocks_history(db, date, months=3), True),
-        }
-
-        selected_keys = task_types if task_types else list(task_map.keys())
+        task_map = get_sync_task_map()
+        selected_keys = list(dict.fromkeys(task_types)) if task_types else list(task_map.keys())
         results = {}
         error_details = {}
         task_results = {}
         
-        # 定义任务依赖关系：某些任务必须在其他任务完成后执行
-        # 例如：lhb_institution 依赖 lhb，active_branch_detail 依赖 active_branch
-        task_dependencies = {
-            "lhb_institution": ["lhb"],  # 龙虎榜机构数据依赖龙虎榜基础数据
-            "active_branch_detail": ["active_branch"],  # 活跃营业部详情依赖活跃营业部数据
-            "stock_history": ["zt_pool"],  # 涨停股历史行情依赖涨停池数据
-        }
-        
-        # 分离独立任务和依赖任务
-        independent_tasks = []
-        dependent_tasks = []
-        
+        task_dependencies = SYNC_TASK_DEPENDENCIES
+
+        # 按依赖图执行：任务在自身依赖完成后立即开始，不等待同批其它任务
+        # 未选中的依赖视为已满足；依赖失败的任务跳过
+        from app.config import settings
+        from app.tasks.dag_runner import DagRunner, TaskNode, DEFAULT_ESTIMATE
+        from app.tasks.process_pool import sync_db_concurrency
+        from app.utils.perf import record_sync_phases
+
+        estimates = _load_task_estimates(db)
+        nodes = []
         for key in selected_keys:
-            if key in task_dependencies:
-                # 检查依赖是否满足
-                deps = task_dependencies[key]
-                if all(dep in selected_keys for dep in deps):
-                    dependent_tasks.append(key)
-                else:
-                    # 依赖不满足，跳过或标记为独立任务（如果依赖已完成）
-                    independent_tasks.append(key)
+            task_info = task_map.get(key)
+            if not task_info:
+                print(f"跳过未知任务: {key}")
+                error_details[key] = "未知任务类型"
+                continue
+            service_method, resources = task_info
+            nodes.append(TaskNode(
+                key=key,
+                func=lambda key=key, service_method=service_method: run_sync_task(key, service_method, target_date),
+                deps=tuple(dep for dep in task_dependencies.get(key, []) if dep in selected_keys and dep in task_map),
+                resources=resources,
+                estimate=estimates.get(key, DEFAULT_ESTIMATE),
+            ))
+
+        def on_task_finish(run):
+            """任务结束（含跳过）时记录结果，在调度线程中调用"""
+            key = run.key
+            if run.status == "skipped":
+                logger.warning(f"[{thread_name}] ⚠️ 跳过任务 {key}，因为{run.error}")
+                print(f"⚠️ 跳过任务 {key}，因为依赖任务未成功完成")
+                results[key] = SyncResult.failure_result("依赖任务未成功", run.error)
+                error_details[key] = run.error
+                task_results[key] = {"success": False, "status": "skipped", "message": run.error}
+                return
+
+            task_result = run.result or {
+                "result": SyncResult.failure_result(run.error or "执行失败", run.error),
+                "success": False,
+                "error": run.error,
+            }
+            result = task_result["result"]
+            results[key] = result
+            task_results[key] = {
+                "success": task_result["success"],
+                "duration": f"{run.duration:.2f}",
+                "message": str(result) if isinstance(result, SyncResult) else ("成功" if result else "失败"),
+                "started_at": run.started_at,
+                "finished_at": run.finished_at,
+                "wait": f"{run.wait:.2f}",
+                "phases": task_result.get("phases"),
+            }
+            record_sync_phases(key, task_result.get("phases"), wait=run.wait)
+
+            # 打印详细结果
+            if task_result["success"]:
+                logger.info(f"[{thread_name}] ✅ {key}: {result} (耗时: {run.duration:.2f}秒)")
+                print(f"✅ {key}: {result} (耗时: {run.duration:.2f}秒)")
             else:
-                independent_tasks.append(key)
-        
-        # 定义执行单个任务的函数（使用独立数据库连接）
-        def execute_task(key: str, service_method, target_date_param):
-            """执行单个任务，使用独立的数据库连接"""
-            task_db = SessionLocal()
-            task_start_time = time.time()
-            try:
-                # 调用服务方法，传入独立的数据库连接和目标日期
-                result = service_method(task_db, target_date_param)
-                
-                # 兼容旧代码：如果返回 bool，转换为 SyncResult
-                if isinstance(result, bool):
-                    if result:
-                        result = SyncResult.success_result(f"{key} 同步成功")
-                    else:
-                        result = SyncResult.failure_result(f"{key} 同步失败", "返回 False")
-                
-                task_duration = time.time() - task_start_time
-                return {
-                    "key": key,
-                    "result": result,
-                    "duration": task_duration,
-                    "success": result.success if isinstance(result, SyncResult) else result,
-                }
-            except Exception as e:
-                task_duration = time.time() - task_start_time
-                error_msg = f"{key} 执行异常: {str(e)}"
-                logger.error(f"[{threading.current_thread().name}] ❌ {error_msg}", exc_info=True)
-                import traceback
-                traceback.print_exc()
-                return {
-                    "key": key,
-                    "result": SyncResult.failure_result(str(e), error_msg),
-                    "duration": task_duration,
-                    "success": False,
-                    "error": str(e),
-                }
-            finally:
-                task_db.close()
-        
-        # 第一阶段：并行执行独立任务
-        if independent_tasks:
-            logger.info(f"[{thread_name}] 开始并行执行 {len(independent_tasks)} 个独立任务...")
-            print(f"[{thread_name}] 开始并行执行 {len(independent_tasks)} 个独立任务...")
-            
-            # 使用线程池并行执行独立任务
-            # 限制并发数，避免过多并发导致数据库连接池耗尽
-            max_workers = min(len(independent_tasks), 5)  # 最多5个并发任务
-            
-            with ConcurrentThreadPoolExecutor(max_workers=max_workers) as executor:
-                futures = {}
-                for key in independent_tasks:
-                    task_info = task_map.get(key)
-                    if not task_info:
-                        print(f"跳过未知任务: {key}")
-                        error_details[key] = "未知任务类型"
-                        continue
-                    service_method, _ = task_info
-                    # 提交任务，使用独立的数据库连接
-                    futures[executor.submit(execute_task, key, service_method, target_date)] = key
-                
-                # 收集结果
-                for future in as_completed(futures):
-                    key = futures[future]
-                    try:
-                        task_result = future.result()
-                        key = task_result["key"]
-                        result = task_result["result"]
-                        task_duration = task_result["duration"]
-                        
-                        results[key] = result
-                        task_results[key] = {
-                            "success": task_result["success"],
-                            "duration": f"{task_duration:.2f}",
-                            "message": str(result) if isinstance(result, SyncResult) else ("成功" if result else "失败"),
-                        }
-                        
-                        # 打印详细结果
-                        if task_result["success"]:
-                            logger.info(f"[{threading.current_thread().name}] ✅ {key}: {result} (耗时: {task_duration:.2f}秒)")
-                            print(f"✅ {key}: {result} (耗时: {task_duration:.2f}秒)")
-                        else:
-                            logger.error(f"[{threading.current_thread().name}] ❌ {key}: {result}")
-                            print(f"❌ {key}: {result}")
-                            error_details[key] = result.error if isinstance(result, SyncResult) else task_result.get("error", "未知错误")
-                    except Exception as e:
-                        logger.error(f"[{threading.current_thread().name}] ❌ 任务 {key} 执行异常: {str(e)}", exc_info=True)
-                        error_details[key] = str(e)
-        
-        # 第二阶段：串行执行依赖任务（确保依赖已完成）
-        if dependent_tasks:
-            logger.info(f"[{thread_name}] 开始串行执行 {len(dependent_tasks)} 个依赖任务...")
-            print(f"[{thread_name}] 开始串行执行 {len(dependent_tasks)} 个依赖任务...")
-            
-            for key in dependent_tasks:
-                task_info = task_map.get(key)
-                if not task_info:
-                    print(f"跳过未知任务: {key}")
-                    error_details[key] = "未知任务类型"
-                    continue
-                service_method, _ = task_info
-                
-                # 检查依赖是否成功
-                deps = task_dependencies.get(key, [])
-                if deps and not all(results.get(dep, SyncResult.failure_result("", "")).success if isinstance(results.get(dep), SyncResult) else results.get(dep, False) for dep in deps):
-                    logger.warning(f"[{thread_name}] ⚠️ 跳过任务 {key}，因为依赖任务未成功完成")
-                    print(f"⚠️ 跳过任务 {key}，因为依赖任务未成功完成")
-                    results[key] = SyncResult.failure_result("依赖任务未成功", f"依赖任务 {deps} 未成功完成")
-                    error_details[key] = f"依赖任务 {deps} 未成功完成"
-                    continue
-                
-                task_result = execute_task(key, service_method, target_date)
-                key = task_result["key"]
-                result = task_result["result"]
-                task_duration = task_result["duration"]
-                
-                results[key] = result
-                task_results[key] = {
-                    "success": task_result["success"],
-                    "duration": f"{task_duration:.2f}",
-                    "message": str(result) if isinstance(result, SyncResult) else ("成功" if result else "失败"),
-                }
-                
-                # 打印详细结果
-                if task_result["success"]:
-                    logger.info(f"[{threading.current_thread().name}] ✅ {key}: {result} (耗时: {task_duration:.2f}秒)")
-                    print(f"✅ {key}: {result} (耗时: {task_duration:.2f}秒)")
-                else:
-                    logger.error(f"[{threading.current_thread().name}] ❌ {key}: {result}")
-                    print(f"❌ {key}: {result}")
-                    error_details[key] = result.error if isinstance(result, SyncResult) else task_result.get("error", "未知错误")
+                logger.error(f"[{thread_name}] ❌ {key}: {result}")
+                print(f"❌ {key}: {result}")
+                error_details[key] = result.error if isinstance(result, SyncResult) else task_result.get("error", "未知错误")
+
+        critical_path = None
+        if nodes:
+            logger.info(f"[{thread_name}] 开始按依赖图执行 {len(nodes)} 个任务...")
+            print(f"[{thread_name}] 开始按依赖图执行 {len(nodes)} 个任务...")
+            runner = DagRunner(
+                nodes,
+                resource_limits={
+                    "akshare": settings.SYNC_AKSHARE_CONCURRENCY,
+                    "db": sync_db_concurrency(),
+                },
+                max_workers=min(len(nodes), settings.SYNC_MAX_WORKERS),
+                is_success=lambda task_result: bool(task_result and task_result["success"]),
+                on_finish=on_task_finish,
+                cancel=cancel,
+            )
+            path, span = runner.run().critical_path()
+            critical_path = {"tasks": path, "duration": f"{span:.2f}"}
+            logger.info(f"[{thread_name}] 关键路径: {' -> '.join(path)} (总耗时: {span:.2f}秒)")
+            print(f"关键路径: {' -> '.join(path)} (总耗时: {span:.2f}秒)")
+
+        # 所有任务结束后重算该日仪表盘概览（失败不影响同步结果）
+        if any(run_result.get("success") for run_result in task_results.values()):
+            from app.services.dashboard_service import DashboardService
+            DashboardService.build_snapshot(db, target_date)
 
         success_count = sum(1 for v in results.values() if (isinstance(v, SyncResult) and v.success) or (isinstance(v, bool) and v))
         total_count = len(results)
@@ -921,6 +1031,7 @@ def sync_daily_data(task_types: list[str] | None = None, target_date: date | Non
         # 更新执行记录状态（延迟导入避免循环导入）
         if execution_id:
             from app.services.task_service import TaskService, make_json_serializable
+            from app.tasks.process_pool import worker_info
             overall_duration = time.time() - execution.start_time.timestamp() if execution.start_time else 0
             
             # 确保result字典中的所有值都是JSON可序列化的
@@ -928,6 +1039,8 @@ def sync_daily_data(task_types: list[str] | None = None, target_date: date | Non
                 "success_count": success_count,
                 "total_count": total_count,
                 "task_results": task_results,
+                "critical_path": critical_path,
+                "worker": worker_info(),
             })
             
             TaskService.update_execution_status(
@@ -0,0 +1,163 @@
+"""
+同步任务工作进程
+从 task_execution 队列领取任务执行，执行期间由心跳线程定期续约；
+API 副本只入队，工作进程可独立扩缩容。启动方式见 scripts/run_worker.py
+"""
+import os
+import socket
+import threading
+import logging
+from typing import Any, Callable, Dict, Optional, Tuple
+
+from app.models.task_execution import TaskExecution
+from app.services.task_queue_service import TaskQueueService
+from app.utils.date_utils import parse_date
+
+logger = logging.getLogger(__name__)
+
+
+def _handle_sync_daily_data(
+    execution: TaskExecution, kwargs: Dict[str, Any], cancel: threading.Event
+) -> Optional[Tuple[bool, Any]]:
+    """每日数据同步：复用执行记录，状态和结果由 sync_daily_data 写入"""
+    from app.tasks.scheduler import sync_daily_data
+
+    sync_daily_data(
+        task_types=kwargs.get("task_types"),
+        target_date=parse_date(kwargs.get("target_date")),
+        execution_id=execution.id,
+        cancel=cancel,
+    )
+    return None
+
+
+def _handle_backfill(
+    execution: TaskExecution, kwargs: Dict[str, Any], cancel: threading.Event
+) -> Optional[Tuple[bool, Any]]:
+    """历史数据回填：作业进度作为执行结果"""
+    from app.services.backfill_service import BackfillService
+
+    progress = BackfillService.run_job(kwargs["job_id"], cancel=cancel)
+    if progress is None:
+        return False, {"error": f"回填作业不存在: {kwargs['job_id']}"}
+    return progress["status"] == "success", progress
+
+
+# 任务种类 -> 处理函数(执行记录, 参数, 租约失效事件) -> None（已自行记录状态）或 (是否成功, 结果)
+# 租约失效（任务已被其它工作进程接管）时事件置位，处理函数应尽快停止启动新的子任务
+QUEUE_HANDLERS: Dict[str, Callable[[TaskExecution, Dict[str, Any], threading.Event], Optional[Tuple[bool, Any]]]] = {
+    "sync_daily_data": _handle_sync_daily_data,
+    "backfill": _handle_backfill,
+}
+
+
+class SyncWorker:
+    """
+    队列工作进程
+
+    Args:
+        worker_id: 工作进程标识，默认 主机名:进程号
+        lease_seconds: 租约时长，默认 SYNC_QUEUE_LEASE_SECONDS
+        poll_seconds: 队列为空时的轮询间隔，默认 SYNC_QUEUE_POLL_SECONDS
+        session_factory: 数据库会话工厂，默认 SessionLocal
+        handlers: 任务处理函数，默认 QUEUE_HANDLERS
+    """
+
+    def __init__(
+        self,
+        worker_id: Optional[str] = None,
+        lease_seconds: Optional[int] = None,
+        poll_seconds: Optional[float] = None,
+        session_factory=None,
+        handlers: Optional[Dict[str, Callable]] = None,
+    ):
+        from app.config import settings
+        from app.database.session import SessionLocal
+
+        self.worker_id = worker_id or f"{socket.gethostname()}:{os.getpid()}"
+        self.lease_seconds = lease_seconds or settings.SYNC_QUEUE_LEASE_SECONDS
+        self.poll_seconds = poll_seconds if poll_seconds is not None else settings.SYNC_QUEUE_POLL_SECONDS
+        self.session_factory = session_factory or SessionLocal
+        self.handlers = handlers or QUEUE_HANDLERS
+        self._stop = threading.Event()
+
+    def stop(self) -> None:
+        """当前任务执行完后退出"""
+        self._stop.set()
+
+    def _heartbeat_loop(self, execution_id: int, done: threading.Event, lease_lost: threading.Event) -> None:
+        interval = max(1.0, self.lease_seconds / 3)
+        while not done.wait(interval):
+            db = self.session_factory()
+            try:
+                if not TaskQueueService.heartbeat(db, execution_id, self.worker_id, self.lease_seconds):
+                    logger.warning(f"[{self.worker_id}] 任务 {execution_id} 的租约已失效，停止启动新的子任务")
+                    lease_lost.set()
+                    return
+            except Exception as e:
+                logger.warning(f"[{self.worker_id}] 任务 {execution_id} 续约失败: {str(e)}")
+            finally:
+                db.close()
+
+    def run_once(self) -> bool:
+        """领取并执行一个任务，队列为空时返回 False"""
+        db = self.session_factory()
+        try:
+            execution = TaskQueueService.claim(db, self.worker_id, self.lease_seconds)
+            if execution is None:
+                return False
+            execution_id = execution.id
+            payload = execution.job_payload or {}
+            kind, kwargs = payload.get("kind"), payload.get("kwargs") or {}
+            print(f"[{self.worker_id}] 领取任务 {execution_id}: {execution.task_name}（第 {execution.attempts} 次）")
+
+            handler = self.handlers.get(kind)
+            if handler is None:
+                TaskQueueService.finish(db, execution_id, self.worker_id, error_message=f"不支持的队列任务: {kind}")
+                return True
+
+            done, lease_lost = threading.Event(), threading.Event()
+            heartbeat = threading.Thread(
+                target=self._heartbeat_loop, args=(execution_id, done, lease_lost),
+                name=f"heartbeat-{execution_id}", daemon=True,
+            )
+            heartbeat.start()
+            outcome, error_message = None, None
+            try:
+                outcome = handler(execution, kwargs, lease_lost)
+            except Exception as e:
+                logger.error(f"[{self.worker_id}] 任务 {execution_id} 执行失败: {str(e)}", exc_info=True)
+                error_message = str(e)
+            finally:
+                done.set()
+                heartbeat.join()
+
+            db.expire_all()
+            if lease_lost.is_set():
+                # 任务已由其它工作进程接管，结果以接管者为准，不再写入
+                logger.error(f"[{self.worker_id}] 任务 {execution_id} 执行期间租约失效，结果已丢弃")
+                print(f"[{self.worker_id}] 任务 {execution_id} 租约失效，结果已丢弃")
+                return True
+            if error_message:
+                TaskQueueService.finish(db, execution_id, self.worker_id, success=False, error_message=error_message)
+            elif outcome is None:
+                TaskQueueService.finish(db, execution_id, self.worker_id)
+            else:
+                success, result = outcome
+                TaskQueueService.finish(db, execution_id, self.worker_id, success=success, result=result)
+            print(f"[{self.worker_id}] 任务 {execution_id} 执行结束")
+            return True
+        finally:
+            db.close()
+
+    def run_forever(self) -> None:
+        """循环领取任务，直到 stop()"""
+        print(f"✅ 工作进程已启动: {self.worker_id}")
+        while not self._stop.is_set():
+            try:
+                if self.run_once():
+                    continue
+            except Exception as e:
+                logger.error(f"[{self.worker_id}] 领取任务失败: {str(e)}", exc_info=True)
+            self._stop.wait(self.poll_seconds)
+        print(f"🛑 工作进程已停止: {self.worker_id}")
@@ -0,0 +1,71 @@
+"""
+Aho–Corasick 多模式字符串匹配
+一次构建自动机后，对任意文本只需线性扫描一遍即可找出其中出现的全部模式串
+"""
+from collections import deque
+from typing import Dict, Generic, Hashable, Iterable, List, Set, Tuple, TypeVar
+
+V = TypeVar("V", bound=Hashable)
+
+
+class AhoCorasick(Generic[V]):
+    """
+    多模式匹配自动机
+
+    patterns 为 (模式串, 值) 列表；匹配不区分大小写，返回文本中出现过的模式串对应的值。
+    """
+
+    def __init__(self, patterns: Iterable[Tuple[str, V]]):
+        # 每个状态: 转移表、失败指针、输出（在该状态结束的模式串的值）
+        self._goto: List[Dict[str, int]] = [{}]
+        self._fail: List[int] = [0]
+        self._output: List[List[V]] = [[]]
+        self.size = 0
+        for pattern, value in patterns:
+            if pattern:
+                self._add(pattern.lower(), value)
+                self.size += 1
+        self._build()
+
+    def _add(self, pattern: str, value: V) -> None:
+        state = 0
+        for ch in pattern:
+            nxt = self._goto[state].get(ch)
+            if nxt is None:
+                nxt = len(self._goto)
+                self._goto[state][ch] = nxt
+                self._goto.append({})
+                self._fail.append(0)
+                self._output.append([])
+            state = nxt
+        self._output[state].append(value)
+
+    def _build(self) -> None:
+        """BFS 计算失败指针，并把失败链上的输出合并到当前状态"""
+        queue = deque(self._goto[0].values())
+        while queue:
+            state = queue.popleft()
+            for ch, nxt in self._goto[state].items():
+                queue.append(nxt)
+                fail = self._fail[state]
+                while fail and ch not in self._goto[fail]:
+                    fail = self._fail[fail]
+                target = self._goto[fail].get(ch, 0)
+                self._fail[nxt] = target if target != nxt else 0
+                if self._output[self._fail[nxt]]:
+                    self._output[nxt] = self._output[nxt] + self._output[self._fail[nxt]]
+
+    def find(self, text: str) -> Set[V]:
+        """返回 text 中出现过的所有模式串对应的值"""
+        found: Set[V] = set()
+        if not text:
+            return found
+        goto, fail, output = self._goto, self._fail, self._output
+        state = 0
+        for ch in text.lower():
+            while state and ch not in goto[state]:
+                state = fail[state]
+            state = goto[state].get(ch, 0)
+            if output[state]:
+                found.update(output[state])
+        return found
@@ -0,0 +1,270 @@
+"""
+AKShare 本地响应缓存（可选，通过 AKSHARE_CACHE_ENABLED 开启）
+
+按“接口名 + 参数”缓存 DataFrame 到本地磁盘：
+- 数据文件：安装了 pyarrow 时使用 Parquet，否则使用 pickle
+- 索引：SQLite，记录大小、过期时间、最近访问时间和命中次数
+- 请求参数中的日期都早于今天（已收盘）且不是前复权数据时，缓存永不过期
+- 其余请求（含 symbol="即时" 的实时快照）按 AKSHARE_CACHE_TTL 过期
+- 缓存总大小超过上限时按最近访问时间淘汰（LRU）
+"""
+import hashlib
+import json
+import logging
+import os
+import sqlite3
+import threading
+import time
+from datetime import date, datetime
+from pathlib import Path
+from typing import Any, Callable, Dict, Optional, Tuple
+
+import pandas as pd
+
+logger = logging.getLogger(__name__)
+
+try:
+    import pyarrow  # noqa: F401
+    _FILE_FORMAT = "parquet"
+except ImportError:
+    _FILE_FORMAT = "pickle"
+
+# 前复权数据在除权除息后会整体变化，不能视为不可变
+_MUTABLE_ADJUST = {"qfq", "qfq-factor"}
+
+_SCHEMA = """
+CREATE TABLE IF NOT EXISTS cache_entry (
+    key TEXT PRIMARY KEY,
+    endpoint TEXT NOT NULL,
+    params TEXT NOT NULL,
+    path TEXT NOT NULL,
+    size INTEGER NOT NULL,
+    created_at REAL NOT NULL,
+    last_access REAL NOT NULL,
+    expires_at REAL,
+    hits INTEGER NOT NULL DEFAULT 0
+);
+CREATE INDEX IF NOT EXISTS idx_cache_entry_last_access ON cache_entry (last_access);
+"""
+
+
+def _parse_date_arg(value: Any) -> Optional[date]:
+    """识别参数中的日期（date/datetime/YYYYMMDD/YYYY-MM-DD），不是日期返回 None"""
+    if isinstance(value, datetime):
+        return value.date()
+    if isinstance(value, date):
+        return value
+    if isinstance(value, str):
+        text = value.strip()
+        for fmt in ("%Y%m%d", "%Y-%m-%d"):
+            try:
+                return datetime.strptime(text, fmt).date()
+            except ValueError:
+                continue
+    return None
+
+
+def is_immutable_request(kwargs: Dict[str, Any], today: Optional[date] = None) -> bool:
+    """
+    判断请求结果是否不会再变化
+
+    参数里至少有一个日期、所有日期都早于今天，且不是前复权数据。
+    """
+    today = today or date.today()
+    if str(kwargs.get("adjust", "")).lower() in _MUTABLE_ADJUST:
+        return False
+    dates = [_parse_date_arg(v) for k, v in kwargs.items() if "date" in k.lower()]
+    dates = [d for d in dates if d is not None]
+    return bool(dates) and max(dates) < today
+
+
+class AkshareCache:
+    """AKShare 本地响应缓存"""
+
+    def __init__(self, cache_dir: str, max_bytes: int, ttl_seconds: int):
+        self.cache_dir = Path(cache_dir)
+        self.data_dir = self.cache_dir / "data"
+        self.data_dir.mkdir(parents=True, exist_ok=True)
+        self.max_bytes = max_bytes
+        self.ttl_seconds = ttl_seconds
+        self.file_format = _FILE_FORMAT
+
+        self._lock = threading.Lock()
+        self._conn = sqlite3.connect(str(self.cache_dir / "index.sqlite3"), check_same_thread=False)
+        self._conn.executescript(_SCHEMA)
+        self._conn.commit()
+
+        # 进程内计数器
+        self.hits = 0
+        self.misses = 0
+        self.stores = 0
+        self.evictions = 0
+
+    # ==================== 键与文件 ====================
+
+    @staticmethod
+    def make_key(endpoint: str, args: Tuple, kwargs: Dict[str, Any]) -> Tuple[str, str]:
+        """返回 (缓存键, 参数JSON)"""
+        params = json.dumps({"args": list(args), "kwargs": kwargs}, sort_keys=True, ensure_ascii=False, default=str)
+        digest = hashlib.sha1(f"{endpoint}|{params}".encode("utf-8")).hexdigest()
+        return digest, params
+
+    def _path_for(self, key: str) -> Path:
+        suffix = ".parquet" if self.file_format == "parquet" else ".pkl"
+        return self.data_dir / key[:2] / f"{key}{suffix}"
+
+    def _write_frame(self, path: Path, df: pd.DataFrame) -> None:
+        path.parent.mkdir(parents=True, exist_ok=True)
+        tmp = path.with_suffix(path.suffix + ".tmp")
+        if self.file_format == "parquet":
+            df.to_parquet(tmp)
+        else:
+            df.to_pickle(tmp)
+        os.replace(tmp, path)
+
+    def _read_frame(self, path: Path) -> pd.DataFrame:
+        if path.suffix == ".parquet":
+            return pd.read_parquet(path)
+        return pd.read_pickle(path)
+
+    # ==================== 读写 ====================
+
+    def get(self, func: Callable, args: Tuple, kwargs: Dict[str, Any]) -> Optional[pd.DataFrame]:
+        """读取缓存，未命中或已过期返回 None"""
+        endpoint = getattr(func, "__name__", repr(func))
+        key, _ = self.make_key(endpoint, args, kwargs)
+        now = time.time()
+        with self._lock:
+            row = self._conn.execute(
+                "SELECT path, expires_at FROM cache_entry WHERE key = ?", (key,)
+            ).fetchone()
+            if row is None or (row[1] is not None and row[1] <= now):
+                self.misses += 1
+                return None
+            path = Path(row[0])
+            try:
+                df = self._read_frame(path)
+            except Exception as e:
+                logger.warning(f"读取AKShare缓存失败，删除该条目: {endpoint}, 错误: {str(e)}")
+                self._delete_locked(key, path)
+                self.misses += 1
+                return None
+            self._conn.execute(
+                "UPDATE cache_entry SET last_access = ?, hits = hits + 1 WHERE key = ?", (now, key)
+            )
+            self._conn.commit()
+            self.hits += 1
+            return df
+
+    def put(self, func: Callable, args: Tuple, kwargs: Dict[str, Any], df: pd.DataFrame) -> None:
+        """写入缓存，写入失败只记录日志"""
+        endpoint = getattr(func, "__name__", repr(func))
+        key, params = self.make_key(endpoint, args, kwargs)
+        path = self._path_for(key)
+        now = time.time()
+        expires_at = None if is_immutable_request(kwargs) else now + self.ttl_seconds
+        with self._lock:
+            try:
+                self._write_frame(path, df)
+            except Exception as e:
+                logger.warning(f"写入AKShare缓存失败: {endpoint}, 错误: {str(e)}")
+                return
+            self._conn.execute(
+                "INSERT OR REPLACE INTO cache_entry "
+                "(key, endpoint, params, path, size, created_at, last_access, expires_at, hits) "
+                "VALUES (?, ?, ?, ?, ?, ?, ?, ?, 0)",
+                (key, endpoint, params, str(path), path.stat().st_size, now, now, expires_at),
+            )
+            self._conn.commit()
+            self.stores += 1
+            self._evict_locked()
+
+    def _delete_locked(self, key: str, path: Path) -> None:
+        self._conn.execute("DELETE FROM cache_entry WHERE key = ?", (key,))
+        self._conn.commit()
+        try:
+            path.unlink()
+        except FileNotFoundError:
+            pass
+
+    def _evict_locked(self) -> None:
+        """先删除已过期条目，再按最近访问时间淘汰直到总大小不超过上限"""
+        now = time.time()
+        expired = self._conn.execute(
+            "SELECT key, path FROM cache_entry WHERE expires_at IS NOT NULL AND expires_at <= ?", (now,)
+        ).fetchall()
+        for key, path in expired:
+            self._delete_locked(key, Path(path))
+            self.evictions += 1
+
+        total = self._conn.execute("SELECT COALESCE(SUM(size), 0) FROM cache_entry").fetchone()[0]
+        if total <= self.max_bytes:
+            return
+        for key, path, size in self._conn.execute(
+            "SELECT key, path, size FROM cache_entry ORDER BY last_access"
+        ).fetchall():
+            self._delete_locked(key, Path(path))
+            self.evictions += 1
+            total -= size
+            if total <= self.max_bytes:
+                break
+
+    def clear(self) -> int:
+        """清空缓存，返回删除的条目数"""
+        with self._lock:
+            rows = self._conn.execute("SELECT key, path FROM cache_entry").fetchall()
+            for key, path in rows:
+                self._delete_locked(key, Path(path))
+            return len(rows)
+
+    def stats(self) -> dict:
+        """缓存统计信息"""
+        with self._lock:
+            entries, size, immutable = self._conn.execute(
+                "SELECT COUNT(*), COALESCE(SUM(size), 0), COALESCE(SUM(expires_at IS NULL), 0) FROM cache_entry"
+            ).fetchone()
+            by_endpoint = {
+                endpoint: {"entries": count, "size_bytes": total, "hits": hits}
+                for endpoint, count, total, hits in self._conn.execute(
+                    "SELECT endpoint, COUNT(*), SUM(size), SUM(hits) FROM cache_entry GROUP BY endpoint"
+                ).fetchall()
+            }
+        lookups = self.hits + self.misses
+        return {
+            "enabled": True,
+            "cache_dir": str(self.cache_dir),
+            "file_format": self.file_format,
+            "entries": entries,
+            "immutable_entries": immutable,
+            "size_bytes": size,
+            "max_bytes": self.max_bytes,
+            "ttl_seconds": self.ttl_seconds,
+            "hits": self.hits,
+            "misses": self.misses,
+            "stores": self.stores,
+            "evictions": self.evictions,
+            "hit_rate": round(self.hits / lookups, 4) if lookups else None,
+            "by_endpoint": by_endpoint,
+        }
+
+
+_cache: Optional[AkshareCache] = None
+_cache_lock = threading.Lock()
+
+
+def get_akshare_cache() -> Optional[AkshareCache]:
+    """获取全局缓存实例，未开启缓存时返回 None"""
+    global _cache
+    from app.config import settings
+
+    if not settings.AKSHARE_CACHE_ENABLED:
+        return None
+    if _cache is None:
+        with _cache_lock:
+            if _cache is None:
+                _cache = AkshareCache(
+                    cache_dir=settings.AKSHARE_CACHE_DIR,
+                    max_bytes=settings.AKSHARE_CACHE_MAX_MB * 1024 * 1024,
+                    ttl_seconds=settings.AKSHARE_CACHE_TTL,
+                )
+    return _cache
@@ -0,0 +1,154 @@
+"""
+AKShare 并发抓取
+有界并发 + 按接口的令牌桶限流 + 抖动退避重试
+"""
+import contextvars
+import random
+import threading
+import time
+import logging
+from concurrent.futures import ThreadPoolExecutor, as_completed
+from typing import Any, Callable, Dict, Hashable, Iterator, Optional, Tuple
+
+import pandas as pd
+
+logger = logging.getLogger(__name__)
+
+
+class TokenBucket:
+    """
+    令牌桶限流器（线程安全）
+
+    每秒补充 rate 个令牌，最多累积 capacity 个；acquire() 在没有令牌时阻塞等待。
+    """
+
+    def __init__(self, rate: float, capacity: Optional[float] = None, clock: Callable[[], float] = time.monotonic):
+        if rate <= 0:
+            raise ValueError("rate 必须大于0")
+        self.rate = rate
+        self.capacity = capacity if capacity is not None else max(1.0, rate)
+        self._clock = clock
+        self._tokens = self.capacity
+        self._updated = clock()
+        self._lock = threading.Lock()
+
+    def _refill(self) -> None:
+        now = self._clock()
+        self._tokens = min(self.capacity, self._tokens + (now - self._updated) * self.rate)
+        self._updated = now
+
+    def try_acquire(self) -> float:
+        """尝试取一个令牌，成功返回0，否则返回需要等待的秒数"""
+        with self._lock:
+            self._refill()
+            if self._tokens >= 1:
+                self._tokens -= 1
+                return 0.0
+            return (1 - self._tokens) / self.rate
+
+    def acquire(self) -> None:
+        """取一个令牌，必要时阻塞等待"""
+        while True:
+            wait = self.try_acquire()
+            if wait <= 0:
+                return
+            time.sleep(wait)
+
+
+class AkshareFetcher:
+    """
+    AKShare 并发抓取器
+
+    - 最多 max_workers 个请求同时进行
+    - 同一个接口（按函数名区分）共享一个令牌桶，每秒最多 rate 次请求
+    - 请求抛异常时按 backoff_base * 2^n 加随机抖动退避后重试，最多 max_retries 次
+    - 返回值语义与 safe_akshare_call 一致：失败或空数据返回 None
+    """
+
+    def __init__(
+        self,
+        max_workers: Optional[int] = None,
+        rate: Optional[float] = None,
+        max_retries: Optional[int] = None,
+        backoff_base: float = 0.5,
+    ):
+        from app.config import settings
+
+        self.max_workers = max_workers or settings.AKSHARE_MAX_WORKERS
+        self.rate = rate or settings.AKSHARE_RATE_LIMIT
+        self.max_retries = settings.AKSHARE_MAX_RETRIES if max_retries is None else max_retries
+        self.backoff_base = backoff_base
+        self._buckets: Dict[str, TokenBucket] = {}
+        self._lock = threading.Lock()
+
+    def _bucket(self, func: Callable) -> TokenBucket:
+        name = getattr(func, "__name__", repr(func))
+        with self._lock:
+            if name not in self._buckets:
+                self._buckets[name] = TokenBucket(self.rate)
+            return self._buckets[name]
+
+    def _backoff(self, attempt: int) -> float:
+        """第 attempt 次重试前的等待时间（full jitter）"""
+        return random.uniform(0, self.backoff_base * (2 ** attempt))
+
+    def call(self, func: Callable, *args, **kwargs) -> Optional[pd.DataFrame]:
+        """限流 + 重试地调用一次 AKShare 函数，命中本地缓存时不占用限流额度"""
+        from app.utils.akshare_cache import get_akshare_cache
+        from app.utils.perf import record_akshare_call
+
+        cache = get_akshare_cache()
+        if cache is not None:
+            started = time.perf_counter()
+            cached = cache.get(func, args, kwargs)
+            if cached is not None:
+                record_akshare_call(func, time.perf_counter() - started, "cache_hit")
+                return cached
+
+        bucket = self._bucket(func)
+        for attempt in range(self.max_retries + 1):
+            bucket.acquire()
+            started = time.perf_counter()
+            try:
+                result = func(*args, **kwargs)
+            except Exception as e:
+                record_akshare_call(func, time.perf_counter() - started, "error")
+                if attempt < self.max_retries:
+                    delay = self._backoff(attempt)
+                    logger.warning(f"AKShare调用失败，{delay:.2f}s 后重试({attempt + 1}/{self.max_retries}): "
+                                   f"{func.__name__}, 错误: {str(e)}")
+                    time.sleep(delay)
+                    continue
+                logger.error(f"AKShare调用失败: {func.__name__}, 错误: {str(e)}")
+                return None
+            if result is None or (isinstance(result, pd.DataFrame) and result.empty):
+                record_akshare_call(func, time.perf_counter() - started, "empty")
+                return None
+            record_akshare_call(func, time.perf_counter() - started, "ok")
+            if cache is not None and isinstance(result, pd.DataFrame):
+                cache.put(func, args, kwargs, result)
+            return result
+        return None
+
+    def fetch_all(
+        self,
+        requests: Dict[Hashable, Tuple[Callable, Dict[str, Any]]],
+    ) -> Iterator[Tuple[Hashable, Optional[pd.DataFrame]]]:
+        """
+        并发执行一批请求，按完成顺序逐个产出 (key, 结果)
+
+        结果在调用方线程中产出，调用方可以用同一个数据库会话串行写入。
+
+        Args:
+            requests: {key: (func, kwargs)}
+        """
+        if not requests:
+            return
+        with ThreadPoolExecutor(max_workers=self.max_workers, thread_name_prefix="akshare") as executor:
+            # 在调用方上下文中执行，AKShare 耗时计入调用方所在的同步任务
+            futures = {
+                executor.submit(contextvars.copy_context().run, self.call, func, **kwargs): key
+                for key, (func, kwargs) in requests.items()
+            }
+            for future in as_completed(futures):
+                yield futures[future], future.result()
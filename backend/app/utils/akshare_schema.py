@@ -0,0 +1,310 @@
+"""
+AKShare 返回数据的列规范化
+按接口登记“中文列名 -> 目标字段 + 类型”，整列向量化转换，替代逐行解析
+"""
+from dataclasses import dataclass
+from typing import Any, Dict, List, Optional, Sequence, Tuple
+
+import numpy as np
+import pandas as pd
+
+# 支持的列类型
+#   str     去除首尾空白，空字符串/NaN 转为 None
+#   code    股票代码，去除 .SZ/.SH 后缀并补齐 6 位
+#   float   数值
+#   int     整数（先按数值解析再取整）
+#   amount  带“亿/万”单位的金额，如 "11.71亿" -> 1171000000
+#   percent 带“%”的百分比，如 "3.5%" -> 3.5
+#   date    日期，支持 YYYYMMDD / YYYY-MM-DD / datetime
+#   time    时间，支持 HH:MM:SS / HH:MM / HHMMSS / HH:MM:SS.ffffff
+COLUMN_KINDS = ("str", "code", "float", "int", "amount", "percent", "date", "time")
+
+_UNIT_MULTIPLIERS = {"亿": 1e8, "万": 1e4}
+
+
+@dataclass(frozen=True)
+class ColumnSpec:
+    """目标字段定义"""
+    target: str
+    sources: Tuple[str, ...]
+    kind: str = "float"
+    default: Any = None
+
+    def __post_init__(self):
+        if self.kind not in COLUMN_KINDS:
+            raise ValueError(f"不支持的列类型: {self.kind}")
+
+
+def col(target: str, *sources: str, kind: str = "float", default: Any = None) -> ColumnSpec:
+    """ColumnSpec 简写，sources 按优先级排列，取第一个存在的列"""
+    return ColumnSpec(target=target, sources=tuple(sources), kind=kind, default=default)
+
+
+# ==================== 按类型整列转换 ====================
+
+def _to_float(series: pd.Series) -> pd.Series:
+    values = pd.to_numeric(series, errors="coerce")
+    return values.replace([np.inf, -np.inf], np.nan).astype("float64")
+
+
+def _to_str(series: pd.Series) -> pd.Series:
+    values = series.astype("string").str.strip()
+    return values.mask(values.isin(["", "nan", "NaN", "None", "<NA>"]))
+
+
+def _to_code(series: pd.Series) -> pd.Series:
+    values = _to_str(series)
+    values = values.str.split(".", n=1).str[0].str.zfill(6)
+    return values.mask(values == "000000")
+
+
+def _to_amount(series: pd.Series) -> pd.Series:
+    if pd.api.types.is_numeric_dtype(series):
+        return _to_float(series)
+    text = series.astype("string").str.strip()
+    multiplier = pd.Series(1.0, index=series.index)
+    for unit, factor in _UNIT_MULTIPLIERS.items():
+        multiplier = multiplier.mask(text.str.endswith(unit).fillna(False), factor)
+    number = _to_float(text.str.replace(r"[亿万,\s]", "", regex=True))
+    return number * multiplier
+
+
+def _to_percent(series: pd.Series) -> pd.Series:
+    if pd.api.types.is_numeric_dtype(series):
+        return _to_float(series)
+    return _to_float(series.astype("string").str.replace("%", "", regex=False).str.strip())
+
+
+def _to_int(series: pd.Series) -> pd.Series:
+    return _to_amount(series).round().astype("Int64")
+
+
+def _to_date(series: pd.Series) -> pd.Series:
+    if pd.api.types.is_datetime64_any_dtype(series):
+        parsed = series
+    else:
+        text = series.astype("string").str.strip()
+        compact = text.str.fullmatch(r"\d{8}").fillna(False)
+        parsed = pd.to_datetime(text.where(~compact), errors="coerce")
+        if compact.any():
+            parsed = parsed.where(~compact, pd.to_datetime(text.where(compact), format="%Y%m%d", errors="coerce"))
+    return parsed.dt.date.where(parsed.notna())
+
+
+def _to_time(series: pd.Series) -> pd.Series:
+    text = series.astype("string").str.strip()
+    # 去掉小数秒和冒号，统一为 HHMMSS
+    digits = text.str.split(".", n=1).str[0].str.replace(":", "", regex=False)
+    digits = digits.where(digits.str.len() != 4, digits + "00")
+    digits = digits.str.zfill(6)
+    parsed = pd.to_datetime(digits, format="%H%M%S", errors="coerce")
+    return parsed.dt.time.where(parsed.notna())
+
+
+_CONVERTERS = {
+    "str": _to_str,
+    "code": _to_code,
+    "float": _to_float,
+    "int": _to_int,
+    "amount": _to_amount,
+    "percent": _to_percent,
+    "date": _to_date,
+    "time": _to_time,
+}
+
+
+# ==================== 接口登记表 ====================
+
+_FUND_FLOW_BOARD = [
+    col("index_value", "行业指数"),
+    col("index_change_percent", "行业-涨跌幅", kind="percent"),
+    col("inflow", "流入资金", kind="amount"),
+    col("outflow", "流出资金", kind="amount"),
+    col("net_amount", "净额", kind="amount"),
+    col("stock_count", "公司家数", kind="int"),
+    col("leader_stock", "领涨股", kind="str"),
+    col("leader_change_percent", "领涨股-涨跌幅", kind="percent"),
+    col("leader_price", "当前价"),
+]
+
+_ZT_POOL_COMMON = [
+    col("stock_code", "代码", kind="code"),
+    col("stock_name", "名称", kind="str"),
+    col("change_percent", "涨跌幅"),
+    col("latest_price", "最新价"),
+    col("turnover_amount", "成交额", kind="int"),
+    col("circulation_market_value", "流通市值"),
+    col("total_market_value", "总市值"),
+    col("turnover_rate", "换手率"),
+    col("limit_up_capital", "封板资金", kind="int"),
+    col("first_limit_time", "首次封板时间", kind="time"),
+    col("last_limit_time", "最后封板时间", kind="time"),
+    col("explosion_count", "炸板次数", kind="int", default=0),
+    col("limit_up_statistics", "涨停统计", kind="str"),
+    col("consecutive_limit_count", "连板数", kind="int", default=1),
+    col("industry", "所属行业", kind="str"),
+    col("concept", "概念", kind="str"),
+]
+
+AKSHARE_SCHEMAS: Dict[str, List[ColumnSpec]] = {
+    # 个股资金流（即时）
+    "stock_fund_flow_individual": [
+        col("stock_code", "股票代码", "代码", "code", kind="code"),
+        col("stock_name", "股票简称", "名称", "name", kind="str"),
+        col("current_price", "最新价", "current_price"),
+        col("change_percent", "涨跌幅", "涨幅", "change_percent", kind="percent"),
+        col("turnover_rate", "换手率", "turnover_rate", kind="percent"),
+        col("main_inflow", "流入资金", "主力流入", "main_inflow", kind="amount"),
+        col("main_outflow", "流出资金", "主力流出", "main_outflow", kind="amount"),
+        col("main_net_inflow", "净额", "主力净流入", "main_net_inflow", "净流入", kind="amount"),
+        col("turnover_amount", "成交额", "turnover_amount", kind="amount"),
+    ],
+    # 概念/行业资金流（即时），接口的板块名称列均为“行业”
+    "stock_fund_flow_concept": [col("concept", "行业", kind="str")] + _FUND_FLOW_BOARD,
+    "stock_fund_flow_industry": [col("industry", "行业", kind="str")] + _FUND_FLOW_BOARD,
+    # 涨停池 / 跌停池
+    "stock_zt_pool_em": _ZT_POOL_COMMON + [col("limit_up_reason", "涨停原因", kind="str")],
+    "stock_zt_pool_dtgc_em": _ZT_POOL_COMMON + [col("limit_up_reason", "涨停原因", "跌停原因", kind="str")],
+    # 龙虎榜详情
+    "stock_lhb_detail_em": [
+        col("date", "上榜日", kind="date"),
+        col("stock_code", "代码", kind="code"),
+        col("stock_name", "名称", kind="str"),
+        col("close_price", "收盘价", "最新价"),
+        col("change_percent", "涨跌幅", "涨跌"),
+        col("net_buy_amount", "龙虎榜净买额", "净买额"),
+        col("buy_amount", "龙虎榜买入额", "买入额"),
+        col("sell_amount", "龙虎榜卖出额", "卖出额"),
+        col("total_amount", "总成交额", "成交额"),
+        col("turnover_rate", "换手率"),
+    ],
+    # 龙虎榜个股买入/卖出营业部
+    "stock_lhb_stock_detail_em": [
+        col("institution_name", "交易营业部名称", kind="str"),
+        col("buy_amount", "买入金额"),
+        col("sell_amount", "卖出金额"),
+        col("net_buy_amount", "净额"),
+    ],
+    # 机构买卖每日统计
+    "stock_lhb_jgmmtj_em": [
+        col("date", "上榜日期", kind="date"),
+        col("stock_code", "代码", kind="code"),
+        col("stock_name", "名称", kind="str"),
+        col("close_price", "收盘价"),
+        col("change_percent", "涨跌幅"),
+        col("buyer_institution_count", "买方机构数", kind="int"),
+        col("seller_institution_count", "卖方机构数", kind="int"),
+        col("institution_buy_amount", "机构买入总额"),
+        col("institution_sell_amount", "机构卖出总额"),
+        col("institution_net_buy_amount", "机构买入净额"),
+        col("market_total_amount", "市场总成交额"),
+        col("net_buy_ratio", "机构净买额占总成交额比"),
+        col("turnover_rate", "换手率"),
+        col("circulation_market_value", "流通市值"),
+        col("reason", "上榜原因", kind="str"),
+    ],
+    # 个股历史行情
+    "stock_zh_a_hist": [
+        col("date", "日期", kind="date"),
+        col("stock_name", "股票名称", kind="str"),
+        col("open_price", "开盘"),
+        col("close_price", "收盘"),
+        col("high_price", "最高"),
+        col("low_price", "最低"),
+        col("volume", "成交量", kind="int"),
+        col("amount", "成交额"),
+        col("amplitude", "振幅"),
+        col("change_percent", "涨跌幅"),
+        col("change_amount", "涨跌额"),
+        col("turnover_rate", "换手率"),
+    ],
+    # 新浪交易日历
+    "tool_trade_date_hist_sina": [
+        col("date", "trade_date", "date", kind="date"),
+    ],
+    # 指数实时行情
+    "stock_zh_index_spot_em": [
+        col("index_code", "代码", "index_code", kind="str"),
+        col("index_name", "名称", "name", kind="str"),
+        col("close_price", "最新价", "最新", "close"),
+        col("change_percent", "涨跌幅", "涨跌", "change_pct"),
+        col("volume", "成交量", "volume", kind="int"),
+        col("amount", "成交额", "amount"),
+    ],
+    # 指数K线（index_zh_a_hist / index_zh_a_hist_min_em / stock_zh_index_daily 共用）
+    "index_kline": [
+        col("date", "日期", "date", "交易日期", "time", kind="date"),
+        col("open", "开盘", "open", "开"),
+        col("high", "最高", "high", "高"),
+        col("low", "最低", "low", "低"),
+        col("close", "收盘", "close", "收"),
+        col("volume", "成交量", "volume", "vol", kind="int"),
+        col("amount", "成交额", "amount"),
+    ],
+}
+
+
+def register_schema(endpoint: str, specs: Sequence[ColumnSpec]) -> None:
+    """登记（或覆盖）接口的列定义"""
+    AKSHARE_SCHEMAS[endpoint] = list(specs)
+
+
+def get_schema(endpoint: str) -> List[ColumnSpec]:
+    """获取接口的列定义"""
+    try:
+        return AKSHARE_SCHEMAS[endpoint]
+    except KeyError:
+        raise KeyError(f"未登记的 AKShare 接口: {endpoint}")
+
+
+def convert_column(series: pd.Series, kind: str) -> pd.Series:
+    """按类型转换整列"""
+    return _CONVERTERS[kind](series)
+
+
+def normalize_frame(
+    endpoint: str,
+    df: pd.DataFrame,
+    required: Optional[Sequence[str]] = None,
+) -> pd.DataFrame:
+    """
+    按登记表将 AKShare 返回的 DataFrame 转换为目标字段
+
+    - 每个目标字段取 sources 中第一个存在的列（按列探测，不逐行探测）
+    - 源列都不存在时整列为空（或 default）
+    - 输出只包含登记的目标字段，列顺序与登记顺序一致
+
+    Args:
+        endpoint: 接口名，如 "stock_zt_pool_em"
+        df: AKShare 返回的原始数据
+        required: 必填目标字段，任一为空的行被丢弃
+
+    Returns:
+        pd.DataFrame: 规范化后的数据
+    """
+    specs = get_schema(endpoint)
+    if df is None or df.empty:
+        return pd.DataFrame(columns=[s.target for s in specs])
+
+    columns = {}
+    for spec in specs:
+        source = next((name for name in spec.sources if name in df.columns), None)
+        if source is None:
+            values = pd.Series(spec.default, index=df.index, dtype="object")
+        else:
+            values = convert_column(df[source], spec.kind)
+            if spec.default is not None:
+                values = values.fillna(spec.default)
+        columns[spec.target] = values
+
+    result = pd.DataFrame(columns, index=df.index)
+    if required:
+        result = result.dropna(subset=list(required))
+    return result.reset_index(drop=True)
+
+
+def to_records(df: pd.DataFrame) -> List[dict]:
+    """规范化后的 DataFrame 转换为字典列表，缺失值统一为 None"""
+    if df.empty:
+        return []
+    return df.astype(object).where(df.notna(), None).to_dict(orient="records")
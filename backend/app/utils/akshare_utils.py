@@ -1,6 +1,7 @@
 """
 AKShare工具函数
 """
+import time
 import pandas as pd
 import logging
 
@@ -10,13 +11,31 @@ logger = logging.getLogger(__name__)
 def safe_akshare_call(func, *args, **kwargs):
     """
     安全调用AKShare函数，处理异常
+    开启 AKSHARE_CACHE_ENABLED 时优先读取本地缓存
     """
+    from app.utils.akshare_cache import get_akshare_cache
+    from app.utils.perf import record_akshare_call
+
+    started = time.perf_counter()
+    cache = get_akshare_cache()
+    if cache is not None:
+        cached = cache.get(func, args, kwargs)
+        if cached is not None:
+            record_akshare_call(func, time.perf_counter() - started, "cache_hit")
+            return cached
+
+    started = time.perf_counter()
     try:
         result = func(*args, **kwargs)
         if result is None or (isinstance(result, pd.DataFrame) and result.empty):
+            record_akshare_call(func, time.perf_counter() - started, "empty")
             return None
+        record_akshare_call(func, time.perf_counter() - started, "ok")
+        if cache is not None and isinstance(result, pd.DataFrame):
+            cache.put(func, args, kwargs, result)
         return result
     except Exception as e:
+        record_akshare_call(func, time.perf_counter() - started, "error")
         logger.error(f"AKShare调用失败: {func.__name__}, 错误: {str(e)}")
         return None
 
@@ -0,0 +1,146 @@
+"""
+批量写入工具
+使用 INSERT ... ON CONFLICT DO UPDATE 一次写入整批数据，替代逐行“先查询再插入/更新”
+"""
+from dataclasses import dataclass
+from typing import Iterable, List, Optional, Sequence, Union
+import math
+
+import pandas as pd
+from sqlalchemy import func, literal_column, tuple_, select
+from sqlalchemy.orm import Session
+
+# 每批写入的行数，PostgreSQL 单条语句参数上限为 65535
+DEFAULT_BATCH_SIZE = 1000
+
+
+@dataclass
+class UpsertResult:
+    """批量写入结果"""
+    inserted: int = 0
+    updated: int = 0
+
+    @property
+    def count(self) -> int:
+        """写入总数（新增 + 更新）"""
+        return self.inserted + self.updated
+
+    def __add__(self, other: "UpsertResult") -> "UpsertResult":
+        return UpsertResult(self.inserted + other.inserted, self.updated + other.updated)
+
+
+def _clean_value(value):
+    """NaN/inf/NaT 统一转换为 None，numpy 标量转换为 Python 原生类型"""
+    if value is None:
+        return None
+    if value is pd.NaT:
+        return None
+    if isinstance(value, float) and (math.isnan(value) or math.isinf(value)):
+        return None
+    if hasattr(value, "item") and not isinstance(value, (str, bytes)):
+        try:
+            value = value.item()
+        except (ValueError, AttributeError):
+            return value
+        if isinstance(value, float) and (math.isnan(value) or math.isinf(value)):
+            return None
+    return value
+
+
+def _to_records(rows: Union[pd.DataFrame, Iterable[dict]]) -> List[dict]:
+    """DataFrame 或字典列表统一转换为清洗后的字典列表"""
+    if isinstance(rows, pd.DataFrame):
+        if rows.empty:
+            return []
+        rows = rows.to_dict(orient="records")
+    return [{k: _clean_value(v) for k, v in row.items()} for row in rows]
+
+
+def _dedupe_by_key(records: List[dict], conflict_columns: Sequence[str]) -> List[dict]:
+    """同一批次内冲突键重复时保留最后一条（ON CONFLICT 不允许同一语句两次更新同一行）"""
+    by_key = {}
+    for record in records:
+        by_key[tuple(record.get(c) for c in conflict_columns)] = record
+    return list(by_key.values())
+
+
+def _insert_for(db: Session):
+    """根据数据库方言选择支持 ON CONFLICT 的 insert 构造器"""
+    dialect = db.get_bind().dialect.name
+    if dialect == "postgresql":
+        from sqlalchemy.dialects.postgresql import insert
+    elif dialect == "sqlite":
+        from sqlalchemy.dialects.sqlite import insert
+    else:
+        raise ValueError(f"不支持的数据库类型: {dialect}")
+    return dialect, insert
+
+
+def bulk_upsert(
+    db: Session,
+    model,
+    rows: Union[pd.DataFrame, Iterable[dict]],
+    conflict_columns: Sequence[str],
+    update_columns: Optional[Sequence[str]] = None,
+    keep_existing_on_null: bool = False,
+    batch_size: int = DEFAULT_BATCH_SIZE,
+) -> UpsertResult:
+    """
+    批量插入或更新
+
+    目标表必须在 conflict_columns 上有唯一约束。
+    不提交事务，由调用方决定何时 commit。
+
+    Args:
+        db: 数据库会话
+        model: ORM 模型类
+        rows: 已规范化的数据（列名即模型字段名）
+        conflict_columns: 冲突判定列（唯一约束列）
+        update_columns: 冲突时更新的列，默认除冲突列、id、created_at 外的所有列
+        keep_existing_on_null: 为 True 时新值为空不覆盖已有值
+        batch_size: 每批写入的行数
+
+    Returns:
+        UpsertResult: 新增和更新的行数
+    """
+    records = _dedupe_by_key(_to_records(rows), conflict_columns)
+    if not records:
+        return UpsertResult()
+
+    table = model.__table__
+    dialect, insert = _insert_for(db)
+
+    if update_columns is None:
+        skip = set(conflict_columns) | {"id", "created_at"}
+        update_columns = [c for c in records[0].keys() if c not in skip]
+
+    result = UpsertResult()
+    for start in range(0, len(records), batch_size):
+        batch = records[start:start + batch_size]
+
+        stmt = insert(table).values(batch)
+        excluded = stmt.excluded
+        set_ = {
+            col: func.coalesce(excluded[col], table.c[col]) if keep_existing_on_null else excluded[col]
+            for col in update_columns
+        }
+        if set_:
+            stmt = stmt.on_conflict_do_update(index_elements=list(conflict_columns), set_=set_)
+        else:
+            stmt = stmt.on_conflict_do_nothing(index_elements=list(conflict_columns))
+
+        if dialect == "postgresql":
+            # xmax = 0 表示该行由本语句新插入，否则为冲突后更新
+            flags = db.execute(stmt.returning(literal_column("(xmax = 0)"))).scalars().all()
+            inserted = sum(1 for f in flags if f)
+            result = result + UpsertResult(inserted=inserted, updated=len(flags) - inserted)
+        else:
+            key_cols = [table.c[c] for c in conflict_columns]
+            keys = [tuple(r.get(c) for c in conflict_columns) for r in batch]
+            existing = db.execute(
+                select(func.count()).select_from(table).where(tuple_(*key_cols).in_(keys))
+            ).scalar() or 0
+            db.execute(stmt)
+            result = result + UpsertResult(inserted=len(batch) - existing, updated=existing)
+
+    return result
@@ -0,0 +1,192 @@
+"""
+列表总数的计算策略
+页码分页每页除了取数据还要 COUNT(*)，已收盘日期的总数不会变化，却在每次翻页时重算。
+
+- exact：精确计数，结果按 (接口, 筛选条件, 日期) 存入查询缓存，已收盘日期不过期，同步写入后按标签失效
+- estimate：PostgreSQL 估算，无筛选条件时读 pg_class.reltuples，有筛选条件时读 EXPLAIN 的 Plan Rows；
+  其它数据库或估算值较小时改为精确计数
+- none：不计数，多取一行判断是否有下一页
+
+翻到最后一页（本页不满）时总数可直接由偏移量得出，任何模式都不再计数。
+"""
+import json
+import logging
+from dataclasses import dataclass, field
+from typing import Any, Dict, Iterable, List, Optional, Tuple
+
+from sqlalchemy import text
+from sqlalchemy.ext.compiler import compiles
+from sqlalchemy.orm import Session
+from sqlalchemy.sql.expression import ClauseElement, Executable
+
+from app.utils.query_cache import Tag, cached_query
+
+logger = logging.getLogger(__name__)
+
+COUNT_MODES = ("exact", "estimate", "none")
+
+# 接口 count 参数
+COUNT_QUERY_PATTERN = "^(exact|estimate|none)$"
+COUNT_QUERY_DESCRIPTION = "总数计算方式：exact 精确（缓存）/ estimate 估算 / none 不计数，默认见 LIST_COUNT_MODE"
+
+
+@dataclass
+class CountCacheKey:
+    """
+    精确计数的缓存键
+
+    Args:
+        endpoint: 接口名
+        params: 影响总数的筛选条件（不含页码、排序）
+        tags: 失效标签 (表, 日期)
+        closed: 是否为已收盘日期（不过期）
+    """
+    endpoint: str
+    params: Dict[str, Any]
+    tags: Iterable[Tag] = field(default_factory=list)
+    closed: bool = False
+
+
+@dataclass
+class OffsetPage:
+    """
+    页码分页结果
+
+    total 在 none 模式下是已知的最少条数（有下一页时多算一条，前端据此显示"下一页"），
+    estimated 为 True 表示 total 是估算值
+    """
+    items: List[Any]
+    total: int
+    has_more: bool
+    estimated: bool = False
+
+
+def resolve_count_mode(mode: Optional[str]) -> str:
+    """接口参数为空时使用 LIST_COUNT_MODE"""
+    from app.config import settings
+
+    mode = mode or settings.LIST_COUNT_MODE
+    return mode if mode in COUNT_MODES else "exact"
+
+
+def table_row_estimate(db: Session, table_name: str) -> Optional[int]:
+    """PostgreSQL 统计信息中的表行数（未 ANALYZE 过或非 PostgreSQL 时返回 None）"""
+    if db.get_bind().dialect.name != "postgresql":
+        return None
+    try:
+        estimate = db.execute(
+            text("SELECT reltuples::bigint FROM pg_class WHERE oid = to_regclass(:table_name)"),
+            {"table_name": table_name},
+        ).scalar()
+    except Exception as e:
+        logger.warning(f"读取 {table_name} 行数估算失败: {str(e)}")
+        return None
+    return int(estimate) if estimate is not None and estimate >= 0 else None
+
+
+class Explain(Executable, ClauseElement):
+    """EXPLAIN (FORMAT JSON) <查询>，与普通语句一样由当前连接的方言编译和绑定参数"""
+
+    inherit_cache = False
+
+    def __init__(self, statement):
+        self.statement = statement
+
+
+@compiles(Explain)
+def _compile_explain(element: Explain, compiler, **kw) -> str:
+    # 参数随内层语句一起编译：IN 列表按执行时展开，psycopg（命名）和 asyncpg（$n 位置参数）都适用
+    return f"EXPLAIN (FORMAT JSON) {compiler.process(element.statement, **kw)}"
+
+
+def query_row_estimate(db: Session, query) -> Optional[int]:
+    """
+    PostgreSQL 规划器对查询结果行数的估算（EXPLAIN，不执行查询）
+
+    在保存点中执行：EXPLAIN 失败只回滚保存点，不会让整个事务进入中止状态，之后的精确计数仍可执行。
+    """
+    bind = db.get_bind()
+    if bind.dialect.name != "postgresql":
+        return None
+    try:
+        with db.begin_nested():
+            plan = db.execute(Explain(query.order_by(None).statement)).scalar()
+        if isinstance(plan, str):
+            # asyncpg 未注册 json 编解码时返回文本
+            plan = json.loads(plan)
+        return int(plan[0]["Plan"]["Plan Rows"])
+    except Exception as e:
+        logger.warning(f"EXPLAIN 估算行数失败: {str(e)}")
+        return None
+
+
+def exact_count(query, cache_key: Optional[CountCacheKey] = None) -> int:
+    """精确计数，给出缓存键时经查询缓存"""
+    def load() -> int:
+        return query.order_by(None).count()
+
+    if cache_key is None:
+        return load()
+    return cached_query(
+        f"count:{cache_key.endpoint}", cache_key.params, load, cache_key.tags, cache_key.closed
+    )
+
+
+def count_total(
+    db: Session,
+    query,
+    mode: str,
+    cache_key: Optional[CountCacheKey] = None,
+    table_name: Optional[str] = None,
+) -> Tuple[Optional[int], bool]:
+    """
+    按策略计算总数
+
+    Args:
+        table_name: 查询没有筛选条件（全表）时传表名，估算直接读 pg_class
+
+    Returns:
+        (总数, 是否为估算值)；none 模式返回 (None, False)
+    """
+    from app.config import settings
+
+    if mode == "none":
+        return None, False
+    if mode == "estimate":
+        estimate = table_row_estimate(db, table_name) if table_name else query_row_estimate(db, query)
+        if estimate is not None and estimate >= settings.LIST_COUNT_EXACT_BELOW:
+            return estimate, True
+    return exact_count(query, cache_key), False
+
+
+def paginate_query(
+    db: Session,
+    query,
+    page: int,
+    page_size: int,
+    count_mode: Optional[str] = None,
+    cache_key: Optional[CountCacheKey] = None,
+    table_name: Optional[str] = None,
+) -> OffsetPage:
+    """
+    页码分页：多取一行判断是否有下一页，按策略计算总数
+
+    当前页不满时（最后一页）总数就是 偏移量 + 本页条数，不再计数。
+    """
+    mode = resolve_count_mode(count_mode)
+    offset = (page - 1) * page_size
+    items = query.offset(offset).limit(page_size + 1).all()
+    has_more = len(items) > page_size
+    items = items[:page_size]
+
+    if not has_more and (items or page == 1):
+        return OffsetPage(items=items, total=offset + len(items), has_more=False)
+
+    seen = offset + len(items) + (1 if has_more else 0)
+    total, estimated = count_total(db, query, mode, cache_key, table_name)
+    if total is None:
+        return OffsetPage(items=items, total=seen, has_more=has_more)
+    if estimated:
+        # 估算值不能小于已经看到的条数
+        total = max(total, seen)
+    return OffsetPage(items=items, total=total, has_more=has_more, estimated=estimated)
@@ -0,0 +1,201 @@
+"""
+流式导出（CSV / NDJSON / Parquet）
+
+调用方传入逐行产生的记录（ORM 对象或字典，通常来自服务端游标 yield_per），
+按 Pydantic 响应模型校验和序列化后分批写出，字段与对应查询接口的 JSON 一致。
+内存只保留一批（EXPORT_BATCH_SIZE 行），与导出总行数无关。
+
+- csv：UTF-8 带 BOM（Excel 直接打开中文不乱码），嵌套字段写为 JSON 字符串
+- ndjson：每行一个 JSON 对象
+- parquet：每批一个行组，需要安装 pyarrow；嵌套字段写为 JSON 字符串
+"""
+import csv
+import io
+import json
+import logging
+import types
+import typing
+from datetime import date, datetime
+from typing import Any, Dict, Iterable, Iterator, List, Optional, Type
+
+from pydantic import BaseModel
+
+logger = logging.getLogger(__name__)
+
+try:
+    import pyarrow
+    import pyarrow.parquet
+except ImportError:
+    pyarrow = None
+
+EXPORT_MEDIA_TYPES = {
+    "csv": "text/csv; charset=utf-8",
+    "ndjson": "application/x-ndjson",
+    "parquet": "application/vnd.apache.parquet",
+}
+
+# 接口 format 参数
+EXPORT_FORMAT_PATTERN = "^(csv|ndjson|parquet)$"
+EXPORT_FORMAT_DESCRIPTION = "导出格式：csv / ndjson / parquet（parquet 需服务端安装 pyarrow）"
+
+
+class ExportFormatError(ValueError):
+    """导出格式不可用（如未安装 pyarrow）"""
+
+
+def _batches(items: Iterable[Any], size: int) -> Iterator[List[Any]]:
+    batch = []
+    for item in items:
+        batch.append(item)
+        if len(batch) >= size:
+            yield batch
+            batch = []
+    if batch:
+        yield batch
+
+
+def _dump(model: Type[BaseModel], item: Any, mode: str) -> Dict[str, Any]:
+    return model.model_validate(item).model_dump(mode=mode)
+
+
+def _flat_value(value: Any) -> Any:
+    """CSV / Parquet 不支持嵌套结构，列表和字典写为 JSON 字符串"""
+    if isinstance(value, (list, dict)):
+        return json.dumps(value, ensure_ascii=False, default=str)
+    return value
+
+
+def _csv_chunks(model: Type[BaseModel], items: Iterable[Any], batch_size: int) -> Iterator[bytes]:
+    fields = list(model.model_fields)
+    buffer = io.StringIO()
+    writer = csv.writer(buffer)
+    writer.writerow(fields)
+    yield ("\ufeff" + buffer.getvalue()).encode("utf-8")
+    for batch in _batches(items, batch_size):
+        buffer.seek(0)
+        buffer.truncate()
+        for item in batch:
+            row = _dump(model, item, "json")
+            writer.writerow(["" if row[f] is None else _flat_value(row[f]) for f in fields])
+        yield buffer.getvalue().encode("utf-8")
+
+
+def _ndjson_chunks(model: Type[BaseModel], items: Iterable[Any], batch_size: int) -> Iterator[bytes]:
+    for batch in _batches(items, batch_size):
+        yield "".join(
+            json.dumps(_dump(model, item, "json"), ensure_ascii=False) + "\n" for item in batch
+        ).encode("utf-8")
+
+
+def _arrow_type(annotation: Any):
+    """Pydantic 字段类型 -> Arrow 类型，Optional 取内层类型，其它复杂类型按 JSON 字符串处理"""
+    args = [a for a in typing.get_args(annotation) if a is not type(None)]
+    if typing.get_origin(annotation) in (typing.Union, types.UnionType) and len(args) == 1:
+        annotation = args[0]
+    return {
+        str: pyarrow.string(),
+        int: pyarrow.int64(),
+        float: pyarrow.float64(),
+        bool: pyarrow.bool_(),
+        date: pyarrow.date32(),
+        datetime: pyarrow.timestamp("us"),
+    }.get(annotation, pyarrow.string())
+
+
+def parquet_schema(model: Type[BaseModel]):
+    return pyarrow.schema([
+        (name, _arrow_type(field.annotation)) for name, field in model.model_fields.items()
+    ])
+
+
+class _StreamSink(io.RawIOBase):
+    """Parquet 写入目标：只保存尚未发送的字节，tell() 返回累计写入量（列块偏移依赖它）"""
+
+    def __init__(self):
+        self._chunks: List[bytes] = []
+        self._position = 0
+
+    def writable(self) -> bool:
+        return True
+
+    def write(self, data) -> int:
+        data = bytes(data)
+        self._chunks.append(data)
+        self._position += len(data)
+        return len(data)
+
+    def tell(self) -> int:
+        return self._position
+
+    def drain(self) -> bytes:
+        data = b"".join(self._chunks)
+        self._chunks.clear()
+        return data
+
+
+def _parquet_chunks(model: Type[BaseModel], items: Iterable[Any], batch_size: int) -> Iterator[bytes]:
+    schema = parquet_schema(model)
+    fields = list(model.model_fields)
+    sink = _StreamSink()
+    writer = pyarrow.parquet.ParquetWriter(sink, schema)
+    try:
+        for batch in _batches(items, batch_size):
+            rows = [_dump(model, item, "python") for item in batch]
+            columns = {f: [_flat_value(row[f]) for row in rows] for f in fields}
+            writer.write_table(pyarrow.Table.from_pydict(columns, schema=schema))
+            yield sink.drain()
+    finally:
+        writer.close()
+    yield sink.drain()
+
+
+def stream_export(
+    model: Type[BaseModel],
+    items: Iterable[Any],
+    fmt: str,
+    batch_size: Optional[int] = None,
+) -> Iterator[bytes]:
+    """
+    按格式逐块产生导出内容
+
+    Raises:
+        ExportFormatError: 格式未知，或 parquet 格式但未安装 pyarrow（在开始产生内容前检查）
+    """
+    from app.config import settings
+
+    if fmt not in EXPORT_MEDIA_TYPES:
+        raise ExportFormatError(f"不支持的导出格式: {fmt}")
+    if fmt == "parquet" and pyarrow is None:
+        raise ExportFormatError("服务端未安装 pyarrow，不支持 Parquet 导出")
+    batch_size = batch_size or settings.EXPORT_BATCH_SIZE
+    chunks = {"csv": _csv_chunks, "ndjson": _ndjson_chunks, "parquet": _parquet_chunks}[fmt]
+    return chunks(model, items, batch_size)
+
+
+def export_response(model: Type[BaseModel], items: Iterable[Any], fmt: str, filename: str):
+    """
+    流式导出响应
+
+    items 应为惰性迭代器（如 Query.yield_per），响应发送过程中才从数据库读取；
+    中途出错时响应已开始发送，只能记录日志并截断输出。
+    """
+    from fastapi import HTTPException
+    from fastapi.responses import StreamingResponse
+
+    try:
+        chunks = stream_export(model, items, fmt)
+    except ExportFormatError as e:
+        raise HTTPException(status_code=400, detail=str(e))
+
+    def guarded() -> Iterator[bytes]:
+        try:
+            yield from chunks
+        except Exception as e:
+            logger.error(f"导出 {filename}.{fmt} 中途失败: {str(e)}", exc_info=True)
+            raise
+
+    return StreamingResponse(
+        guarded(),
+        media_type=EXPORT_MEDIA_TYPES[fmt],
+        headers={"Content-Disposition": f'attachment; filename="{filename}.{fmt}"'},
+    )
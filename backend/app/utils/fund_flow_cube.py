@@ -0,0 +1,492 @@
+"""
+个股资金流列式内存立方体
+把 stock_fund_flow 按 (交易日 × 股票) 展开为 NumPy 矩阵，日期范围内的汇总、筛选、排序和 Top-K 都是向量化运算，
+不再逐行构造 ORM 对象。
+
+- 按请求的日期窗口懒加载，窗口外的日期在首次用到时补齐
+- 同进程内的资金流同步提交后通过 invalidate_fund_flow_cube 标记失效，下次查询时只重新加载这些日期
+- 定时任务在独立进程写库时，按 TTL 比对各日期行数发现变化；当日（未收盘）数据按 TTL 重新加载
+"""
+import bisect
+import threading
+import time
+import logging
+from datetime import date, timedelta
+from typing import Any, Callable, Dict, Iterable, List, Optional, Set, Tuple
+
+import numpy as np
+import pandas as pd
+from sqlalchemy import and_, func, select
+from sqlalchemy.orm import Session
+
+from app.models.fund_flow import StockFundFlow
+
+logger = logging.getLogger(__name__)
+
+# 多日汇总的金额字段
+SUM_FIELDS = ("main_inflow", "main_outflow", "main_net_inflow", "turnover_amount")
+# 取窗口内最新一天值的字段
+LATEST_FIELDS = ("current_price", "change_percent", "turnover_rate")
+VALUE_FIELDS = SUM_FIELDS + LATEST_FIELDS
+FLAG_FIELDS = ("is_limit_up", "is_lhb")
+
+
+class FundFlowCube:
+    """
+    个股资金流立方体
+
+    每个数值字段是一个 float64 矩阵（行=交易日，列=股票，缺失为 NaN），
+    涨停/龙虎榜标志为布尔矩阵，股票名称为名称表下标矩阵（-1 表示当天无数据）。
+    """
+
+    def __init__(self, max_span_days: int = 400, ttl_seconds: int = 60):
+        self.max_span_days = max_span_days
+        self.ttl_seconds = ttl_seconds
+        self._lock = threading.RLock()
+        self._clear()
+
+    def _clear(self) -> None:
+        self.dates: List[date] = []
+        self._date_pos: Dict[date, int] = {}
+        self.codes: List[str] = []
+        self._code_index: Dict[str, int] = {}
+        self.names: List[str] = []
+        self._name_index: Dict[str, int] = {}
+        self._values: Dict[str, np.ndarray] = {f: np.empty((0, 0)) for f in VALUE_FIELDS}
+        self._flags: Dict[str, np.ndarray] = {f: np.zeros((0, 0), dtype=bool) for f in FLAG_FIELDS}
+        self._name_ids = np.full((0, 0), -1, dtype=np.int32)
+        # 已加载的自然日区间 [start, end]（区间内没有行的日期即无数据）
+        self.coverage: Optional[Tuple[date, date]] = None
+        self._row_counts: Dict[date, int] = {}
+        self._stale: Set[date] = set()
+        self._checked_at = 0.0
+        self._prefix: Optional[Dict[str, np.ndarray]] = None
+
+    def __len__(self) -> int:
+        return len(self.dates)
+
+    # ---------- 加载 ----------
+
+    def ensure(self, db: Session, start: date, end: date) -> None:
+        """保证 [start, end] 已加载且不过期"""
+        with self._lock:
+            if self.coverage is None:
+                self._load_range(db, start, end)
+            else:
+                cov_start, cov_end = self.coverage
+                if start < cov_start or end > cov_end:
+                    new_start, new_end = min(start, cov_start), max(end, cov_end)
+                    if (new_end - new_start).days > self.max_span_days:
+                        # 超出容量时丢弃旧窗口，只保留本次请求的窗口
+                        self.reset()
+                        self._load_range(db, start, end)
+                    else:
+                        if start < cov_start:
+                            self._load_range(db, start, cov_start - timedelta(days=1))
+                        if end > cov_end:
+                            self._load_range(db, cov_end + timedelta(days=1), end)
+                        self.coverage = (new_start, new_end)
+            self._revalidate(db)
+
+    def evicts(self, start: date, end: date) -> bool:
+        """
+        加载 [start, end] 是否会丢弃常驻窗口
+
+        窗口本身超出容量，或向更早的历史回溯导致总跨度超出容量时为真；
+        向后扩展（新的交易日）仍然滑动常驻窗口。
+        """
+        if (end - start).days > self.max_span_days:
+            return True
+        coverage = self.coverage
+        return (
+            coverage is not None
+            and start < coverage[0]
+            and (max(end, coverage[1]) - start).days > self.max_span_days
+        )
+
+    def invalidate(self, start: date, end: Optional[date] = None) -> None:
+        """标记 [start, end] 内已加载的日期失效"""
+        end = end or start
+        with self._lock:
+            if self.coverage is None:
+                return
+            current = max(start, self.coverage[0])
+            last = min(end, self.coverage[1])
+            while current <= last:
+                self._stale.add(current)
+                current += timedelta(days=1)
+
+    def reset(self) -> None:
+        with self._lock:
+            self._clear()
+
+    def _revalidate(self, db: Session) -> None:
+        """重新加载失效日期；每隔 TTL 比对一次各日期行数，并刷新未收盘日期"""
+        now = time.time()
+        if now - self._checked_at >= self.ttl_seconds:
+            cov_start, cov_end = self.coverage
+            counts = dict(db.execute(
+                select(StockFundFlow.date, func.count()).where(
+                    and_(StockFundFlow.date >= cov_start, StockFundFlow.date <= cov_end)
+                ).group_by(StockFundFlow.date)
+            ).all())
+            for d in set(counts) | set(self._row_counts):
+                if counts.get(d, 0) != self._row_counts.get(d, 0) or d >= date.today():
+                    self._stale.add(d)
+            self._checked_at = now
+        if self._stale:
+            stale = sorted(self._stale)
+            self._stale = set()
+            self._load(db, StockFundFlow.date.in_(stale), stale)
+
+    def _load_range(self, db: Session, start: date, end: date) -> None:
+        self._load(db, and_(StockFundFlow.date >= start, StockFundFlow.date <= end), [])
+        if self.coverage is None:
+            self.coverage = (start, end)
+            self._checked_at = time.time()
+
+    def _load(self, db: Session, condition, replace_dates: Iterable[date]) -> None:
+        """按条件查询行并写入矩阵；replace_dates 中的日期先清空（处理被删除的行）"""
+        columns = [StockFundFlow.date, StockFundFlow.stock_code, StockFundFlow.stock_name]
+        columns += [getattr(StockFundFlow, f) for f in VALUE_FIELDS + FLAG_FIELDS]
+        rows = db.execute(select(*columns).where(condition)).all()
+        self._prefix = None
+        frame = pd.DataFrame(rows, columns=[c.key for c in columns])
+
+        new_dates = set(frame["date"].unique()) if not frame.empty else set()
+        self._resize(new_dates - set(self._date_pos), frame["stock_code"].unique() if not frame.empty else [])
+
+        for d in replace_dates:
+            pos = self._date_pos.get(d)
+            if pos is not None:
+                for arr in self._values.values():
+                    arr[pos, :] = np.nan
+                for arr in self._flags.values():
+                    arr[pos, :] = False
+                self._name_ids[pos, :] = -1
+            self._row_counts.pop(d, None)
+        if frame.empty:
+            return
+
+        di = frame["date"].map(self._date_pos).to_numpy()
+        si = frame["stock_code"].map(self._code_index).to_numpy()
+        for field in VALUE_FIELDS:
+            self._values[field][di, si] = pd.to_numeric(frame[field], errors="coerce").to_numpy(dtype=float)
+        for field in FLAG_FIELDS:
+            self._flags[field][di, si] = frame[field].eq(True).to_numpy()
+        for name in frame["stock_name"].unique():
+            if name not in self._name_index:
+                self._name_index[name] = len(self.names)
+                self.names.append(name)
+        self._name_ids[di, si] = frame["stock_name"].map(self._name_index).to_numpy(dtype=np.int32)
+        self._row_counts.update(frame.groupby("date").size().to_dict())
+
+    def _resize(self, add_dates: Set[date], codes: Iterable[str]) -> None:
+        """加入新日期行、新股票列（矩阵整体重建，只在加载时发生）"""
+        add_codes = [c for c in codes if c not in self._code_index]
+        if not add_dates and not add_codes:
+            return
+        for code in add_codes:
+            self._code_index[code] = len(self.codes)
+            self.codes.append(code)
+        old_rows = [self._date_pos[d] for d in self.dates]
+        dates = sorted(set(self.dates) | add_dates)
+        date_pos = {d: i for i, d in enumerate(dates)}
+        target_rows = [date_pos[d] for d in self.dates]
+        shape = (len(dates), len(self.codes))
+        old_cols = self._name_ids.shape[1]
+
+        def grow(old: np.ndarray, fill, dtype) -> np.ndarray:
+            new = np.full(shape, fill, dtype=dtype)
+            if old.size:
+                new[np.ix_(target_rows, range(old_cols))] = old[old_rows, :]
+            return new
+
+        self._values = {f: grow(arr, np.nan, float) for f, arr in self._values.items()}
+        self._flags = {f: grow(arr, False, bool) for f, arr in self._flags.items()}
+        self._name_ids = grow(self._name_ids, -1, np.int32)
+        self.dates = dates
+        self._date_pos = date_pos
+
+    # ---------- 查询 ----------
+
+    def _window(self, start: date, end: date) -> slice:
+        return slice(bisect.bisect_left(self.dates, start), bisect.bisect_right(self.dates, end))
+
+    def name_mask(self, predicate: Callable[[str], bool]) -> np.ndarray:
+        """名称表上的布尔掩码，可按 name_ids 下标映射到 (日 × 股) 矩阵"""
+        return np.array([predicate(name) for name in self.names] + [False], dtype=bool)
+
+    def consecutive_inflow_mask(self, trading_dates: List[date], min_net_inflow: float) -> np.ndarray:
+        """给定交易日每天都有数据且主力净流入都 > M 的股票（与 FundFlowScreener.consecutive_inflow_query 一致）"""
+        with self._lock:
+            rows = [self._date_pos.get(d) for d in set(trading_dates)]
+            if not rows or any(r is None for r in rows):
+                return np.zeros(len(self.codes), dtype=bool)
+            # NaN（无数据或空值）比较结果为 False
+            return np.all(self._values["main_net_inflow"][rows, :] > min_net_inflow, axis=0)
+
+    def query(
+        self,
+        db: Session,
+        start: date,
+        end: date,
+        consecutive_dates: Optional[List[date]] = None,
+        min_net_inflow: float = 0,
+        **kwargs,
+    ) -> Tuple[List[Dict], int]:
+        """
+        加载窗口、计算连续净流入掩码并汇总，全程持有同一把锁
+
+        分开调用 ensure / consecutive_inflow_mask / aggregate 时，其它请求可能在中间重置或刷新窗口，
+        导致本次汇总落在另一个（或空的）窗口上。consecutive_dates 不为空时只保留这些交易日主力净流入都
+        > min_net_inflow 的股票；其余参数同 aggregate。
+
+        Returns:
+            tuple: (当前页的字典列表, 总数)
+        """
+        window_start = min(start, min(consecutive_dates)) if consecutive_dates else start
+        if self.evicts(window_start, end):
+            # 为本次查询单独构建（不缓存），不驱逐常驻窗口
+            cube = FundFlowCube(max_span_days=(end - window_start).days, ttl_seconds=self.ttl_seconds)
+            return cube.query(db, start, end, consecutive_dates, min_net_inflow, **kwargs)
+        with self._lock:
+            self.ensure(db, window_start, end)
+            if consecutive_dates:
+                mask = self.consecutive_inflow_mask(consecutive_dates, min_net_inflow)
+                if kwargs.get("stock_mask") is not None:
+                    mask &= kwargs["stock_mask"][:len(mask)]
+                kwargs["stock_mask"] = mask
+            return self.aggregate(start, end, **kwargs)
+
+    def _build_prefix(self) -> None:
+        """沿交易日方向的前缀和：窗口内求和/计数 = prefix[hi] - prefix[lo]"""
+        def prefix(arr: np.ndarray, dtype) -> np.ndarray:
+            out = np.zeros((arr.shape[0] + 1, arr.shape[1]), dtype=dtype)
+            np.cumsum(arr, axis=0, dtype=dtype, out=out[1:])
+            return out
+
+        self._prefix = {f: prefix(np.nan_to_num(self._values[f], nan=0.0), float) for f in SUM_FIELDS}
+        self._prefix["rows"] = prefix(self._name_ids >= 0, np.int32)
+        for f in FLAG_FIELDS:
+            self._prefix[f] = prefix(self._flags[f], np.int32)
+
+    def aggregate(
+        self,
+        start: date,
+        end: date,
+        stock_code: Optional[str] = None,
+        name_predicate: Optional[Callable[[str], bool]] = None,
+        stock_mask: Optional[np.ndarray] = None,
+        is_limit_up: Optional[bool] = None,
+        sort_by: Optional[str] = None,
+        order: str = "desc",
+        offset: int = 0,
+        limit: Optional[int] = None,
+        after: Optional[Tuple[Any, str]] = None,
+    ) -> Tuple[List[Dict], int]:
+        """
+        按股票汇总 [start, end] 内的资金流
+
+        - 金额字段求和，最新价/涨跌幅/换手率/名称取窗口内最新一天
+        - 涨停、龙虎榜：任意一天为真即为真
+        - name_predicate 作用于每一天的股票名称（与逐行按名称过滤一致）
+        - 排序相同时按股票代码升序
+
+        没有按名称过滤时，求和与标志直接由前缀和相减得到；最新一天的值只在排序或当前页需要时计算。
+        after 为上一页最后一行的 (排序字段取值, 股票代码) 时从其后开始取（游标分页），忽略 offset。
+
+        Returns:
+            tuple: (当前页的字典列表, 总数)
+        """
+        with self._lock:
+            window = self._window(start, end)
+            lo, hi = window.start, window.stop
+            name_ids = self._name_ids[window]
+
+            column_mask = np.ones(len(self.codes), dtype=bool)
+            if stock_code is not None:
+                column_mask[:] = False
+                column = self._code_index.get(stock_code)
+                if column is not None:
+                    column_mask[column] = True
+            if stock_mask is not None:
+                column_mask &= stock_mask[:len(self.codes)]
+
+            if name_predicate is None:
+                if self._prefix is None:
+                    self._build_prefix()
+                prefix = self._prefix
+                columns = np.flatnonzero((prefix["rows"][hi] - prefix["rows"][lo] > 0) & column_mask)
+                present = None
+                values = {f: prefix[f][hi, columns] - prefix[f][lo, columns] for f in SUM_FIELDS}
+                flags = {f: prefix[f][hi, columns] - prefix[f][lo, columns] > 0 for f in FLAG_FIELDS}
+            else:
+                present = (name_ids >= 0) & self.name_mask(name_predicate)[name_ids]
+                columns = np.flatnonzero(present.any(axis=0) & column_mask)
+                present = present[:, columns]
+                values = {
+                    f: np.where(present, np.nan_to_num(self._values[f][window][:, columns], nan=0.0), 0.0).sum(axis=0)
+                    for f in SUM_FIELDS
+                }
+                flags = {f: (self._flags[f][window][:, columns] & present).any(axis=0) for f in FLAG_FIELDS}
+
+            if is_limit_up is not None:
+                keep = flags["is_limit_up"] == is_limit_up
+                columns = columns[keep]
+                present = present[:, keep] if present is not None else None
+                values = {f: v[keep] for f, v in values.items()}
+                flags = {f: v[keep] for f, v in flags.items()}
+            if not columns.size:
+                return [], 0
+
+            def latest_rows(idx: np.ndarray) -> np.ndarray:
+                """每只股票窗口内最后一个有数据的行"""
+                sub = present[:, idx] if present is not None else name_ids[:, columns[idx]] >= 0
+                return sub.shape[0] - 1 - np.argmax(sub[::-1], axis=0)
+
+            def latest(field: str, idx: np.ndarray, rows: np.ndarray) -> np.ndarray:
+                if field == "stock_name":
+                    return np.array(self.names + [None], dtype=object)[name_ids[rows, columns[idx]]]
+                return self._values[field][window][rows, columns[idx]]
+
+            codes = np.array(self.codes, dtype=object)[columns]
+            sort_key = sort_by or "main_net_inflow"
+            if sort_key in values:
+                key = values[sort_key]
+            elif sort_key in flags:
+                key = flags[sort_key].astype(int)
+            elif sort_key == "stock_code":
+                key = codes
+            elif sort_key == "date" or sort_key == "stock_name" or sort_key in LATEST_FIELDS:
+                everything = np.arange(columns.size)
+                rows = latest_rows(everything)
+                key = rows if sort_key == "date" else latest(sort_key, everything, rows)
+            else:
+                key = None
+            ordered = self._order(codes, key, order)
+            total = len(ordered)
+            if after is not None:
+                offset = self._seek(ordered, codes, key, order, after, self.dates[window])
+            page = ordered[offset:offset + limit if limit is not None else None]
+            if not page.size:
+                return [], total
+
+            rows = latest_rows(page)
+            page_values = {f: values[f][page] for f in SUM_FIELDS}
+            page_values.update({f: latest(f, page, rows) for f in LATEST_FIELDS})
+            names = latest("stock_name", page, rows)
+            window_dates = self.dates[window]
+
+            items = []
+            for n, i in enumerate(page):
+                item = {
+                    "date": window_dates[rows[n]],
+                    "stock_code": codes[i],
+                    "stock_name": names[n],
+                    "is_limit_up": bool(flags["is_limit_up"][i]),
+                    "is_lhb": bool(flags["is_lhb"][i]),
+                }
+                for field in VALUE_FIELDS:
+                    value = page_values[field][n]
+                    item[field] = None if np.isnan(value) else round(float(value), 2)
+                items.append(item)
+            return items, total
+
+    @staticmethod
+    def _order(codes: np.ndarray, key: Optional[np.ndarray], order: str) -> np.ndarray:
+        """稳定排序：先按代码升序，再按排序键（空值按 0）"""
+        base = np.argsort(codes, kind="stable")
+        if key is None:
+            return base
+        key = key[base]
+        if key.dtype == object:
+            key = np.unique(key, return_inverse=True)[1]
+        else:
+            # 按展示精度（两位小数）比较，游标取自展示值时顺序一致
+            key = np.round(np.nan_to_num(key.astype(float), nan=0.0), 2)
+        if order != "asc":
+            key = -key
+        return base[np.argsort(key, kind="stable")]
+
+    @staticmethod
+    def _seek(
+        ordered: np.ndarray,
+        codes: np.ndarray,
+        key: Optional[np.ndarray],
+        order: str,
+        after: Tuple[Any, str],
+        window_dates: List[date],
+    ) -> int:
+        """游标定位：ordered 中第一个排在 (排序键, 股票代码) 之后的位置，与 _order 的顺序一致"""
+        after_key, after_code = after
+        if key is None:
+            def normalize(value):
+                return 0
+        elif key.dtype == object:
+            def normalize(value):
+                return "" if value is None else value
+        else:
+            sign = 1 if order == "asc" else -1
+            if isinstance(after_key, date):
+                # 按日期排序时排序键是窗口内的行号
+                after_key = bisect.bisect_left(window_dates, after_key)
+
+            def normalize(value):
+                value = 0.0 if value is None else float(value)
+                return sign * round(0.0 if np.isnan(value) else value, 2)
+
+        cursor_key = normalize(after_key)
+        descending_text = key is not None and key.dtype == object and order != "asc"
+
+        def is_after(i: int) -> bool:
+            value = normalize(key[i]) if key is not None else 0
+            if value != cursor_key:
+                return value < cursor_key if descending_text else value > cursor_key
+            return codes[i] > after_code
+
+        lo, hi = 0, len(ordered)
+        while lo < hi:
+            mid = (lo + hi) // 2
+            if is_after(ordered[mid]):
+                hi = mid
+            else:
+                lo = mid + 1
+        return lo
+
+
+_cube: Optional[FundFlowCube] = None
+_cube_lock = threading.Lock()
+
+
+def get_fund_flow_cube() -> Optional[FundFlowCube]:
+    """获取全局资金流立方体（未启用时返回 None）"""
+    global _cube
+    from app.config import settings
+
+    if not settings.FUND_FLOW_CUBE_ENABLED:
+        return None
+    if _cube is None:
+        with _cube_lock:
+            if _cube is None:
+                _cube = FundFlowCube(settings.FUND_FLOW_CUBE_MAX_DAYS, settings.FUND_FLOW_CUBE_TTL)
+    return _cube
+
+
+def query_fund_flow_cube(db: Session, start: date, end: date, **kwargs) -> Tuple[List[Dict], int]:
+    """
+    在全局立方体上执行 FundFlowCube.query
+
+    未启用时为本次查询单独构建一个（不缓存）。
+    """
+    cube = get_fund_flow_cube() or FundFlowCube(max_span_days=(end - start).days)
+    return cube.query(db, start, end, **kwargs)
+
+
+def invalidate_fund_flow_cube(start: date, end: Optional[date] = None) -> None:
+    """资金流同步提交后调用，标记相关日期失效（在同步工作进程中同时回传给 API 进程）"""
+    from app.tasks.process_pool import forward_invalidation
+
+    forward_invalidation("fund_flow_cube", start, end)
+    if _cube is not None:
+        _cube.invalidate(start, end)
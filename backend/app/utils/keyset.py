@@ -0,0 +1,203 @@
+"""
+游标（keyset）分页
+按 (排序键..., id) 记住上一页最后一行，下一页用 WHERE 条件从该位置继续，
+翻到任意深度都只扫描一页的行，也不需要先查总数或把全部结果取回内存再切片。
+
+游标是不透明的 base64 字符串，内含排序键取值和排序方式签名；
+排序方式变化后旧游标失效（decode_cursor 抛出 InvalidCursorError，接口返回 400）。
+NULL 一律排在最后，与列表接口原有的 nullslast 排序一致。
+"""
+import base64
+import binascii
+import json
+from dataclasses import dataclass
+from datetime import date, datetime
+from decimal import Decimal
+from typing import Any, Callable, List, Optional, Sequence, Tuple
+
+from sqlalchemy import and_, asc, desc, false, nullslast, or_
+
+# 列表接口 cursor 参数的统一说明
+CURSOR_QUERY_DESCRIPTION = "游标分页：首页传空字符串，之后传上一页返回的 next_cursor；不传则按页码分页"
+
+
+class InvalidCursorError(ValueError):
+    """游标格式错误或与当前排序方式不匹配"""
+
+
+@dataclass(frozen=True)
+class SortKey:
+    """
+    排序键
+
+    Args:
+        column: 列或 SQL 表达式
+        descending: 是否倒序
+        nullable: 是否可能为 NULL，默认按列定义判断（表达式视为可空）
+    """
+    column: Any
+    descending: bool = False
+    nullable: Optional[bool] = None
+
+    @property
+    def is_nullable(self) -> bool:
+        if self.nullable is not None:
+            return self.nullable
+        column = getattr(self.column, "expression", self.column)
+        return getattr(column, "nullable", True) is not False
+
+    def order_by(self):
+        ordered = desc(self.column) if self.descending else asc(self.column)
+        return nullslast(ordered) if self.is_nullable else ordered
+
+
+@dataclass
+class KeysetPage:
+    """一页结果：has_more 为 True 时 next_cursor 可用于获取下一页"""
+    items: List[Any]
+    next_cursor: Optional[str]
+    has_more: bool
+
+
+def _encode_value(value: Any) -> Any:
+    if value is None or isinstance(value, (bool, int, str)):
+        return value
+    if isinstance(value, datetime):
+        return {"t": value.isoformat()}
+    if isinstance(value, date):
+        return {"d": value.isoformat()}
+    if isinstance(value, (Decimal, float)):
+        return {"n": str(value)}
+    if hasattr(value, "value"):
+        # 枚举按取值比较
+        return _encode_value(value.value)
+    return str(value)
+
+
+def _decode_value(value: Any) -> Any:
+    if not isinstance(value, dict):
+        return value
+    if "t" in value:
+        return datetime.fromisoformat(value["t"])
+    if "d" in value:
+        return date.fromisoformat(value["d"])
+    if "n" in value:
+        return Decimal(value["n"])
+    raise ValueError(f"未知的游标取值: {value}")
+
+
+def encode_cursor(values: Sequence[Any], signature: str = "") -> str:
+    """排序键取值 -> 游标"""
+    payload = {"k": [_encode_value(v) for v in values], "s": signature}
+    raw = json.dumps(payload, separators=(",", ":"), ensure_ascii=False).encode("utf-8")
+    return base64.urlsafe_b64encode(raw).decode("ascii").rstrip("=")
+
+
+def decode_cursor(cursor: str, signature: str = "", size: Optional[int] = None) -> List[Any]:
+    """游标 -> 排序键取值，格式错误或签名不匹配时抛出 InvalidCursorError"""
+    try:
+        raw = base64.urlsafe_b64decode(cursor + "=" * (-len(cursor) % 4))
+        payload = json.loads(raw.decode("utf-8"))
+        values = [_decode_value(v) for v in payload["k"]]
+        cursor_signature = payload.get("s", "")
+    except (binascii.Error, UnicodeDecodeError, ValueError, KeyError, TypeError) as e:
+        raise InvalidCursorError(f"无效的分页游标: {str(e)}")
+    if cursor_signature != signature:
+        raise InvalidCursorError("分页游标与当前排序方式不匹配，请从第一页重新查询")
+    if size is not None and len(values) != size:
+        raise InvalidCursorError("分页游标与当前排序方式不匹配，请从第一页重新查询")
+    return values
+
+
+def keyset_condition(keys: Sequence[SortKey], values: Sequence[Any]):
+    """
+    "排在游标之后" 的 WHERE 条件：
+    (k1 在 v1 之后) OR (k1 = v1 AND k2 在 v2 之后) OR ...
+
+    首个排序键不可空时额外加上 k1 >= v1（倒序为 <=），便于数据库用 (k1, ...) 索引直接定位。
+    """
+    branches = []
+    equal_prefix = []
+    for key, value in zip(keys, values):
+        column = key.column
+        if value is None:
+            # NULL 排在最后：同列中没有排在 NULL 之后的非空值
+            after = false()
+            equal = column.is_(None)
+        else:
+            after = column < value if key.descending else column > value
+            if key.is_nullable:
+                after = or_(after, column.is_(None))
+            equal = column == value
+        branches.append(and_(*equal_prefix, after) if equal_prefix else after)
+        equal_prefix.append(equal)
+
+    condition = or_(*branches)
+    first_key, first_value = keys[0], values[0]
+    if first_value is not None and not first_key.is_nullable:
+        bound = first_key.column <= first_value if first_key.descending else first_key.column >= first_value
+        condition = and_(bound, condition)
+    return condition
+
+
+def model_column(model, name: Optional[str]):
+    """按字段名取模型的列属性，不是表字段（关系、方法等）时返回 None"""
+    if not name or name not in model.__table__.columns:
+        return None
+    return getattr(model, name, None)
+
+
+def sort_signature(name: str, keys: Sequence[SortKey]) -> str:
+    """排序方式签名：列表名 + 各排序键方向"""
+    parts = [name]
+    for key in keys:
+        label = getattr(key.column, "key", None) or getattr(key.column, "name", None) or str(key.column)
+        parts.append(f"{label}:{'desc' if key.descending else 'asc'}")
+    return "|".join(parts)
+
+
+def keyset_paginate(
+    query,
+    keys: Sequence[SortKey],
+    limit: int,
+    cursor: Optional[str] = None,
+    signature: str = "",
+    row_values: Optional[Callable[[Any], Tuple[Any, ...]]] = None,
+    predicate: Optional[Callable[[Any], bool]] = None,
+) -> KeysetPage:
+    """
+    对未排序的查询做游标分页
+
+    Args:
+        query: 已应用筛选条件、未设置排序的 ORM 查询
+        keys: 排序键，最后一个必须唯一（通常是 id），保证顺序稳定
+        limit: 每页数量
+        cursor: 上一页返回的 next_cursor，为空表示第一页
+        signature: 排序方式签名，防止游标用于其它列表或排序
+        row_values: 从结果行取排序键取值，默认按列名取属性
+        predicate: 无法用 SQL 表达的内存过滤条件，按批继续读取直到凑满一页
+
+    Returns:
+        KeysetPage，多取一行判断是否有下一页
+    """
+    if row_values is None:
+        def row_values(row):
+            return [getattr(row, key.column.key) for key in keys]
+
+    ordered = query.order_by(*[key.order_by() for key in keys])
+    values = decode_cursor(cursor, signature, size=len(keys)) if cursor else None
+    batch_size = limit + 1 if predicate is None else max(limit * 2, 100)
+
+    rows: List[Any] = []
+    while True:
+        batch_query = ordered.filter(keyset_condition(keys, values)) if values is not None else ordered
+        batch = batch_query.limit(batch_size).all()
+        rows.extend(batch if predicate is None else [row for row in batch if predicate(row)])
+        if len(rows) > limit or len(batch) < batch_size:
+            break
+        values = list(row_values(batch[-1]))
+
+    has_more = len(rows) > limit
+    rows = rows[:limit]
+    next_cursor = encode_cursor(row_values(rows[-1]), signature) if has_more else None
+    return KeysetPage(items=rows, next_cursor=next_cursor, has_more=has_more)
@@ -0,0 +1,637 @@
+"""
+性能埋点
+进程内汇总接口、数据库查询、AKShare 调用和同步任务的耗时，通过 /metrics（Prometheus 文本格式）和 /debug/perf 查看。
+
+- 作用域（PerfScope）：一次 HTTP 请求或一个同步任务，通过 contextvars 传递，
+  同一作用域内的 SQL 语句按"形状"（参数占位符归一化后的语句）计数，同一形状超过阈值记为疑似 N+1
+- 数据库：SQLAlchemy before/after_cursor_execute 事件计时；各连接池（读/写、同步/异步）的获取连接耗时、
+  超时次数和占用情况（借出数、峰值、饱和度）
+- AKShare：safe_akshare_call / AkshareFetcher.call 按函数名和结果（ok/empty/error/cache_hit）记录耗时
+- 采样分析：开启 PERF_PROFILING_ENABLED 后，请求带 X-Perf-Profile 头或 perf_profile=1 参数时
+  按间隔采样线程栈，结果以折叠栈格式保存，通过 /debug/perf/profiles/{id} 查看
+
+指标只在当前进程内汇总；同步任务在工作进程中执行时，其阶段耗时随任务结果写入 task_execution。
+"""
+import contextvars
+import math
+import os
+import re
+import sys
+import threading
+import time
+import uuid
+import logging
+from collections import Counter, OrderedDict, deque
+from contextlib import contextmanager
+from datetime import datetime
+from typing import Any, Dict, Iterator, List, Optional, Sequence, Tuple
+
+logger = logging.getLogger(__name__)
+
+# 耗时直方图桶（秒）
+LATENCY_BUCKETS = (0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0, 30.0, 60.0)
+SYNC_BUCKETS = (0.5, 1.0, 2.5, 5.0, 10.0, 30.0, 60.0, 120.0, 300.0, 600.0, 1800.0)
+QUERY_COUNT_BUCKETS = (0, 1, 2, 5, 10, 20, 50, 100, 200, 500)
+POOL_WAIT_BUCKETS = (0.001, 0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0)
+
+# 连接池占用指标（/metrics 抓取时读取连接池当前状态）：(指标名, 说明, pool_stats 字段)
+POOL_GAUGES = (
+    ("db_pool_size", "连接池常驻连接数上限", "size"),
+    ("db_pool_max_overflow", "连接池溢出连接数上限", "max_overflow"),
+    ("db_pool_checked_out", "当前借出的连接数", "checked_out"),
+    ("db_pool_peak_checked_out", "借出连接数峰值", "peak_checked_out"),
+    ("db_pool_saturation", "借出连接数 / 最大连接数", "saturation"),
+)
+
+PROFILE_HEADER = "x-perf-profile"
+PROFILE_PARAM = "perf_profile"
+
+
+def _label_value(value: Any) -> str:
+    return str(value).replace("\\", "\\\\").replace("\n", "\\n").replace('"', '\\"')
+
+
+def _format_labels(labelnames: Sequence[str], values: Sequence[Any], extra: str = "") -> str:
+    parts = [f'{name}="{_label_value(value)}"' for name, value in zip(labelnames, values)]
+    if extra:
+        parts.append(extra)
+    return "{" + ",".join(parts) + "}" if parts else ""
+
+
+def _format_number(value: float) -> str:
+    if value == math.inf:
+        return "+Inf"
+    return repr(float(value)) if isinstance(value, float) else str(value)
+
+
+class CounterMetric:
+    """计数器（按标签分组）"""
+
+    type = "counter"
+
+    def __init__(self, name: str, documentation: str, labelnames: Sequence[str] = ()):
+        self.name = name
+        self.documentation = documentation
+        self.labelnames = tuple(labelnames)
+        self._values: Dict[Tuple, float] = {}
+        self._lock = threading.Lock()
+
+    def inc(self, amount: float = 1, **labels) -> None:
+        key = tuple(labels.get(name, "") for name in self.labelnames)
+        with self._lock:
+            self._values[key] = self._values.get(key, 0) + amount
+
+    def samples(self) -> Dict[Tuple, float]:
+        with self._lock:
+            return dict(self._values)
+
+    def render(self) -> List[str]:
+        return [
+            f"{self.name}{_format_labels(self.labelnames, key)} {_format_number(value)}"
+            for key, value in sorted(self.samples().items())
+        ]
+
+
+class Histogram:
+    """直方图（按标签分组），桶为累计计数，与 Prometheus 一致"""
+
+    type = "histogram"
+
+    def __init__(self, name: str, documentation: str, buckets: Sequence[float], labelnames: Sequence[str] = ()):
+        self.name = name
+        self.documentation = documentation
+        self.labelnames = tuple(labelnames)
+        self.buckets = tuple(buckets) + (math.inf,)
+        # 标签值 -> [各桶计数（非累计）, 总和, 次数]
+        self._series: Dict[Tuple, List] = {}
+        self._lock = threading.Lock()
+
+    def observe(self, value: float, **labels) -> None:
+        key = tuple(labels.get(name, "") for name in self.labelnames)
+        index = next(i for i, bound in enumerate(self.buckets) if value <= bound)
+        with self._lock:
+            series = self._series.get(key)
+            if series is None:
+                series = self._series[key] = [[0] * len(self.buckets), 0.0, 0]
+            series[0][index] += 1
+            series[1] += value
+            series[2] += 1
+
+    def series(self) -> Dict[Tuple, Tuple[List[int], float, int]]:
+        with self._lock:
+            return {key: (list(counts), total, count) for key, (counts, total, count) in self._series.items()}
+
+    def quantile(self, counts: List[int], q: float) -> Optional[float]:
+        """由桶计数估算分位数（取所在桶的上界，落在 +Inf 桶时取最后一个有限上界）"""
+        total = sum(counts)
+        if not total:
+            return None
+        rank = q * total
+        seen = 0
+        for bound, count in zip(self.buckets, counts):
+            seen += count
+            if seen >= rank:
+                return bound if bound != math.inf else self.buckets[-2]
+        return self.buckets[-2]
+
+    def summarize(self) -> Dict[Tuple, Dict[str, Any]]:
+        return {
+            key: {
+                "count": count,
+                "sum": round(total, 6),
+                "avg": round(total / count, 6) if count else None,
+                "p50": self.quantile(counts, 0.5),
+                "p95": self.quantile(counts, 0.95),
+            }
+            for key, (counts, total, count) in self.series().items()
+        }
+
+    def render(self) -> List[str]:
+        lines = []
+        for key, (counts, total, count) in sorted(self.series().items()):
+            cumulative = 0
+            for bound, bucket_count in zip(self.buckets, counts):
+                cumulative += bucket_count
+                le = f'le="{_format_number(float(bound))}"'
+                lines.append(f"{self.name}_bucket{_format_labels(self.labelnames, key, le)} {cumulative}")
+            lines.append(f"{self.name}_sum{_format_labels(self.labelnames, key)} {_format_number(total)}")
+            lines.append(f"{self.name}_count{_format_labels(self.labelnames, key)} {count}")
+        return lines
+
+
+class PerfRegistry:
+    """进程内性能指标汇总"""
+
+    def __init__(self):
+        self.started_at = datetime.now()
+        self.http_duration = Histogram(
+            "http_request_duration_seconds", "接口请求耗时", LATENCY_BUCKETS, ("method", "route", "status"))
+        self.http_db_queries = Histogram(
+            "http_request_db_queries", "每次请求执行的 SQL 语句数", QUERY_COUNT_BUCKETS, ("route",))
+        self.http_db_seconds = Histogram(
+            "http_request_db_seconds", "每次请求的 SQL 执行耗时合计", LATENCY_BUCKETS, ("route",))
+        self.db_query = Histogram(
+            "db_query_duration_seconds", "单条 SQL 执行耗时", LATENCY_BUCKETS, ("scope",))
+        self.n_plus_one = CounterMetric(
+            "db_n_plus_one_total", "同一语句形状在一个作用域内重复超过阈值的次数", ("scope", "name"))
+        self.akshare_call = Histogram(
+            "akshare_call_duration_seconds", "AKShare 单次调用耗时", LATENCY_BUCKETS, ("func", "outcome"))
+        self.sync_phase = Histogram(
+            "sync_task_phase_seconds", "同步任务各阶段耗时", SYNC_BUCKETS, ("task", "phase"))
+        self.pool_wait = Histogram(
+            "db_pool_wait_seconds", "从连接池获取连接的耗时（含排队和新建连接）", POOL_WAIT_BUCKETS, ("pool",))
+        self.pool_timeouts = CounterMetric(
+            "db_pool_timeouts_total", "等待连接超过 pool_timeout 的次数", ("pool",))
+        self.metrics = (
+            self.http_duration, self.http_db_queries, self.http_db_seconds, self.db_query,
+            self.n_plus_one, self.akshare_call, self.sync_phase, self.pool_wait, self.pool_timeouts,
+        )
+        # 连接池名 -> 连接池（dispose 重建后指向新连接池）、借出连接数峰值
+        self.pools: Dict[str, Any] = {}
+        self.pool_peaks: Dict[str, int] = {}
+        self.n_plus_one_events: deque = deque(maxlen=50)
+        self.profiles: "OrderedDict[str, Dict[str, Any]]" = OrderedDict()
+        self._lock = threading.Lock()
+
+    def record_n_plus_one(self, scope: "PerfScope", shape: str, count: int) -> None:
+        self.n_plus_one.inc(scope=scope.kind, name=scope.name)
+        with self._lock:
+            self.n_plus_one_events.append({
+                "at": datetime.now().isoformat(timespec="seconds"),
+                "scope": scope.kind,
+                "name": scope.name,
+                "count": count,
+                "statement": shape[:500],
+            })
+
+    def save_profile(self, profile_id: str, profile: Dict[str, Any], keep: int = 20) -> None:
+        with self._lock:
+            self.profiles[profile_id] = profile
+            while len(self.profiles) > keep:
+                self.profiles.popitem(last=False)
+
+    def get_profile(self, profile_id: str) -> Optional[Dict[str, Any]]:
+        with self._lock:
+            return self.profiles.get(profile_id)
+
+    def register_pool(self, name: str, pool) -> None:
+        with self._lock:
+            self.pools[name] = pool
+
+    def record_pool_checkout(self, name: str, pool, elapsed: float) -> None:
+        self.pool_wait.observe(elapsed, pool=name)
+        checked_out = pool.checkedout()
+        with self._lock:
+            if checked_out > self.pool_peaks.get(name, 0):
+                self.pool_peaks[name] = checked_out
+
+    def pool_stats(self) -> Dict[str, Dict[str, Any]]:
+        """各连接池当前占用；max_overflow 为 -1（不限）时饱和度按常驻连接数计算"""
+        with self._lock:
+            pools = dict(self.pools)
+            peaks = dict(self.pool_peaks)
+        stats = {}
+        for name, pool in sorted(pools.items()):
+            size = pool.size()
+            max_overflow = max(getattr(pool, "_max_overflow", 0), 0)
+            checked_out = pool.checkedout()
+            capacity = size + max_overflow
+            stats[name] = {
+                "size": size,
+                "max_overflow": max_overflow,
+                "checked_out": checked_out,
+                "peak_checked_out": peaks.get(name, 0),
+                "saturation": round(checked_out / capacity, 4) if capacity else None,
+            }
+        return stats
+
+    def render_prometheus(self) -> str:
+        lines = []
+        for metric in self.metrics:
+            lines.append(f"# HELP {metric.name} {metric.documentation}")
+            lines.append(f"# TYPE {metric.name} {metric.type}")
+            lines.extend(metric.render())
+        pools = self.pool_stats()
+        for metric_name, documentation, field in POOL_GAUGES:
+            lines.append(f"# HELP {metric_name} {documentation}")
+            lines.append(f"# TYPE {metric_name} gauge")
+            for name, stats in pools.items():
+                if stats[field] is not None:
+                    lines.append(f"{metric_name}{_format_labels(('pool',), (name,))} {_format_number(stats[field])}")
+        return "\n".join(lines) + "\n"
+
+    def summary(self, top: int = 20) -> Dict[str, Any]:
+        """/debug/perf 汇总：按累计耗时排序的接口、AKShare 函数和同步任务阶段"""
+        queries = {key[0]: value for key, value in self.http_db_queries.summarize().items()}
+        routes = []
+        for (method, route, status), stats in self.http_duration.summarize().items():
+            db_stats = queries.get(route) or {}
+            routes.append({
+                "method": method, "route": route, "status": status, **stats,
+                "avg_db_queries": db_stats.get("avg"),
+            })
+        routes.sort(key=lambda item: item["sum"], reverse=True)
+        akshare = [
+            {"func": func, "outcome": outcome, **stats}
+            for (func, outcome), stats in self.akshare_call.summarize().items()
+        ]
+        akshare.sort(key=lambda item: item["sum"], reverse=True)
+        sync = [
+            {"task": task, "phase": phase, **stats}
+            for (task, phase), stats in self.sync_phase.summarize().items()
+        ]
+        sync.sort(key=lambda item: (item["task"], item["phase"]))
+        pools = self.pool_stats()
+        waits = {key[0]: stats for key, stats in self.pool_wait.summarize().items()}
+        timeouts = {key[0]: value for key, value in self.pool_timeouts.samples().items()}
+        for name, stats in pools.items():
+            stats["wait"] = waits.get(name)
+            stats["timeouts"] = timeouts.get(name, 0)
+        with self._lock:
+            n_plus_one = list(self.n_plus_one_events)[::-1]
+            profiles = list(self.profiles)[::-1]
+        return {
+            "pid": os.getpid(),
+            "started_at": self.started_at.isoformat(timespec="seconds"),
+            "routes": routes[:top],
+            "db_queries": {scope: stats for (scope,), stats in self.db_query.summarize().items()},
+            "n_plus_one": n_plus_one,
+            "akshare": akshare[:top],
+            "sync_tasks": sync,
+            "db_pools": pools,
+            "profiles": profiles,
+        }
+
+
+_registry: Optional[PerfRegistry] = None
+_registry_lock = threading.Lock()
+
+
+def get_perf_registry() -> PerfRegistry:
+    """获取进程内性能指标汇总"""
+    global _registry
+    if _registry is None:
+        with _registry_lock:
+            if _registry is None:
+                _registry = PerfRegistry()
+    return _registry
+
+
+def perf_enabled() -> bool:
+    from app.config import settings
+
+    return settings.PERF_METRICS_ENABLED
+
+
+class PerfScope:
+    """一次请求或一个同步任务内的 SQL 和 AKShare 统计"""
+
+    def __init__(self, kind: str, name: str):
+        self.kind = kind
+        self.name = name
+        self.started = time.perf_counter()
+        self.db_queries = 0
+        self.db_seconds = 0.0
+        self.akshare_calls = 0
+        self.akshare_seconds = 0.0
+        self.statements: Counter = Counter()
+        self._lock = threading.Lock()
+
+    def add_query(self, shape: str, elapsed: float) -> None:
+        with self._lock:
+            self.db_queries += 1
+            self.db_seconds += elapsed
+            self.statements[shape] += 1
+
+    def add_akshare(self, elapsed: float) -> None:
+        with self._lock:
+            self.akshare_calls += 1
+            self.akshare_seconds += elapsed
+
+    def elapsed(self) -> float:
+        return time.perf_counter() - self.started
+
+    def phases(self) -> Dict[str, Any]:
+        """阶段耗时（秒）；AKShare 并发抓取时为各调用耗时之和，可能超过总耗时"""
+        total = self.elapsed()
+        return {
+            "total": round(total, 3),
+            "db": round(self.db_seconds, 3),
+            "akshare": round(self.akshare_seconds, 3),
+            "other": round(max(total - self.db_seconds - self.akshare_seconds, 0.0), 3),
+            "db_queries": self.db_queries,
+            "akshare_calls": self.akshare_calls,
+        }
+
+    def repeated_statements(self, threshold: int) -> List[Tuple[str, int]]:
+        with self._lock:
+            return [(shape, count) for shape, count in self.statements.most_common() if count > threshold]
+
+
+_current_scope: contextvars.ContextVar[Optional[PerfScope]] = contextvars.ContextVar("perf_scope", default=None)
+
+
+def current_scope() -> Optional[PerfScope]:
+    return _current_scope.get()
+
+
+@contextmanager
+def perf_scope(kind: str, name: str) -> Iterator[PerfScope]:
+    """
+    开启一个统计作用域（请求或同步任务），退出时检查重复语句
+
+    线程池中执行的代码需用 contextvars.copy_context().run 提交才会计入该作用域。
+    """
+    from app.config import settings
+
+    scope = PerfScope(kind, name)
+    token = _current_scope.set(scope)
+    try:
+        yield scope
+    finally:
+        _current_scope.reset(token)
+        if settings.PERF_METRICS_ENABLED:
+            for shape, count in scope.repeated_statements(settings.PERF_N_PLUS_ONE_THRESHOLD):
+                logger.warning(f"[性能] {kind} {name} 疑似 N+1：同一语句执行 {count} 次: {shape[:200]}")
+                get_perf_registry().record_n_plus_one(scope, shape, count)
+
+
+_PLACEHOLDER = re.compile(r"%\(\w+\)s|%s|\$\d+|\?")
+_PLACEHOLDER_LIST = re.compile(r"\?(\s*,\s*\?)+")
+_WHITESPACE = re.compile(r"\s+")
+
+
+def statement_shape(statement: str) -> str:
+    """语句形状：参数占位符统一为 ?，IN 列表折叠为单个 ?，空白合并"""
+    shape = _PLACEHOLDER.sub("?", statement)
+    shape = _PLACEHOLDER_LIST.sub("?", shape)
+    return _WHITESPACE.sub(" ", shape).strip()
+
+
+def record_query(statement: str, elapsed: float) -> None:
+    scope = current_scope()
+    get_perf_registry().db_query.observe(elapsed, scope=scope.kind if scope else "none")
+    if scope is not None:
+        scope.add_query(statement_shape(statement), elapsed)
+
+
+def install_query_hooks(engine) -> None:
+    """为引擎注册 SQL 计时事件（未开启 PERF_METRICS_ENABLED 时不注册）"""
+    from sqlalchemy import event
+
+    if not perf_enabled():
+        return
+
+    @event.listens_for(engine, "before_cursor_execute")
+    def _before_cursor_execute(conn, cursor, statement, parameters, context, executemany):
+        conn.info.setdefault("perf_query_start", []).append(time.perf_counter())
+
+    @event.listens_for(engine, "after_cursor_execute")
+    def _after_cursor_execute(conn, cursor, statement, parameters, context, executemany):
+        starts = conn.info.get("perf_query_start")
+        if starts:
+            record_query(statement, time.perf_counter() - starts.pop())
+
+    @event.listens_for(engine, "handle_error")
+    def _handle_error(exception_context):
+        conn = exception_context.connection
+        starts = conn.info.get("perf_query_start") if conn is not None else None
+        if starts:
+            starts.pop()
+
+
+class _MeteredPoolMixin:
+    """连接池获取连接计时：QueuePool._do_get 是排队等待和新建连接的唯一入口"""
+
+    perf_pool_name = "default"
+
+    def __init__(self, *args, **kwargs):
+        super().__init__(*args, **kwargs)
+        get_perf_registry().register_pool(self.perf_pool_name, self)
+
+    def _do_get(self):
+        from sqlalchemy.exc import TimeoutError as PoolTimeoutError
+
+        start = time.perf_counter()
+        try:
+            connection = super()._do_get()
+        except PoolTimeoutError:
+            get_perf_registry().pool_timeouts.inc(pool=self.perf_pool_name)
+            raise
+        get_perf_registry().record_pool_checkout(self.perf_pool_name, self, time.perf_counter() - start)
+        return connection
+
+
+def metered_pool_class(base, name: str):
+    """
+    返回带计时的连接池类（create_engine 的 poolclass 参数）
+
+    base 为 QueuePool 或 AsyncAdaptedQueuePool；未开启 PERF_METRICS_ENABLED 时原样返回。
+    名称放在类上，engine.dispose() 按 __class__ 重建连接池后仍然保留。
+    """
+    if not perf_enabled():
+        return base
+    return type(f"Metered{base.__name__}", (_MeteredPoolMixin, base), {"perf_pool_name": name})
+
+
+def record_akshare_call(func, elapsed: float, outcome: str) -> None:
+    """记录一次 AKShare 调用（outcome: ok / empty / error / cache_hit）"""
+    if not perf_enabled():
+        return
+    get_perf_registry().akshare_call.observe(elapsed, func=getattr(func, "__name__", str(func)), outcome=outcome)
+    scope = current_scope()
+    if scope is not None and outcome != "cache_hit":
+        scope.add_akshare(elapsed)
+
+
+def record_sync_phases(task: str, phases: Dict[str, Any], wait: Optional[float] = None) -> None:
+    """记录同步任务的阶段耗时（由 run_sync_task 返回的 phases）"""
+    if not perf_enabled() or not phases:
+        return
+    histogram = get_perf_registry().sync_phase
+    for phase in ("total", "db", "akshare", "other"):
+        if phases.get(phase) is not None:
+            histogram.observe(phases[phase], task=task, phase=phase)
+    if wait is not None:
+        histogram.observe(wait, task=task, phase="wait")
+
+
+class SamplingProfiler:
+    """
+    采样分析器：后台线程按间隔读取其它线程的调用栈，只保留经过 app 包代码的栈
+
+    接口在线程池中执行，无法只采样当前请求所在线程；并发请求的样本会混在一起，适合在空闲实例上定位热点。
+    """
+
+    def __init__(self, interval: float, max_depth: int = 64):
+        self.interval = interval
+        self.max_depth = max_depth
+        self.samples = 0
+        self.stacks: Counter = Counter()
+        self._stop = threading.Event()
+        self._thread: Optional[threading.Thread] = None
+        self._root = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+
+    def _collapse(self, frame) -> Optional[str]:
+        names = []
+        in_app = False
+        while frame is not None and len(names) < self.max_depth:
+            code = frame.f_code
+            if code.co_filename.startswith(self._root) and code.co_filename != __file__:
+                in_app = True
+            names.append(f"{os.path.basename(code.co_filename)}:{code.co_name}")
+            frame = frame.f_back
+        return ";".join(reversed(names)) if in_app else None
+
+    def _run(self) -> None:
+        own = threading.get_ident()
+        while not self._stop.wait(self.interval):
+            self.samples += 1
+            for thread_id, frame in sys._current_frames().items():
+                if thread_id == own:
+                    continue
+                stack = self._collapse(frame)
+                if stack:
+                    self.stacks[stack] += 1
+
+    def start(self) -> "SamplingProfiler":
+        self._thread = threading.Thread(target=self._run, name="perf-profiler", daemon=True)
+        self._thread.start()
+        return self
+
+    def stop(self, top: int = 200) -> Dict[str, Any]:
+        self._stop.set()
+        if self._thread is not None:
+            self._thread.join()
+        return {
+            "interval": self.interval,
+            "samples": self.samples,
+            # 折叠栈格式（flamegraph.pl / speedscope 可直接读取）
+            "stacks": [f"{stack} {count}" for stack, count in self.stacks.most_common(top)],
+        }
+
+
+def route_template(scope: Dict[str, Any]) -> str:
+    """
+    请求对应的路由模板（如 /api/v1/dashboard/{date}）
+
+    子路由的 route.path 不含前缀，前缀由实际路径去掉路由匹配部分得到；未匹配路由统一为 unmatched，避免任意路径撑大标签基数。
+    """
+    route = scope.get("route")
+    path = scope.get("path", "")
+    template = getattr(route, "path", None)
+    if not template:
+        return "unmatched"
+    try:
+        matched = route.path_format.format(**scope.get("path_params", {}))
+    except (AttributeError, KeyError, IndexError, ValueError):
+        return template
+    if matched and path.endswith(matched):
+        return path[:len(path) - len(matched)] + template
+    return template
+
+
+def _wants_profile(scope: Dict[str, Any]) -> bool:
+    headers = dict(scope.get("headers") or [])
+    if headers.get(PROFILE_HEADER.encode()):
+        return True
+    query = scope.get("query_string", b"").decode("latin-1")
+    return f"{PROFILE_PARAM}=1" in query.split("&")
+
+
+class PerfMiddleware:
+    """
+    请求埋点 ASGI 中间件：记录接口耗时、SQL 条数和耗时，
+    响应头附带 Server-Timing（流式响应只包含开始发送前的 SQL）
+    """
+
+    def __init__(self, app):
+        self.app = app
+
+    async def __call__(self, scope, receive, send):
+        from app.config import settings
+
+        if scope["type"] != "http" or not settings.PERF_METRICS_ENABLED:
+            await self.app(scope, receive, send)
+            return
+
+        profile_id = None
+        profiler = None
+        if settings.PERF_PROFILING_ENABLED and _wants_profile(scope):
+            profile_id = uuid.uuid4().hex[:12]
+            profiler = SamplingProfiler(settings.PERF_PROFILE_INTERVAL).start()
+
+        status_code = 500
+        with perf_scope("request", scope.get("path", "")) as perf:
+            async def send_wrapper(message):
+                nonlocal status_code
+                if message["type"] == "http.response.start":
+                    status_code = message["status"]
+                    headers = list(message.get("headers") or [])
+                    headers.append((
+                        b"server-timing",
+                        f'db;dur={perf.db_seconds * 1000:.1f};desc="{perf.db_queries} queries"'.encode(),
+                    ))
+                    if profile_id:
+                        headers.append((b"x-perf-profile-id", profile_id.encode()))
+                    message = {**message, "headers": headers}
+                await send(message)
+
+            try:
+                await self.app(scope, receive, send_wrapper)
+            finally:
+                perf.name = route_template(scope)
+                registry = get_perf_registry()
+                registry.http_duration.observe(
+                    perf.elapsed(), method=scope.get("method", ""), route=perf.name, status=status_code)
+                registry.http_db_queries.observe(perf.db_queries, route=perf.name)
+                registry.http_db_seconds.observe(perf.db_seconds, route=perf.name)
+                if profiler is not None:
+                    profile = profiler.stop()
+                    profile.update({
+                        "route": perf.name,
+                        "path": scope.get("path", ""),
+                        "duration": round(perf.elapsed(), 3),
+                        "at": datetime.now().isoformat(timespec="seconds"),
+                    })
+                    registry.save_profile(profile_id, profile)
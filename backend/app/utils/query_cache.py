@@ -0,0 +1,386 @@
+"""
+查询结果缓存
+热点看板接口的读穿透缓存：按 接口名 + 规范化参数 生成缓存键，按 (表, 日期) 标签失效。
+
+- 已收盘日期（早于今天）的结果不过期，只在同步任务写入该日期后失效
+- 当日或"最新"数据按 TTL 过期
+- 后端可选进程内 LRU（按字节数限制）或 Redis；同步任务工作进程池（SYNC_EXECUTION_MODE=process）中的失效会回传给
+  API 进程，由 scripts/run_worker.py 独立执行同步（SYNC_QUEUE_ENABLED）时需用 Redis 才能跨进程失效
+"""
+import hashlib
+import json
+import pickle
+import threading
+import time
+import logging
+from collections import OrderedDict
+from datetime import date, datetime
+from typing import Any, Callable, Dict, Iterable, List, Optional, Set, Tuple
+
+logger = logging.getLogger(__name__)
+
+# 不限定日期的标签（日期范围查询、全量统计），该表任一日期写入时都失效
+ANY_DATE = "*"
+
+Tag = Tuple[str, Optional[date]]
+
+
+def _normalize_value(value: Any) -> Any:
+    if isinstance(value, (date, datetime)):
+        return value.isoformat()
+    if isinstance(value, str):
+        return value.strip()
+    if isinstance(value, (list, tuple)):
+        return [_normalize_value(v) for v in value]
+    return value
+
+
+def normalize_params(params: Dict[str, Any]) -> str:
+    """参数规范化：去掉空值、日期转 ISO 字符串、按键排序"""
+    normalized = {k: _normalize_value(v) for k, v in params.items() if v is not None}
+    return json.dumps(normalized, sort_keys=True, ensure_ascii=False, default=str)
+
+
+def make_key(endpoint: str, params: Dict[str, Any]) -> str:
+    digest = hashlib.sha1(normalize_params(params).encode("utf-8")).hexdigest()
+    return f"{endpoint}:{digest}"
+
+
+def tag_name(table: str, target_date: Optional[date] = None) -> str:
+    return f"{table}:{target_date.isoformat() if target_date else ANY_DATE}"
+
+
+def table_marker(table: str) -> str:
+    """整表失效时递增代数的标记（不关联缓存条目），加载期间的整表失效也能被发现"""
+    return f"{table}:#all"
+
+
+def is_closed_date(target_date: Optional[date], today: Optional[date] = None) -> bool:
+    """早于今天的日期视为已收盘，数据只会被同步任务改写"""
+    return target_date is not None and target_date < (today or date.today())
+
+
+class MemoryCacheBackend:
+    """进程内 LRU 缓存，按序列化后的字节数限制总大小"""
+
+    name = "memory"
+
+    def __init__(self, max_bytes: int):
+        self.max_bytes = max_bytes
+        # key -> (payload, 过期时间戳或 None, 标签)
+        self._entries: "OrderedDict[str, Tuple[bytes, Optional[float], List[str]]]" = OrderedDict()
+        self._tags: Dict[str, Set[str]] = {}
+        # 标签 -> 失效次数（代数），读穿透加载期间有失效时放弃写入
+        self._generations: Dict[str, int] = {}
+        self._size = 0
+        self.evictions = 0
+        self._lock = threading.Lock()
+
+    def _remove(self, key: str) -> None:
+        payload, _, tags = self._entries.pop(key)
+        self._size -= len(payload)
+        for tag in tags:
+            keys = self._tags.get(tag)
+            if keys is not None:
+                keys.discard(key)
+                if not keys:
+                    del self._tags[tag]
+
+    def get(self, key: str) -> Optional[bytes]:
+        with self._lock:
+            entry = self._entries.get(key)
+            if entry is None:
+                return None
+            payload, expires_at, _ = entry
+            if expires_at is not None and expires_at <= time.time():
+                self._remove(key)
+                return None
+            self._entries.move_to_end(key)
+            return payload
+
+    def set(self, key: str, payload: bytes, ttl: Optional[int], tags: List[str]) -> None:
+        if len(payload) > self.max_bytes:
+            return
+        with self._lock:
+            if key in self._entries:
+                self._remove(key)
+            expires_at = time.time() + ttl if ttl is not None else None
+            self._entries[key] = (payload, expires_at, tags)
+            self._size += len(payload)
+            for tag in tags:
+                self._tags.setdefault(tag, set()).add(key)
+            while self._size > self.max_bytes and self._entries:
+                self._remove(next(iter(self._entries)))
+                self.evictions += 1
+
+    def generations(self, tags: List[str]) -> List[int]:
+        with self._lock:
+            return [self._generations.get(tag, 0) for tag in tags]
+
+    def invalidate_tags(self, tags: Iterable[str]) -> int:
+        removed = 0
+        with self._lock:
+            for tag in tags:
+                self._generations[tag] = self._generations.get(tag, 0) + 1
+                for key in list(self._tags.get(tag, ())):
+                    if key in self._entries:
+                        self._remove(key)
+                        removed += 1
+        return removed
+
+    def table_tags(self, table: str) -> List[str]:
+        with self._lock:
+            return [tag for tag in self._tags if tag.startswith(f"{table}:")]
+
+    def clear(self) -> int:
+        with self._lock:
+            count = len(self._entries)
+            self._entries.clear()
+            self._tags.clear()
+            self._size = 0
+        return count
+
+    def stats(self) -> Dict[str, Any]:
+        with self._lock:
+            return {
+                "entries": len(self._entries),
+                "size_bytes": self._size,
+                "max_bytes": self.max_bytes,
+                "evictions": self.evictions,
+            }
+
+
+class RedisCacheBackend:
+    """Redis 缓存，多个 API/定时任务进程共享；总大小由 Redis 的 maxmemory 策略控制"""
+
+    name = "redis"
+    prefix = "qc:"
+
+    def __init__(self, url: str):
+        import redis
+
+        self._client = redis.Redis.from_url(url)
+
+    def _tag_key(self, tag: str) -> str:
+        return f"{self.prefix}tag:{tag}"
+
+    def _generation_key(self, tag: str) -> str:
+        return f"{self.prefix}gen:{tag}"
+
+    def generations(self, tags: List[str]) -> List[int]:
+        if not tags:
+            return []
+        values = self._client.mget([self._generation_key(tag) for tag in tags])
+        return [int(value) if value is not None else 0 for value in values]
+
+    def get(self, key: str) -> Optional[bytes]:
+        return self._client.get(self.prefix + key)
+
+    def set(self, key: str, payload: bytes, ttl: Optional[int], tags: List[str]) -> None:
+        pipe = self._client.pipeline()
+        pipe.set(self.prefix + key, payload, ex=ttl)
+        for tag in tags:
+            pipe.sadd(self._tag_key(tag), self.prefix + key)
+        pipe.execute()
+
+    def invalidate_tags(self, tags: Iterable[str]) -> int:
+        removed = 0
+        for tag in tags:
+            self._client.incr(self._generation_key(tag))
+            tag_key = self._tag_key(tag)
+            keys = list(self._client.smembers(tag_key))
+            if keys:
+                removed += self._client.delete(*keys)
+            self._client.delete(tag_key)
+        return removed
+
+    def table_tags(self, table: str) -> List[str]:
+        start = len(self._tag_key(""))
+        return [
+            key.decode("utf-8")[start:]
+            for key in self._client.scan_iter(match=self._tag_key(f"{table}:*"))
+        ]
+
+    def clear(self) -> int:
+        # 代数计数保留，正在加载的结果仍能发现期间的失效
+        keys = [
+            key for key in self._client.scan_iter(match=f"{self.prefix}*")
+            if not key.startswith(f"{self.prefix}gen:".encode("utf-8"))
+        ]
+        return self._client.delete(*keys) if keys else 0
+
+    def stats(self) -> Dict[str, Any]:
+        entries = sum(
+            1 for key in self._client.scan_iter(match=f"{self.prefix}*")
+            if not key.startswith((f"{self.prefix}tag:".encode("utf-8"), f"{self.prefix}gen:".encode("utf-8")))
+        )
+        return {"entries": entries}
+
+
+class QueryCache:
+    """读穿透查询缓存，后端异常时直接查询数据库，不影响接口可用性"""
+
+    def __init__(self, backend, ttl_seconds: int, closed_ttl_seconds: Optional[int] = None):
+        self.backend = backend
+        self.ttl_seconds = ttl_seconds
+        # 已收盘日期的缓存秒数，None 表示不过期（失效无法送达本进程时需设为有限值）
+        self.closed_ttl_seconds = closed_ttl_seconds
+        self.hits = 0
+        self.misses = 0
+        self._by_endpoint: Dict[str, Dict[str, int]] = {}
+        self._lock = threading.Lock()
+
+    def _count(self, endpoint: str, field: str) -> None:
+        with self._lock:
+            setattr(self, field, getattr(self, field) + 1)
+            counters = self._by_endpoint.setdefault(endpoint, {"hits": 0, "misses": 0})
+            counters[field] += 1
+
+    def get_or_load(
+        self,
+        endpoint: str,
+        params: Dict[str, Any],
+        loader: Callable[[], Any],
+        tags: Iterable[Tag],
+        closed: bool,
+    ) -> Any:
+        """
+        命中缓存直接返回，否则调用 loader 查询并写入缓存
+
+        Args:
+            endpoint: 接口名，如 "zt_pool.analysis"
+            params: 影响结果的全部查询参数
+            loader: 未命中时的查询函数，返回值需可 pickle
+            tags: (表名, 日期) 列表，日期为 None 表示不限定日期
+            closed: 是否为已收盘日期的数据（默认不过期）
+        """
+        key = make_key(endpoint, params)
+        try:
+            payload = self.backend.get(key)
+        except Exception as e:
+            logger.warning(f"读取查询缓存失败: {endpoint}, 错误: {str(e)}")
+            payload = None
+        if payload is not None:
+            self._count(endpoint, "hits")
+            return pickle.loads(payload)
+
+        self._count(endpoint, "misses")
+        tags = list(tags)
+        tag_names = [tag_name(table, d) for table, d in tags]
+        # 加载前记下各标签的代数：加载期间同步任务提交并失效时，结果可能已过期，不写入缓存
+        watched = tag_names + sorted({table_marker(table) for table, _ in tags})
+        try:
+            generations = self.backend.generations(watched)
+        except Exception as e:
+            logger.warning(f"读取查询缓存代数失败: {endpoint}, 错误: {str(e)}")
+            return loader()
+        value = loader()
+        try:
+            if self.backend.generations(watched) != generations:
+                logger.info(f"查询缓存加载期间数据已失效，不写入: {endpoint}")
+                return value
+            self.backend.set(
+                key,
+                pickle.dumps(value, protocol=pickle.HIGHEST_PROTOCOL),
+                self.closed_ttl_seconds if closed else self.ttl_seconds,
+                tag_names,
+            )
+        except Exception as e:
+            logger.warning(f"写入查询缓存失败: {endpoint}, 错误: {str(e)}")
+        return value
+
+    def invalidate(self, table: str, target_date: Optional[date] = None) -> int:
+        """
+        失效某张表某个日期相关的缓存
+
+        target_date 为 None 时失效该表的全部缓存；否则失效该日期及不限定日期的缓存。
+        """
+        try:
+            if target_date is None:
+                tags = self.backend.table_tags(table) + [table_marker(table)]
+            else:
+                tags = [tag_name(table, target_date), tag_name(table)]
+            return self.backend.invalidate_tags(tags)
+        except Exception as e:
+            logger.warning(f"失效查询缓存失败: {table} {target_date}, 错误: {str(e)}")
+            return 0
+
+    def clear(self) -> int:
+        return self.backend.clear()
+
+    def stats(self) -> Dict[str, Any]:
+        with self._lock:
+            stats = {
+                "backend": self.backend.name,
+                "hits": self.hits,
+                "misses": self.misses,
+                "ttl_seconds": self.ttl_seconds,
+                "by_endpoint": {k: dict(v) for k, v in self._by_endpoint.items()},
+            }
+        try:
+            stats.update(self.backend.stats())
+        except Exception as e:
+            stats["error"] = str(e)
+        return stats
+
+
+_query_cache: Optional[QueryCache] = None
+_query_cache_lock = threading.Lock()
+
+
+def get_query_cache() -> Optional[QueryCache]:
+    """获取全局查询缓存（未启用时返回 None）"""
+    global _query_cache
+    from app.config import settings
+
+    if not settings.QUERY_CACHE_ENABLED:
+        return None
+    if _query_cache is None:
+        with _query_cache_lock:
+            if _query_cache is None:
+                backend = None
+                if settings.QUERY_CACHE_BACKEND == "redis":
+                    try:
+                        backend = RedisCacheBackend(settings.REDIS_URL)
+                    except Exception as e:
+                        logger.warning(f"Redis 查询缓存不可用，改用进程内缓存: {str(e)}")
+                closed_ttl = None
+                if backend is None:
+                    backend = MemoryCacheBackend(settings.QUERY_CACHE_MAX_MB * 1024 * 1024)
+                    if settings.SYNC_QUEUE_ENABLED:
+                        # 独立工作进程的失效送不到本进程，已收盘日期的缓存也按 TTL 过期，避免一直返回旧数据
+                        logger.error(
+                            "SYNC_QUEUE_ENABLED 开启时进程内查询缓存收不到工作进程的失效，"
+                            "请设置 QUERY_CACHE_BACKEND=redis；当前所有缓存均按 QUERY_CACHE_TTL 过期"
+                        )
+                        closed_ttl = settings.QUERY_CACHE_TTL
+                _query_cache = QueryCache(backend, settings.QUERY_CACHE_TTL, closed_ttl)
+    return _query_cache
+
+
+def cached_query(
+    endpoint: str,
+    params: Dict[str, Any],
+    loader: Callable[[], Any],
+    tags: Iterable[Tag],
+    closed: bool,
+) -> Any:
+    """经查询缓存执行 loader，缓存未启用时直接执行"""
+    cache = get_query_cache()
+    if cache is None:
+        return loader()
+    return cache.get_or_load(endpoint, params, loader, tags, closed)
+
+
+def invalidate_query_cache(table: str, target_date: Optional[date] = None) -> int:
+    """同步任务写入某日期数据后调用，失效相关缓存（在同步工作进程中同时回传给 API 进程）"""
+    from app.tasks.process_pool import forward_invalidation
+
+    forward_invalidation("query_cache", table, target_date)
+    cache = get_query_cache()
+    if cache is None:
+        return 0
+    removed = cache.invalidate(table, target_date)
+    if removed:
+        logger.info(f"查询缓存失效: {table} {target_date or ANY_DATE}, 共 {removed} 条")
+    return removed
@@ -12,15 +12,27 @@ class SyncResult:
     message: str = ""
     error: Optional[str] = None
     count: int = 0
+    inserted: int = 0
+    updated: int = 0
     
     def __bool__(self):
         """支持 bool() 转换，保持向后兼容"""
         return self.success
     
     @classmethod
-    def success_result(cls, message: str = "", count: int = 0) -> "SyncResult":
+    def success_result(cls, message: str = "", count: int = 0, inserted: int = 0, updated: int = 0) -> "SyncResult":
         """创建成功结果"""
-        return cls(success=True, message=message, count=count)
+        return cls(success=True, message=message, count=count, inserted=inserted, updated=updated)
+    
+    @classmethod
+    def from_upsert(cls, message: str, upsert_result) -> "SyncResult":
+        """根据批量写入结果创建成功结果（附带新增/更新数量）"""
+        return cls.success_result(
+            message,
+            upsert_result.count,
+            inserted=upsert_result.inserted,
+            updated=upsert_result.updated,
+        )
     
     @classmethod
     def failure_result(cls, error: str, message: str = "") -> "SyncResult":
@@ -29,7 +41,10 @@ class SyncResult:
     
     def __str__(self):
         if self.success:
-            return f"成功: {self.message}" + (f" (共 {self.count} 条)" if self.count > 0 else "")
+            detail = f" (共 {self.count} 条" if self.count > 0 else ""
+            if detail and (self.inserted or self.updated):
+                detail += f"，新增 {self.inserted} 条，更新 {self.updated} 条"
+            return f"成功: {self.message}" + (detail + ")" if detail else "")
         else:
             return f"失败: {self.error}" + (f" ({self.message})" if self.message else "")
 
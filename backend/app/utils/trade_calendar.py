@@ -0,0 +1,170 @@
+"""
+交易日历
+启动后从 trade_date 表一次性加载全部交易日到内存有序数组，之后的交易日查询都用二分查找完成，不再访问数据库。
+日历未覆盖的日期（表为空、或早于/晚于已知范围）按周一至周五近似。
+"""
+import bisect
+import threading
+import logging
+from datetime import date, timedelta
+from typing import Iterable, List, Optional
+
+logger = logging.getLogger(__name__)
+
+ONE_DAY = timedelta(days=1)
+
+
+def _weekdays_between(start: date, end: date) -> List[date]:
+    """[start, end] 内的工作日（升序）"""
+    result = []
+    current = start
+    while current <= end:
+        if current.weekday() < 5:
+            result.append(current)
+        current += ONE_DAY
+    return result
+
+
+class TradeCalendar:
+    """
+    内存交易日索引
+
+    - is_trading_day / latest_trading_day：O(log n)
+    - previous_trading_days / trading_days_between：O(log n + 返回条数)
+    """
+
+    def __init__(self, dates: Optional[Iterable[date]] = None):
+        self._dates: List[date] = []
+        self._loaded = False
+        self._lock = threading.Lock()
+        if dates is not None:
+            self.set_dates(dates)
+
+    @property
+    def loaded(self) -> bool:
+        return self._loaded
+
+    @property
+    def first_date(self) -> Optional[date]:
+        return self._dates[0] if self._dates else None
+
+    @property
+    def last_date(self) -> Optional[date]:
+        return self._dates[-1] if self._dates else None
+
+    def __len__(self) -> int:
+        return len(self._dates)
+
+    def set_dates(self, dates: Iterable[date]) -> None:
+        """替换交易日索引（整体替换列表，读线程看到的要么是旧索引要么是新索引）"""
+        self._dates = sorted(set(dates))
+        self._loaded = True
+
+    def load(self, db) -> int:
+        """从 trade_date 表加载交易日，返回加载条数"""
+        from app.models.trade_date import TradeDate
+
+        rows = db.query(TradeDate.date).all()
+        self.set_dates(row[0] for row in rows)
+        logger.info(f"交易日历已加载: {len(self._dates)} 个交易日 ({self.first_date} ~ {self.last_date})")
+        return len(self._dates)
+
+    def ensure_loaded(self, db=None) -> None:
+        """首次使用时加载；未传 db 时使用独立会话。加载失败按工作日近似，直到下次 load"""
+        if self._loaded:
+            return
+        with self._lock:
+            if self._loaded:
+                return
+            try:
+                if db is not None:
+                    self.load(db)
+                else:
+                    from app.database.session import SessionLocal
+
+                    session = SessionLocal()
+                    try:
+                        self.load(session)
+                    finally:
+                        session.close()
+            except Exception as e:
+                logger.warning(f"加载交易日历失败，按周一至周五近似: {str(e)}")
+                if db is not None:
+                    db.rollback()
+                self.set_dates([])
+
+    def is_trading_day(self, d: date) -> bool:
+        dates = self._dates
+        if not dates or d < dates[0] or d > dates[-1]:
+            return d.weekday() < 5
+        i = bisect.bisect_left(dates, d)
+        return i < len(dates) and dates[i] == d
+
+    def previous_trading_days(self, end_date: date, count: int) -> List[date]:
+        """
+        截至 end_date（含）往前 count 个交易日
+
+        Returns:
+            List[date]: 交易日列表（从新到旧）
+        """
+        if count <= 0:
+            return []
+        dates = self._dates
+        result: List[date] = []
+        current = end_date
+        # 晚于日历末端的部分按工作日近似
+        while len(result) < count and (not dates or current > dates[-1]):
+            if current.weekday() < 5:
+                result.append(current)
+            current -= ONE_DAY
+        if len(result) < count and dates:
+            hi = bisect.bisect_right(dates, current)
+            lo = max(0, hi - (count - len(result)))
+            result.extend(reversed(dates[lo:hi]))
+            # 早于日历起点的部分按工作日近似
+            current = min(current, dates[0] - ONE_DAY)
+            while len(result) < count:
+                if current.weekday() < 5:
+                    result.append(current)
+                current -= ONE_DAY
+        return result
+
+    def trading_days_between(self, start_date: date, end_date: date) -> List[date]:
+        """[start_date, end_date] 内的交易日（升序）"""
+        if start_date > end_date:
+            return []
+        dates = self._dates
+        if not dates:
+            return _weekdays_between(start_date, end_date)
+        first, last = dates[0], dates[-1]
+        result: List[date] = []
+        if start_date < first:
+            result.extend(_weekdays_between(start_date, min(end_date, first - ONE_DAY)))
+        lo = bisect.bisect_left(dates, max(start_date, first))
+        hi = bisect.bisect_right(dates, min(end_date, last))
+        result.extend(dates[lo:hi])
+        if end_date > last:
+            result.extend(_weekdays_between(max(start_date, last + ONE_DAY), end_date))
+        return result
+
+    def latest_trading_day(self, d: date) -> date:
+        """不晚于 d 的最近一个交易日"""
+        return self.previous_trading_days(d, 1)[0]
+
+    def previous_trading_day(self, d: date) -> date:
+        """早于 d 的上一个交易日"""
+        return self.previous_trading_days(d - ONE_DAY, 1)[0]
+
+
+_calendar = TradeCalendar()
+
+
+def get_trade_calendar(db=None) -> TradeCalendar:
+    """获取全局交易日历（首次调用时加载）"""
+    _calendar.ensure_loaded(db)
+    return _calendar
+
+
+def reload_trade_calendar(db) -> int:
+    """交易日表更新后重新加载全局交易日历"""
+    return _calendar.load(db)
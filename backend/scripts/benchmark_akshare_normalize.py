@@ -0,0 +1,173 @@
+"""
+基准测试：AKShare 返回数据规范化
+
+使用 tests/fixtures/akshare 下录制的接口数据，复制扩充到指定行数后对比：
+- rowwise: 旧实现，iterrows 逐行探测字段名、逐个值解析“亿/万”单位和 strptime 解析时间
+- vectorized: app.utils.akshare_schema.normalize_frame，整列转换
+
+不需要数据库和网络。
+
+执行方式：
+    python backend/scripts/benchmark_akshare_normalize.py
+    python backend/scripts/benchmark_akshare_normalize.py --rows 20000 --repeat 5
+"""
+import sys
+import time
+import argparse
+from pathlib import Path
+from datetime import datetime
+
+import pandas as pd
+
+# 添加项目根目录到路径
+sys.path.insert(0, str(Path(__file__).resolve().parents[1]))
+
+from app.utils.akshare_schema import normalize_frame, to_records
+from app.utils.format_utils import safe_float, safe_int
+
+FIXTURE_DIR = Path(__file__).resolve().parents[1] / "tests" / "fixtures" / "akshare"
+TEXT_COLUMNS = ["代码", "股票代码", "首次封板时间", "最后封板时间"]
+
+
+def load_fixture(endpoint: str, rows: int) -> pd.DataFrame:
+    """读取录制数据并复制扩充到 rows 行"""
+    df = pd.read_csv(FIXTURE_DIR / f"{endpoint}.csv", dtype={c: str for c in TEXT_COLUMNS})
+    repeat = max(1, -(-rows // len(df)))
+    return pd.concat([df] * repeat, ignore_index=True).head(rows)
+
+
+# ==================== 旧实现（保留用于对比） ====================
+
+def _parse_amount(value):
+    if value is None or value == "":
+        return None
+    if isinstance(value, (int, float)):
+        return float(value)
+    value_str = str(value).strip()
+    if "亿" in value_str:
+        return int(float(value_str.replace("亿", "").strip()) * 100000000)
+    elif "万" in value_str:
+        return int(float(value_str.replace("万", "").strip()) * 10000)
+    try:
+        return float(value_str)
+    except ValueError:
+        return None
+
+
+def _parse_percent(value):
+    if value is None:
+        return None
+    if isinstance(value, str):
+        value = value.replace("%", "").strip()
+    try:
+        return float(value)
+    except ValueError:
+        return None
+
+
+def _parse_time(value):
+    if not value or pd.isna(value):
+        return None
+    for fmt in ["%H:%M:%S", "%H:%M", "%H%M%S"]:
+        try:
+            return datetime.strptime(str(value).strip(), fmt).time()
+        except ValueError:
+            continue
+    return None
+
+
+def rowwise_fund_flow(df: pd.DataFrame) -> list:
+    records = []
+    for _, row in df.iterrows():
+        records.append({
+            "stock_code": str(row.get("股票代码", row.get("代码", row.get("code", "")))).zfill(6),
+            "stock_name": row.get("股票简称", row.get("名称", row.get("name", ""))),
+            "current_price": safe_float(row.get("最新价", row.get("current_price", None))),
+            "change_percent": _parse_percent(row.get("涨跌幅", row.get("涨幅", row.get("change_percent", None)))),
+            "turnover_rate": _parse_percent(row.get("换手率", row.get("turnover_rate", None))),
+            "main_inflow": _parse_amount(row.get("流入资金", row.get("主力流入", None))),
+            "main_outflow": _parse_amount(row.get("流出资金", row.get("主力流出", None))),
+            "main_net_inflow": _parse_amount(row.get("净额", row.get("主力净流入", None))),
+            "turnover_amount": _parse_amount(row.get("成交额", row.get("turnover_amount", None))),
+        })
+    return records
+
+
+def rowwise_zt_pool(df: pd.DataFrame) -> list:
+    records = []
+    for _, row in df.iterrows():
+        records.append({
+            "stock_code": str(row.get("代码", "")).zfill(6),
+            "stock_name": row.get("名称", ""),
+            "change_percent": safe_float(row.get("涨跌幅")),
+            "latest_price": safe_float(row.get("最新价")),
+            "turnover_amount": safe_int(row.get("成交额")),
+            "circulation_market_value": safe_float(row.get("流通市值")),
+            "total_market_value": safe_float(row.get("总市值")),
+            "turnover_rate": safe_float(row.get("换手率")),
+            "limit_up_capital": safe_int(row.get("封板资金")),
+            "first_limit_time": _parse_time(row.get("首次封板时间")),
+            "last_limit_time": _parse_time(row.get("最后封板时间")),
+            "explosion_count": safe_int(row.get("炸板次数")) or 0,
+            "limit_up_statistics": str(row.get("涨停统计", "")),
+            "consecutive_limit_count": safe_int(row.get("连板数")) or 1,
+            "industry": str(row.get("所属行业", "")),
+        })
+    return records
+
+
+def rowwise_stock_history(df: pd.DataFrame) -> list:
+    records = []
+    for _, row in df.iterrows():
+        records.append({
+            "date": pd.to_datetime(row.get("日期")).date(),
+            "open_price": safe_float(row.get("开盘")),
+            "close_price": safe_float(row.get("收盘")),
+            "high_price": safe_float(row.get("最高")),
+            "low_price": safe_float(row.get("最低")),
+            "volume": safe_int(row.get("成交量")),
+            "amount": safe_float(row.get("成交额")),
+            "amplitude": safe_float(row.get("振幅")),
+            "change_percent": safe_float(row.get("涨跌幅")),
+            "change_amount": safe_float(row.get("涨跌额")),
+            "turnover_rate": safe_float(row.get("换手率")),
+        })
+    return records
+
+
+CASES = {
+    "stock_fund_flow_individual": rowwise_fund_flow,
+    "stock_zt_pool_em": rowwise_zt_pool,
+    "stock_zh_a_hist": rowwise_stock_history,
+}
+
+
+def _best_of(func, repeat: int) -> float:
+    durations = []
+    for _ in range(repeat):
+        start = time.perf_counter()
+        func()
+        durations.append(time.perf_counter() - start)
+    return min(durations)
+
+
+def run_benchmark(rows: int, repeat: int):
+    print("=" * 60)
+    print(f"AKShare 数据规范化: 每个接口 {rows} 行, 取 {repeat} 次最快")
+    print("=" * 60)
+    for endpoint, rowwise in CASES.items():
+        df = load_fixture(endpoint, rows)
+        rowwise_time = _best_of(lambda: rowwise(df), repeat)
+        vectorized_time = _best_of(lambda: to_records(normalize_frame(endpoint, df)), repeat)
+        print(f"{endpoint:<28} rowwise {rowwise_time * 1000:8.1f} ms  "
+              f"vectorized {vectorized_time * 1000:8.1f} ms  "
+              f"加速比 {rowwise_time / max(vectorized_time, 1e-9):.1f}x")
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="AKShare 数据规范化基准测试")
+    parser.add_argument("--rows", type=int, default=5000, help="每个接口扩充到的行数（个股资金流约5000行）")
+    parser.add_argument("--repeat", type=int, default=3, help="每种实现重复次数")
+    args = parser.parse_args()
+
+    run_benchmark(args.rows, args.repeat)
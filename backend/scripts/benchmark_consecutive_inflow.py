@@ -0,0 +1,116 @@
+"""
+基准测试：连续N日主力净流入>M 筛选
+
+对比两种实现：
+- loop: 旧实现，先取出N日内所有股票代码，再逐个股票查询N日数据（约5000次数据库往返）
+- grouped: FundFlowScreener，一条 GROUP BY ... HAVING 语句
+
+执行方式：
+    python backend/scripts/benchmark_consecutive_inflow.py --days 5 --min-net-inflow 10000000
+    python backend/scripts/benchmark_consecutive_inflow.py --end-date 2026-01-14 --repeat 3
+"""
+import sys
+import time
+import argparse
+from pathlib import Path
+from datetime import date
+from typing import List, Set
+
+from sqlalchemy import and_
+
+# 添加项目根目录到路径
+sys.path.insert(0, str(Path(__file__).resolve().parents[1]))
+
+from app.database.session import SessionLocal
+from app.models.fund_flow import StockFundFlow
+from app.services.fund_flow_screener import FundFlowScreener
+from app.utils.date_utils import parse_date, get_trading_date, get_trading_dates_before
+
+
+def loop_consecutive_inflow_codes(db, trading_dates: List[date], min_net_inflow: float) -> Set[str]:
+    """旧实现：逐个股票查询（保留用于对比）"""
+    all_stock_codes = {
+        row[0] for row in db.query(StockFundFlow.stock_code).filter(
+            StockFundFlow.date.in_(trading_dates)
+        ).distinct().all()
+    }
+
+    qualified = set()
+    for stock_code in all_stock_codes:
+        stock_records = db.query(StockFundFlow).filter(
+            and_(
+                StockFundFlow.stock_code == stock_code,
+                StockFundFlow.date.in_(trading_dates)
+            )
+        ).all()
+        records_by_date = {r.date: r for r in stock_records}
+
+        all_days_valid = True
+        for d in trading_dates:
+            record = records_by_date.get(d)
+            if record is None or not record.main_net_inflow or record.main_net_inflow <= min_net_inflow:
+                all_days_valid = False
+                break
+        if all_days_valid:
+            qualified.add(stock_code)
+    return qualified
+
+
+def _time_call(func, repeat: int):
+    """执行 repeat 次，返回 (最后一次结果, 每次耗时列表)"""
+    durations = []
+    result = None
+    for _ in range(repeat):
+        start = time.perf_counter()
+        result = func()
+        durations.append(time.perf_counter() - start)
+    return result, durations
+
+
+def run_benchmark(end_date: date, days: int, min_net_inflow: float, repeat: int, skip_loop: bool):
+    db = SessionLocal()
+    try:
+        trading_dates = get_trading_dates_before(db, end_date, days)
+        print("=" * 60)
+        print(f"连续 {days} 日主力净流入 > {min_net_inflow:,.0f} 元")
+        print(f"交易日: {', '.join(d.isoformat() for d in sorted(trading_dates))}")
+        print("=" * 60)
+
+        grouped_codes, grouped_times = _time_call(
+            lambda: FundFlowScreener.get_consecutive_inflow_codes(db, trading_dates, min_net_inflow),
+            repeat,
+        )
+        print(f"grouped: {len(grouped_codes)} 只股票, "
+              f"最快 {min(grouped_times) * 1000:.1f} ms, 平均 {sum(grouped_times) / len(grouped_times) * 1000:.1f} ms")
+
+        if skip_loop:
+            return
+
+        loop_codes, loop_times = _time_call(
+            lambda: loop_consecutive_inflow_codes(db, trading_dates, min_net_inflow),
+            repeat,
+        )
+        print(f"loop:    {len(loop_codes)} 只股票, "
+              f"最快 {min(loop_times) * 1000:.1f} ms, 平均 {sum(loop_times) / len(loop_times) * 1000:.1f} ms")
+
+        if loop_codes == grouped_codes:
+            print("✅ 两种实现结果一致")
+        else:
+            print(f"❌ 结果不一致: 仅loop {sorted(loop_codes - grouped_codes)[:10]}, "
+                  f"仅grouped {sorted(grouped_codes - loop_codes)[:10]}")
+        print(f"加速比: {min(loop_times) / max(min(grouped_times), 1e-9):.1f}x")
+    finally:
+        db.close()
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="连续N日净流入筛选基准测试")
+    parser.add_argument("--end-date", type=str, default=None, help="截止日期 YYYY-MM-DD，默认最近交易日")
+    parser.add_argument("--days", type=int, default=5, help="连续天数N")
+    parser.add_argument("--min-net-inflow", type=float, default=0, help="净流入阈值M（元）")
+    parser.add_argument("--repeat", type=int, default=3, help="每种实现重复次数")
+    parser.add_argument("--skip-loop", action="store_true", help="只测试集合化实现")
+    args = parser.parse_args()
+
+    end = parse_date(args.end_date) if args.end_date else get_trading_date()
+    run_benchmark(end, args.days, args.min_net_inflow, args.repeat, args.skip_loop)
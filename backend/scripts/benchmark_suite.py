@@ -0,0 +1,573 @@
+"""
+服务热点路径基准测试套件
+
+在本地 PostgreSQL 中写入合成行情数据（scripts/synthetic_market_data.py），对真实服务方法执行脚本化场景，
+统计延迟分位数、SQL 条数和峰值内存（RSS），结果写入 JSON，可与之前的结果对比。
+
+场景：
+- 资金流筛选（单条件 / 多条件 + 连续净流入 / 概念过滤）、资金流日期范围列表
+- 涨停池日期范围列表（排序 / 概念过滤）
+- 龙虎榜列表、上榜个股统计、机构席位明细、活跃营业部统计
+- 概念树和概念层级展开
+- 每日同步写入：tests/fixtures/akshare 下录制的接口数据扩充到真实规模后调用 save_* 方法（不访问网络）
+
+注意：generate 会清空相关表，只应指向基准测试专用数据库。
+写入场景（sync_save_*）会删除同步日期及之后的数据，只在 generate 写入的合成数据集上执行，
+或显式指定 --allow-writes。
+
+执行方式：
+    python backend/scripts/benchmark_suite.py generate --stocks 5000 --days 250 --truncate
+    python backend/scripts/benchmark_suite.py run --output bench/head.json
+    python backend/scripts/benchmark_suite.py run --only fund_flow_filter_multi zt_pool_range --repeat 20
+    python backend/scripts/benchmark_suite.py run --isolate --output bench/head.json   # 每个场景独立进程，峰值内存互不影响
+    python backend/scripts/benchmark_suite.py run --only sync_save_lhb --allow-writes   # 非合成数据集上执行写入场景
+    python backend/scripts/benchmark_suite.py compare bench/base.json bench/head.json --threshold 0.2
+"""
+import sys
+import argparse
+import json
+import os
+import platform
+import resource
+import subprocess
+import tempfile
+import time
+from dataclasses import dataclass
+from datetime import date, datetime, timedelta
+from pathlib import Path
+from typing import Any, Callable, Dict, List, Optional
+
+import pandas as pd
+
+# 添加项目根目录到路径
+sys.path.insert(0, str(Path(__file__).resolve().parents[1]))
+
+from app.config import settings
+from app.database.session import SessionLocal
+from scripts.synthetic_market_data import MarketSpec, SyntheticMarket, is_synthetic, load_market
+
+FIXTURE_DIR = Path(__file__).resolve().parents[1] / "tests" / "fixtures" / "akshare"
+TEXT_COLUMNS = ["代码", "股票代码", "首次封板时间", "最后封板时间"]
+RESULT_VERSION = 1
+
+
+# ==================== 统计 ====================
+
+def percentile(values: List[float], q: float) -> Optional[float]:
+    """线性插值分位数（q 取 0~100）"""
+    if not values:
+        return None
+    ordered = sorted(values)
+    position = (len(ordered) - 1) * q / 100
+    lower = int(position)
+    upper = min(lower + 1, len(ordered) - 1)
+    return ordered[lower] + (ordered[upper] - ordered[lower]) * (position - lower)
+
+
+def peak_rss_mb() -> float:
+    """当前进程的峰值 RSS（MB）；Linux 下 ru_maxrss 单位为 KB，macOS 为字节"""
+    peak = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+    return round(peak / (1024 * 1024 if sys.platform == "darwin" else 1024), 1)
+
+
+def summarize(durations: List[float], queries: List[int], db_seconds: List[float]) -> Dict[str, Any]:
+    ms = [d * 1000 for d in durations]
+    return {
+        "iterations": len(ms),
+        "min_ms": round(min(ms), 3),
+        "p50_ms": round(percentile(ms, 50), 3),
+        "p90_ms": round(percentile(ms, 90), 3),
+        "p95_ms": round(percentile(ms, 95), 3),
+        "p99_ms": round(percentile(ms, 99), 3),
+        "max_ms": round(max(ms), 3),
+        "mean_ms": round(sum(ms) / len(ms), 3),
+        "queries": round(sum(queries) / len(queries), 1),
+        "db_ms": round(sum(db_seconds) / len(db_seconds) * 1000, 3),
+    }
+
+
+# ==================== 场景 ====================
+
+@dataclass
+class BenchContext:
+    """场景共享的数据集信息（从数据库读取，与生成参数无关）"""
+    days: List[date]
+    stock_codes: List[str]
+    stock_names: List[str]
+    level1_concept_id: int
+    level2_concept_id: int
+    lhb_stock_code: str
+    lhb_date: date
+    branch_code: str
+    sync_date: date
+
+    @property
+    def last_day(self) -> date:
+        return self.days[-1]
+
+    def window(self, count: int) -> List[date]:
+        return self.days[-count:]
+
+
+@dataclass
+class Scenario:
+    name: str
+    description: str
+    run: Callable[[Any, BenchContext], Any]
+    setup: Optional[Callable[[Any, BenchContext], None]] = None  # 每次执行前调用，不计时
+    teardown: Optional[Callable[[Any, BenchContext], None]] = None  # 全部执行后调用
+    repeat: Optional[int] = None  # 覆盖默认重复次数（写入类场景较慢）
+    writes: bool = False  # 会删除并重写数据，只允许在合成数据集上执行
+
+
+def _conditions(ctx: BenchContext, windows, min_inflow: float):
+    from app.schemas.fund_flow import DateRange, DateRangeCondition, NetInflowRange
+
+    return [
+        DateRangeCondition(
+            date_range=DateRange(start=ctx.window(n)[0], end=ctx.last_day),
+            main_net_inflow=NetInflowRange(min=min_inflow),
+        )
+        for n in windows
+    ]
+
+
+def _fund_flow_filter(windows, consecutive_days=None, concept: bool = False):
+    def run(db, ctx):
+        from app.services.fund_flow_service import FundFlowService
+
+        return FundFlowService.filter_fund_flow_by_conditions(
+            db, _conditions(ctx, windows, 1e7),
+            concept_ids=[ctx.level1_concept_id] if concept else None,
+            consecutive_days=consecutive_days, min_net_inflow=0 if consecutive_days else None,
+            page=1, page_size=20,
+        )
+    return run
+
+
+def _fund_flow_range(db, ctx):
+    from app.services.fund_flow_service import FundFlowService
+
+    return FundFlowService.get_fund_flow_list_by_date_range(
+        db, ctx.window(20)[0], ctx.last_day, page=1, page_size=20
+    )
+
+
+def _zt_pool_range(concept: bool = False):
+    def run(db, ctx):
+        from app.services.zt_pool_service import ZtPoolService
+
+        return ZtPoolService.get_zt_pool_list(
+            db, ctx.window(20)[0], ctx.last_day,
+            concept_ids=[ctx.level2_concept_id] if concept else None,
+            page=1, page_size=20, sort_by="limit_up_count", count_mode="exact",
+        )
+    return run
+
+
+def _lhb_list(db, ctx):
+    from app.services.lhb_service import LhbService
+
+    return LhbService.get_lhb_list(db, ctx.last_day, page=1, page_size=20, count_mode="exact")
+
+
+def _lhb_statistics(db, ctx):
+    from app.services.lhb_service import LhbService
+
+    return LhbService.get_lhb_stocks_statistics(db, ctx.window(60)[0], ctx.last_day, page=1, page_size=20)
+
+
+def _lhb_institutions(db, ctx):
+    from app.services.lhb_service import LhbService
+
+    return LhbService.get_institution_detail(db, ctx.lhb_stock_code, ctx.lhb_date)
+
+
+def _active_branch_statistics(db, ctx):
+    from app.services.active_branch_detail_service import ActiveBranchDetailService
+
+    return ActiveBranchDetailService.get_statistics(db, institution_code=ctx.branch_code)
+
+
+def _active_branch_list(db, ctx):
+    from app.services.active_branch_detail_service import ActiveBranchDetailService
+
+    return ActiveBranchDetailService.get_list(db, target_date=ctx.last_day, page=1, page_size=20)
+
+
+def _concept_tree(db, ctx):
+    from app.services.stock_concept_service import StockConceptService
+
+    return StockConceptService.get_tree(db)
+
+
+def _concept_expand(db, ctx):
+    from app.services.stock_concept_service import StockConceptService
+
+    return StockConceptService.expand_concept_ids(db, [ctx.level1_concept_id], include_ancestors=True)
+
+
+def load_fixture(endpoint: str, codes: List[str], names: List[str]) -> pd.DataFrame:
+    """录制的接口数据扩充到 len(codes) 行，代码和名称替换为数据集中的股票"""
+    df = pd.read_csv(FIXTURE_DIR / f"{endpoint}.csv", dtype={c: str for c in TEXT_COLUMNS})
+    repeat = max(1, -(-len(codes) // len(df)))
+    df = pd.concat([df] * repeat, ignore_index=True).head(len(codes)).copy()
+    code_column = "股票代码" if "股票代码" in df.columns else "代码"
+    name_column = "股票简称" if "股票简称" in df.columns else "名称"
+    df[code_column] = codes[:len(df)]
+    if name_column in df.columns:
+        df[name_column] = names[:len(df)]
+    return df
+
+
+def _delete_date(model, column: str = "date"):
+    def delete(db, ctx):
+        db.query(model).filter(getattr(model, column) >= ctx.sync_date).delete(synchronize_session=False)
+        db.commit()
+    return delete
+
+
+def _save_fund_flow():
+    frames = {}
+
+    def run(db, ctx):
+        from app.services.fund_flow_service import FundFlowService
+
+        if "df" not in frames:
+            frames["df"] = load_fixture("stock_fund_flow_individual", ctx.stock_codes, ctx.stock_names)
+        return FundFlowService.save_fund_flow_data(db, ctx.sync_date, frames["df"])
+    return run
+
+
+def _save_zt_pool(db, ctx):
+    from app.services.zt_pool_service import ZtPoolService
+
+    df = load_fixture("stock_zt_pool_em", ctx.stock_codes[:80], ctx.stock_names[:80])
+    return ZtPoolService.save_zt_pool_data(db, ctx.sync_date, df)
+
+
+def _save_lhb(db, ctx):
+    from app.services.lhb_service import LhbService
+
+    df = load_fixture("stock_lhb_detail_em", ctx.stock_codes[:80], ctx.stock_names[:80])
+    df["上榜日"] = ctx.sync_date.isoformat()
+    return LhbService.save_lhb_data(db, ctx.sync_date, df)
+
+
+def _save_stock_history(db, ctx, stocks: int = 20, days: int = 250):
+    """增量同步的最坏情况：stocks 只股票各写入 days 天历史行情"""
+    from app.services.stock_history_service import StockHistoryService
+
+    dates = [ctx.sync_date + timedelta(days=k) for k in range(days)]
+    base = pd.read_csv(FIXTURE_DIR / "stock_zh_a_hist.csv", dtype={"股票代码": str})
+    df = pd.concat([base] * (-(-days // len(base))), ignore_index=True).head(days).copy()
+    df["日期"] = [d.isoformat() for d in dates]
+    return sum(StockHistoryService.save_stock_history(db, code, df) for code in ctx.stock_codes[:stocks])
+
+
+def build_scenarios() -> List[Scenario]:
+    from app.models.fund_flow import StockFundFlow
+    from app.models.lhb import LhbDetail
+    from app.models.stock_history import StockHistory
+    from app.models.zt_pool import ZtPool
+
+    return [
+        Scenario("fund_flow_filter_single", "资金流筛选：近5日主力净流入>1000万", _fund_flow_filter([5])),
+        Scenario("fund_flow_filter_multi", "资金流筛选：5/20/60日三个条件 + 连续3日净流入", _fund_flow_filter([5, 20, 60], consecutive_days=3)),
+        Scenario("fund_flow_filter_concept", "资金流筛选：一级概念（含全部子概念）+ 近20日净流入", _fund_flow_filter([20], concept=True)),
+        Scenario("fund_flow_range_list", "资金流日期范围列表（20个交易日）", _fund_flow_range),
+        Scenario("zt_pool_range", "涨停池日期范围列表（20个交易日，按涨停次数排序）", _zt_pool_range()),
+        Scenario("zt_pool_range_concept", "涨停池日期范围列表 + 二级概念过滤", _zt_pool_range(concept=True)),
+        Scenario("lhb_list", "龙虎榜当日列表", _lhb_list),
+        Scenario("lhb_stock_statistics", "龙虎榜上榜个股统计（60个交易日）", _lhb_statistics),
+        Scenario("lhb_institution_detail", "龙虎榜机构席位明细", _lhb_institutions),
+        Scenario("active_branch_statistics", "活跃营业部交易统计（单个营业部全部日期）", _active_branch_statistics),
+        Scenario("active_branch_list", "活跃营业部当日交易详情列表", _active_branch_list),
+        Scenario("concept_tree", "概念树（3级）", _concept_tree),
+        Scenario("concept_expand", "一级概念展开全部子孙及祖先", _concept_expand),
+        Scenario("sync_save_fund_flow", "同步写入：个股资金流（全市场一日）", _save_fund_flow(),
+                 setup=_delete_date(StockFundFlow), teardown=_delete_date(StockFundFlow), repeat=5, writes=True),
+        Scenario("sync_save_zt_pool", "同步写入：涨停池（80只）", _save_zt_pool,
+                 setup=_delete_date(ZtPool), teardown=_delete_date(ZtPool), repeat=5, writes=True),
+        Scenario("sync_save_lhb", "同步写入：龙虎榜（80只）", _save_lhb,
+                 setup=_delete_date(LhbDetail), teardown=_delete_date(LhbDetail), repeat=5, writes=True),
+        Scenario("sync_save_stock_history", "同步写入：历史行情（20只 × 250日）", _save_stock_history,
+                 setup=_delete_date(StockHistory), teardown=_delete_date(StockHistory), repeat=3, writes=True),
+    ]
+
+
+def load_context(db) -> BenchContext:
+    """从数据库读取数据集的交易日、股票和概念"""
+    from sqlalchemy import func
+    from app.models.fund_flow import StockFundFlow
+    from app.models.lhb import ActiveBranchDetail, LhbDetail
+    from app.models.stock_concept import StockConcept
+    from app.models.trade_date import TradeDate
+    from app.utils.trade_calendar import reload_trade_calendar
+
+    reload_trade_calendar(db)
+    last_day = db.query(func.max(StockFundFlow.date)).scalar()
+    if last_day is None:
+        raise ValueError("stock_fund_flow 为空，请先执行 generate 写入合成数据")
+    days = [row[0] for row in db.query(TradeDate.date).filter(TradeDate.date <= last_day).order_by(TradeDate.date).all()]
+    stocks = db.query(StockFundFlow.stock_code, StockFundFlow.stock_name).filter(
+        StockFundFlow.date == last_day
+    ).order_by(StockFundFlow.stock_code).all()
+    level1 = db.query(StockConcept.id).filter(StockConcept.level == 1).order_by(StockConcept.id).first()
+    level2 = db.query(StockConcept.id).filter(StockConcept.level == 2).order_by(StockConcept.id).first()
+    lhb = db.query(LhbDetail.stock_code, LhbDetail.date).filter(
+        LhbDetail.date == last_day
+    ).order_by(LhbDetail.stock_code).first()
+    branch = db.query(ActiveBranchDetail.institution_code).order_by(ActiveBranchDetail.institution_code).first()
+    # 同步写入场景使用数据集之后的日期，不影响查询场景
+    sync_date = last_day + timedelta(days=1)
+    return BenchContext(
+        days=days,
+        stock_codes=[row[0] for row in stocks],
+        stock_names=[row[1] for row in stocks],
+        level1_concept_id=level1[0] if level1 else 0,
+        level2_concept_id=level2[0] if level2 else 0,
+        lhb_stock_code=lhb[0] if lhb else "",
+        lhb_date=lhb[1] if lhb else last_day,
+        branch_code=branch[0] if branch else "",
+        sync_date=sync_date,
+    )
+
+
+def run_scenario(db, scenario: Scenario, ctx: BenchContext, repeat: int, warmup: int) -> Dict[str, Any]:
+    from app.utils.perf import perf_scope
+
+    rss_before = peak_rss_mb()
+    durations, queries, db_seconds = [], [], []
+    repeat = scenario.repeat or repeat
+    try:
+        for iteration in range(warmup + repeat):
+            if scenario.setup:
+                scenario.setup(db, ctx)
+            with perf_scope("bench", scenario.name) as perf:
+                start = time.perf_counter()
+                scenario.run(db, ctx)
+                elapsed = time.perf_counter() - start
+            # 释放会话中的对象，避免上一次结果影响下一次
+            db.expire_all()
+            if iteration >= warmup:
+                durations.append(elapsed)
+                queries.append(perf.db_queries)
+                db_seconds.append(perf.db_seconds)
+    finally:
+        db.rollback()
+        if scenario.teardown:
+            scenario.teardown(db, ctx)
+    result = summarize(durations, queries, db_seconds)
+    result["description"] = scenario.description
+    result["peak_rss_mb"] = peak_rss_mb()
+    result["rss_growth_mb"] = round(result["peak_rss_mb"] - rss_before, 1)
+    return result
+
+
+def _git_revision() -> Optional[str]:
+    try:
+        return subprocess.run(
+            ["git", "rev-parse", "--short", "HEAD"], capture_output=True, text=True, check=True,
+            cwd=Path(__file__).resolve().parent,
+        ).stdout.strip()
+    except Exception:
+        return None
+
+
+def environment(db) -> Dict[str, Any]:
+    from sqlalchemy import text
+    from scripts.synthetic_market_data import existing_rows
+
+    try:
+        server = db.execute(text("SELECT version()")).scalar()
+    except Exception:
+        db.rollback()
+        server = db.get_bind().dialect.name
+    return {
+        "git_revision": _git_revision(),
+        "started_at": datetime.now().isoformat(timespec="seconds"),
+        "python": platform.python_version(),
+        "platform": platform.platform(),
+        "database": server,
+        "rows": existing_rows(db),
+        "query_cache": settings.QUERY_CACHE_ENABLED,
+    }
+
+
+def run_suite(
+    only: Optional[List[str]], repeat: int, warmup: int, with_cache: bool, allow_writes: bool = False
+) -> Dict[str, Any]:
+    # 默认关闭查询缓存，测量的是查询本身而不是缓存命中
+    settings.QUERY_CACHE_ENABLED = with_cache
+    settings.PERF_METRICS_ENABLED = True
+    scenarios = build_scenarios()
+    if only:
+        unknown = set(only) - {s.name for s in scenarios}
+        if unknown:
+            raise ValueError(f"未知场景: {', '.join(sorted(unknown))}")
+        scenarios = [s for s in scenarios if s.name in only]
+
+    db = SessionLocal()
+    try:
+        writes = [s.name for s in scenarios if s.writes]
+        if writes and not allow_writes and not is_synthetic(db):
+            # 写入场景会删除同步日期及之后的数据，目标库不是合成数据集时拒绝执行
+            if only:
+                raise ValueError(
+                    f"目标库不是 generate 写入的合成数据集，拒绝执行写入场景: {', '.join(writes)}"
+                    f"（确认后使用 --allow-writes）"
+                )
+            print(f"⚠️ 目标库不是合成数据集，跳过写入场景: {', '.join(writes)}")
+            scenarios = [s for s in scenarios if not s.writes]
+
+        ctx = load_context(db)
+        report = {
+            "version": RESULT_VERSION,
+            "environment": environment(db),
+            "settings": {"repeat": repeat, "warmup": warmup},
+            "scenarios": {},
+        }
+        print(f"数据集: {len(ctx.stock_codes)} 只股票, {len(ctx.days)} 个交易日 ({ctx.days[0]} ~ {ctx.last_day})")
+        for scenario in scenarios:
+            result = run_scenario(db, scenario, ctx, repeat, warmup)
+            report["scenarios"][scenario.name] = result
+            print(f"{scenario.name:<28} p50 {result['p50_ms']:>9.1f} ms  p95 {result['p95_ms']:>9.1f} ms  "
+                  f"SQL {result['queries']:>6.1f}  RSS {result['peak_rss_mb']:>7.1f} MB")
+        return report
+    finally:
+        db.close()
+
+
+def run_isolated(
+    only: Optional[List[str]], repeat: int, warmup: int, with_cache: bool, allow_writes: bool = False
+) -> Dict[str, Any]:
+    """每个场景在独立进程中执行，峰值 RSS 只反映该场景"""
+    scenarios = build_scenarios()
+    names = only or [s.name for s in scenarios]
+    if not only and not allow_writes:
+        db = SessionLocal()
+        try:
+            synthetic = is_synthetic(db)
+        finally:
+            db.close()
+        if not synthetic:
+            print("⚠️ 目标库不是合成数据集，跳过写入场景")
+            names = [s.name for s in scenarios if not s.writes]
+    report = None
+    for name in names:
+        with tempfile.TemporaryDirectory() as tmp:
+            output = os.path.join(tmp, "result.json")
+            command = [sys.executable, __file__, "run", "--only", name, "--repeat", str(repeat),
+                       "--warmup", str(warmup), "--output", output]
+            if with_cache:
+                command.append("--with-cache")
+            if allow_writes:
+                command.append("--allow-writes")
+            subprocess.run(command, check=True)
+            with open(output, encoding="utf-8") as f:
+                result = json.load(f)
+        if report is None:
+            report = result
+        else:
+            report["scenarios"].update(result["scenarios"])
+    if report is not None:
+        report["settings"]["isolate"] = True
+    return report
+
+
+def compare(base: Dict[str, Any], head: Dict[str, Any], threshold: float) -> List[str]:
+    """打印两次结果的对比，返回 p50 变慢超过 threshold（比例）的场景"""
+    regressions = []
+    print(f"{'场景':<28} {'p50 基线':>10} {'p50 当前':>10} {'变化':>8} {'p95 变化':>9} {'SQL':>12}")
+    for name, current in head["scenarios"].items():
+        previous = base["scenarios"].get(name)
+        if previous is None:
+            print(f"{name:<28} {'-':>10} {current['p50_ms']:>10.1f}  (新场景)")
+            continue
+        p50_change = current["p50_ms"] / max(previous["p50_ms"], 1e-9) - 1
+        p95_change = current["p95_ms"] / max(previous["p95_ms"], 1e-9) - 1
+        flag = ""
+        if p50_change > threshold:
+            regressions.append(name)
+            flag = "  ❌"
+        print(f"{name:<28} {previous['p50_ms']:>10.1f} {current['p50_ms']:>10.1f} {p50_change:>+8.0%} "
+              f"{p95_change:>+9.0%} {previous['queries']:>5.0f}->{current['queries']:<5.0f}{flag}")
+    return regressions
+
+
+def generate(spec: MarketSpec, truncate: bool) -> None:
+    print("=" * 60)
+    print(f"生成合成数据: {spec.stocks} 只股票 × {spec.days} 个交易日（截止 {spec.end_date}，种子 {spec.seed}）")
+    print("=" * 60)
+    start = time.perf_counter()
+    market = SyntheticMarket(spec)
+    db = SessionLocal()
+    try:
+        counts = load_market(db, market, truncate=truncate)
+    finally:
+        db.close()
+    for table, count in counts.items():
+        print(f"  {table:<24} {count:>10,}")
+    print(f"完成，耗时 {time.perf_counter() - start:.1f} 秒")
+
+
+def _write_json(report: Dict[str, Any], output: Optional[str]) -> None:
+    if not output:
+        return
+    Path(output).parent.mkdir(parents=True, exist_ok=True)
+    with open(output, "w", encoding="utf-8") as f:
+        json.dump(report, f, ensure_ascii=False, indent=2, default=str)
+    print(f"结果已写入 {output}")
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="服务热点路径基准测试")
+    subparsers = parser.add_subparsers(dest="command", required=True)
+
+    gen = subparsers.add_parser("generate", help="写入合成行情数据")
+    gen.add_argument("--stocks", type=int, default=5000, help="股票数")
+    gen.add_argument("--days", type=int, default=250, help="交易日数")
+    gen.add_argument("--end-date", type=str, default="2025-12-31", help="最后一个交易日 YYYY-MM-DD")
+    gen.add_argument("--seed", type=int, default=MarketSpec.seed, help="随机种子")
+    gen.add_argument("--truncate", action="store_true", help="先清空相关表（会删除已有数据）")
+
+    run = subparsers.add_parser("run", help="执行场景")
+    run.add_argument("--only", nargs="+", default=None, help="只执行指定场景")
+    run.add_argument("--repeat", type=int, default=10, help="每个场景计时次数")
+    run.add_argument("--warmup", type=int, default=1, help="每个场景预热次数（不计入结果）")
+    run.add_argument("--with-cache", action="store_true", help="开启查询缓存（默认关闭）")
+    run.add_argument("--isolate", action="store_true", help="每个场景在独立进程中执行")
+    run.add_argument("--allow-writes", action="store_true",
+                     help="目标库不是合成数据集时也执行写入场景（会删除同步日期及之后的数据）")
+    run.add_argument("--output", type=str, default=None, help="结果 JSON 路径")
+
+    cmp = subparsers.add_parser("compare", help="对比两次结果")
+    cmp.add_argument("base", help="基线结果 JSON")
+    cmp.add_argument("head", help="当前结果 JSON")
+    cmp.add_argument("--threshold", type=float, default=0.2, help="p50 变慢超过该比例时返回非零退出码")
+
+    subparsers.add_parser("list", help="列出全部场景")
+    args = parser.parse_args()
+
+    if args.command == "generate":
+        from app.utils.date_utils import parse_date
+
+        generate(MarketSpec(stocks=args.stocks, days=args.days, end_date=parse_date(args.end_date), seed=args.seed),
+                 args.truncate)
+    elif args.command == "run":
+        runner = run_isolated if args.isolate else run_suite
+        _write_json(runner(args.only, args.repeat, args.warmup, args.with_cache, args.allow_writes), args.output)
+    elif args.command == "compare":
+        with open(args.base, encoding="utf-8") as f:
+            base_report = json.load(f)
+        with open(args.head, encoding="utf-8") as f:
+            head_report = json.load(f)
+        regressed = compare(base_report, head_report, args.threshold)
+        if regressed:
+            print(f"\n❌ {len(regressed)} 个场景 p50 变慢超过 {args.threshold:.0%}: {', '.join(regressed)}")
+            sys.exit(1)
+        print("\n✅ 没有超过阈值的性能回退")
+    else:
+        for item in build_scenarios():
+            print(f"{item.name:<28} {item.description}")
@@ -85,7 +85,7 @@ def fix_institutions_flag(target_date: date, limit: int = None):
                 # 重新保存机构数据（会使用flag字段）
                 inst_count = LhbService.save_institution_data(
                     db, lhb_detail.id, stock_code, target_date, df_buy, df_sell
-                )
+                ).count
                 
                 if inst_count > 0:
                     print(f"✅ 成功 ({inst_count} 条机构)")
@@ -0,0 +1,47 @@
+"""
+重算概念/行业资金流日汇总脚本
+首次上线或手工修改历史资金流数据后运行，按日期顺序重写累计净额、近N日净额和排名
+"""
+import sys
+import argparse
+from pathlib import Path
+
+# 添加项目根目录到路径
+sys.path.insert(0, str(Path(__file__).resolve().parents[1]))
+
+from app.database.session import SessionLocal
+from app.services.fund_flow_rollup_service import FundFlowRollupService, ROLLUPS
+from app.utils.date_utils import parse_date
+
+
+def rebuild_rollups(kinds, start_date=None) -> bool:
+    """重算日汇总"""
+    db = SessionLocal()
+    try:
+        for kind in kinds:
+            print(f"开始重算 {kind} 资金流日汇总（起始日期: {start_date or '全部'}）")
+            count = FundFlowRollupService.rebuild(db, kind, start_date)
+            print(f"✅ {kind} 资金流日汇总重算完成，共 {count} 条")
+    except Exception as e:
+        db.rollback()
+        print(f"❌ 重算失败: {str(e)}")
+        import traceback
+        traceback.print_exc()
+        return False
+    finally:
+        db.close()
+    return True
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="重算概念/行业资金流日汇总")
+    parser.add_argument("--kind", choices=list(ROLLUPS.keys()), help="只重算概念或行业，默认全部")
+    parser.add_argument("--start-date", help="起始日期 YYYY-MM-DD，默认全部")
+    args = parser.parse_args()
+
+    start = parse_date(args.start_date) if args.start_date else None
+    if args.start_date and not start:
+        print("日期格式错误")
+        sys.exit(1)
+    success = rebuild_rollups([args.kind] if args.kind else list(ROLLUPS.keys()), start)
+    sys.exit(0 if success else 1)
@@ -0,0 +1,89 @@
+"""
+历史数据回填脚本
+按 (任务类型, 交易日) 拆分为工作单元并发执行，每个单元完成即记录检查点；
+中断后用 --resume 继续，只执行未成功的单元。
+
+示例：
+  python backend/scripts/run_backfill.py --tasks institution_trading_statistics --start-date 2026-01-05 --end-date 2026-02-13
+  python backend/scripts/run_backfill.py --resume 12
+  python backend/scripts/run_backfill.py --list
+"""
+import sys
+import argparse
+from pathlib import Path
+
+# 添加项目根目录到路径
+sys.path.insert(0, str(Path(__file__).resolve().parents[1]))
+
+from app.database.session import SessionLocal
+from app.services.backfill_service import BackfillService
+from app.utils.date_utils import parse_date
+
+
+def print_jobs() -> None:
+    db = SessionLocal()
+    try:
+        for job in BackfillService.list_jobs(db, page_size=50)["items"]:
+            print(
+                f"[{job['job_id']}] {job['status']:<8} {','.join(job['task_types'])} "
+                f"{job['start_date']}~{job['end_date']} "
+                f"{job['completed_units']}/{job['total_units']} ({job['progress']}%)"
+            )
+    finally:
+        db.close()
+
+
+def create_job(task_types, start_date, end_date, max_workers, units_per_minute) -> int:
+    db = SessionLocal()
+    try:
+        job = BackfillService.create_job(
+            db,
+            task_types=task_types,
+            start_date=start_date,
+            end_date=end_date,
+            max_workers=max_workers,
+            units_per_minute=units_per_minute,
+            triggered_by="script",
+        )
+        return job.id
+    finally:
+        db.close()
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="历史数据回填（可中断、可继续）")
+    parser.add_argument("--tasks", help="任务类型，逗号分隔，如 lhb,lhb_institution")
+    parser.add_argument("--start-date", help="开始日期 YYYY-MM-DD")
+    parser.add_argument("--end-date", help="结束日期 YYYY-MM-DD")
+    parser.add_argument("--workers", type=int, help="并发单元数")
+    parser.add_argument("--rate", type=float, help="每分钟最多启动的单元数")
+    parser.add_argument("--resume", type=int, metavar="JOB_ID", help="继续执行已有作业")
+    parser.add_argument("--list", action="store_true", help="列出回填作业")
+    args = parser.parse_args()
+
+    if args.list:
+        print_jobs()
+        sys.exit(0)
+
+    if args.resume:
+        job_id = args.resume
+    else:
+        start = parse_date(args.start_date) if args.start_date else None
+        end = parse_date(args.end_date) if args.end_date else None
+        if not args.tasks or not start or not end:
+            parser.error("需要 --tasks、--start-date、--end-date，或使用 --resume JOB_ID")
+        try:
+            job_id = create_job(args.tasks.split(","), start, end, args.workers, args.rate)
+        except ValueError as e:
+            print(f"❌ {str(e)}")
+            sys.exit(1)
+
+    try:
+        progress = BackfillService.run_job(job_id)
+    except KeyboardInterrupt:
+        print(f"\n⏹️ 已中断，使用 --resume {job_id} 继续")
+        sys.exit(130)
+    if progress is None:
+        print(f"❌ 回填作业不存在: {job_id}")
+        sys.exit(1)
+    sys.exit(0 if progress["status"] == "success" else 1)
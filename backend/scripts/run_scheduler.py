@@ -39,6 +39,8 @@ def main():
         print("\n⏹️ 收到退出信号，停止调度器...")
     finally:
         scheduler.shutdown()
+        from app.tasks.process_pool import shutdown_sync_process_pool
+        shutdown_sync_process_pool()
         print("🛑 调度器已停止")
 
 
@@ -0,0 +1,46 @@
+"""
+独立启动同步任务工作进程的入口
+从 task_execution 队列领取任务执行（需设置 SYNC_QUEUE_ENABLED=true，API 和调度器只入队）。
+可启动多个实例，用 SELECT ... FOR UPDATE SKIP LOCKED 领取，同一任务只会被一个实例执行。
+
+运行方式（项目根目录）:
+  python backend/scripts/run_worker.py
+  python backend/scripts/run_worker.py --once   # 只处理当前队列中的任务后退出
+"""
+import sys
+import signal
+import argparse
+from pathlib import Path
+
+# 将项目根目录加入路径，便于独立执行
+sys.path.insert(0, str(Path(__file__).resolve().parents[1]))
+
+from app.tasks.worker import SyncWorker
+
+
+def main():
+    parser = argparse.ArgumentParser(description="同步任务工作进程")
+    parser.add_argument("--worker-id", help="工作进程标识，默认 主机名:进程号")
+    parser.add_argument("--once", action="store_true", help="处理完当前队列中的任务后退出")
+    args = parser.parse_args()
+
+    worker = SyncWorker(worker_id=args.worker_id)
+
+    if args.once:
+        count = 0
+        while worker.run_once():
+            count += 1
+        print(f"队列已空，共处理 {count} 个任务")
+        return
+
+    def handle_signal(signum, frame):
+        print(f"\n⏹️ 收到退出信号，当前任务结束后停止工作进程...")
+        worker.stop()
+
+    signal.signal(signal.SIGINT, handle_signal)
+    signal.signal(signal.SIGTERM, handle_signal)
+    worker.run_forever()
+
+
+if __name__ == "__main__":
+    main()
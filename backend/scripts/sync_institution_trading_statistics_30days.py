@@ -3,15 +3,14 @@
 """
 import sys
 from pathlib import Path
-from datetime import date, datetime, timedelta
+from datetime import date, datetime
 
 # 添加项目根目录到路径
 sys.path.insert(0, str(Path(__file__).resolve().parents[1]))
 
 from app.database.session import SessionLocal
 from app.services.institution_trading_service import InstitutionTradingService
-import akshare as ak
-import pandas as pd
+from app.utils.trade_calendar import get_trade_calendar
 
 
 def get_trading_dates(count: int = 30) -> list[date]:
@@ -24,72 +23,9 @@ def get_trading_dates(count: int = 30) -> list[date]:
     Returns:
         list[date]: 交易日列表（从新到旧）
     """
-    try:
-        # 获取交易日历（最近60天，确保能获取到30个交易日）
-        end_date = date.today()
-        start_date = end_date - timedelta(days=60)
-        
-        start_date_str = start_date.strftime("%Y%m%d")
-        end_date_str = end_date.strftime("%Y%m%d")
-        
-        print(f"[获取交易日历] 日期范围: {start_date_str} - {end_date_str}")
-        
-        # 调用 akshare 获取交易日历
-        df = ak.tool_trade_date_hist_sina()
-        
-        if df is None or df.empty:
-            print("⚠️  无法获取交易日历，使用简化方法")
-            # 简化方法：排除周末
-            trading_dates = []
-            current_date = end_date
-            while len(trading_dates) < count and current_date >= start_date:
-                # 排除周末（周六=5, 周日=6）
-                if current_date.weekday() < 5:
-                    trading_dates.append(current_date)
-                current_date -= timedelta(days=1)
-            return trading_dates
-        
-        # 转换日期列
-        if 'trade_date' in df.columns:
-            df['trade_date'] = pd.to_datetime(df['trade_date']).dt.date
-        elif 'date' in df.columns:
-            df['date'] = pd.to_datetime(df['date']).dt.date
-            df.rename(columns={'date': 'trade_date'}, inplace=True)
-        else:
-            print("⚠️  交易日历格式异常，使用简化方法")
-            trading_dates = []
-            current_date = end_date
-            while len(trading_dates) < count and current_date >= start_date:
-                if current_date.weekday() < 5:
-                    trading_dates.append(current_date)
-                current_date -= timedelta(days=1)
-            return trading_dates
-        
-        # 过滤日期范围并排序
-        df_filtered = df[
-            (df['trade_date'] >= start_date) & 
-            (df['trade_date'] <= end_date)
-        ].sort_values('trade_date', ascending=False)
-        
-        # 获取最近的N个交易日
-        trading_dates = df_filtered['trade_date'].head(count).tolist()
-        
-        print(f"[获取交易日历] 找到 {len(trading_dates)} 个交易日")
-        return trading_dates
-        
-    except Exception as e:
-        print(f"⚠️  获取交易日历失败: {str(e)}，使用简化方法")
-        import traceback
-        traceback.print_exc()
-        
-        # 简化方法：排除周末
-        trading_dates = []
-        current_date = end_date
-        while len(trading_dates) < count and current_date >= start_date:
-            if current_date.weekday() < 5:
-                trading_dates.append(current_date)
-            current_date -= timedelta(days=1)
-        return trading_dates
+    trading_dates = get_trade_calendar().previous_trading_days(date.today(), count)
+    print(f"[获取交易日历] 找到 {len(trading_dates)} 个交易日")
+    return trading_dates
 
 
 def sync_institution_trading_statistics_for_dates(trading_dates: list[date], force: bool = False) -> dict:
@@ -192,68 +128,10 @@ def get_trading_dates_by_range(start_date: date, end_date: date) -> list[date]:
     Returns:
         list[date]: 交易日列表（从新到旧）
     """
-    try:
-        start_date_str = start_date.strftime("%Y%m%d")
-        end_date_str = end_date.strftime("%Y%m%d")
-        
-        print(f"[获取交易日历] 日期范围: {start_date_str} - {end_date_str}")
-        
-        # 调用 akshare 获取交易日历
-        df = ak.tool_trade_date_hist_sina()
-        
-        if df is None or df.empty:
-            print("⚠️  无法获取交易日历，使用简化方法")
-            # 简化方法：排除周末
-            trading_dates = []
-            current_date = end_date
-            while current_date >= start_date:
-                # 排除周末（周六=5, 周日=6）
-                if current_date.weekday() < 5:
-                    trading_dates.append(current_date)
-                current_date -= timedelta(days=1)
-            return trading_dates
-        
-        # 转换日期列
-        if 'trade_date' in df.columns:
-            df['trade_date'] = pd.to_datetime(df['trade_date']).dt.date
-        elif 'date' in df.columns:
-            df['date'] = pd.to_datetime(df['date']).dt.date
-            df.rename(columns={'date': 'trade_date'}, inplace=True)
-        else:
-            print("⚠️  交易日历格式异常，使用简化方法")
-            trading_dates = []
-            current_date = end_date
-            while current_date >= start_date:
-                if current_date.weekday() < 5:
-                    trading_dates.append(current_date)
-                current_date -= timedelta(days=1)
-            return trading_dates
-        
-        # 过滤日期范围并排序
-        df_filtered = df[
-            (df['trade_date'] >= start_date) & 
-            (df['trade_date'] <= end_date)
-        ].sort_values('trade_date', ascending=False)
-        
-        # 获取交易日列表
-        trading_dates = df_filtered['trade_date'].tolist()
-        
-        print(f"[获取交易日历] 找到 {len(trading_dates)} 个交易日")
-        return trading_dates
-        
-    except Exception as e:
-        print(f"⚠️  获取交易日历失败: {str(e)}，使用简化方法")
-        import traceback
-        traceback.print_exc()
-        
-        # 简化方法：排除周末
-        trading_dates = []
-        current_date = end_date
-        while current_date >= start_date:
-            if current_date.weekday() < 5:
-                trading_dates.append(current_date)
-            current_date -= timedelta(days=1)
-        return trading_dates
+    print(f"[获取交易日历] 日期范围: {start_date.strftime('%Y%m%d')} - {end_date.strftime('%Y%m%d')}")
+    trading_dates = list(reversed(get_trade_calendar().trading_days_between(start_date, end_date)))
+    print(f"[获取交易日历] 找到 {len(trading_dates)} 个交易日")
+    return trading_dates
 
 
 def main():
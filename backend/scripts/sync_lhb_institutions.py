@@ -74,7 +74,7 @@ def sync_institutions_for_date(target_date: date, limit: int = None):
                 # 保存机构数据
                 inst_count = LhbService.save_institution_data(
                     db, lhb_detail.id, stock_code, target_date, df_buy, df_sell
-                )
+                ).count
                 
                 if inst_count > 0:
                     print(f"✅ 成功 ({inst_count} 条机构)")
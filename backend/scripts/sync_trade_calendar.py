@@ -0,0 +1,49 @@
+"""
+手动同步交易所交易日历脚本
+"""
+import sys
+from pathlib import Path
+
+# 添加项目根目录到路径
+sys.path.insert(0, str(Path(__file__).resolve().parents[1]))
+
+from app.database.session import SessionLocal
+from app.services.trade_calendar_service import TradeCalendarService
+from app.utils.trade_calendar import get_trade_calendar
+from app.utils.date_utils import get_today
+
+
+def sync_trade_calendar() -> bool:
+    """同步交易日历"""
+    print("=" * 60)
+    print("开始同步交易日历")
+    print("=" * 60)
+    
+    db = SessionLocal()
+    try:
+        result = TradeCalendarService.sync_trade_calendar(db)
+        if not result:
+            print(f"\n❌ 交易日历同步失败: {result}")
+            return False
+        
+        calendar = get_trade_calendar()
+        today = get_today()
+        print(f"\n✅ {result}")
+        print(f"📅 覆盖范围: {calendar.first_date} ~ {calendar.last_date}，共 {len(calendar)} 个交易日")
+        print(f"   今天 {today} {'是' if calendar.is_trading_day(today) else '不是'}交易日，"
+              f"最近交易日: {calendar.latest_trading_day(today)}")
+    except Exception as e:
+        print(f"\n❌ 同步过程中发生错误: {str(e)}")
+        import traceback
+        traceback.print_exc()
+        return False
+    finally:
+        db.close()
+    
+    print("=" * 60)
+    return True
+
+
+if __name__ == "__main__":
+    success = sync_trade_calendar()
+    sys.exit(0 if success else 1)
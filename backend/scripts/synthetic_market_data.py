@@ -0,0 +1,561 @@
+"""
+A股合成行情数据生成器（基准测试用）
+
+按固定随机种子生成可复现的数据集，规模和分布接近真实行情：
+- 股票池：沪市主板 / 深市主板 / 创业板 / 科创板，创业板和科创板涨跌幅限制 20%，其余 10%
+- 日收益率取 t 分布（厚尾），触及涨跌停价时截断，涨跌停家数每日约数十只
+- stock_history / stock_fund_flow：每只股票每个交易日一行，主力净流入与当日涨跌相关
+- zt_pool / zt_pool_down：当日涨停/跌停股票，连板数按连续涨停天数累计
+- lhb_detail / lhb_institution / active_branch_detail：涨跌停及异动股票上榜，每只上榜股票若干买卖席位
+- stock_concept / stock_concept_mapping：3 级概念层级，每只股票关联若干三级概念
+- trade_date：数据集的交易日（只跳过周末，不考虑节假日）
+
+load_market 写入数据库：PostgreSQL 使用 COPY，其它数据库（测试用 SQLite）使用批量 INSERT。
+
+执行方式：
+    python backend/scripts/benchmark_suite.py generate --stocks 5000 --days 250 --truncate
+"""
+import csv
+import io
+import math
+from dataclasses import asdict, dataclass
+from datetime import date, datetime, time, timedelta
+from typing import Callable, Dict, Iterator, List, Optional, Sequence, Tuple
+
+import numpy as np
+
+# 写入顺序（被引用的表在前）；清空时倒序
+TABLES = (
+    "trade_date",
+    "stock_concept",
+    "stock_concept_mapping",
+    "stock_history",
+    "stock_fund_flow",
+    "zt_pool",
+    "zt_pool_down",
+    "lhb_detail",
+    "lhb_institution",
+    "active_branch_detail",
+)
+
+# 标记表：generate 写入一行数据集规格，基准测试的写入场景据此确认目标库是合成数据集（不属于应用模型）
+MARKER_TABLE = "benchmark_dataset"
+
+# 板块前缀、占比、涨跌幅限制
+BOARDS = (
+    ("60", 0.40, 0.10),
+    ("00", 0.35, 0.10),
+    ("30", 0.18, 0.20),
+    ("68", 0.07, 0.20),
+)
+
+INDUSTRIES = (
+    "半导体", "汽车零部件", "汽车整车", "电池", "光伏设备", "通信设备", "软件开发", "医疗器械",
+    "化学制药", "白酒", "银行", "证券", "房地产开发", "电力", "煤炭开采", "有色金属",
+    "工程机械", "航天装备", "消费电子", "游戏",
+)
+
+BRANCH_COUNT = 200
+LHB_MOVERS_PER_DAY = 20  # 涨跌停之外、按涨跌幅绝对值取前 N 只异动股上榜
+SEATS_PER_SIDE = 5  # 每只上榜股票的买入/卖出席位数
+BRANCHES_PER_LHB_STOCK = 3  # 每只上榜股票关联的活跃营业部数
+
+
+@dataclass
+class MarketSpec:
+    """数据集规格（相同规格和种子生成完全相同的数据）"""
+    stocks: int = 5000
+    days: int = 250
+    end_date: date = date(2025, 12, 31)
+    seed: int = 20250101
+    concepts_level1: int = 12
+    concepts_per_parent: int = 4  # 每个一级概念下的二级数、每个二级概念下的三级数
+    concepts_per_stock: Tuple[int, int] = (2, 5)
+
+    def to_dict(self) -> dict:
+        data = asdict(self)
+        data["end_date"] = self.end_date.isoformat()
+        data["concepts_per_stock"] = list(self.concepts_per_stock)
+        return data
+
+
+def trading_days(end_date: date, count: int) -> List[date]:
+    """end_date（含）往前 count 个工作日，从旧到新"""
+    days = []
+    current = end_date
+    while len(days) < count:
+        if current.weekday() < 5:
+            days.append(current)
+        current -= timedelta(days=1)
+    return days[::-1]
+
+
+def _round(value: float, digits: int = 2) -> float:
+    return round(float(value), digits)
+
+
+class SyntheticMarket:
+    """
+    合成行情数据集
+
+    价格、成交额等矩阵（股票数 × 交易日数）在构造时一次生成，各表按交易日逐批产出行，
+    写入时内存只保留一个交易日的明细。
+    """
+
+    def __init__(self, spec: MarketSpec):
+        self.spec = spec
+        rng = np.random.default_rng(spec.seed)
+        self.days = trading_days(spec.end_date, spec.days)
+        n, d = spec.stocks, spec.days
+
+        self.codes, self.limits = self._universe(rng, n)
+        self.names = [f"样本{code}" for code in self.codes]
+        self.industries = [INDUSTRIES[i] for i in rng.integers(0, len(INDUSTRIES), n)]
+
+        # 日收益率：t 分布厚尾，触及涨跌幅限制时截断为涨跌停
+        limits = self.limits[:, None]
+        returns = rng.standard_t(3, (n, d)) * 0.02
+        self.limit_up = returns >= limits - 0.001
+        self.limit_down = returns <= -limits + 0.001
+        returns = np.clip(returns, -limits, limits)
+        self.returns = returns
+
+        start_price = np.exp(rng.normal(2.5, 0.6, n))
+        self.close = np.round(start_price[:, None] * np.cumprod(1 + returns, axis=1), 2)
+        self.close = np.maximum(self.close, 0.5)
+        self.prev_close = np.concatenate([np.round(start_price, 2)[:, None], self.close[:, :-1]], axis=1)
+        swing = np.abs(rng.normal(0, 0.012, (n, d)))
+        self.high = np.maximum(self.close, self.prev_close) * (1 + np.where(self.limit_up, 0, swing))
+        self.low = np.minimum(self.close, self.prev_close) * (1 - np.where(self.limit_down, 0, swing))
+        self.open = np.clip(self.prev_close * (1 + rng.normal(0, 0.008, (n, d))), self.low, self.high)
+
+        self.circulation_value = np.exp(rng.normal(math.log(8e9), 0.9, n))
+        self.total_value = self.circulation_value * rng.uniform(1.0, 1.6, n)
+        # 换手率（%），涨跌停和大幅波动时放大
+        self.turnover_rate = np.exp(rng.normal(math.log(2.5), 0.6, (n, d))) * (1 + 8 * np.abs(returns))
+        self.amount = self.circulation_value[:, None] * self.turnover_rate / 100
+        self.main_inflow = self.amount * rng.uniform(0.2, 0.45, (n, d))
+        self.main_net = self.amount * (1.5 * returns + rng.normal(0, 0.04, (n, d)))
+        self.consecutive = self._consecutive(self.limit_up)
+        self.consecutive_down = self._consecutive(self.limit_down)
+
+        self.concepts = self._concepts()
+        self.mappings = self._mappings(rng)
+        self.branches = [(f"8{i:05d}", f"合成证券{i:03d}营业部") for i in range(BRANCH_COUNT)]
+        # 各交易日明细（席位、封板时间等）的随机数由 (种子, 交易日序号) 派生，与生成顺序无关
+        self._rng_seed = int(rng.integers(0, 2 ** 31))
+
+    @staticmethod
+    def _universe(rng, n: int) -> Tuple[List[str], np.ndarray]:
+        counts = [int(n * share) for _, share, _ in BOARDS]
+        counts[0] += n - sum(counts)
+        codes, limits = [], []
+        for (prefix, _, limit), count in zip(BOARDS, counts):
+            numbers = rng.choice(10000, size=count, replace=False)
+            codes.extend(f"{prefix}{k:04d}" for k in sorted(numbers))
+            limits.extend([limit] * count)
+        return codes, np.array(limits)
+
+    @staticmethod
+    def _consecutive(flags: np.ndarray) -> np.ndarray:
+        streak = np.zeros(flags.shape, dtype=int)
+        for j in range(flags.shape[1]):
+            previous = streak[:, j - 1] if j else 0
+            streak[:, j] = np.where(flags[:, j], previous + 1, 0)
+        return streak
+
+    def _concepts(self) -> List[dict]:
+        """3 级概念层级，id 从 1 开始，path 为祖先 id 链"""
+        concepts = []
+        per = self.spec.concepts_per_parent
+
+        def add(name: str, parent: Optional[dict]) -> dict:
+            concept_id = len(concepts) + 1
+            concept = {
+                "id": concept_id,
+                "name": name,
+                "code": f"SC{concept_id:04d}",
+                "parent_id": parent["id"] if parent else None,
+                "level": parent["level"] + 1 if parent else 1,
+                "path": f"{parent['path']}/{concept_id}" if parent else str(concept_id),
+                "sort_order": concept_id,
+            }
+            concepts.append(concept)
+            return concept
+
+        for i in range(self.spec.concepts_level1):
+            level1 = add(f"概念{i + 1}", None)
+            for j in range(per):
+                level2 = add(f"{level1['name']}-{j + 1}", level1)
+                for k in range(per):
+                    add(f"{level2['name']}-{k + 1}", level2)
+        return concepts
+
+    def _mappings(self, rng) -> List[Tuple[str, int]]:
+        """每只股票关联若干三级概念（按股票名称关联）"""
+        leaves = [c["id"] for c in self.concepts if c["level"] == 3]
+        low, high = self.spec.concepts_per_stock
+        mappings = []
+        for name in self.names:
+            count = int(rng.integers(low, high + 1))
+            for concept_id in sorted(rng.choice(leaves, size=min(count, len(leaves)), replace=False)):
+                mappings.append((name, int(concept_id)))
+        counts = {}
+        for _, concept_id in mappings:
+            counts[concept_id] = counts.get(concept_id, 0) + 1
+        for concept in self.concepts:
+            concept["stock_count"] = counts.get(concept["id"], 0)
+        return mappings
+
+    def concept_names(self, stock_index: int) -> str:
+        """股票关联的概念名称（逗号分隔，与涨停池 concept 字段格式一致）"""
+        if not hasattr(self, "_concepts_by_stock"):
+            self._concepts_by_stock = {}
+            for name, concept_id in self.mappings:
+                self._concepts_by_stock.setdefault(name, []).append(self.concepts[concept_id - 1]["name"])
+        return ",".join(self._concepts_by_stock.get(self.names[stock_index], []))
+
+    # ==================== 各表的行 ====================
+
+    def stock_history_rows(self, j: int) -> Iterator[dict]:
+        day = self.days[j]
+        for i, code in enumerate(self.codes):
+            close, prev = self.close[i, j], self.prev_close[i, j]
+            yield {
+                "date": day,
+                "stock_code": code,
+                "stock_name": self.names[i],
+                "open_price": _round(self.open[i, j]),
+                "close_price": _round(close),
+                "high_price": _round(self.high[i, j]),
+                "low_price": _round(self.low[i, j]),
+                "volume": int(self.amount[i, j] / close / 100),
+                "amount": _round(self.amount[i, j]),
+                "amplitude": _round((self.high[i, j] - self.low[i, j]) / prev * 100),
+                "change_percent": _round(self.returns[i, j] * 100),
+                "change_amount": _round(close - prev),
+                "turnover_rate": _round(min(self.turnover_rate[i, j], 999)),
+            }
+
+    def stock_fund_flow_rows(self, j: int) -> Iterator[dict]:
+        day = self.days[j]
+        lhb = set(self.lhb_indices(j))
+        for i, code in enumerate(self.codes):
+            inflow, net = self.main_inflow[i, j], self.main_net[i, j]
+            yield {
+                "date": day,
+                "stock_code": code,
+                "stock_name": self.names[i],
+                "current_price": _round(self.close[i, j]),
+                "change_percent": _round(self.returns[i, j] * 100),
+                "turnover_rate": _round(min(self.turnover_rate[i, j], 999)),
+                "main_inflow": _round(inflow),
+                "main_outflow": _round(inflow - net),
+                "main_net_inflow": _round(net),
+                "turnover_amount": _round(self.amount[i, j]),
+                "is_limit_up": bool(self.limit_up[i, j]),
+                "is_lhb": i in lhb,
+            }
+
+    def _pool_rows(self, j: int, flags: np.ndarray, streak: np.ndarray, down: bool) -> Iterator[dict]:
+        day = self.days[j]
+        rng = np.random.default_rng((self._rng_seed, j, int(down)))
+        for i in np.flatnonzero(flags[:, j]):
+            # 约两成一字板（集合竞价封板），其余在盘中封板；炸板后回封时间在尾盘
+            if rng.random() < 0.2:
+                first = time(9, 25)
+            else:
+                first = time(int(rng.choice((10, 11, 13, 14))), int(rng.integers(0, 30)))
+            explosions = int(rng.poisson(0.6))
+            row = {
+                "date": day,
+                "stock_code": self.codes[i],
+                "stock_name": self.names[i],
+                "change_percent": _round(self.returns[i, j] * 100),
+                "latest_price": _round(self.close[i, j]),
+                "turnover_amount": int(self.amount[i, j]),
+                "circulation_market_value": _round(self.circulation_value[i]),
+                "total_market_value": _round(self.total_value[i]),
+                "turnover_rate": _round(min(self.turnover_rate[i, j], 999)),
+                "limit_up_capital": None if down else int(self.amount[i, j] * rng.uniform(0.02, 0.3)),
+                "first_limit_time": first,
+                "last_limit_time": first if not explosions else time(14, int(rng.integers(30, 57))),
+                "explosion_count": explosions,
+                "limit_up_statistics": f"{streak[i, j]}/{streak[i, j]}",
+                "consecutive_limit_count": int(streak[i, j]),
+                "industry": self.industries[i],
+            }
+            if not down:
+                row["concept"] = self.concept_names(i)
+                row["limit_up_reason"] = None
+            yield row
+
+    def zt_pool_rows(self, j: int) -> Iterator[dict]:
+        return self._pool_rows(j, self.limit_up, self.consecutive, down=False)
+
+    def zt_pool_down_rows(self, j: int) -> Iterator[dict]:
+        return self._pool_rows(j, self.limit_down, self.consecutive_down, down=True)
+
+    def lhb_indices(self, j: int) -> List[int]:
+        """当日上榜股票：全部涨跌停 + 其余股票中涨跌幅绝对值最大的若干只"""
+        limit = np.flatnonzero(self.limit_up[:, j] | self.limit_down[:, j])
+        others = np.abs(self.returns[:, j]).copy()
+        others[limit] = -1
+        movers = np.argsort(others)[::-1][:LHB_MOVERS_PER_DAY]
+        return sorted(set(limit.tolist()) | set(movers.tolist()))
+
+    def lhb_rows(self, j: int, first_id: int) -> Tuple[List[dict], List[dict], List[dict]]:
+        """(lhb_detail, lhb_institution, active_branch_detail)，lhb_detail 的 id 从 first_id 连续分配"""
+        day = self.days[j]
+        rng = np.random.default_rng((self._rng_seed, j, 2))
+        details, seats, branch_rows = [], [], []
+        for offset, i in enumerate(self.lhb_indices(j)):
+            amount = self.amount[i, j]
+            buy = amount * rng.uniform(0.05, 0.25)
+            sell = amount * rng.uniform(0.05, 0.25)
+            detail_id = first_id + offset
+            change = _round(self.returns[i, j] * 100)
+            details.append({
+                "id": detail_id,
+                "date": day,
+                "stock_code": self.codes[i],
+                "stock_name": self.names[i],
+                "close_price": _round(self.close[i, j]),
+                "change_percent": change,
+                "net_buy_amount": _round(buy - sell),
+                "buy_amount": _round(buy),
+                "sell_amount": _round(sell),
+                "total_amount": _round(buy + sell),
+                "turnover_rate": _round(min(self.turnover_rate[i, j], 999)),
+                "concept": None,
+            })
+            for flag, total in (("买入", buy), ("卖出", sell)):
+                weights = rng.dirichlet(np.ones(SEATS_PER_SIDE))
+                # 同一方向席位不重复（唯一约束 lhb_detail_id + institution_name + flag）
+                picks = rng.choice(BRANCH_COUNT, size=SEATS_PER_SIDE, replace=False)
+                for k, weight in enumerate(weights):
+                    main, other = total * weight, total * weight * rng.uniform(0, 0.2)
+                    seat_buy, seat_sell = (main, other) if flag == "买入" else (other, main)
+                    seats.append({
+                        "lhb_detail_id": detail_id,
+                        "date": day,
+                        "stock_code": self.codes[i],
+                        "institution_name": "机构专用" if k == 0 and rng.random() < 0.4 else
+                        self.branches[int(picks[k])][1],
+                        "buy_amount": _round(seat_buy),
+                        "sell_amount": _round(seat_sell),
+                        "net_buy_amount": _round(seat_buy - seat_sell),
+                        "flag": flag,
+                    })
+            after = {
+                f"after_{n}d": _round((self.close[i, j + n] / self.close[i, j] - 1) * 100)
+                if j + n < len(self.days) else None
+                for n in (1, 2, 3, 5, 10, 20, 30)
+            }
+            for b in rng.choice(BRANCH_COUNT, size=BRANCHES_PER_LHB_STOCK, replace=False):
+                code, name = self.branches[int(b)]
+                branch_buy, branch_sell = buy * rng.uniform(0, 0.4), sell * rng.uniform(0, 0.4)
+                branch_rows.append({
+                    "institution_code": code,
+                    "institution_name": name,
+                    "date": day,
+                    "stock_code": self.codes[i],
+                    "stock_name": self.names[i],
+                    "change_percent": change,
+                    "buy_amount": _round(branch_buy),
+                    "sell_amount": _round(branch_sell),
+                    "net_amount": _round(branch_buy - branch_sell),
+                    "reason": "日涨幅偏离值达7%" if change > 0 else "日跌幅偏离值达7%",
+                    **after,
+                })
+        return details, seats, branch_rows
+
+    def row_counts(self) -> Dict[str, int]:
+        """各表行数（不写库，按矩阵计算）"""
+        n, d = self.spec.stocks, self.spec.days
+        lhb = sum(len(self.lhb_indices(j)) for j in range(d))
+        return {
+            "trade_date": d,
+            "stock_concept": len(self.concepts),
+            "stock_concept_mapping": len(self.mappings),
+            "stock_history": n * d,
+            "stock_fund_flow": n * d,
+            "zt_pool": int(self.limit_up.sum()),
+            "zt_pool_down": int(self.limit_down.sum()),
+            "lhb_detail": lhb,
+            "lhb_institution": lhb * SEATS_PER_SIDE * 2,
+            "active_branch_detail": lhb * BRANCHES_PER_LHB_STOCK,
+        }
+
+
+# ==================== 写入数据库 ====================
+
+def _table_columns(table) -> List[str]:
+    return [column.name for column in table.columns]
+
+
+class _Writer:
+    """按表缓冲行，PostgreSQL 用 COPY，其它数据库用批量 INSERT；id 由写入方连续分配"""
+
+    def __init__(self, db, metadata_tables: Dict[str, object], batch_rows: int = 50000):
+        self.db = db
+        self.tables = metadata_tables
+        self.batch_rows = batch_rows
+        self.postgres = db.get_bind().dialect.name == "postgresql"
+        self.buffers: Dict[str, List[dict]] = {name: [] for name in metadata_tables}
+        self.next_id: Dict[str, int] = {name: 1 for name in metadata_tables}
+        self.counts: Dict[str, int] = {name: 0 for name in metadata_tables}
+        self.created_at = datetime.now()
+
+    def add(self, name: str, rows) -> None:
+        buffer = self.buffers[name]
+        for row in rows:
+            if "id" not in row:
+                row["id"] = self.next_id[name]
+            self.next_id[name] = max(self.next_id[name], row["id"] + 1)
+            row.setdefault("created_at", self.created_at)
+            buffer.append(row)
+        if len(buffer) >= self.batch_rows:
+            self.flush(name)
+
+    def flush(self, name: Optional[str] = None) -> None:
+        for table_name in ([name] if name else list(self.buffers)):
+            rows = self.buffers[table_name]
+            if not rows:
+                continue
+            table = self.tables[table_name]
+            columns = [c for c in _table_columns(table) if c in rows[0]]
+            if self.postgres:
+                buffer = io.StringIO()
+                writer = csv.writer(buffer)
+                for row in rows:
+                    writer.writerow(["" if row.get(c) is None else row.get(c) for c in columns])
+                buffer.seek(0)
+                cursor = self.db.connection().connection.cursor()
+                cursor.copy_expert(
+                    f"COPY {table_name} ({', '.join(columns)}) FROM STDIN WITH (FORMAT csv)", buffer
+                )
+            else:
+                self.db.execute(table.insert(), [{c: row.get(c) for c in columns} for row in rows])
+            self.counts[table_name] += len(rows)
+            rows.clear()
+
+    def finish(self) -> None:
+        from sqlalchemy import text
+
+        self.flush()
+        if self.postgres:
+            for table_name in self.tables:
+                self.db.execute(text(
+                    f"SELECT setval(pg_get_serial_sequence('{table_name}', 'id'), "
+                    f"(SELECT COALESCE(MAX(id), 0) + 1 FROM {table_name}), false)"
+                ))
+        self.db.commit()
+        if self.postgres:
+            # 更新统计信息，基准测试的执行计划与真实数据一致
+            connection = self.db.connection().execution_options(isolation_level="AUTOCOMMIT")
+            for table_name in self.tables:
+                connection.execute(text(f"ANALYZE {table_name}"))
+
+
+def _metadata_tables() -> Dict[str, object]:
+    import app.models  # noqa: F401  注册全部模型
+    from app.database.base import Base
+
+    return {name: Base.metadata.tables[name] for name in TABLES}
+
+
+def _marker_table():
+    from sqlalchemy import Column, DateTime, Integer, MetaData, Table, Text
+
+    return Table(
+        MARKER_TABLE, MetaData(),
+        Column("id", Integer, primary_key=True),
+        Column("spec", Text, nullable=False),
+        Column("created_at", DateTime, nullable=False),
+    )
+
+
+def mark_synthetic(db, spec: MarketSpec) -> None:
+    """记录目标库中的数据由合成数据生成器写入"""
+    import json
+
+    table = _marker_table()
+    table.create(db.get_bind(), checkfirst=True)
+    db.execute(table.delete())
+    db.execute(table.insert().values(spec=json.dumps(spec.to_dict()), created_at=datetime.now()))
+    db.commit()
+
+
+def is_synthetic(db) -> bool:
+    """目标库是否为合成数据集（有 generate 写入的标记行）"""
+    from sqlalchemy import func, inspect, select
+
+    if not inspect(db.get_bind()).has_table(MARKER_TABLE):
+        return False
+    return bool(db.execute(select(func.count()).select_from(_marker_table())).scalar())
+
+
+def existing_rows(db) -> Dict[str, int]:
+    from sqlalchemy import func, select
+
+    return {
+        name: db.execute(select(func.count()).select_from(table)).scalar() or 0
+        for name, table in _metadata_tables().items()
+    }
+
+
+def clear_tables(db) -> None:
+    from sqlalchemy import text
+
+    tables = _metadata_tables()
+    marker = _marker_table()
+    marker.create(db.get_bind(), checkfirst=True)
+    db.execute(marker.delete())
+    if db.get_bind().dialect.name == "postgresql":
+        db.execute(text(f"TRUNCATE {', '.join(TABLES)} RESTART IDENTITY CASCADE"))
+    else:
+        for name in reversed(TABLES):
+            db.execute(tables[name].delete())
+    db.commit()
+
+
+def load_market(
+    db,
+    market: SyntheticMarket,
+    truncate: bool = False,
+    progress: Callable[[str], None] = print,
+) -> Dict[str, int]:
+    """
+    写入合成数据集，返回各表写入行数
+
+    Raises:
+        ValueError: 目标表已有数据且未指定 truncate（避免误写入真实数据库）
+    """
+    if truncate:
+        clear_tables(db)
+    else:
+        non_empty = {name: count for name, count in existing_rows(db).items() if count}
+        if non_empty:
+            raise ValueError(f"目标表已有数据，需指定 truncate 清空后再写入: {non_empty}")
+
+    writer = _Writer(db, _metadata_tables())
+    writer.add("trade_date", ({"date": day} for day in market.days))
+    writer.add("stock_concept", (dict(concept) for concept in market.concepts))
+    writer.add("stock_concept_mapping", (
+        {"stock_name": name, "concept_id": concept_id} for name, concept_id in market.mappings
+    ))
+    for j, day in enumerate(market.days):
+        writer.add("stock_history", market.stock_history_rows(j))
+        writer.add("stock_fund_flow", market.stock_fund_flow_rows(j))
+        writer.add("zt_pool", market.zt_pool_rows(j))
+        writer.add("zt_pool_down", market.zt_pool_down_rows(j))
+        details, seats, branch_rows = market.lhb_rows(j, writer.next_id["lhb_detail"])
+        writer.add("lhb_detail", details)
+        writer.add("lhb_institution", seats)
+        writer.add("active_branch_detail", branch_rows)
+        if (j + 1) % 25 == 0 or j + 1 == len(market.days):
+            progress(f"  已生成 {j + 1}/{len(market.days)} 个交易日（{day}）")
+    writer.finish()
+    mark_synthetic(db, market.spec)
+    return writer.counts
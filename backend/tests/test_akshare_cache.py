@@ -0,0 +1,72 @@
+"""
+测试 AKShare 本地响应缓存
+"""
+from datetime import date
+
+import pandas as pd
+import pytest
+
+from app.utils.akshare_cache import AkshareCache, is_immutable_request
+
+
+def stock_zh_a_hist(symbol, start_date, end_date, adjust=""):
+    return pd.DataFrame({"日期": [start_date, end_date], "收盘": [10.0, 10.5], "symbol": [symbol] * 2})
+
+
+def stock_fund_flow_individual(symbol):
+    return pd.DataFrame({"股票代码": ["000001"], "净额": ["1.2亿"]})
+
+
+@pytest.fixture
+def cache(tmp_path):
+    return AkshareCache(str(tmp_path), max_bytes=10 * 1024 * 1024, ttl_seconds=300)
+
+
+def test_immutable_request_rules():
+    today = date(2026, 1, 15)
+    assert is_immutable_request({"start_date": "20260101", "end_date": "20260114"}, today)
+    assert not is_immutable_request({"start_date": "20260101", "end_date": "20260115"}, today)
+    assert not is_immutable_request({"symbol": "即时"}, today)
+    # 前复权数据会随除权除息变化
+    assert not is_immutable_request({"end_date": "2026-01-14", "adjust": "qfq"}, today)
+
+
+def test_get_put_and_counters(cache):
+    kwargs = {"symbol": "000001", "start_date": "20200101", "end_date": "20200110"}
+    assert cache.get(stock_zh_a_hist, (), kwargs) is None
+
+    df = stock_zh_a_hist(**kwargs)
+    cache.put(stock_zh_a_hist, (), kwargs, df)
+    cached = cache.get(stock_zh_a_hist, (), kwargs)
+    pd.testing.assert_frame_equal(cached, df)
+
+    stats = cache.stats()
+    assert (stats["hits"], stats["misses"], stats["entries"], stats["immutable_entries"]) == (1, 1, 1, 1)
+    assert stats["by_endpoint"]["stock_zh_a_hist"]["hits"] == 1
+
+
+def test_ttl_expiry(tmp_path):
+    cache = AkshareCache(str(tmp_path), max_bytes=10 * 1024 * 1024, ttl_seconds=0)
+    kwargs = {"symbol": "即时"}
+    cache.put(stock_fund_flow_individual, (), kwargs, stock_fund_flow_individual(**kwargs))
+    assert cache.get(stock_fund_flow_individual, (), kwargs) is None
+
+
+def test_lru_eviction(cache):
+    requests = [
+        {"symbol": code, "start_date": "20200101", "end_date": "20200110"}
+        for code in ("000001", "000002", "000003")
+    ]
+    cache.put(stock_zh_a_hist, (), requests[0], stock_zh_a_hist(**requests[0]))
+    entry_size = cache.stats()["size_bytes"]
+    cache.max_bytes = int(entry_size * 2.5)
+
+    cache.put(stock_zh_a_hist, (), requests[1], stock_zh_a_hist(**requests[1]))
+    # 访问第一条后，最久未访问的是第二条
+    assert cache.get(stock_zh_a_hist, (), requests[0]) is not None
+    cache.put(stock_zh_a_hist, (), requests[2], stock_zh_a_hist(**requests[2]))
+
+    assert cache.evictions == 1
+    assert cache.get(stock_zh_a_hist, (), requests[1]) is None
+    assert cache.get(stock_zh_a_hist, (), requests[0]) is not None
+    assert cache.get(stock_zh_a_hist, (), requests[2]) is not None
@@ -0,0 +1,67 @@
+"""
+测试 AKShare 并发抓取器
+"""
+import pandas as pd
+
+from app.utils.akshare_fetcher import AkshareFetcher, TokenBucket
+
+
+class FakeClock:
+    def __init__(self):
+        self.now = 0.0
+
+    def __call__(self):
+        return self.now
+
+
+def test_token_bucket_refill():
+    clock = FakeClock()
+    bucket = TokenBucket(rate=2, capacity=2, clock=clock)
+    assert bucket.try_acquire() == 0
+    assert bucket.try_acquire() == 0
+    # 令牌用完，需要等待半秒补充一个
+    assert bucket.try_acquire() == 0.5
+    clock.now = 0.5
+    assert bucket.try_acquire() == 0
+
+
+def test_call_retries_then_succeeds():
+    attempts = []
+
+    def stock_lhb_stock_detail_em(symbol):
+        attempts.append(symbol)
+        if len(attempts) < 3:
+            raise ConnectionError("timeout")
+        return pd.DataFrame({"symbol": [symbol]})
+
+    fetcher = AkshareFetcher(max_workers=2, rate=1000, max_retries=3, backoff_base=0)
+    df = fetcher.call(stock_lhb_stock_detail_em, symbol="000001")
+    assert len(attempts) == 3
+    assert df["symbol"].tolist() == ["000001"]
+
+
+def test_call_gives_up_and_returns_none():
+    def always_fail():
+        raise ConnectionError("timeout")
+
+    fetcher = AkshareFetcher(max_workers=1, rate=1000, max_retries=2, backoff_base=0)
+    assert fetcher.call(always_fail) is None
+
+
+def test_fetch_all_yields_every_key():
+    def fetch(symbol, flag):
+        if symbol == "000002" and flag == "卖出":
+            return pd.DataFrame()
+        return pd.DataFrame({"symbol": [symbol], "flag": [flag]})
+
+    requests = {
+        (symbol, flag): (fetch, {"symbol": symbol, "flag": flag})
+        for symbol in ("000001", "000002")
+        for flag in ("买入", "卖出")
+    }
+    fetcher = AkshareFetcher(max_workers=3, rate=1000, max_retries=0)
+    results = dict(fetcher.fetch_all(requests))
+    assert set(results) == set(requests)
+    # 空数据与 safe_akshare_call 一致返回 None
+    assert results[("000002", "卖出")] is None
+    assert results[("000001", "买入")]["flag"].tolist() == ["买入"]
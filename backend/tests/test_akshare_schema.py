@@ -0,0 +1,66 @@
+"""
+测试 AKShare 列规范化
+使用 tests/fixtures/akshare 下录制的接口返回数据
+"""
+from datetime import date, time
+from pathlib import Path
+
+import pandas as pd
+import pytest
+
+from app.utils.akshare_schema import convert_column, normalize_frame, to_records
+
+
+FIXTURE_DIR = Path(__file__).parent / "fixtures" / "akshare"
+
+
+def load_fixture(endpoint: str) -> pd.DataFrame:
+    text_columns = ["代码", "股票代码", "首次封板时间", "最后封板时间"]
+    return pd.read_csv(FIXTURE_DIR / f"{endpoint}.csv", dtype={c: str for c in text_columns})
+
+
+def test_fund_flow_units_and_percent():
+    records = to_records(normalize_frame("stock_fund_flow_individual", load_fixture("stock_fund_flow_individual")))
+    first = records[0]
+    assert first["stock_code"] == "300059"
+    assert first["main_net_inflow"] == pytest.approx(11.71e8)
+    assert first["change_percent"] == pytest.approx(3.12)
+    assert records[3]["main_net_inflow"] == pytest.approx(1406.52e4)
+    # "-" 表示无数据
+    assert records[4]["main_net_inflow"] is None
+    assert records[4]["turnover_rate"] is None
+
+
+def test_zt_pool_times_and_defaults():
+    frame = normalize_frame("stock_zt_pool_em", load_fixture("stock_zt_pool_em"))
+    records = to_records(frame)
+    assert records[0]["first_limit_time"] == time(9, 25)
+    assert records[2]["last_limit_time"] == time(13, 5, 21)
+    assert records[3]["first_limit_time"] == time(9, 30)
+    # 连板数缺失时默认为首板
+    assert records[3]["consecutive_limit_count"] == 1
+    assert records[3]["limit_up_capital"] is None
+    # 接口没有的列整列为空
+    assert all(r["concept"] is None for r in records)
+
+
+def test_lhb_detail_dates():
+    frame = normalize_frame("stock_lhb_detail_em", load_fixture("stock_lhb_detail_em"))
+    assert set(frame["date"]) == {date(2026, 1, 14)}
+    assert to_records(frame)[2]["net_buy_amount"] is None
+
+
+def test_required_columns_drop_rows():
+    df = pd.DataFrame({"代码": ["1", None, "600000.SH"], "名称": ["平安银行", "无代码", "浦发银行"]})
+    frame = normalize_frame("stock_zt_pool_em", df, required=["stock_code"])
+    assert frame["stock_code"].tolist() == ["000001", "600000"]
+
+
+def test_convert_column_dates_and_inf():
+    dates = convert_column(pd.Series(["20260114", "2026-01-13", None]), "date")
+    assert dates.tolist()[:2] == [date(2026, 1, 14), date(2026, 1, 13)]
+    assert pd.isna(dates.iloc[2])
+
+    values = convert_column(pd.Series([1.5, float("inf"), "abc"]), "float")
+    assert values.iloc[0] == 1.5
+    assert values.iloc[1:].isna().all()
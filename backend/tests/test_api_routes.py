@@ -0,0 +1,106 @@
+"""
+测试热点只读路由：同步 def 在线程池中执行，线程池大小由 API_THREADPOOL_SIZE 设置
+"""
+import inspect
+from datetime import date
+
+import pytest
+from fastapi import FastAPI
+from fastapi.testclient import TestClient
+from sqlalchemy import create_engine
+from sqlalchemy.orm import sessionmaker
+from sqlalchemy.pool import StaticPool
+
+from app.api.v1 import dashboard, fund_flow, index, lhb, zt_pool
+from app.config import settings
+from app.database.session import get_db
+from app.models.daily_summary import DailySummary
+from app.models.fund_flow import ConceptFundFlow
+from app.models.index import IndexHistory
+from app.models.lhb import LhbDetail, LhbInstitution
+from app.models.sector import SectorHistory
+from app.models.zt_pool import ZtPool, ZtPoolDown
+
+
+DAY = date(2026, 1, 12)
+MODELS = (DailySummary, ConceptFundFlow, IndexHistory, LhbDetail, LhbInstitution, SectorHistory, ZtPool, ZtPoolDown)
+
+
+@pytest.fixture
+def session_factory():
+    engine = create_engine("sqlite://", connect_args={"check_same_thread": False}, poolclass=StaticPool)
+    for model in MODELS:
+        model.__table__.create(engine)
+    factory = sessionmaker(bind=engine)
+    session = factory()
+    session.add(ZtPool(date=DAY, stock_code="600000", stock_name="涨停"))
+    detail = LhbDetail(date=DAY, stock_code="600000", stock_name="涨停", net_buy_amount=10)
+    session.add(detail)
+    session.flush()
+    for n in range(3):
+        session.add(LhbInstitution(
+            lhb_detail_id=detail.id, date=DAY, stock_code="600000",
+            institution_name=f"营业部{n}", net_buy_amount=n, flag="买入",
+        ))
+    session.commit()
+    session.close()
+    return factory
+
+
+@pytest.fixture
+def client(session_factory, monkeypatch):
+    monkeypatch.setattr(settings, "QUERY_CACHE_ENABLED", False)
+
+    def override_get_db():
+        db = session_factory()
+        try:
+            yield db
+        finally:
+            db.close()
+
+    app = FastAPI()
+    app.include_router(dashboard.router, prefix="/dashboard")
+    app.include_router(lhb.router, prefix="/lhb")
+    app.dependency_overrides[get_db] = override_get_db
+    with TestClient(app) as test_client:
+        yield test_client
+
+
+def test_routes_run_in_threadpool():
+    for route in (
+        dashboard.get_dashboard_snapshot, lhb.get_lhb_list, lhb.get_institution_detail,
+        fund_flow.get_fund_flow_list, fund_flow.get_concept_fund_flow, index.get_index_list,
+        zt_pool.get_zt_pool_list,
+    ):
+        assert not inspect.iscoroutinefunction(route)
+
+
+def test_routes_read_only(client, session_factory):
+    # 概览不存在时现场汇总返回，GET 不写入概览行
+    response = client.get(f"/dashboard/{DAY}")
+    assert response.status_code == 200
+    assert response.json()["zt_count"] == 1
+    db = session_factory()
+    assert db.query(DailySummary).count() == 0
+    db.close()
+    assert client.get("/dashboard/2026-01-11").status_code == 404
+    assert client.get("/dashboard/bad-date").status_code == 400
+
+    response = client.get("/lhb/600000/institution", params={"date": str(DAY)})
+    assert response.status_code == 200
+    assert [item["institution_name"] for item in response.json()] == ["营业部2", "营业部1", "营业部0"]
+
+
+def test_threadpool_sized_by_setting(monkeypatch):
+    from anyio import to_thread
+    from app.main import lifespan
+
+    monkeypatch.setattr(settings, "API_THREADPOOL_SIZE", 7)
+    app = FastAPI(lifespan=lifespan)
+
+    @app.get("/limit")
+    async def limit():
+        return to_thread.current_default_thread_limiter().total_tokens
+
+    with TestClient(app) as test_client:
+        assert test_client.get("/limit").json() == 7
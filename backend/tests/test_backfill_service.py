@@ -0,0 +1,122 @@
+"""
+测试历史数据回填：拆分单元、检查点与继续执行
+"""
+from datetime import date
+
+import pytest
+from sqlalchemy import create_engine
+from sqlalchemy.orm import sessionmaker
+from sqlalchemy.pool import StaticPool
+
+from app.models.backfill import BackfillJob, BackfillUnit
+from app.models.task_execution import TaskStatus
+from app.services.backfill_service import BackfillService
+from app.utils.sync_result import SyncResult
+from app.utils.trade_calendar import TradeCalendar
+
+
+DAYS = [date(2026, 1, d) for d in (5, 6, 7)]
+
+
+@pytest.fixture
+def session_factory(monkeypatch):
+    import app.utils.trade_calendar as calendar_module
+    from app.config import settings
+
+    monkeypatch.setattr(calendar_module, "_calendar", TradeCalendar(DAYS))
+    monkeypatch.setattr(settings, "BACKFILL_UNITS_PER_MINUTE", 0)
+    engine = create_engine("sqlite://", connect_args={"check_same_thread": False}, poolclass=StaticPool)
+    BackfillJob.__table__.create(engine)
+    BackfillUnit.__table__.create(engine)
+    return sessionmaker(bind=engine)
+
+
+class FakeTasks:
+    """lhb 第一次执行 1月6日 时失败，lhb_institution 依赖 lhb"""
+
+    def __init__(self):
+        self.calls = []
+        self.failed_once = False
+
+    def lhb(self, db, target_date):
+        self.calls.append(("lhb", target_date))
+        if target_date == DAYS[1] and not self.failed_once:
+            self.failed_once = True
+            return SyncResult.failure_result("接口超时")
+        return SyncResult.success_result("lhb", count=10)
+
+    def lhb_institution(self, db, target_date):
+        self.calls.append(("lhb_institution", target_date))
+        return SyncResult.success_result("lhb_institution", count=3)
+
+    def task_map(self):
+        return {"lhb": (self.lhb, ("akshare",)), "lhb_institution": (self.lhb_institution, ("akshare",))}
+
+
+def test_create_job_splits_units(session_factory):
+    db = session_factory()
+    job = BackfillService.create_job(db, ["lhb", "lhb_institution"], date(2026, 1, 3), date(2026, 1, 7))
+    assert db.query(BackfillUnit).filter_by(job_id=job.id).count() == 6
+    with pytest.raises(ValueError):
+        BackfillService.create_job(db, ["unknown"], DAYS[0], DAYS[-1])
+
+
+def test_failed_units_are_retried_on_resume(session_factory):
+    db = session_factory()
+    job = BackfillService.create_job(db, ["lhb", "lhb_institution"], DAYS[0], DAYS[-1], units_per_minute=0)
+    tasks = FakeTasks()
+
+    progress = BackfillService.run_job(job.id, session_factory=session_factory, task_map=tasks.task_map())
+    assert progress["status"] == "failed"
+    assert progress["completed_units"] == 4 and progress["failed_units"] == 2
+    # 依赖失败的单元不执行
+    assert ("lhb_institution", DAYS[1]) not in tasks.calls
+    assert progress["rows"] == 2 * 10 + 2 * 3
+
+    tasks.calls.clear()
+    progress = BackfillService.run_job(job.id, session_factory=session_factory, task_map=tasks.task_map())
+    assert sorted(tasks.calls) == [("lhb", DAYS[1]), ("lhb_institution", DAYS[1])]
+    assert progress["status"] == "success" and progress["completed_units"] == 6
+    assert progress["rows"] == 3 * 10 + 3 * 3
+    assert progress["units_per_minute"] > 0
+
+
+def test_interrupted_units_are_reclaimed(session_factory):
+    db = session_factory()
+    job = BackfillService.create_job(db, ["lhb"], DAYS[0], DAYS[-1], units_per_minute=0)
+    # 模拟进程在执行中退出：一个单元已完成，一个单元停在执行中
+    units = db.query(BackfillUnit).filter_by(job_id=job.id).order_by(BackfillUnit.target_date).all()
+    units[0].status = TaskStatus.SUCCESS
+    units[1].status = TaskStatus.RUNNING
+    job.status = TaskStatus.RUNNING
+    db.commit()
+
+    tasks = FakeTasks()
+    tasks.failed_once = True
+    progress = BackfillService.run_job(job.id, session_factory=session_factory, task_map=tasks.task_map())
+    assert sorted(tasks.calls) == [("lhb", DAYS[1]), ("lhb", DAYS[2])]
+    assert progress["status"] == "success"
+
+
+def test_active_job_is_not_claimed_twice(session_factory):
+    from datetime import datetime, timedelta
+
+    db = session_factory()
+    job = BackfillService.create_job(db, ["lhb"], DAYS[0], DAYS[-1], units_per_minute=0)
+    # 另一个进程已认领并持有新鲜心跳：其执行中的单元不能被改回待执行，也不能重复执行
+    assert BackfillService.claim_job(db, job.id) is not None
+    assert BackfillService.claim_job(db, job.id) is None
+    unit = db.query(BackfillUnit).filter_by(job_id=job.id).first()
+    unit.status = TaskStatus.RUNNING
+    db.commit()
+
+    tasks = FakeTasks()
+    progress = BackfillService.run_job(job.id, session_factory=session_factory, task_map=tasks.task_map())
+    assert tasks.calls == [] and progress["status"] == "running"
+    db.refresh(unit)
+    assert unit.status == TaskStatus.RUNNING
+
+    # 心跳过期后可以重新认领
+    job.heartbeat_at = datetime.now() - timedelta(hours=1)
+    db.commit()
+    assert BackfillService.claim_job(db, job.id) is not None
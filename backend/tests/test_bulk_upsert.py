@@ -0,0 +1,70 @@
+"""
+测试批量写入工具
+"""
+from datetime import date
+
+import pandas as pd
+import pytest
+from sqlalchemy import create_engine
+from sqlalchemy.orm import sessionmaker
+
+from app.models.fund_flow import StockFundFlow
+from app.utils.bulk_upsert import bulk_upsert
+
+
+TODAY = date(2026, 1, 14)
+
+
+@pytest.fixture
+def db():
+    engine = create_engine("sqlite://")
+    StockFundFlow.__table__.create(engine)
+    session = sessionmaker(bind=engine)()
+    yield session
+    session.close()
+
+
+def _row(code, inflow, price=10.0):
+    return {
+        "date": TODAY,
+        "stock_code": code,
+        "stock_name": code,
+        "current_price": price,
+        "main_net_inflow": inflow,
+    }
+
+
+def test_insert_then_update_counts(db):
+    result = bulk_upsert(db, StockFundFlow, [_row("000001", 100), _row("000002", 200)],
+                         conflict_columns=["date", "stock_code"])
+    assert (result.inserted, result.updated) == (2, 0)
+
+    result = bulk_upsert(db, StockFundFlow, [_row("000002", 300), _row("000003", 400)],
+                         conflict_columns=["date", "stock_code"])
+    db.commit()
+    assert (result.inserted, result.updated, result.count) == (1, 1, 2)
+
+    rows = {r.stock_code: r for r in db.query(StockFundFlow).all()}
+    assert len(rows) == 3
+    assert rows["000002"].main_net_inflow == 300
+    assert rows["000001"].created_at is not None
+
+
+def test_keep_existing_on_null_and_nan_cleanup(db):
+    bulk_upsert(db, StockFundFlow, [_row("000001", 100, price=12.5)], conflict_columns=["date", "stock_code"])
+
+    df = pd.DataFrame([_row("000001", 200, price=float("nan"))])
+    bulk_upsert(db, StockFundFlow, df, conflict_columns=["date", "stock_code"], keep_existing_on_null=True)
+    db.commit()
+
+    record = db.query(StockFundFlow).one()
+    assert record.main_net_inflow == 200
+    assert record.current_price == 12.5
+
+
+def test_duplicate_keys_in_batch_keep_last(db):
+    result = bulk_upsert(db, StockFundFlow, [_row("000001", 100), _row("000001", 150)],
+                         conflict_columns=["date", "stock_code"])
+    db.commit()
+    assert result.count == 1
+    assert db.query(StockFundFlow).one().main_net_inflow == 150
@@ -0,0 +1,65 @@
+"""
+测试涨停关键字的概念多模式匹配
+"""
+import random
+
+import pytest
+from sqlalchemy import create_engine, event
+from sqlalchemy.orm import sessionmaker
+
+from app.models.stock_concept import StockConcept
+from app.services.limit_up_board_service import LimitUpBoardService
+from app.services.stock_concept_service import StockConceptService
+from app.utils.aho_corasick import AhoCorasick
+
+
+def test_automaton_matches_naive_substring_scan():
+    rng = random.Random(7)
+    alphabet = "abcAB人工智能"
+    patterns = {"".join(rng.choice(alphabet) for _ in range(rng.randint(1, 4))) for _ in range(60)}
+    automaton = AhoCorasick((p, p) for p in patterns)
+    for _ in range(200):
+        text = "".join(rng.choice(alphabet) for _ in range(rng.randint(0, 30)))
+        expected = {p for p in patterns if p.lower() in text.lower()}
+        assert automaton.find(text) == expected
+
+
+@pytest.fixture
+def db():
+    engine = create_engine("sqlite://")
+    StockConcept.__table__.create(engine)
+    session = sessionmaker(bind=engine)()
+    for id_, name in [(1, "人工智能"), (2, "AI"), (3, "智能"), (4, "机器人"), (5, "芯片")]:
+        session.add(StockConcept(id=id_, name=name, level=1, path=str(id_)))
+    session.commit()
+    StockConceptService.invalidate_name_matcher()
+    session.statements = []
+    event.listen(engine, "before_cursor_execute", lambda *args: session.statements.append(args[2]))
+    yield session
+    session.close()
+    StockConceptService.invalidate_name_matcher()
+
+
+def test_extract_concepts(db):
+    assert LimitUpBoardService.extract_concepts_from_keywords(db, "ai+人工智能机器人") == [2, 1, 3, 4]
+    assert LimitUpBoardService.extract_concepts_from_keywords(db, "芯片", ["机器人", "不存在"]) == [4, 5]
+    assert LimitUpBoardService.extract_concepts_from_keywords(db, None) == []
+
+
+def test_batch_extract_builds_matcher_once(db):
+    result = LimitUpBoardService.extract_concepts_batch(
+        db, [("芯片", None), ("机器人", ["AI"]), (None, None)]
+    )
+    assert result == [[5], [2, 4], []]
+    # 签名查询 + 加载概念
+    assert len(db.statements) == 2
+
+    db.statements.clear()
+    LimitUpBoardService.extract_concepts_batch(db, [("芯片", None)])
+    assert len(db.statements) == 1
+
+
+def test_matcher_rebuilt_when_concepts_change(db):
+    assert LimitUpBoardService.extract_concepts_from_keywords(db, "光伏") == []
+    StockConceptService.create(db, {"name": "光伏"})
+    assert LimitUpBoardService.extract_concepts_from_keywords(db, "光伏") == [6]
@@ -0,0 +1,109 @@
+"""
+测试列表总数的计算策略
+"""
+from datetime import date
+
+import pytest
+from sqlalchemy import create_engine, event
+from sqlalchemy.orm import sessionmaker
+
+from app.config import settings
+from app.models.lhb import LhbDetail
+from app.utils import query_cache
+from app.utils.count_strategy import CountCacheKey, Explain, paginate_query, query_row_estimate
+
+
+DAY = date(2026, 1, 12)
+
+
+@pytest.fixture
+def db():
+    engine = create_engine("sqlite://")
+    LhbDetail.__table__.create(engine)
+    session = sessionmaker(bind=engine)()
+    for n in range(25):
+        session.add(LhbDetail(date=DAY, stock_code=f"{n:06d}", stock_name=f"股票{n}", net_buy_amount=n))
+    session.commit()
+    session.count_queries = 0
+
+    @event.listens_for(engine, "before_cursor_execute")
+    def _count(conn, cursor, statement, *args):
+        if "count(" in statement.lower():
+            session.count_queries += 1
+
+    yield session
+    session.close()
+
+
+@pytest.fixture
+def memory_cache(monkeypatch):
+    monkeypatch.setattr(settings, "QUERY_CACHE_ENABLED", True)
+    monkeypatch.setattr(settings, "QUERY_CACHE_BACKEND", "memory")
+    monkeypatch.setattr(query_cache, "_query_cache", None)
+    yield
+    monkeypatch.setattr(query_cache, "_query_cache", None)
+
+
+def _query(db):
+    return db.query(LhbDetail).filter(LhbDetail.date == DAY).order_by(LhbDetail.id)
+
+
+def test_last_page_total_needs_no_count(db):
+    page = paginate_query(db, _query(db), 3, 10, "exact")
+    assert [len(page.items), page.total, page.has_more] == [5, 25, False]
+    assert db.count_queries == 0
+
+
+def test_none_mode_returns_lower_bound(db):
+    page = paginate_query(db, _query(db), 1, 10, "none")
+    assert [len(page.items), page.total, page.has_more] == [10, 11, True]
+    assert db.count_queries == 0
+
+
+def test_estimate_falls_back_to_exact_off_postgres(db):
+    page = paginate_query(db, _query(db), 1, 10, "estimate", table_name="lhb_detail")
+    assert page.total == 25 and not page.estimated
+
+
+def test_exact_count_cached_until_invalidated(db, memory_cache):
+    key = CountCacheKey("lhb_list", {"date": DAY}, tags=[("lhb_detail", DAY)], closed=True)
+    for page_no in (1, 2):
+        assert paginate_query(db, _query(db), page_no, 10, "exact", cache_key=key).total == 25
+    assert db.count_queries == 1
+
+    db.add(LhbDetail(date=DAY, stock_code="999999", stock_name="新增", net_buy_amount=1))
+    db.commit()
+    query_cache.invalidate_query_cache("lhb_detail", DAY)
+    assert paginate_query(db, _query(db), 1, 10, "exact", cache_key=key).total == 26
+    assert db.count_queries == 2
+
+
+def test_explain_binds_in_list_per_dialect():
+    from sqlalchemy.dialects.postgresql import asyncpg, psycopg
+
+    statement = _query_in_list(None).statement
+    for dialect, marker in ((psycopg.dialect(), "%(stock_code_1_1)s"), (asyncpg.dialect(), "$2")):
+        sql = str(Explain(statement).compile(dialect=dialect, compile_kwargs={"render_postcompile": True}))
+        assert sql.startswith("EXPLAIN (FORMAT JSON) SELECT") and marker in sql
+        assert "POSTCOMPILE" not in sql
+
+
+def test_failed_explain_rolls_back_savepoint(db, monkeypatch):
+    statements = []
+    event.listen(db.get_bind(), "before_cursor_execute", lambda conn, cursor, statement, *args: statements.append(statement))
+    # 按 PostgreSQL 生成 EXPLAIN，SQLite 不支持 FORMAT JSON，执行失败
+    monkeypatch.setattr(db.get_bind().dialect, "name", "postgresql")
+    query = _query_in_list(db)
+    assert query_row_estimate(db, query) is None
+    assert any(s.startswith("SAVEPOINT") for s in statements)
+    assert any(s.startswith("ROLLBACK TO SAVEPOINT") for s in statements)
+    # 会话仍可用，回退为精确计数
+    page = paginate_query(db, query, 1, 2, "estimate")
+    assert page.total == 3 and not page.estimated
+
+
+def _query_in_list(db):
+    from sqlalchemy.orm import Query
+
+    query = db.query(LhbDetail) if db is not None else Query(LhbDetail)
+    return query.filter(LhbDetail.stock_code.in_(["000001", "000002", "000003"])).order_by(LhbDetail.id)
@@ -0,0 +1,130 @@
+"""
+测试任务依赖图执行器
+"""
+import threading
+import time
+
+import pytest
+
+from app.tasks.dag_runner import DagRunner, TaskNode
+
+
+def sleeper(seconds, log=None, key=None, result=True):
+    def run():
+        if log is not None:
+            log.append(("start", key))
+        time.sleep(seconds)
+        if log is not None:
+            log.append(("end", key))
+        return result
+    return run
+
+
+def test_dependent_starts_before_unrelated_slow_task_finishes():
+    log = []
+    runner = DagRunner([
+        TaskNode("slow", sleeper(0.3, log, "slow")),
+        TaskNode("zt_pool", sleeper(0.05, log, "zt_pool")),
+        TaskNode("stock_history", sleeper(0.05, log, "stock_history"), deps=("zt_pool",)),
+    ], max_workers=3)
+    report = runner.run()
+
+    assert all(run.status == "success" for run in report.runs.values())
+    assert log.index(("start", "stock_history")) < log.index(("end", "slow"))
+    assert report.runs["stock_history"].started_at >= report.runs["zt_pool"].finished_at
+
+
+def test_failed_dependency_skips_descendants():
+    runner = DagRunner([
+        TaskNode("a", sleeper(0, result=False)),
+        TaskNode("b", sleeper(0), deps=("a",)),
+        TaskNode("c", sleeper(0), deps=("b",)),
+        TaskNode("d", sleeper(0)),
+    ])
+    runs = runner.run().runs
+    assert runs["a"].status == "failed"
+    assert runs["b"].status == "skipped" and runs["c"].status == "skipped"
+    assert runs["d"].status == "success"
+
+
+def test_resource_limits_and_critical_path_priority():
+    lock = threading.Lock()
+    active = {"n": 0, "max": 0}
+    order = []
+
+    def task(key):
+        def run():
+            with lock:
+                order.append(key)
+                active["n"] += 1
+                active["max"] = max(active["max"], active["n"])
+            time.sleep(0.02)
+            with lock:
+                active["n"] -= 1
+            return True
+        return run
+
+    nodes = [TaskNode(f"t{i}", task(f"t{i}"), resources=("akshare",), estimate=1) for i in range(5)]
+    # head 后面还挂着长任务，应当最先调度
+    nodes.append(TaskNode("head", task("head"), resources=("akshare",), estimate=1))
+    nodes.append(TaskNode("tail", task("tail"), deps=("head",), resources=("akshare",), estimate=100))
+    report = DagRunner(nodes, resource_limits={"akshare": 2}, max_workers=6).run()
+
+    assert active["max"] == 2
+    # head 先执行，tail 一就绪就排在其余短任务之前
+    assert order[0] == "head" and order.index("tail") <= 3
+    assert all(run.status == "success" for run in report.runs.values())
+
+
+def test_critical_path():
+    report = DagRunner([
+        TaskNode("a", sleeper(0.05)),
+        TaskNode("b", sleeper(0.05), deps=("a",)),
+        TaskNode("c", sleeper(0.02)),
+    ]).run()
+    path, span = report.critical_path()
+    assert path == ["a", "b"]
+    assert span >= 0.1
+
+
+def test_invalid_graph():
+    with pytest.raises(ValueError):
+        DagRunner([TaskNode("a", sleeper(0), deps=("missing",))])
+    with pytest.raises(ValueError):
+        DagRunner([TaskNode("a", sleeper(0), deps=("b",)), TaskNode("b", sleeper(0), deps=("a",))])
+    with pytest.raises(ValueError):
+        DagRunner([TaskNode("a", sleeper(0), resources=("db",))], resource_limits={"db": 0})
+
+
+def test_unschedulable_node_skips_descendants():
+    finished = []
+    runner = DagRunner([
+        TaskNode("a", sleeper(0), resources=("db",)),
+        TaskNode("b", sleeper(0), deps=("a",)),
+        TaskNode("c", sleeper(0), deps=("b",)),
+    ], on_finish=lambda run: finished.append(run.key))
+    # 绕过构造校验，模拟运行期无法调度
+    runner.resource_limits["db"] = 0
+    runs = runner.run().runs
+    assert runs["a"].status == "failed"
+    assert runs["b"].status == "skipped" and runs["c"].status == "skipped"
+    assert finished == ["a", "b", "c"]
+
+
+def test_cancel_skips_pending_nodes():
+    cancel = threading.Event()
+    started = []
+
+    def first():
+        started.append("a")
+        cancel.set()
+        return True
+
+    runner = DagRunner([
+        TaskNode("a", first),
+        TaskNode("b", sleeper(0), deps=("a",)),
+        TaskNode("c", sleeper(0), deps=("b",)),
+    ], cancel=cancel)
+    runs = runner.run().runs
+    assert started == ["a"] and runs["a"].status == "success"
+    assert runs["b"].status == "skipped" and runs["c"].status == "skipped"
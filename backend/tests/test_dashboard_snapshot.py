@@ -0,0 +1,71 @@
+"""
+测试仪表盘每日概览
+"""
+from datetime import date
+
+import pytest
+from sqlalchemy import create_engine
+from sqlalchemy.orm import sessionmaker
+
+from app.models.daily_summary import DailySummary
+from app.models.fund_flow import ConceptFundFlow
+from app.models.index import IndexHistory
+from app.models.lhb import LhbDetail
+from app.models.sector import SectorHistory
+from app.models.zt_pool import ZtPool, ZtPoolDown
+from app.services.dashboard_service import LHB_TOP_COUNT, DashboardService
+
+
+DAY = date(2026, 1, 12)
+
+
+@pytest.fixture
+def db():
+    engine = create_engine("sqlite://")
+    for model in (DailySummary, ConceptFundFlow, IndexHistory, LhbDetail, SectorHistory, ZtPool, ZtPoolDown):
+        model.__table__.create(engine)
+    session = sessionmaker(bind=engine)()
+    for n in range(3):
+        session.add(ZtPool(date=DAY, stock_code=f"60000{n}", stock_name=f"涨停{n}"))
+    session.add(ZtPoolDown(date=DAY, stock_code="000001", stock_name="跌停"))
+    for n, change in enumerate((1.5, -0.5, 0, None, 2)):
+        session.add(SectorHistory(date=DAY, sector_code=f"BK{n}", sector_name=f"板块{n}", change_percent=change))
+    for n in range(12):
+        session.add(ConceptFundFlow(date=DAY, concept=f"概念{n}", net_amount=n * 100, index_change_percent=1))
+    for n in range(7):
+        session.add(LhbDetail(date=DAY, stock_code=f"30000{n}", stock_name=f"龙虎{n}", net_buy_amount=n - 2))
+    session.commit()
+    yield session
+    session.close()
+
+
+def test_compute_summary(db):
+    summary = DashboardService.compute_summary(db, DAY)
+    assert [summary["zt_count"], summary["zt_down_count"]] == [3, 1]
+    assert [summary["sector_rise_count"], summary["sector_fall_count"], summary["sector_total_count"]] == [2, 1, 5]
+    assert len(summary["top_concepts"]) == 10 and summary["top_concepts"][0]["concept"] == "概念11"
+    assert summary["lhb_count"] == 7 and summary["lhb_net_buy_amount"] == 7.0
+    assert len(summary["lhb_top"]) == LHB_TOP_COUNT and summary["lhb_top"][0]["stock_code"] == "300006"
+
+
+def test_snapshot_built_by_sync_and_read_only_on_get(db):
+    # 没有概览行时现场汇总返回，但读取不写入
+    snapshot = DashboardService.get_snapshot(db, DAY)
+    assert snapshot["date"] == DAY and snapshot["zt_count"] == 3
+    assert db.query(DailySummary).count() == 0
+    DashboardService.build_snapshot(db, DAY)
+    assert DashboardService.get_snapshot(db, DAY) == snapshot
+    assert db.query(DailySummary).count() == 1
+
+    db.add(ZtPool(date=DAY, stock_code="600009", stock_name="新增"))
+    db.commit()
+    # 已有概览行时直接读取，重新同步后重算
+    assert DashboardService.get_snapshot(db, DAY)["zt_count"] == 3
+    DashboardService.build_snapshot(db, DAY)
+    assert DashboardService.get_snapshot(db, DAY)["zt_count"] == 4
+    assert db.query(DailySummary).count() == 1
+
+
+def test_no_snapshot_without_data(db):
+    assert DashboardService.get_snapshot(db, date(2026, 1, 11)) is None
+    assert db.query(DailySummary).count() == 0
@@ -0,0 +1,91 @@
+"""
+测试流式导出
+"""
+import csv
+import io
+import json
+from datetime import date
+
+import pytest
+from sqlalchemy import create_engine
+from sqlalchemy.orm import sessionmaker
+
+from app.models.fund_flow import StockFundFlow
+from app.models.lhb import InstitutionTradingStatistics
+from app.schemas.fund_flow import StockFundFlowItem
+from app.schemas.lhb import InstitutionTradingStatisticsAggregatedItem
+from app.services.fund_flow_service import FundFlowService
+from app.services.institution_trading_service import InstitutionTradingService
+from app.utils import export
+from app.utils.export import ExportFormatError, stream_export
+
+
+DAYS = [date(2026, 1, 12), date(2026, 1, 13), date(2026, 1, 14)]
+
+
+@pytest.fixture
+def db():
+    engine = create_engine("sqlite://")
+    StockFundFlow.__table__.create(engine)
+    InstitutionTradingStatistics.__table__.create(engine)
+    session = sessionmaker(bind=engine)()
+    for day in DAYS:
+        for n in range(4):
+            session.add(StockFundFlow(
+                date=day, stock_code=f"00000{n}", stock_name=f"股票{n}",
+                main_net_inflow=n * 1000 - 1500, current_price=10 + n, is_limit_up=n == 3, is_lhb=False,
+            ))
+            if DAYS.index(day) <= n:
+                # 股票 n 上榜 min(n + 1, 3) 次，股票 0 没有成交额（占比为空，排在最后）
+                session.add(InstitutionTradingStatistics(
+                    date=day, stock_code=f"00000{n}", stock_name=f"股票{n}",
+                    institution_net_buy_amount=(n - 1) * 100, institution_buy_amount=500,
+                    institution_sell_amount=500 - (n - 1) * 100, market_total_amount=10000 * n if n else None,
+                ))
+    session.commit()
+    yield session
+    session.close()
+
+
+def test_csv_export_streams_in_batches(db):
+    rows = FundFlowService.iter_fund_flow_history(db, None, DAYS[0], DAYS[-1], batch_size=5)
+    chunks = list(stream_export(StockFundFlowItem, rows, "csv", batch_size=5))
+    # 表头 + 12 行分 3 批
+    assert len(chunks) == 4
+    text = b"".join(chunks).decode("utf-8-sig")
+    records = list(csv.DictReader(io.StringIO(text)))
+    assert len(records) == 12
+    assert list(records[0]) == list(StockFundFlowItem.model_fields)
+    assert records[0]["date"] == "2026-01-12" and records[0]["stock_name"] == "股票0"
+    assert records[3]["is_limit_up"] == "True"
+
+
+def test_ndjson_matches_schema(db):
+    rows = FundFlowService.iter_fund_flow_history(db, "000002", DAYS[0], DAYS[-1])
+    lines = b"".join(stream_export(StockFundFlowItem, rows, "ndjson")).decode("utf-8").splitlines()
+    items = [json.loads(line) for line in lines]
+    assert [item["date"] for item in items] == [d.isoformat() for d in DAYS]
+    assert items[0]["main_net_inflow"] == 500.0
+
+
+def test_aggregated_export_matches_paginated_order(db):
+    for sort_by, expected in (("appear_count", None), ("net_buy_ratio", ["000003", "000002", "000001", "000000"])):
+        paged, total = InstitutionTradingService.get_aggregated_statistics(
+            db, DAYS[0], DAYS[-1], page_size=100, sort_by=sort_by
+        )
+        exported = list(InstitutionTradingService.iter_aggregated_statistics(
+            db, DAYS[0], DAYS[-1], batch_size=2, sort_by=sort_by
+        ))
+        assert total == len(exported) == 4
+        assert [i["stock_code"] for i in exported] == [i["stock_code"] for i in paged]
+        if expected:
+            assert [i["stock_code"] for i in exported] == expected
+        InstitutionTradingStatisticsAggregatedItem.model_validate(exported[0])
+
+
+def test_unknown_or_unavailable_format(monkeypatch):
+    with pytest.raises(ExportFormatError):
+        stream_export(StockFundFlowItem, [], "xlsx")
+    monkeypatch.setattr(export, "pyarrow", None)
+    with pytest.raises(ExportFormatError):
+        stream_export(StockFundFlowItem, [], "parquet")
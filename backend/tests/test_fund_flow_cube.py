@@ -0,0 +1,132 @@
+"""
+测试个股资金流内存立方体
+"""
+import threading
+from datetime import date
+
+import pytest
+from sqlalchemy import create_engine
+from sqlalchemy.orm import sessionmaker
+
+from app.models.fund_flow import StockFundFlow
+from app.utils.fund_flow_cube import FundFlowCube
+
+
+DATES = [date(2026, 1, 12), date(2026, 1, 13), date(2026, 1, 14)]
+
+
+@pytest.fixture
+def db():
+    engine = create_engine("sqlite://")
+    StockFundFlow.__table__.create(engine)
+    session = sessionmaker(bind=engine)()
+    rows = {
+        "000001": [(100, 10.0, False), (200, 10.5, True), (-50, 10.2, False)],
+        "000002": [(300, 20.0, False), (None, 20.1, False), (100, 19.8, False)],
+        "000003": [(50, 5.0, False), (60, 5.1, False)],
+    }
+    for code, values in rows.items():
+        for d, (net, price, limit_up) in zip(DATES, values):
+            session.add(StockFundFlow(
+                date=d, stock_code=code, stock_name=f"股票{code[-1]}",
+                main_net_inflow=net, main_inflow=abs(net or 0) * 2, current_price=price,
+                is_limit_up=limit_up, is_lhb=False,
+            ))
+    session.commit()
+    yield session
+    session.close()
+
+
+@pytest.fixture
+def cube(db):
+    cube = FundFlowCube(ttl_seconds=3600)
+    cube.ensure(db, DATES[0], DATES[-1])
+    return cube
+
+
+def test_range_aggregation(cube):
+    items, total = cube.aggregate(DATES[0], DATES[-1])
+    assert total == 3
+    assert [(i["stock_code"], i["main_net_inflow"]) for i in items] == [
+        ("000002", 400.0), ("000001", 250.0), ("000003", 110.0),
+    ]
+    first = items[1]
+    # 最新价取窗口内最后一天，涨停任意一天为真即为真
+    assert first["date"] == DATES[2] and first["current_price"] == 10.2 and first["is_limit_up"]
+    # 000003 最后一天没有数据
+    assert items[2]["date"] == DATES[1]
+
+
+def test_filters_sort_and_page(cube):
+    items, total = cube.aggregate(DATES[1], DATES[2], sort_by="current_price", order="asc", offset=1, limit=1)
+    assert total == 3 and [i["stock_code"] for i in items] == ["000001"]
+
+    items, total = cube.aggregate(DATES[0], DATES[2], is_limit_up=True)
+    assert [i["stock_code"] for i in items] == ["000001"]
+
+    items, total = cube.aggregate(DATES[0], DATES[2], name_predicate=lambda name: name.endswith("3"))
+    assert total == 1 and items[0]["main_net_inflow"] == 110.0
+
+    mask = cube.consecutive_inflow_mask(DATES, 0)
+    assert [cube.codes[i] for i in mask.nonzero()[0]] == []
+    mask = cube.consecutive_inflow_mask(DATES[:2], 0)
+    assert {cube.codes[i] for i in mask.nonzero()[0]} == {"000001", "000003"}
+
+
+def test_query_holds_lock_across_steps(db):
+    cube = FundFlowCube(max_span_days=3, ttl_seconds=3600)
+    aggregate = cube.aggregate
+    threads = []
+
+    def interleaved(*args, **kwargs):
+        # 加载和掩码之后、汇总之前，另一个请求试图重置常驻窗口
+        thread = threading.Thread(target=cube.reset)
+        thread.start()
+        thread.join(0.1)
+        threads.append(thread)
+        return aggregate(*args, **kwargs)
+
+    cube.aggregate = interleaved
+    items, total = cube.query(db, DATES[1], DATES[2], consecutive_dates=DATES[:2], min_net_inflow=0)
+    assert threads[0].is_alive()
+    assert total == 2 and [i["stock_code"] for i in items] == ["000001", "000003"]
+    threads[0].join()
+    assert len(cube) == 0
+
+
+def test_history_query_keeps_resident_window(db, cube):
+    cube.max_span_days = 3
+    items, total = cube.query(db, date(2026, 1, 9), date(2026, 1, 12))
+    assert total == 3
+    # 向更早回溯超出容量时使用临时立方体
+    assert cube.coverage == (DATES[0], DATES[-1])
+
+
+def test_invalidate_reloads_dates(db, cube):
+    db.query(StockFundFlow).filter(
+        StockFundFlow.stock_code == "000003", StockFundFlow.date == DATES[1]
+    ).update({"main_net_inflow": 1000})
+    db.add(StockFundFlow(date=date(2026, 1, 15), stock_code="000004", stock_name="股票4", main_net_inflow=5))
+    db.commit()
+
+    cube.invalidate(DATES[1])
+    cube.ensure(db, DATES[0], date(2026, 1, 15))
+    items, total = cube.aggregate(DATES[0], date(2026, 1, 15), limit=1)
+    assert total == 4 and items[0]["stock_code"] == "000003" and items[0]["main_net_inflow"] == 1050.0
+
+
+def test_service_uses_cube(db, monkeypatch):
+    from app.models.stock_concept import StockConcept, StockConceptMapping
+    from app.services.fund_flow_service import FundFlowService
+    import app.utils.fund_flow_cube as module
+
+    StockConcept.__table__.create(db.get_bind())
+    StockConceptMapping.__table__.create(db.get_bind())
+    monkeypatch.setattr(module, "_cube", None)
+
+    items, total = FundFlowService.get_fund_flow_list_by_date_range(
+        db, DATES[0], DATES[2], stock_name="股票", page=1, page_size=2
+    )
+    assert total == 3
+    assert [(i.stock_code, float(i.main_net_inflow)) for i in items] == [("000002", 400.0), ("000001", 250.0)]
+    assert items[0]._concepts == []
@@ -0,0 +1,141 @@
+"""
+测试概念/行业资金流日汇总
+"""
+from datetime import date
+
+import pytest
+from sqlalchemy import create_engine
+from sqlalchemy.orm import sessionmaker
+
+from app.models.fund_flow import ConceptFundFlow, ConceptFundFlowRollup
+from app.services.fund_flow_rollup_service import FundFlowRollupService
+from app.utils.trade_calendar import TradeCalendar
+
+
+DAYS = [date(2026, 1, d) for d in (5, 6, 7, 8, 9, 12, 13)]
+# 每个交易日的概念净额（缺失表示当天未进入前 limit 名）
+NET = {
+    "人工智能": [10, 20, 30, 40, 50, 60, 70],
+    "机器人": [5, None, -5, 15, 25, -10, 5],
+    "芯片": [None, None, 100, -50, None, None, 1],
+}
+
+
+@pytest.fixture
+def db(monkeypatch):
+    import app.utils.trade_calendar as calendar_module
+
+    monkeypatch.setattr(calendar_module, "_calendar", TradeCalendar(DAYS))
+    engine = create_engine("sqlite://")
+    ConceptFundFlow.__table__.create(engine)
+    ConceptFundFlowRollup.__table__.create(engine)
+    session = sessionmaker(bind=engine)()
+    yield session
+    session.close()
+
+
+def ingest(db, day_index):
+    for concept, values in NET.items():
+        if values[day_index] is not None:
+            db.add(ConceptFundFlow(date=DAYS[day_index], concept=concept, net_amount=values[day_index]))
+    db.commit()
+    return FundFlowRollupService.rollup_day(db, "concept", DAYS[day_index])
+
+
+def rollup(db, day, concept):
+    return db.query(ConceptFundFlowRollup).filter_by(date=day, concept=concept).one()
+
+
+def expected_sum(concept, start, end):
+    return sum(v or 0 for d, v in zip(DAYS, NET[concept]) if start <= d <= end)
+
+
+def test_incremental_rollup(db):
+    for i in range(len(DAYS)):
+        assert ingest(db, i) == sum(1 for values in NET.values() if values[i] is not None)
+
+    last = rollup(db, DAYS[-1], "人工智能")
+    assert float(last.cum_net_amount) == 280
+    assert float(last.net_amount_5d) == 30 + 40 + 50 + 60 + 70
+    assert float(last.net_amount_10d) == 280
+    assert last.net_amount_rank == 1
+    # 中间几天缺失的概念，近5日净额只包含窗口内有数据的日期
+    assert float(rollup(db, DAYS[-1], "芯片").net_amount_5d) == 100 - 50 + 1
+    assert float(rollup(db, DAYS[-1], "机器人").net_amount_5d) == -5 + 15 + 25 - 10 + 5
+    assert rollup(db, DAYS[2], "芯片").net_amount_rank == 1
+
+
+def test_range_sum_matches_scan(db):
+    for i in range(len(DAYS)):
+        ingest(db, i)
+    for start, end in [(DAYS[1], DAYS[4]), (DAYS[0], DAYS[-1]), (DAYS[5], DAYS[5]), (date(2026, 1, 10), DAYS[-1])]:
+        sums = FundFlowRollupService.range_net_amounts(db, "concept", start, end)
+        for concept in NET:
+            rows_in_range = any(v is not None for d, v in zip(DAYS, NET[concept]) if start <= d <= end)
+            if rows_in_range:
+                assert sums[concept] == expected_sum(concept, start, end)
+            else:
+                assert concept not in sums
+
+
+def test_backfill_rebuilds_later_days(db):
+    for i in range(len(DAYS)):
+        if i != 2:
+            ingest(db, i)
+    assert float(rollup(db, DAYS[-1], "芯片").cum_net_amount) == -49
+
+    # 补录 1月7日，之后各日的累计值一起重算
+    ingest(db, 2)
+    assert float(rollup(db, DAYS[-1], "芯片").cum_net_amount) == 51
+    assert float(rollup(db, DAYS[-1], "人工智能").cum_net_amount) == 280
+
+
+def test_missing_days_are_rolled_up(db):
+    # 前几天的原始数据由其它入口写入，没有汇总
+    for i in range(3):
+        for concept, values in NET.items():
+            if values[i] is not None:
+                db.add(ConceptFundFlow(date=DAYS[i], concept=concept, net_amount=values[i]))
+    db.commit()
+
+    ingest(db, 3)
+    assert db.query(ConceptFundFlowRollup).filter_by(date=DAYS[0]).count() == 2
+    assert float(rollup(db, DAYS[3], "人工智能").cum_net_amount) == 100
+
+
+def test_concept_queries_use_rollups(db):
+    from app.schemas.fund_flow import ConceptDateRangeCondition
+    from app.services.fund_flow_service import FundFlowService
+
+    for i in range(len(DAYS)):
+        ingest(db, i)
+
+    # 净额条件按单日判断：范围内芯片有一天 100；汇总尚未生成的概念也能匹配
+    db.add(ConceptFundFlow(date=DAYS[1], concept="新概念", net_amount=200))
+    db.commit()
+    condition = ConceptDateRangeCondition(
+        date_range={"start": DAYS[1], "end": DAYS[4]}, net_amount={"min": 100}
+    )
+    items, total = FundFlowService.filter_concept_fund_flow_by_conditions(
+        db, [condition], sort_by="date", order="asc"
+    )
+    assert total == 3 and {item["concept"] for item in items} == {"芯片", "新概念"}
+    assert items[1]["concept"] == "芯片" and float(items[1]["cum_net_amount"]) == 100
+    assert items[1]["match_conditions"][0]["range_net_amount"] == 50
+
+    # 净额合计按范围内前缀和相减判断：人工智能 140、机器人 35、芯片 50
+    condition = ConceptDateRangeCondition(
+        date_range={"start": DAYS[1], "end": DAYS[4]}, range_net_amount={"min": 100}
+    )
+    items, total = FundFlowService.filter_concept_fund_flow_by_conditions(db, [condition])
+    assert total == 4 and {item["concept"] for item in items} == {"人工智能"}
+    assert items[0]["match_conditions"][0]["range_net_amount"] == 140
+
+    condition = ConceptDateRangeCondition(date_range={"start": DAYS[1], "end": DAYS[4]}, inflow={"min": 1})
+    assert FundFlowService.filter_concept_fund_flow_by_conditions(db, [condition]) == ([], 0)
+
+    items, total = FundFlowService.get_concept_fund_flow_by_date_range(
+        db, DAYS[5], DAYS[6], concepts=["芯"], sort_by="net_amount_rank", order="asc"
+    )
+    assert total == 1
+    assert items[0]["range_net_amount"] == 1 and float(items[0]["net_amount_5d"]) == 51
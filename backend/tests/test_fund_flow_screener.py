@@ -0,0 +1,116 @@
+"""
+测试连续N日净流入筛选原语
+"""
+from datetime import date
+
+import pytest
+from sqlalchemy import create_engine
+from sqlalchemy.orm import sessionmaker
+
+from app.models.fund_flow import StockFundFlow
+from app.services.fund_flow_screener import FundFlowScreener
+
+
+DATES = [date(2026, 1, 12), date(2026, 1, 13), date(2026, 1, 14)]
+
+
+@pytest.fixture
+def db():
+    engine = create_engine("sqlite://")
+    StockFundFlow.__table__.create(engine)
+    session = sessionmaker(bind=engine)()
+    rows = {
+        # 每天都>100
+        "000001": [200, 300, 150],
+        # 有一天等于阈值
+        "000002": [200, 100, 150],
+        # 缺一天数据
+        "000003": [200, 300],
+        # 有一天为空
+        "000004": [200, None, 150],
+    }
+    for code, values in rows.items():
+        for d, value in zip(DATES, values):
+            session.add(StockFundFlow(date=d, stock_code=code, stock_name=code, main_net_inflow=value))
+    session.commit()
+    yield session
+    session.close()
+
+
+def test_consecutive_inflow_codes(db):
+    codes = FundFlowScreener.get_consecutive_inflow_codes(db, DATES, 100)
+    assert codes == {"000001"}
+
+
+def test_consecutive_inflow_empty_dates(db):
+    assert FundFlowScreener.get_consecutive_inflow_codes(db, [], 100) == set()
+
+
+def make_condition(start, end, min_inflow=None, max_inflow=None, limit_up=None):
+    from app.schemas.fund_flow import DateRange, DateRangeCondition, LimitUpCountRange, NetInflowRange
+
+    return DateRangeCondition(
+        date_range=DateRange(start=start, end=end),
+        main_net_inflow=NetInflowRange(min=min_inflow, max=max_inflow),
+        limit_up_count=LimitUpCountRange(min=limit_up[0], max=limit_up[1]) if limit_up else None,
+    )
+
+
+@pytest.fixture
+def screen_db(db):
+    from app.models.zt_pool import ZtPool
+
+    ZtPool.__table__.create(db.get_bind())
+    db.add(ZtPool(date=DATES[0], stock_code="000001", stock_name="000001"))
+    db.add(ZtPool(date=DATES[1], stock_code="000001", stock_name="000001"))
+    db.add(ZtPool(date=DATES[2], stock_code="000002", stock_name="000002"))
+    db.commit()
+    return db
+
+
+def run_screen(db, conditions, **kwargs):
+    query = FundFlowScreener.multi_condition_query(conditions, **kwargs)
+    return db.execute(query).all()
+
+
+def test_multi_condition_intersection(screen_db):
+    rows = run_screen(screen_db, [
+        make_condition(DATES[0], DATES[0], min_inflow=200),
+        make_condition(DATES[1], DATES[2], max_inflow=150),
+    ], sort_by="stock_code", order="asc")
+    # 第一个条件命中 4 只，第二个条件命中 000001(150)、000002(100/150)、000004(150)
+    assert [row.stock_code for row in rows] == ["000001", "000002", "000004"]
+    assert rows[0].total == 3
+    assert (rows[0].cond_0_count, rows[0].cond_1_count) == (4, 3)
+
+
+def test_limit_up_count_join(screen_db):
+    rows = run_screen(screen_db, [make_condition(DATES[0], DATES[2], limit_up=(2, None))])
+    assert [row.stock_code for row in rows] == ["000001"]
+    # 未涨停按 0 次计
+    rows = run_screen(screen_db, [make_condition(DATES[0], DATES[2], limit_up=(None, 0))])
+    assert {row.stock_code for row in rows} == {"000003", "000004"}
+
+
+def test_filter_service_pages_details(screen_db):
+    from app.models.stock_concept import StockConcept, StockConceptMapping
+    from app.services.fund_flow_service import FundFlowService
+
+    StockConcept.__table__.create(screen_db.get_bind())
+    StockConceptMapping.__table__.create(screen_db.get_bind())
+    conditions = [make_condition(DATES[0], DATES[2], min_inflow=150, limit_up=(1, None))]
+
+    items, total = FundFlowService.filter_fund_flow_by_conditions(
+        screen_db, conditions, page=1, page_size=1
+    )
+    assert total == 2
+    assert [item["stock_code"] for item in items] == ["000001"]
+    detail = items[0]["match_conditions"][0]
+    assert detail["matched_count"] == 2
+    assert [rec["date"] for rec in detail["matched_records"]] == [d.isoformat() for d in DATES]
+    assert detail["limit_up_count"] == 2
+
+    items, total = FundFlowService.filter_fund_flow_by_conditions(
+        screen_db, conditions, page=3, page_size=1
+    )
+    assert (items, total) == ([], 2)
@@ -0,0 +1,141 @@
+"""
+测试游标（keyset）分页
+"""
+from datetime import date, datetime, timedelta
+
+import pytest
+from sqlalchemy import create_engine
+from sqlalchemy.orm import sessionmaker
+
+from app.models.lhb import LhbDetail
+from app.models.task_execution import TaskExecution, TaskStatus
+from app.utils.keyset import (
+    InvalidCursorError,
+    SortKey,
+    decode_cursor,
+    encode_cursor,
+    keyset_paginate,
+    sort_signature,
+)
+
+
+DAY = date(2026, 1, 12)
+
+
+@pytest.fixture
+def db():
+    engine = create_engine("sqlite://")
+    LhbDetail.__table__.create(engine)
+    TaskExecution.__table__.create(engine)
+    session = sessionmaker(bind=engine)()
+    # 净买额有重复值和空值，验证 id 兜底排序与 NULL 排在最后
+    amounts = [500, 300, None, 300, 800, None, 300, 100, 500, 0]
+    for n, amount in enumerate(amounts):
+        session.add(LhbDetail(
+            date=DAY, stock_code=f"{n:06d}", stock_name=f"股票{n}", net_buy_amount=amount,
+        ))
+    session.add(LhbDetail(date=DAY + timedelta(days=1), stock_code="999999", stock_name="次日", net_buy_amount=900))
+    session.commit()
+    yield session
+    session.close()
+
+
+def _walk(query, keys, page_size, **kwargs):
+    pages, cursor = [], None
+    while True:
+        page = keyset_paginate(query, keys, page_size, cursor=cursor, signature="lhb", **kwargs)
+        pages.append(page.items)
+        if not page.has_more:
+            return pages
+        cursor = page.next_cursor
+
+
+@pytest.mark.parametrize("descending", [True, False])
+def test_pages_match_full_ordering(db, descending):
+    query = db.query(LhbDetail).filter(LhbDetail.date == DAY)
+    keys = [SortKey(LhbDetail.net_buy_amount, descending=descending), SortKey(LhbDetail.id, descending=descending)]
+    expected = query.order_by(*[key.order_by() for key in keys]).all()
+
+    pages = _walk(query, keys, 3)
+    assert [len(p) for p in pages] == [3, 3, 3, 1]
+    flat = [item.id for page in pages for item in page]
+    assert flat == [item.id for item in expected]
+    # NULL 排在最后
+    assert [item.net_buy_amount for item in pages[-1]] == [None]
+
+
+def test_predicate_fills_page_across_batches(db):
+    query = db.query(LhbDetail).filter(LhbDetail.date == DAY)
+    keys = [SortKey(LhbDetail.net_buy_amount, descending=True), SortKey(LhbDetail.id, descending=True)]
+    pages = _walk(query, keys, 2, predicate=lambda item: int(item.stock_code) % 2 == 0)
+    codes = [item.stock_code for page in pages for item in page]
+    assert all(int(code) % 2 == 0 for code in codes)
+    assert len(codes) == 5
+
+
+def test_cursor_rejects_other_sort_and_garbage(db):
+    keys = [SortKey(LhbDetail.net_buy_amount, descending=True), SortKey(LhbDetail.id, descending=True)]
+    token = encode_cursor([300, 4], sort_signature("lhb", keys))
+    assert decode_cursor(token, sort_signature("lhb", keys)) == [300, 4]
+
+    other = [SortKey(LhbDetail.net_buy_amount), SortKey(LhbDetail.id)]
+    with pytest.raises(InvalidCursorError):
+        decode_cursor(token, sort_signature("lhb", other))
+    with pytest.raises(InvalidCursorError):
+        decode_cursor("not-a-cursor", "lhb")
+
+
+def test_task_executions_cursor_mode(db):
+    from app.services.task_service import TaskService
+
+    start = datetime(2026, 1, 12, 9, 0)
+    for n in range(5):
+        # 两条记录开始时间相同，由 id 决定先后
+        db.add(TaskExecution(
+            task_name=f"任务{n}", task_type="zt_pool", status=TaskStatus.SUCCESS,
+            start_time=start + timedelta(minutes=min(n, 3)), triggered_by="manual",
+        ))
+    db.commit()
+
+    first = TaskService.get_task_executions(db, page_size=2, cursor="")
+    assert first["total"] is None and first["next_cursor"]
+    seen = [e.task_name for e in first["items"]]
+    cursor = first["next_cursor"]
+    while cursor:
+        result = TaskService.get_task_executions(db, page_size=2, cursor=cursor)
+        seen += [e.task_name for e in result["items"]]
+        cursor = result["next_cursor"]
+    assert seen == ["任务4", "任务3", "任务2", "任务1", "任务0"]
+
+    with pytest.raises(InvalidCursorError):
+        TaskService.get_task_executions(db, page_size=2, cursor="bad")
+
+
+def test_fund_flow_cube_after_cursor():
+    from tests.test_fund_flow_cube import DATES
+    from app.models.fund_flow import StockFundFlow
+    from app.utils.fund_flow_cube import FundFlowCube
+
+    engine = create_engine("sqlite://")
+    StockFundFlow.__table__.create(engine)
+    session = sessionmaker(bind=engine)()
+    for n, net in enumerate([100, 300, 100, None, 250]):
+        session.add(StockFundFlow(
+            date=DATES[0], stock_code=f"00000{n}", stock_name=f"股票{n}",
+            main_net_inflow=net, current_price=10 + n, is_limit_up=False, is_lhb=False,
+        ))
+    session.commit()
+    cube = FundFlowCube(ttl_seconds=3600)
+    cube.ensure(session, DATES[0], DATES[0])
+
+    full, total = cube.aggregate(DATES[0], DATES[0])
+    walked, after = [], None
+    while True:
+        items, _ = cube.aggregate(DATES[0], DATES[0], limit=2, after=after)
+        walked += items
+        if len(items) < 2:
+            break
+        after = (items[-1]["main_net_inflow"], items[-1]["stock_code"])
+    assert [i["stock_code"] for i in walked] == [i["stock_code"] for i in full]
+    assert total == 5
+    session.close()
@@ -0,0 +1,83 @@
+"""
+测试性能埋点
+"""
+import pandas as pd
+import pytest
+from fastapi import APIRouter, FastAPI
+from fastapi.testclient import TestClient
+from sqlalchemy import create_engine, text
+
+from app.config import settings
+from app.utils import perf
+from app.utils.akshare_utils import safe_akshare_call
+
+
+@pytest.fixture(autouse=True)
+def registry(monkeypatch):
+    monkeypatch.setattr(settings, "PERF_METRICS_ENABLED", True)
+    monkeypatch.setattr(perf, "_registry", None)
+    yield perf.get_perf_registry()
+    monkeypatch.setattr(perf, "_registry", None)
+
+
+def test_scope_counts_queries_and_detects_n_plus_one(registry, monkeypatch):
+    monkeypatch.setattr(settings, "PERF_N_PLUS_ONE_THRESHOLD", 5)
+    engine = create_engine("sqlite://")
+    perf.install_query_hooks(engine)
+    with engine.connect() as conn, perf.perf_scope("sync", "lhb") as scope:
+        conn.execute(text("SELECT 1"))
+        for n in range(6):
+            conn.execute(text("SELECT :n + 1"), {"n": n})
+    assert scope.db_queries == 7 and scope.phases()["db_queries"] == 7
+    assert [event["count"] for event in registry.n_plus_one_events] == [6]
+    assert registry.n_plus_one.samples() == {("sync", "lhb"): 1}
+    assert registry.db_query.series()[("sync",)][2] == 7
+
+
+def test_statement_shape_folds_placeholders():
+    assert perf.statement_shape("SELECT * FROM t\n WHERE id IN (%(id_1)s, %(id_2)s, %(id_3)s)") == \
+        perf.statement_shape("SELECT * FROM t WHERE id IN (%(id_1)s)") == "SELECT * FROM t WHERE id IN (?)"
+
+
+def test_akshare_call_outcomes(registry):
+    def stock_ok():
+        return pd.DataFrame({"a": [1]})
+
+    def stock_empty():
+        return pd.DataFrame()
+
+    def stock_error():
+        raise RuntimeError("boom")
+
+    for func in (stock_ok, stock_empty, stock_error):
+        safe_akshare_call(func)
+    assert set(registry.akshare_call.series()) == {
+        ("stock_ok", "ok"), ("stock_empty", "empty"), ("stock_error", "error"),
+    }
+    text_output = registry.render_prometheus()
+    assert '# TYPE akshare_call_duration_seconds histogram' in text_output
+    assert 'akshare_call_duration_seconds_bucket{func="stock_ok",outcome="ok",le="+Inf"} 1' in text_output
+
+
+def test_middleware_records_route_template(registry):
+    inner = APIRouter()
+
+    @inner.get("/{date}")
+    def snapshot(date: str):
+        return {"date": date}
+
+    outer = APIRouter()
+    outer.include_router(inner, prefix="/dashboard")
+    app = FastAPI()
+    app.include_router(outer, prefix="/api/v1")
+    app.add_middleware(perf.PerfMiddleware)
+
+    client = TestClient(app)
+    for day in ("2026-01-12", "2026-01-13"):
+        response = client.get(f"/api/v1/dashboard/{day}")
+        assert response.headers["server-timing"].startswith("db;dur=")
+    client.get("/nowhere")
+    assert set(registry.http_duration.series()) == {
+        ("GET", "/api/v1/dashboard/{date}", 200), ("GET", "unmatched", 404),
+    }
+    assert registry.summary()["routes"][0]["count"] == 2
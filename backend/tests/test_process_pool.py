@@ -0,0 +1,85 @@
+"""
+测试同步任务工作进程池
+"""
+import os
+from datetime import date
+
+import pytest
+
+from app.config import settings
+from app.tasks import process_pool
+from app.tasks.process_pool import run_sync_job, sync_db_concurrency, worker_info
+from app.utils import query_cache
+from app.utils.query_cache import cached_query, invalidate_query_cache
+
+
+DAY = date(2026, 1, 12)
+
+
+def sync_zt_pool(target_date: date, fail: bool = False) -> str:
+    """模拟同步任务（在工作进程中执行）：写库后失效该日期的查询缓存"""
+    invalidate_query_cache("zt_pool", target_date)
+    if fail:
+        raise ValueError("同步失败")
+    return "ok"
+
+
+@pytest.fixture
+def process_mode(monkeypatch):
+    monkeypatch.setattr(settings, "SYNC_EXECUTION_MODE", "process")
+    monkeypatch.setattr(settings, "SYNC_PROCESS_WORKERS", 1)
+    monkeypatch.setattr(settings, "SYNC_PROCESS_DB_POOL_SIZE", 3)
+    yield
+    process_pool.shutdown_sync_process_pool()
+
+
+def test_thread_mode_runs_inline(monkeypatch):
+    monkeypatch.setattr(settings, "SYNC_EXECUTION_MODE", "thread")
+    assert run_sync_job(worker_info)["pid"] == os.getpid()
+
+
+def test_process_mode_uses_worker_with_own_pool(process_mode):
+    info = run_sync_job(worker_info)
+    assert info["pid"] != os.getpid()
+    assert info["mode"] == "process" and info["db_pool_size"] == 3
+    # 同一个工作进程复用
+    assert run_sync_job(worker_info)["pid"] == info["pid"]
+
+
+def test_static_method_target(process_mode):
+    from app.utils.sync_result import SyncResult
+
+    result = run_sync_job(SyncResult.success_result, message="ok", count=2)
+    assert result.success and result.count == 2
+
+
+def test_worker_invalidates_parent_query_cache(process_mode, monkeypatch):
+    monkeypatch.setattr(settings, "QUERY_CACHE_ENABLED", True)
+    monkeypatch.setattr(settings, "QUERY_CACHE_BACKEND", "memory")
+    monkeypatch.setattr(query_cache, "_query_cache", None)
+    loads = []
+
+    def read():
+        # 已收盘日期的缓存不过期，只能靠同步后的失效刷新
+        return cached_query("zt_pool.list", {"date": DAY}, lambda: loads.append(1) or len(loads),
+                            tags=[("zt_pool", DAY)], closed=True)
+
+    assert read() == 1 and read() == 1
+    assert run_sync_job(sync_zt_pool, target_date=DAY) == "ok"
+    assert read() == 2
+    # 任务失败前已触发的失效同样回传
+    with pytest.raises(ValueError):
+        run_sync_job(sync_zt_pool, target_date=DAY, fail=True)
+    assert read() == 3
+
+
+def test_sync_db_concurrency_capped_by_pool(monkeypatch):
+    monkeypatch.setattr(settings, "SYNC_DB_CONCURRENCY", 8)
+    monkeypatch.setattr(settings, "DB_POOL_SIZE", 10)
+    # 线程模式与 API 共用写库连接池，最多占一半
+    assert sync_db_concurrency() == 5
+    monkeypatch.setattr(process_pool, "_in_worker", True)
+    monkeypatch.setattr(settings, "DB_POOL_SIZE", 6)
+    assert sync_db_concurrency() == 5
+    monkeypatch.setattr(settings, "DB_POOL_SIZE", 1)
+    assert sync_db_concurrency() == 1
@@ -0,0 +1,119 @@
+"""
+测试热点接口查询缓存
+"""
+from datetime import date
+
+import pytest
+
+from app.utils.query_cache import MemoryCacheBackend, QueryCache, is_closed_date, make_key
+
+
+DAY = date(2026, 1, 14)
+
+
+@pytest.fixture
+def cache():
+    return QueryCache(MemoryCacheBackend(max_bytes=1024 * 1024), ttl_seconds=60)
+
+
+class Loader:
+    def __init__(self, value):
+        self.value = value
+        self.calls = 0
+
+    def __call__(self):
+        self.calls += 1
+        return self.value
+
+
+def test_key_normalizes_params():
+    assert make_key("e", {"date": DAY, "limit": 50, "concept": None}) == make_key("e", {"limit": 50, "date": "2026-01-14"})
+    assert make_key("e", {"date": DAY}) != make_key("other", {"date": DAY})
+    assert is_closed_date(DAY, today=date(2026, 1, 15))
+    assert not is_closed_date(DAY, today=DAY)
+    assert not is_closed_date(None)
+
+
+def test_read_through_and_tag_invalidation(cache):
+    loader = Loader({"total": 3})
+    args = ("zt_pool.analysis", {"date": DAY}, loader)
+    kwargs = {"tags": [("zt_pool", DAY)], "closed": True}
+
+    assert cache.get_or_load(*args, **kwargs) == {"total": 3}
+    assert cache.get_or_load(*args, **kwargs) == {"total": 3}
+    assert loader.calls == 1 and (cache.hits, cache.misses) == (1, 1)
+
+    # 其它表、其它日期的写入不影响
+    assert cache.invalidate("zt_pool", date(2026, 1, 13)) == 0
+    assert cache.invalidate("lhb_detail", DAY) == 0
+    assert cache.invalidate("zt_pool", DAY) == 1
+    cache.get_or_load(*args, **kwargs)
+    assert loader.calls == 2
+
+
+def test_range_entries_invalidated_by_any_date(cache):
+    loader = Loader(([], 0))
+    params = {"start_date": date(2026, 1, 1), "end_date": DAY}
+    cache.get_or_load("lhb.stocks_statistics", params, loader, tags=[("lhb_detail", None)], closed=True)
+    assert cache.invalidate("lhb_detail", date(2026, 1, 5)) == 1
+
+
+def test_open_date_expires(monkeypatch, cache):
+    import app.utils.query_cache as module
+
+    now = [1000.0]
+    monkeypatch.setattr(module.time, "time", lambda: now[0])
+    loader = Loader([1])
+    closed_loader = Loader([2])
+    cache.get_or_load("e", {"date": DAY}, loader, tags=[("t", DAY)], closed=False)
+    cache.get_or_load("e", {"date": date(2026, 1, 13)}, closed_loader, tags=[("t", None)], closed=True)
+
+    now[0] += 61
+    cache.get_or_load("e", {"date": DAY}, loader, tags=[("t", DAY)], closed=False)
+    cache.get_or_load("e", {"date": date(2026, 1, 13)}, closed_loader, tags=[("t", None)], closed=True)
+    assert (loader.calls, closed_loader.calls) == (2, 1)
+
+
+def test_lru_byte_limit():
+    backend = MemoryCacheBackend(max_bytes=250)
+    backend.set("a", b"x" * 100, None, ["t:*"])
+    backend.set("b", b"x" * 100, None, ["t:*"])
+    assert backend.get("a") is not None
+    backend.set("c", b"x" * 100, None, ["t:*"])
+    assert backend.get("b") is None
+    assert backend.get("a") is not None and backend.get("c") is not None
+    assert backend.stats()["size_bytes"] == 200 and backend.evictions == 1
+
+
+def test_invalidation_during_load_skips_write(cache):
+    # 加载期间同步任务提交并失效（按日期或整表），旧结果不能以不过期的方式留在缓存里
+    for invalidate in (lambda: cache.invalidate("zt_pool", DAY), lambda: cache.invalidate("zt_pool")):
+        def loader():
+            invalidate()
+            return {"total": 1}
+
+        args = ("zt_pool.analysis", {"date": DAY})
+        assert cache.get_or_load(*args, loader, tags=[("zt_pool", DAY)], closed=True) == {"total": 1}
+        fresh = Loader({"total": 2})
+        assert cache.get_or_load(*args, fresh, tags=[("zt_pool", DAY)], closed=True) == {"total": 2}
+        assert fresh.calls == 1
+        cache.invalidate("zt_pool")
+
+
+def test_queue_mode_memory_cache_expires_closed_dates(monkeypatch):
+    import app.utils.query_cache as query_cache
+    from app.config import settings
+
+    monkeypatch.setattr(settings, "QUERY_CACHE_ENABLED", True)
+    monkeypatch.setattr(settings, "QUERY_CACHE_BACKEND", "memory")
+    monkeypatch.setattr(settings, "SYNC_QUEUE_ENABLED", True)
+    monkeypatch.setattr(query_cache, "_query_cache", None)
+    now = [1000.0]
+    monkeypatch.setattr(query_cache.time, "time", lambda: now[0])
+
+    cache = query_cache.get_query_cache()
+    loader = Loader([1])
+    cache.get_or_load("e", {"date": DAY}, loader, tags=[("t", DAY)], closed=True)
+    now[0] += settings.QUERY_CACHE_TTL + 1
+    cache.get_or_load("e", {"date": DAY}, loader, tags=[("t", DAY)], closed=True)
+    assert loader.calls == 2
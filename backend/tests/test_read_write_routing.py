@@ -0,0 +1,142 @@
+"""
+测试读写分离会话和连接池指标
+"""
+from datetime import date
+
+import pytest
+from fastapi import Depends, FastAPI
+from fastapi.testclient import TestClient
+from sqlalchemy import create_engine, select, text, update
+from sqlalchemy.exc import TimeoutError as PoolTimeoutError
+from sqlalchemy.orm import Session, sessionmaker
+from sqlalchemy.pool import QueuePool
+
+from app.database import session as db_session
+from app.database.session import RoutingSession, get_db
+from app.models.zt_pool import ZtPool
+from app.utils.perf import get_perf_registry, metered_pool_class
+
+
+DAY = date(2026, 1, 12)
+
+
+def _engine(path, stock_name):
+    engine = create_engine(f"sqlite:///{path}")
+    ZtPool.__table__.create(engine)
+    with engine.begin() as conn:
+        conn.execute(ZtPool.__table__.insert(), {"id": 1, "date": DAY, "stock_code": "600000", "stock_name": stock_name})
+    return engine
+
+
+@pytest.fixture
+def engines(tmp_path):
+    reader = _engine(tmp_path / "replica.db", "副本")
+    writer = _engine(tmp_path / "primary.db", "主库")
+    yield reader, writer
+    reader.dispose()
+    writer.dispose()
+
+
+def _name(db: Session) -> str:
+    return db.execute(select(ZtPool.stock_name).where(ZtPool.id == 1)).scalar()
+
+
+def test_routing_session_reads_replica_until_write(engines):
+    reader, writer = engines
+    db = RoutingSession(read_bind=reader, write_bind=writer)
+    assert _name(db) == "副本"
+    assert db.get_bind(clause=select(ZtPool).with_for_update()) is writer
+
+    db = RoutingSession(read_bind=reader, write_bind=writer)
+    db.add(ZtPool(id=2, date=DAY, stock_code="600001", stock_name="新增"))
+    db.commit()
+    # 写入之后的查询改走写库
+    assert _name(db) == "主库"
+    assert db.execute(select(ZtPool.id).order_by(ZtPool.id)).scalars().all() == [1, 2]
+    db.close()
+
+    db = RoutingSession(read_bind=reader, write_bind=writer)
+    db.execute(update(ZtPool).where(ZtPool.id == 1).values(stock_name="改名"))
+    db.commit()
+    assert _name(db) == "改名"
+    db.close()
+
+    db = RoutingSession(read_bind=reader, write_bind=writer)
+    assert db.execute(text("SELECT COUNT(*) FROM zt_pool")).scalar() == 1
+    db.close()
+
+
+def test_get_db_routes_by_method(engines, monkeypatch):
+    reader, writer = engines
+    monkeypatch.setattr(db_session, "_engine", writer)
+    monkeypatch.setattr(db_session, "_SessionLocal", sessionmaker(bind=writer))
+    monkeypatch.setattr(db_session, "_read_engine", reader)
+    monkeypatch.setattr(db_session, "_ReadSessionLocal", sessionmaker(
+        class_=RoutingSession, read_bind=reader, write_bind=writer))
+
+    app = FastAPI()
+
+    @app.get("/name")
+    def read_name(db: Session = Depends(get_db)):
+        return _name(db)
+
+    @app.post("/name")
+    def write_name(db: Session = Depends(get_db)):
+        return _name(db)
+
+    client = TestClient(app)
+    assert client.get("/name").json() == "副本"
+    assert client.post("/name").json() == "主库"
+    # 不经请求调用（脚本）时使用写会话
+    generator = get_db()
+    assert _name(next(generator)) == "主库"
+    generator.close()
+
+
+def test_pool_metrics(tmp_path):
+    engine = create_engine(
+        f"sqlite:///{tmp_path / 'pool.db'}",
+        poolclass=metered_pool_class(QueuePool, "test_pool"),
+        pool_size=1, max_overflow=1, pool_timeout=0.05,
+    )
+    registry = get_perf_registry()
+    first = engine.connect()
+    second = engine.connect()
+    stats = registry.pool_stats()["test_pool"]
+    assert stats["checked_out"] == 2 and stats["peak_checked_out"] == 2
+    assert stats["saturation"] == 1.0
+    with pytest.raises(PoolTimeoutError):
+        engine.connect()
+    first.close()
+    second.close()
+
+    summary = registry.summary()["db_pools"]["test_pool"]
+    assert summary["checked_out"] == 0 and summary["timeouts"] == 1
+    assert summary["wait"]["count"] == 2
+    metrics = registry.render_prometheus()
+    assert 'db_pool_saturation{pool="test_pool"} 0' in metrics
+    assert 'db_pool_timeouts_total{pool="test_pool"} 1' in metrics
+
+    # dispose 重建连接池后仍按原名称记录
+    engine.dispose()
+    with engine.connect():
+        assert registry.pool_stats()["test_pool"]["checked_out"] == 1
+    engine.dispose()
+
+
+def test_pool_budget_caps_connections_per_process(monkeypatch):
+    from app.config import settings
+
+    sizes = db_session.pool_budget()
+    assert sum(sum(pair) for pair in sizes.values()) <= settings.DB_MAX_CONNECTIONS
+    assert sizes["read"] == (settings.DB_READ_POOL_SIZE, settings.DB_READ_MAX_OVERFLOW)
+
+    # 超出预算时写库优先，读库先压缩溢出连接
+    monkeypatch.setattr(settings, "DB_MAX_CONNECTIONS", 30)
+    monkeypatch.setattr(settings, "DB_POOL_SIZE", 10)
+    monkeypatch.setattr(settings, "DB_MAX_OVERFLOW", 10)
+    monkeypatch.setattr(settings, "DB_READ_POOL_SIZE", 8)
+    monkeypatch.setattr(settings, "DB_READ_MAX_OVERFLOW", 8)
+    assert db_session.pool_budget() == {"write": (10, 10), "read": (8, 2)}
+    monkeypatch.setattr(settings, "DB_MAX_CONNECTIONS", 12)
+    assert db_session.pool_budget() == {"write": (10, 1), "read": (1, 0)}
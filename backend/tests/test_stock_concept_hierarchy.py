@@ -0,0 +1,59 @@
+"""
+测试概念层级的递归查询展开
+"""
+import pytest
+from sqlalchemy import create_engine, event
+from sqlalchemy.orm import sessionmaker
+
+from app.models.stock_concept import StockConcept
+from app.services.stock_concept_service import StockConceptService
+
+
+@pytest.fixture
+def db():
+    engine = create_engine("sqlite://")
+    StockConcept.__table__.create(engine)
+    session = sessionmaker(bind=engine)()
+    # 1 ─┬─ 2 ── 4
+    #    └─ 3
+    # 5 ── 6
+    for id_, parent_id, level, path in [
+        (1, None, 1, "1"), (2, 1, 2, "1/2"), (3, 1, 2, "1/3"), (4, 2, 3, "1/2/4"),
+        (5, None, 1, "5"), (6, 5, 2, "5/6"),
+    ]:
+        session.add(StockConcept(id=id_, name=f"概念{id_}", parent_id=parent_id, level=level, path=path))
+    session.commit()
+    session.statements = []
+    event.listen(engine, "before_cursor_execute", lambda *args: session.statements.append(args[2]))
+    yield session
+    session.close()
+
+
+def test_expand_is_single_query(db):
+    expanded = StockConceptService.expand_concept_ids(db, [1, 5])
+    assert sorted(expanded) == [1, 2, 3, 4, 5, 6]
+    assert len(db.statements) == 1
+
+    db.statements.clear()
+    expanded = StockConceptService.expand_concept_ids(db, [4, 6], include_descendants=True, include_ancestors=True)
+    assert sorted(expanded) == [1, 2, 4, 5, 6]
+    assert len(db.statements) == 1
+
+
+def test_descendants_and_ancestors(db):
+    assert sorted(StockConceptService.get_all_descendant_ids(db, 1)) == [2, 3, 4]
+    assert StockConceptService.get_all_descendant_ids(db, 4) == []
+    assert StockConceptService.get_all_ancestor_ids(db, 4) == [2, 1]
+    assert [c.id for c in StockConceptService.get_descendants(db, 1)] == [2, 4, 3]
+    assert [c.id for c in StockConceptService.get_ancestors(db, 4)] == [2, 1]
+
+
+def test_tree_single_query(db):
+    tree = StockConceptService.get_tree(db, max_level=3)
+    assert len(db.statements) == 1
+    assert [n["concept"].id for n in tree] == [1, 5]
+    assert [n["concept"].id for n in tree[0]["children"]] == [2, 3]
+    assert [n["concept"].id for n in tree[0]["children"][0]["children"]] == [4]
+
+    shallow = StockConceptService.get_tree(db, max_level=1)
+    assert all(not n["children"] for n in shallow)
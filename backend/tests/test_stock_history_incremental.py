@@ -0,0 +1,67 @@
+"""
+测试股票历史行情增量同步的水位与获取计划
+"""
+from datetime import date
+
+import pytest
+from sqlalchemy import create_engine
+from sqlalchemy.orm import sessionmaker
+
+from app.models.stock_history import StockHistory
+from app.services.stock_history_service import StockHistoryService
+
+
+DAYS = [date(2026, 1, 12), date(2026, 1, 13), date(2026, 1, 14), date(2026, 1, 15)]
+START = date(2025, 10, 17)
+
+
+@pytest.fixture
+def db():
+    engine = create_engine("sqlite://")
+    StockHistory.__table__.create(engine)
+    session = sessionmaker(bind=engine)()
+    rows = {
+        # 数据完整，缺最后一天
+        "000001": DAYS[:3],
+        # 中间缺 1月13日
+        "000002": [DAYS[0], DAYS[2]],
+        # 已是最新
+        "000003": DAYS,
+        # 开头缺 1月12日
+        "000005": DAYS[1:3],
+    }
+    for code, days in rows.items():
+        for d in days:
+            session.add(StockHistory(date=d, stock_code=code, close_price=10))
+    session.commit()
+    yield session
+    session.close()
+
+
+def test_watermarks_single_query(db):
+    watermarks = StockHistoryService.get_watermarks(db, ["000001", "000002", "000004"], START)
+    assert watermarks["000001"] == (DAYS[0], DAYS[2], 3)
+    assert watermarks["000002"] == (DAYS[0], DAYS[2], 2)
+    assert "000004" not in watermarks
+
+
+def test_plan_history_fetch(db):
+    codes = ["000001", "000002", "000003", "000004", "000005"]
+    end_date = DAYS[3]
+    plan = StockHistoryService.plan_history_fetch(
+        codes,
+        StockHistoryService.get_watermarks(db, codes, START),
+        StockHistoryService.get_reference_dates(db, START, end_date),
+        START,
+        end_date,
+    )
+    assert plan == {
+        # 从水位日开始增量获取（重叠一天用于校验复权口径）
+        "000001": (DAYS[2], "incremental"),
+        # 有缺口，全量获取
+        "000002": (START, "full"),
+        # 没有数据，全量获取
+        "000004": (START, "full"),
+        # 已有数据晚于窗口内第一个交易日开始，全量获取
+        "000005": (START, "full"),
+    }
@@ -0,0 +1,54 @@
+"""
+测试基准测试用合成行情数据生成
+"""
+from datetime import date
+
+import pytest
+from sqlalchemy import create_engine
+from sqlalchemy.orm import sessionmaker
+
+from app.database.base import Base
+from scripts.synthetic_market_data import (
+    MarketSpec, SyntheticMarket, _metadata_tables, existing_rows, is_synthetic, load_market, trading_days,
+)
+
+
+SPEC = MarketSpec(stocks=60, days=30, end_date=date(2026, 1, 16), concepts_level1=3, concepts_per_parent=2)
+
+
+@pytest.fixture
+def db():
+    engine = create_engine("sqlite://")
+    Base.metadata.create_all(engine, tables=list(_metadata_tables().values()))
+    session = sessionmaker(bind=engine)()
+    yield session
+    session.close()
+
+
+def test_trading_days_skip_weekends():
+    days = trading_days(date(2026, 1, 19), 6)
+    assert days[-1] == date(2026, 1, 19)
+    assert len(days) == 6
+    assert all(d.weekday() < 5 for d in days)
+
+
+def test_same_seed_generates_same_data():
+    first, second = SyntheticMarket(SPEC), SyntheticMarket(SPEC)
+    assert first.codes == second.codes
+    assert list(first.stock_fund_flow_rows(5)) == list(second.stock_fund_flow_rows(5))
+    assert first.row_counts() == second.row_counts()
+
+
+def test_load_market_matches_row_counts(db):
+    market = SyntheticMarket(SPEC)
+    assert not is_synthetic(db)
+    load_market(db, market, progress=lambda *args: None)
+
+    assert existing_rows(db) == market.row_counts()
+    # 写入标记行，基准测试的写入场景据此确认目标库是合成数据集
+    assert is_synthetic(db)
+    # 已有数据时不覆盖，除非显式要求清空
+    with pytest.raises(ValueError):
+        load_market(db, market, progress=lambda *args: None)
+    load_market(db, market, truncate=True, progress=lambda *args: None)
+    assert existing_rows(db) == market.row_counts()
@@ -0,0 +1,107 @@
+"""
+测试 task_execution 任务队列与工作进程
+"""
+from datetime import date, datetime, timedelta
+
+import pytest
+from sqlalchemy import create_engine
+from sqlalchemy.orm import sessionmaker
+from sqlalchemy.pool import StaticPool
+
+from app.models.task_execution import TaskExecution, TaskStatus
+from app.services.task_queue_service import TaskQueueService
+from app.tasks.worker import SyncWorker
+
+
+@pytest.fixture
+def session_factory():
+    engine = create_engine("sqlite://", connect_args={"check_same_thread": False}, poolclass=StaticPool)
+    TaskExecution.__table__.create(engine)
+    return sessionmaker(bind=engine)
+
+
+def test_enqueue_dedupes_per_date(session_factory):
+    db = session_factory()
+    first, created = TaskQueueService.enqueue_sync_daily_data(db, ["zt_pool", "lhb"], date(2026, 1, 5), triggered_by="scheduler", skip_if_succeeded=True)
+    assert created
+    again, created = TaskQueueService.enqueue_sync_daily_data(db, ["lhb", "zt_pool"], date(2026, 1, 5), triggered_by="scheduler", skip_if_succeeded=True)
+    assert not created and again.id == first.id
+
+    # 已成功的定时任务不再入队，手动触发可以重新执行
+    first.status = TaskStatus.SUCCESS
+    db.commit()
+    assert not TaskQueueService.enqueue_sync_daily_data(db, ["lhb", "zt_pool"], date(2026, 1, 5), skip_if_succeeded=True)[1]
+    assert TaskQueueService.enqueue_sync_daily_data(db, ["lhb", "zt_pool"], date(2026, 1, 5))[1]
+
+
+def test_claim_order_and_lease_expiry(session_factory):
+    db = session_factory()
+    a, _ = TaskQueueService.enqueue_backfill(db, 1)
+    b, _ = TaskQueueService.enqueue_backfill(db, 2)
+
+    assert TaskQueueService.claim(db, "w1", lease_seconds=60).id == a.id
+    assert TaskQueueService.claim(db, "w2", lease_seconds=60).id == b.id
+    assert TaskQueueService.claim(db, "w3") is None
+
+    # w1 退出，租约过期后被 w3 接管，w1 续约失败
+    db.query(TaskExecution).filter_by(id=a.id).update({"lease_expires_at": datetime.now() - timedelta(seconds=1)})
+    db.commit()
+    reclaimed = TaskQueueService.claim(db, "w3", lease_seconds=60)
+    assert reclaimed.id == a.id and reclaimed.attempts == 2 and reclaimed.worker_id == "w3"
+    assert not TaskQueueService.heartbeat(db, a.id, "w1")
+    assert TaskQueueService.heartbeat(db, a.id, "w3")
+
+    # 超过最大领取次数后标记失败
+    db.query(TaskExecution).filter_by(id=a.id).update({"lease_expires_at": datetime.now() - timedelta(seconds=1), "attempts": 3})
+    db.commit()
+    assert TaskQueueService.claim(db, "w4") is None
+    db.expire_all()
+    assert db.get(TaskExecution, a.id).status == TaskStatus.FAILED
+
+
+def test_worker_runs_handler_and_records_result(session_factory):
+    db = session_factory()
+    ok, _ = TaskQueueService.enqueue_backfill(db, 7)
+    bad, _ = TaskQueueService.enqueue_backfill(db, 8)
+    seen = []
+
+    def handler(execution, kwargs, cancel):
+        seen.append(kwargs["job_id"])
+        if kwargs["job_id"] == 8:
+            raise RuntimeError("接口异常")
+        return True, {"completed_units": 3}
+
+    worker = SyncWorker("w1", lease_seconds=30, poll_seconds=0, session_factory=session_factory, handlers={"backfill": handler})
+    assert worker.run_once() and worker.run_once()
+    assert not worker.run_once()
+    assert seen == [7, 8]
+
+    db.expire_all()
+    done = db.get(TaskExecution, ok.id)
+    assert done.status == TaskStatus.SUCCESS and done.result == {"completed_units": 3} and done.lease_expires_at is None
+    failed = db.get(TaskExecution, bad.id)
+    assert failed.status == TaskStatus.FAILED and "接口异常" in failed.error_message
+    assert TaskQueueService.get_queue_stats(db)["pending"] == 0
+
+
+def test_worker_stops_and_skips_finish_when_lease_lost(session_factory):
+    db = session_factory()
+    execution, _ = TaskQueueService.enqueue_backfill(db, 7)
+    cancelled = []
+
+    def handler(execution, kwargs, cancel):
+        # 模拟租约过期后被其它工作进程接管
+        other = session_factory()
+        other.query(TaskExecution).filter_by(id=execution.id).update({"worker_id": "w2"})
+        other.commit()
+        other.close()
+        cancelled.append(cancel.wait(5))
+        return True, {"completed_units": 1}
+
+    worker = SyncWorker("w1", lease_seconds=3, poll_seconds=0, session_factory=session_factory, handlers={"backfill": handler})
+    assert worker.run_once()
+    assert cancelled == [True]
+
+    db.expire_all()
+    taken = db.get(TaskExecution, execution.id)
+    assert taken.status == TaskStatus.RUNNING and taken.worker_id == "w2" and taken.result is None
@@ -0,0 +1,89 @@
+"""
+测试交易日历内存索引
+"""
+from datetime import date
+
+import pandas as pd
+import pytest
+from sqlalchemy import create_engine
+from sqlalchemy.orm import sessionmaker
+
+from app.models.trade_date import TradeDate
+from app.services.trade_calendar_service import TradeCalendarService
+from app.utils.trade_calendar import TradeCalendar
+
+
+# 2026年春节前后：2月13日(周五)之后休市到2月24日(周二)
+DATES = [
+    date(2026, 2, 9), date(2026, 2, 10), date(2026, 2, 11), date(2026, 2, 12), date(2026, 2, 13),
+    date(2026, 2, 24), date(2026, 2, 25), date(2026, 2, 26), date(2026, 2, 27),
+]
+
+
+@pytest.fixture
+def calendar():
+    return TradeCalendar(DATES)
+
+
+def test_is_trading_day(calendar):
+    assert calendar.is_trading_day(date(2026, 2, 13))
+    # 节假日中的工作日
+    assert not calendar.is_trading_day(date(2026, 2, 16))
+    assert not calendar.is_trading_day(date(2026, 2, 21))
+    # 日历范围外按工作日近似
+    assert calendar.is_trading_day(date(2026, 3, 2))
+    assert not calendar.is_trading_day(date(2026, 3, 1))
+
+
+def test_previous_trading_days_skips_holiday(calendar):
+    assert calendar.previous_trading_days(date(2026, 2, 25), 3) == [
+        date(2026, 2, 25), date(2026, 2, 24), date(2026, 2, 13),
+    ]
+    assert calendar.latest_trading_day(date(2026, 2, 22)) == date(2026, 2, 13)
+    assert calendar.previous_trading_day(date(2026, 2, 24)) == date(2026, 2, 13)
+    # 跨越日历两端时用工作日补足
+    assert calendar.previous_trading_days(date(2026, 3, 3), 3) == [
+        date(2026, 3, 3), date(2026, 3, 2), date(2026, 2, 27),
+    ]
+    assert calendar.previous_trading_days(date(2026, 2, 10), 3) == [
+        date(2026, 2, 10), date(2026, 2, 9), date(2026, 2, 6),
+    ]
+
+
+def test_trading_days_between(calendar):
+    assert calendar.trading_days_between(date(2026, 2, 12), date(2026, 2, 24)) == [
+        date(2026, 2, 12), date(2026, 2, 13), date(2026, 2, 24),
+    ]
+    assert calendar.trading_days_between(date(2026, 2, 14), date(2026, 2, 23)) == []
+    assert calendar.trading_days_between(date(2026, 2, 27), date(2026, 3, 2)) == [
+        date(2026, 2, 27), date(2026, 3, 2),
+    ]
+
+
+def test_empty_calendar_falls_back_to_weekdays():
+    calendar = TradeCalendar([])
+    assert calendar.previous_trading_days(date(2026, 2, 16), 2) == [date(2026, 2, 16), date(2026, 2, 13)]
+
+
+def test_sync_trade_calendar_persists_and_reloads(monkeypatch):
+    engine = create_engine("sqlite://")
+    TradeDate.__table__.create(engine)
+    db = sessionmaker(bind=engine)()
+
+    import app.services.trade_calendar_service as module
+    import app.utils.trade_calendar as calendar_module
+
+    df = pd.DataFrame({"trade_date": [d.isoformat() for d in DATES]})
+    monkeypatch.setattr(module, "safe_akshare_call", lambda func, *args, **kwargs: df)
+    monkeypatch.setattr(calendar_module, "_calendar", TradeCalendar())
+
+    result = TradeCalendarService.sync_trade_calendar(db)
+    assert result.success and result.inserted == len(DATES)
+    # 重复同步不产生新行
+    assert TradeCalendarService.sync_trade_calendar(db).inserted == 0
+    assert db.query(TradeDate).count() == len(DATES)
+
+    calendar = calendar_module.get_trade_calendar()
+    assert calendar.first_date == DATES[0] and calendar.last_date == DATES[-1]
+    assert not calendar.is_trading_day(date(2026, 2, 17))
+    db.close()
@@ -1,7 +1,33 @@
 import apiClient from './client'
-import { indexApi } from './index'
-import { ztPoolApi } from './ztPool'
-import { sectorApi } from './sector'
+import type { IndexItem } from './index'
+
+export interface DashboardConceptItem {
+  concept: string
+  net_amount?: number
+  index_change_percent?: number
+}
+
+export interface DashboardLhbItem {
+  stock_code: string
+  stock_name: string
+  net_buy_amount?: number
+  change_percent?: number
+}
+
+// 后端 /dashboard/{date} 返回的每日概览（同步完成后预先计算）
+export interface DashboardSnapshot {
+  date: string
+  indices: IndexItem[]
+  zt_count: number
+  zt_down_count: number
+  sector_rise_count: number
+  sector_fall_count: number
+  sector_total_count: number
+  top_concepts: DashboardConceptItem[]
+  lhb_count: number
+  lhb_net_buy_amount?: number
+  lhb_top: DashboardLhbItem[]
+}
 
 export interface DashboardStats {
   indexData: any[]
@@ -12,61 +38,45 @@ export interface DashboardStats {
     fallCount: number
     totalCount: number
   }
+  topConcepts: DashboardConceptItem[]
+  lhbCount: number
+  lhbNetBuyAmount?: number
+  lhbTop: DashboardLhbItem[]
 }
 
 export const dashboardApi = {
   getStats: async (date: string): Promise<DashboardStats> => {
     try {
       console.log('开始获取仪表盘数据，日期:', date)
-      
-      // 使用 Promise.allSettled 来避免一个失败导致全部失败
-      const results = await Promise.allSettled([
-        indexApi.getList({ date }).catch(err => {
-          console.warn('获取指数数据失败:', err)
-          return []
-        }),
-        ztPoolApi.getList({ start_date: date, end_date: date, page: 1, page_size: 1 }).catch(err => {
-          console.warn('获取涨停池数据失败:', err)
-          return { total: 0, items: [] }
-        }),
-        ztPoolApi.getDownList({ date, page: 1, page_size: 1 }).catch(err => {
-          console.warn('获取跌停池数据失败:', err)
-          return { total: 0, items: [] }
-        }),
-        sectorApi.getList({ date }).catch(err => {
-          console.warn('获取板块数据失败:', err)
-          return []
-        }),
-      ])
 
-      // 提取结果
-      const indexData = results[0].status === 'fulfilled' ? results[0].value : []
-      const ztPoolData = results[1].status === 'fulfilled' ? results[1].value : { total: 0, items: [] }
-      const ztPoolDownData = results[2].status === 'fulfilled' ? results[2].value : { total: 0, items: [] }
-      const sectorData = results[3].status === 'fulfilled' ? results[3].value : []
+      // 一次请求获取该日概览（指数、涨跌停家数、板块涨跌家数、概念净流入、龙虎榜）
+      const snapshot: DashboardSnapshot = await apiClient.get(`/dashboard/${date}`)
 
-      // 统计上涨板块数量（change_percent > 0）和下跌板块数量（change_percent < 0）
-      const sectorStats = {
-        riseCount: sectorData.filter((item: any) => (item.change_percent || 0) > 0).length,
-        fallCount: sectorData.filter((item: any) => (item.change_percent || 0) < 0).length,
-        totalCount: sectorData.length,
+      const stats = {
+        indexData: Array.isArray(snapshot.indices) ? snapshot.indices : [],
+        ztPoolCount: snapshot.zt_count || 0,
+        ztPoolDownCount: snapshot.zt_down_count || 0,
+        sectorStats: {
+          riseCount: snapshot.sector_rise_count || 0,
+          fallCount: snapshot.sector_fall_count || 0,
+          totalCount: snapshot.sector_total_count || 0,
+        },
+        topConcepts: snapshot.top_concepts || [],
+        lhbCount: snapshot.lhb_count || 0,
+        lhbNetBuyAmount: snapshot.lhb_net_buy_amount,
+        lhbTop: snapshot.lhb_top || [],
       }
 
       console.log('仪表盘数据获取完成:', {
-        indexCount: indexData.length,
-        ztPoolCount: ztPoolData.total,
-        ztPoolDownCount: ztPoolDownData.total,
-        sectorCount: sectorData.length,
-        sectorStats,
+        indexCount: stats.indexData.length,
+        ztPoolCount: stats.ztPoolCount,
+        ztPoolDownCount: stats.ztPoolDownCount,
+        sectorStats: stats.sectorStats,
       })
 
-      return {
-        indexData: Array.isArray(indexData) ? indexData : [],
-        ztPoolCount: ztPoolData.total || 0,
-        ztPoolDownCount: ztPoolDownData.total || 0,
-        sectorStats,
-      }
+      return stats
     } catch (error) {
+      // 非交易日或尚未同步时后端返回 404
       console.error('获取仪表盘数据失败:', error)
       // 返回默认值而不是抛出错误
       return {
@@ -78,8 +88,10 @@ export const dashboardApi = {
           fallCount: 0,
           totalCount: 0,
         },
+        topConcepts: [],
+        lhbCount: 0,
+        lhbTop: [],
       }
     }
   },
 }
-
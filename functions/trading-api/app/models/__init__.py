@@ -13,6 +13,7 @@ from app.models.fund_flow import StockFundFlow, IndustryFundFlow, ConceptFundFlo
 from app.models.zt_pool import ZtPool, ZtPoolDown
 from app.models.trading_calendar import TradingCalendar
 from app.models.task_execution import TaskExecution, TaskStatus
+from app.models.trade_date import TradeDate
 
 __all__ = [
     "LhbDetail",
@@ -29,5 +30,6 @@ __all__ = [
     "TradingCalendar",
     "TaskExecution",
     "TaskStatus",
+    "TradeDate",
 ]
 
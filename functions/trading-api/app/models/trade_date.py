@@ -0,0 +1,18 @@
+"""
+交易所交易日数据模型
+"""
+from sqlalchemy import Column, Date, UniqueConstraint
+
+from app.database.base import BaseModel
+
+
+class TradeDate(BaseModel):
+    """交易所交易日表（沪深A股，来源：新浪交易日历）"""
+    __tablename__ = "trade_date"
+
+    date = Column(Date, nullable=False, comment="交易日")
+
+    __table_args__ = (
+        UniqueConstraint('date', name='uq_trade_date_date'),
+        {"comment": "交易所交易日表"},
+    )
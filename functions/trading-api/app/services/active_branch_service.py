@@ -335,8 +335,12 @@ class ActiveBranchService:
             if df is None or df.empty:
                 print(f"目标日期 {target_date} 无数据，尝试查找最近有数据的日期...")
                 actual_date = None
-                for i in range(1, 8):
-                    check_date = target_date - timedelta(days=i)
+                from app.utils.trade_calendar import get_trade_calendar
+                # 只尝试最近7天内的交易日，跳过周末和节假日
+                recent_days = get_trade_calendar(db).trading_days_between(
+                    target_date - timedelta(days=7), target_date - timedelta(days=1)
+                )
+                for check_date in reversed(recent_days):
                     check_date_str = check_date.strftime("%Y%m%d")
                     print(f"  尝试日期: {check_date} ({check_date_str})")
                     df = safe_akshare_call(ak.stock_lhb_hyyyb_em, start_date=check_date_str, end_date=check_date_str)
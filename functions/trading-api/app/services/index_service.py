@@ -35,19 +35,17 @@ class IndexService:
         # 批量查询前一交易日数据以提高效率
         if indices:
             index_codes = [idx.index_code for idx in indices]
-            # 查找前一个交易日的数据（最多往前找5个交易日）
+            # 查找前一个交易日的数据（最多往前找5个交易日，一次查询）
+            from app.utils.trade_calendar import get_trade_calendar
+            prev_dates = get_trade_calendar(db).previous_trading_days(target_date - timedelta(days=1), 5)
+            prev_indices = db.query(IndexHistory).filter(
+                IndexHistory.index_code.in_(index_codes),
+                IndexHistory.date.in_(prev_dates)
+            ).order_by(IndexHistory.date.desc()).all()
             prev_indices_map = {}
-            for i in range(1, 6):
-                check_date = target_date - timedelta(days=i)
-                prev_indices = db.query(IndexHistory).filter(
-                    IndexHistory.index_code.in_(index_codes),
-                    IndexHistory.date == check_date
-                ).all()
-                for prev_idx in prev_indices:
-                    if prev_idx.index_code not in prev_indices_map and prev_idx.volume:
-                        prev_indices_map[prev_idx.index_code] = prev_idx
-                if len(prev_indices_map) == len(index_codes):
-                    break  # 所有指数都找到了前一交易日数据
+            for prev_idx in prev_indices:
+                if prev_idx.index_code not in prev_indices_map and prev_idx.volume:
+                    prev_indices_map[prev_idx.index_code] = prev_idx
         
         # 计算成交量变化比例
         for index in indices:
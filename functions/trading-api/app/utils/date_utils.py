@@ -29,17 +29,8 @@ def get_today() -> date:
 
 def get_trading_date() -> date:
     """
-    获取交易日（如果是周末，返回最近的交易日）
-    简化版本，实际应该考虑节假日
+    获取交易日（如果今天不是交易日，返回最近的交易日）
+    按交易日历处理周末和节假日
     """
-    today = date.today()
-    # 如果是周六，返回周五
-    if today.weekday() == 5:
-        from datetime import timedelta
-        return today - timedelta(days=1)
-    # 如果是周日，返回周五
-    elif today.weekday() == 6:
-        from datetime import timedelta
-        return today - timedelta(days=2)
-    return today
-
+    from app.utils.trade_calendar import get_trade_calendar
+    return get_trade_calendar().latest_trading_day(date.today())